@@ -1,9 +1,19 @@
-import json
 from app.graph.state import AcademicState
 from langchain_core.messages import HumanMessage
 from app.services.llm_service import LLMService
-from app.agents.base import ReActAgent
-from typing import Dict
+from app.agents.base import ReActAgent, parse_sections
+from app.prompts.prompts import ADVICE_LIBRARY_BLOCK, ADVISOR_FUSED_PROMPT, ANALYSIS_SECTION, GUIDANCE_SECTION
+from app.services.advice_library import AdviceLibrary, advice_library_settings
+from app.utils.context_packer import ContextPacker, Section, pack_profile
+from app.utils.logger import get_logger
+from typing import Dict, List, Optional, Tuple
+import time
+
+logger = get_logger(__name__)
+
+# A failed advice-library load is retried after this long rather than given up on
+# for the life of the process; until then guidance is written from scratch.
+LIBRARY_RETRY_SECONDS = 60.0
 
 
 class AdvisorAgent(ReActAgent):
@@ -12,13 +22,73 @@ class AdvisorAgent(ReActAgent):
     # *** CORRECTED LOGIC ***
     def __init__(self, llm_service: LLMService):
         super().__init__(llm_service)
+        # fused:     one call returns the situation analysis and the guidance as two sections
+        # two_stage: analyze_situation runs as its own node alongside the profile analyzer
+        self.mode = llm_service.config.get('advisor', {}).get('mode', 'fused')
+        # Vetted snippets the LLM personalizes and stitches; loaded (and embedded) on first use
+        self.library_settings = advice_library_settings(llm_service.config)
+        self.library: Optional[AdviceLibrary] = None
+        self._library_failed_at: Optional[float] = None
+        self.packer = ContextPacker.for_node("advisor", llm_service.config)
+
+    def pack_context(self, state: AcademicState) -> Dict[str, str]:
+        """The request and the compact profile, fitted to the advisor's token budget."""
+        return self.packer.pack([
+            Section("request", state['atlas_message'][-1].content, priority=0),
+            Section("profile", pack_profile(state["profile"]), priority=1),
+        ])
+
+    async def library_advice(self, state: AcademicState) -> Tuple[str, List[str]]:
+        """The prompt block of advice-library snippets matching the student and request, and their ids."""
+        if not self.library_settings["enabled"]:
+            return "", []
+        if self.library is None:
+            failed_at = self._library_failed_at
+            if failed_at is not None and time.monotonic() - failed_at < LIBRARY_RETRY_SECONDS:
+                return "", []
+            try:
+                self.library = await AdviceLibrary.aload(
+                    self.library_settings["path"], self.llm_service.get_embedding_model(), self.library_settings
+                )
+                self._library_failed_at = None
+            except Exception as e:
+                self._library_failed_at = time.monotonic()
+                logger.warning("Advice library unavailable; writing guidance from scratch",
+                               extra={"error": str(e), "retry_seconds": LIBRARY_RETRY_SECONDS})
+                return "", []
+        try:
+            situation = await self.llm_service.aget_embedding(state['atlas_message'][-1].content)
+        except Exception as e:
+            logger.warning("Situation embedding failed; writing guidance from scratch", extra={"error": str(e)})
+            return "", []
+        snippets = self.library.search(state["profile"], situation)
+        if not snippets:
+            return "", []
+        block = ADVICE_LIBRARY_BLOCK.format(
+            snippets="\n".join(snippet.to_prompt() for snippet in snippets),
+            max_words=self.library_settings["max_words"],
+        )
+        return block, [snippet.id for snippet in snippets]
+
+    async def run(self, state: AcademicState) -> Dict:
+        """The graph node: one fused call, or guidance on the (already computed) analysis."""
+        if self.mode == "fused":
+            return await self.advise_fused(state)
+        if "situation_analysis" in state["results"]:
+            return await self.generate_guidance(state)
+        # Two-stage outside the graph: nothing ran the analysis yet, so run both steps here
+        analysis = await self.analyze_situation(state)
+        guidance = await self.generate_guidance({**state, "results": {**state["results"], **analysis["results"]}})
+        return {"results": {**analysis["results"], **guidance["results"]}}
 
     async def analyze_situation(self, state: AcademicState) -> Dict:
-        profile = state["profile"]
+        logger.debug("Executing Advisor: Situation Analysis")
+        packed = self.pack_context(state)
         prompt = f"""
         Analyze the student's situation based on their profile and current request to determine the best guidance approach.
-        - Profile: {json.dumps(profile)}
-        - Request: {state['atlas_message'][-1].content}
+        - Profile:
+        {packed["profile"]}
+        - Request: {packed["request"]}
         Analyze: Current challenges, learning style compatibility, time/stress management needs.
         """
         # messages = [{"role": "system", "content": prompt}]
@@ -29,10 +99,14 @@ class AdvisorAgent(ReActAgent):
         return {"results": {"situation_analysis": {"analysis": response_obj.content}}}
 
     async def generate_guidance(self, state: AcademicState) -> Dict:
+        logger.debug("Executing Advisor: Guidance Generation")
         analysis = state["results"].get("situation_analysis", {})
+        library_block, library_ids = await self.library_advice(state)
+        packed = self.packer.pack([Section("analysis", analysis.get('analysis', 'N/A'))])
         prompt = f"""
         Generate personalized academic guidance based on the analysis.
-        ANALYSIS: {analysis.get('analysis', 'N/A')}
+        ANALYSIS: {packed["analysis"]}
+        {library_block}
         FORMAT: Provide actionable steps for schedule optimization, energy management, support strategies, and emergency protocols.
         """
         # messages = [{"role": "system", "content": prompt}]
@@ -40,7 +114,20 @@ class AdvisorAgent(ReActAgent):
 
         llm = self.llm_service.get_llm()
         response_obj = await llm.ainvoke(messages)
-        return {"results": {"advisor_output": {"advice": response_obj.content}}}
+        return {"results": {"advisor_output": {"advice": response_obj.content, "library": library_ids}}}
+
+    async def advise_fused(self, state: AcademicState) -> Dict:
+        logger.debug("Executing Advisor: Fused Analysis and Guidance")
+        library_block, library_ids = await self.library_advice(state)
+        packed = self.pack_context(state)
+        prompt = ADVISOR_FUSED_PROMPT.format(profile=packed["profile"], request=packed["request"], library=library_block)
+        llm = self.llm_service.get_llm()
+        response_obj = await llm.ainvoke([HumanMessage(content=prompt)])
+        sections = parse_sections(response_obj.content, [ANALYSIS_SECTION, GUIDANCE_SECTION])
+        return {"results": {
+            "situation_analysis": {"analysis": sections[ANALYSIS_SECTION]},
+            "advisor_output": {"advice": sections[GUIDANCE_SECTION], "library": library_ids},
+        }}
 
 
 # ==============================================================================
@@ -136,13 +223,15 @@ if __name__ == "__main__":
         # Test Advisor Agent
         print("\n[6. Testing Advisor Agent...]")
         advisor = AdvisorAgent(llm_service)
-        style_analysis = advisor.analyze_situation(mock_state)
-        print("style..........")
-        advice_res = await advisor.generate_guidance(mock_state)
-        print(
-            "   ↳ Advice Output:",
-            advice_res["results"]["advisor_output"]["advice"][:200] + "...",
-        )
+        for mode in ("two_stage", "fused"):
+            advisor.mode = mode
+            advice_res = await advisor.run({**mock_state, "results": {}})
+            print(
+                f"   ↳ Advice Output ({mode}):",
+                advice_res["results"]["advisor_output"]["advice"][:200] + "...",
+            )
+            assert set(advice_res["results"]) == {"situation_analysis", "advisor_output"}
+            print("   ↳ Library snippets:", advice_res["results"]["advisor_output"]["library"])
         print("\n✅ Advisor agent test passed!")
 
         print("\n✅ All agent tests completed successfully!")
@@ -1,3 +1,6 @@
+import re
+from typing import Dict, List
+
 from app.services.llm_service import LLMService
 
 class ReActAgent:
@@ -5,4 +8,25 @@ class ReActAgent:
     Base class for ReACT-based agents.
     """
     def __init__(self, llm_service: LLMService):
-        self.llm_service = llm_service
\ No newline at end of file
+        self.llm_service = llm_service
+
+
+def parse_sections(text: str, headings: List[str]) -> Dict[str, str]:
+    """
+    Splits a fused response into its headed sections (`### HEADING`,
+    `**HEADING**` or `HEADING:` on its own line, any case). If the last
+    (final output) section is missing, the whole response is used for it,
+    so a model that ignores the format still produces an answer.
+    """
+    pattern = re.compile(
+        r"^[ \t]*(?:#+[ \t]*)?\**[ \t]*(" + "|".join(map(re.escape, headings)) + r")[ \t]*\**[ \t]*:?[ \t]*\**[ \t]*$",
+        re.IGNORECASE | re.MULTILINE,
+    )
+    matches = list(pattern.finditer(text))
+    sections = {heading: "" for heading in headings}
+    for match, following in zip(matches, matches[1:] + [None]):
+        heading = next(h for h in headings if h.lower() == match.group(1).lower())
+        sections[heading] = text[match.end():following.start() if following else len(text)].strip()
+    if not sections[headings[-1]]:
+        sections[headings[-1]] = text.strip()
+    return sections
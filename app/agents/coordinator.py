@@ -1,9 +1,12 @@
-import json
 from typing import Dict
 from langchain_core.messages import SystemMessage
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
 from app.prompts.prompts import COORDINATOR_PROMPT
+from app.utils.context_packer import ContextPacker, Section, render_fields
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def parse_coordinator_response(response: str) -> dict:
     """Parses the coordinator's text response to determine the execution plan."""
@@ -18,7 +21,7 @@ async def coordinator_agent(state: AcademicState, llm_service: LLMService) -> di
     """
     The brain of the operation. Decides which specialized agents are needed.
     """
-    print("--- (Node) Executing Coordinator Agent ---")
+    logger.debug("Executing Coordinator Agent")
     
     profile = state.get("profile", {})
     context = {
@@ -28,7 +31,11 @@ async def coordinator_agent(state: AcademicState, llm_service: LLMService) -> di
     }
     query = state["atlas_message"][-1].content
 
-    prompt = COORDINATOR_PROMPT.format(request=query, context=json.dumps(context, indent=2))
+    packed = ContextPacker.for_node("coordinator", llm_service.config).pack([
+        Section("request", query, priority=0),
+        Section("context", "\n".join(render_fields(context)), priority=1),
+    ])
+    prompt = COORDINATOR_PROMPT.format(request=packed["request"], context=packed["context"])
     
     # Get the LLM instance from the service
     llm = llm_service.get_llm()
@@ -40,7 +47,7 @@ async def coordinator_agent(state: AcademicState, llm_service: LLMService) -> di
     analysis = parse_coordinator_response(response_content)
     analysis['reasoning'] = response_content
     
-    print(f"   ↳ Coordinator decided on agents: {analysis['required_agents']}")
+    logger.info("Coordinator decided on agents", extra={"required_agents": analysis['required_agents']})
     return {"results": {"coordinator_analysis": analysis}}
 
 
@@ -1,9 +1,20 @@
-import json
+import hashlib
 from langchain_core.messages import HumanMessage
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
-from app.agents.base import ReActAgent
-from typing import Dict
+from app.agents.base import ReActAgent, parse_sections
+from app.prompts.prompts import ANALYSIS_SECTION, NOTEWRITER_FUSED_PROMPT, STUDY_GUIDE_SECTION
+from app.services.artifact_store import artifact_digest, artifact_store_settings, open_artifact_store
+from app.services.lexical_index import tokenize
+from app.services.summarizer import MapReduceSummarizer, summarization_settings
+from app.utils.context_packer import ContextPacker, Section, canonicalize, render_inline
+from app.utils.logger import get_logger
+from typing import Dict, Optional, Tuple
+
+logger = get_logger(__name__)
+
+# Part of every shared study guide's key: bump it when the note prompts change so stored guides are regenerated.
+NOTES_PROMPT_VERSION = 2
 
 
 class NoteWriterAgent(ReActAgent):
@@ -12,16 +23,92 @@ class NoteWriterAgent(ReActAgent):
     # *** CORRECTED LOGIC ***
     def __init__(self, llm_service: LLMService):
         super().__init__(llm_service)
+        # Long source material (whole chapters) is map-reduced; chunk summaries are cached across requests
+        self.summarizer = MapReduceSummarizer(summarization_settings(llm_service.config))
+        # fused:     one call returns the learning-style analysis and the notes as two sections
+        # two_stage: analyze_learning_style runs as its own node alongside the profile analyzer
+        self.mode = llm_service.config.get('notewriter', {}).get('mode', 'fused')
+        # Study guides shared by students with the same course, topic and primary learning style
+        self.store = open_artifact_store(artifact_store_settings(llm_service.config))
+        self.packer = ContextPacker.for_node("notewriter", llm_service.config)
 
-    async def analyze_learning_style(self, state: AcademicState) -> Dict:
-        profile = state["profile"]
-        learning_style = profile.get("learning_preferences", {}).get(
-            "learning_style", {}
+    @staticmethod
+    def learning_style(state: AcademicState) -> str:
+        """The profile's learning style on one line, e.g. `primary=visual, secondary=kinesthetic`."""
+        style = canonicalize(state["profile"].get("learning_preferences", {}).get("learning_style", {}))
+        return render_inline(style) if isinstance(style, dict) and style else "unknown"
+
+    def artifact_key(self, state: AcademicState) -> Tuple[Tuple, AcademicState]:
+        """
+        The shared-guide key (course, topic fingerprint, primary learning
+        style, prompt version), and the state to generate the guide from:
+        only the key's inputs (the request, the source material and the
+        primary style), so the stored guide holds nothing specific to the
+        student who happened to ask first. The only result carried over is
+        a learning analysis made from those same inputs (see
+        `learning_analysis_node`).
+        """
+        profile = state.get("profile") or {}
+        style = profile.get("learning_preferences", {}).get("learning_style", {}).get("primary", "")
+        request = state['atlas_message'][-1].content
+        courses = [c.get("name", "") for c in profile.get("academic_info", {}).get("current_courses", [])]
+        course = next((c for c in courses if c and c.lower() in request.lower()), "")
+        # Word order, case and filler words don't change the topic; attached material does
+        topic = " ".join(sorted(set(tokenize(request)))) + "\0" + (state.get("source_material") or "")
+        fingerprint = hashlib.blake2b(topic.encode("utf-8"), digest_size=16).hexdigest()
+        key = ("notes", course, fingerprint, style, f"{self.mode}-v{NOTES_PROMPT_VERSION}")
+        analysis = (state.get("results") or {}).get("learning_analysis") or {}
+        shared = AcademicState(
+            atlas_message=state['atlas_message'][-1:],
+            source_material=state.get("source_material") or "",
+            profile={"learning_preferences": {"learning_style": {"primary": style}}},
+            calendar={}, tasks={},
+            results={"learning_analysis": analysis} if analysis.get("artifact") == artifact_digest(key) else {},
         )
+        return key, shared
+
+    async def run(self, state: AcademicState) -> Dict:
+        """The graph node: the shared guide when one exists (or is being generated), else a new one."""
+        if self.store is None:
+            return await self.write(state)
+        key, shared_state = self.artifact_key(state)
+        output, status = await self.store.get_or_create(key, lambda: self.write(shared_state))
+        logger.info("Study guide", extra={"artifact": status})
+        results = dict(output["results"])
+        results["notewriter_output"] = {**results["notewriter_output"], "artifact": status}
+        return {"results": results}
+
+    async def write(self, state: AcademicState) -> Dict:
+        """One fused call, or note generation on the (already computed) analysis."""
+        if self.mode == "fused":
+            return await self.write_fused(state)
+        if "learning_analysis" in state["results"]:
+            return await self.generate_notes(state)
+        # Two-stage outside the graph: nothing ran the analysis yet, so run both steps here
+        analysis = await self.analyze_learning_style(state)
+        notes = await self.generate_notes({**state, "results": {**state["results"], **analysis["results"]}})
+        return {"results": {**analysis["results"], **notes["results"]}}
+
+    async def learning_analysis_node(self, state: AcademicState) -> Dict:
+        """
+        The two-stage analysis node. With shared guides on, it analyzes the
+        guide's inputs rather than the student's full profile and tags the
+        result with the guide's digest, so the guide can be generated on it.
+        """
+        if self.store is None:
+            return await self.analyze_learning_style(state)
+        key, shared_state = self.artifact_key(state)
+        analysis = await self.analyze_learning_style(shared_state)
+        analysis["results"]["learning_analysis"]["artifact"] = artifact_digest(key)
+        return analysis
+
+    async def analyze_learning_style(self, state: AcademicState) -> Dict:
+        logger.debug("Executing NoteWriter: Learning Style Analysis")
+        packed = self.packer.pack([Section("request", state['atlas_message'][-1].content)])
         prompt = f"""
         Analyze content requirements based on the student's learning style and request.
-        - Learning Style: {json.dumps(learning_style)}
-        - Request: {state['atlas_message'][-1].content}
+        - Learning Style: {self.learning_style(state)}
+        - Request: {packed["request"]}
         Focus on: Key Topics (80/20 principle), Learning Style Adaptations, and Quick Reference Format.
         """
         # prompt = [{"role": "system", "content": prompt}]
@@ -31,20 +118,69 @@ class NoteWriterAgent(ReActAgent):
         response_obj = await llm.ainvoke(prompt)
         return {"results": {"learning_analysis": {"analysis": response_obj.content}}}
 
+    async def _source_material(self, state: AcademicState, llm) -> Tuple[str, Optional[Dict]]:
+        """The prompt section for `source_material`, map-reduced first when it is too long for one prompt."""
+        material, source_stats = state.get("source_material") or "", None
+        if material and self.summarizer.needs_map_reduce(material):
+            summary = await self.summarizer.asummarize(llm, material)
+            material, source_stats = summary.summary, summary.stats()
+        return material, source_stats
+
+    @staticmethod
+    def _material_section(material: str) -> str:
+        return f"SOURCE MATERIAL:\n{material}" if material else ""
+
     async def generate_notes(self, state: AcademicState) -> Dict:
+        logger.debug("Executing NoteWriter: Note Generation")
         analysis = state["results"].get("learning_analysis", {})
+        llm = self.llm_service.get_llm()
+        material, source_stats = await self._source_material(state, llm)
+        packed = self.packer.pack([
+            Section("request", state['atlas_message'][-1].content, priority=0),
+            Section("analysis", analysis.get('analysis', 'N/A'), priority=1),
+            Section("material", material, priority=2),
+        ])
+
         prompt = f"""
         Create concise, high-impact study materials based on the analysis.
-        ANALYSIS: {analysis.get('analysis', 'N/A')}
-        REQUEST: {state['atlas_message'][-1].content}
+        ANALYSIS: {packed["analysis"]}
+        REQUEST: {packed["request"]}
+        {self._material_section(packed["material"])}
         FORMAT: **INTENSIVE STUDY GUIDE** with weekly/daily focus areas and core concepts.
         """
         # prompt = [{"role": "system", "content": prompt}]
         prompt = [HumanMessage(content=prompt)]
 
-        llm = self.llm_service.get_llm()
         response_obj = await llm.ainvoke(prompt)
-        return {"results": {"notewriter_output": {"notes": response_obj.content}}}
+        output = {"notes": response_obj.content}
+        if source_stats:
+            output["source_material"] = source_stats
+        return {"results": {"notewriter_output": output}}
+
+    async def write_fused(self, state: AcademicState) -> Dict:
+        logger.debug("Executing NoteWriter: Fused Analysis and Notes")
+        llm = self.llm_service.get_llm()
+        material, source_stats = await self._source_material(state, llm)
+        packed = self.packer.pack([
+            Section("request", state['atlas_message'][-1].content, priority=0),
+            Section("material", material, priority=1),
+        ])
+
+        prompt = NOTEWRITER_FUSED_PROMPT.format(
+            learning_style=self.learning_style(state),
+            request=packed["request"],
+            material=self._material_section(packed["material"]),
+        )
+        response_obj = await llm.ainvoke([HumanMessage(content=prompt)])
+        sections = parse_sections(response_obj.content, [ANALYSIS_SECTION, STUDY_GUIDE_SECTION])
+
+        output = {"notes": sections[STUDY_GUIDE_SECTION]}
+        if source_stats:
+            output["source_material"] = source_stats
+        return {"results": {
+            "learning_analysis": {"analysis": sections[ANALYSIS_SECTION]},
+            "notewriter_output": output,
+        }}
 
 
 # ==============================================================================
@@ -140,6 +276,52 @@ if __name__ == "__main__":
         )
         print("\n✅ Notewriter agent test passed!")
 
+        print("\n[5b. Testing NoteWriter fused mode...]")
+        fused_res = await notewriter.write_fused(mock_state)
+        print("   ↳ Analysis:", fused_res["results"]["learning_analysis"]["analysis"][:100] or "(no section)")
+        print("   ↳ Notes:", fused_res["results"]["notewriter_output"]["notes"][:200] + "...")
+        assert fused_res["results"]["notewriter_output"]["notes"]
+        print("\n✅ Notewriter fused test passed!")
+
+        print("\n[5c. Testing shared study guides...]")
+        import tempfile
+        from app.services.artifact_store import ArtifactStore
+        with tempfile.TemporaryDirectory() as tmp:
+            notewriter.store = ArtifactStore(tmp)
+            classmate = {**mock_state, "profile": {**mock_state["profile"], "id": "student_456"},
+                         "atlas_message": [HumanMessage(content=user_request.upper())]}
+            runs = await asyncio.gather(notewriter.run(mock_state), notewriter.run(mock_state),
+                                        notewriter.run(classmate))
+            statuses = sorted(r["results"]["notewriter_output"]["artifact"] for r in runs)
+            print("   ↳ Concurrent identical requests:", statuses, notewriter.store.stats())
+            assert statuses == ["miss", "shared", "shared"]
+            # The shared guide is generated from the key's inputs only, not this student's results
+            personal = {**mock_state, "results": {"learning_analysis": {"analysis": "secondary=kinesthetic"},
+                                                  "profile_analysis": {"analysis": "personal"}}}
+            _, shared_state = notewriter.artifact_key(personal)
+            assert shared_state["results"] == {} and list(shared_state["profile"]) == ["learning_preferences"]
+            again = await notewriter.run(mock_state)
+            assert again["results"]["notewriter_output"]["artifact"] == "hit"
+            notewriter.store = None
+        print("\n✅ Notewriter shared guide test passed!")
+
+        # Test the long-input mode: a chapter too long for one prompt is map-reduced
+        print("\n[6. Testing NoteWriter long-input mode...]")
+        chapter = "\n\n".join(
+            f"Section {i}: working memory holds about {i % 7 + 3} items; rehearsal, chunking and "
+            f"retrieval practice number {i} move material into long-term memory." for i in range(400)
+        )
+        mock_state["source_material"] = chapter
+        long_res = await notewriter.generate_notes(mock_state)
+        stats = long_res["results"]["notewriter_output"]["source_material"]
+        print("   ↳ Source material:", stats)
+        assert stats["chunks"] > 1
+        mock_state["source_material"] = chapter.replace("Section 200:", "Section 200 (revised):")
+        rerun = await notewriter.generate_notes(mock_state)
+        print("   ↳ After editing one paragraph:", rerun["results"]["notewriter_output"]["source_material"])
+        assert rerun["results"]["notewriter_output"]["source_material"]["cached"] >= stats["chunks"] - 2
+        print("\n✅ Notewriter long-input test passed!")
+
     # --- Run the async test ---
     try:
         asyncio.run(main_test())
@@ -1,21 +1,21 @@
 # app/agents/planner.py
 
-import json
-from datetime import datetime
-from typing import Dict
+import asyncio
+from typing import Dict, Optional, Tuple
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from app.core.records import to_prompt_lines
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
-from app.prompts.prompts import PLANNER_PROMPT
+from app.prompts.prompts import PLANNER_NARRATE_PROMPT, PLANNER_PROMPT
+from app.services.prioritizer import TaskRanking, prioritize_tasks
+from app.services.schedule_solver import Schedule, solve_schedule
+from app.services.scheduling import analyze_calendar
+from app.utils.context_packer import ContextPacker, Section
+from app.utils.logger import get_logger
 from .base import ReActAgent
 
-def json_serializer(obj):
-    """JSON serializer for objects not serializable by default json code"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()  # Converts datetime to "YYYY-MM-DDTHH:MM:SS" format
-    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
-
+logger = get_logger(__name__)
 
 class PlannerAgent(ReActAgent):
     """Handles scheduling, time management, and study plan generation."""
@@ -24,56 +24,174 @@ class PlannerAgent(ReActAgent):
     # The super().__init__ handles setting self.llm_service = llm_service
     def __init__(self, llm_service: LLMService):
         super().__init__(llm_service)
+        # engine: free blocks/conflicts are computed locally, no LLM call
+        # llm:    the LLM reads the raw events (original behaviour)
+        # both:   the LLM comments on the computed availability
+        self.calendar_mode = llm_service.config.get('planner', {}).get('calendar_analysis', 'engine')
+        self.scheduling = llm_service.config.get('scheduling', {})
+        # Same modes for tasks: a local priority score, the LLM, or the LLM commenting on the ranking.
+        self.task_mode = llm_service.config.get('planner', {}).get('task_analysis', 'engine')
+        self.prioritization = llm_service.config.get('prioritization', {})
+        # solver: sessions are placed locally and the LLM only narrates them;
+        #         llm/both analyzer modes add the LLM's calendar/task commentary to the narration
+        # llm:    the LLM allocates time and writes the plan (original behaviour)
+        self.plan_mode = llm_service.config.get('planner', {}).get('plan_generation', 'solver')
+        self.solver_settings = llm_service.config.get('schedule_solver', {})
+        # Fits each prompt's context into the planner's token budget
+        self.packer = ContextPacker.for_node("planner", llm_service.config)
 
     async def calendar_analyzer(self, state: AcademicState) -> Dict:
-        print("--- (Node) Executing Planner: Calendar Analyzer ---")
+        logger.debug("Executing Planner: Calendar Analyzer", extra={"mode": self.calendar_mode})
         events = state["calendar"].get("events", [])
-        prompt = "Analyze these calendar events and identify available time blocks, energy impacts, and conflicts.\nEvents: {events}"
+
+        availability = None
+        if self.calendar_mode in ("engine", "both"):
+            availability = analyze_calendar(
+                events, state.get("profile"),
+                days=self.scheduling.get("lookahead_days", 7), settings=self.scheduling,
+            ).to_prompt()
+            if self.calendar_mode == "engine":
+                return {"results": {"calendar_analysis": {"analysis": availability, "availability": availability}}}
+
+        prompt = "Analyze these calendar events and identify available time blocks, energy impacts, and conflicts.\nEvents (UTC start-end | summary):\n{events}"
+        packed = self.packer.pack([
+            Section("availability", availability or "", priority=0),
+            Section("events", to_prompt_lines(events), priority=1),
+        ])
+        content = prompt.format(events=packed["events"])
+        if availability:
+            content += "\n\nComputed availability (exact; do not recompute it, focus on energy impacts):\n" + packed["availability"]
         
         # 1. Get the default LLM from the service
         llm = self.llm_service.get_llm()
         
         # 2. Use the standard .ainvoke() method with proper messages
-        response = await llm.ainvoke([
-            HumanMessage(content=prompt.format(events=json.dumps(events)))
-        ])
+        response = await llm.ainvoke([HumanMessage(content=content)])
         
-        return {"results": {"calendar_analysis": {"analysis": response.content}}}
+        return {"results": {"calendar_analysis": {"analysis": response.content, "availability": availability}}}
 
     async def task_analyzer(self, state: AcademicState) -> Dict:
-        print("--- (Node) Executing Planner: Task Analyzer ---")
+        logger.debug("Executing Planner: Task Analyzer", extra={"mode": self.task_mode})
         tasks = state["tasks"].get("tasks", [])
-        prompt = "Analyze this task list and create a priority structure considering urgency and complexity.\nTasks: {tasks}"
+
+        ranked, ranking_results = None, {}
+        if self.task_mode in ("engine", "both"):
+            ranking = prioritize_tasks(tasks, state.get("profile"), settings=self.prioritization)
+            ranked = ranking.to_prompt()
+            ranking_results = {"ranked": ranked, "ranked_tasks": ranking.ranked()}
+            if self.task_mode == "engine":
+                return {"results": {"task_analysis": {"analysis": ranked, **ranking_results}}}
+
+        prompt = "Analyze this task list and create a priority structure considering urgency and complexity.\nTasks (UTC due | status | title | notes):\n{tasks}"
+        packed = self.packer.pack([
+            Section("ranked", ranked or "", priority=0),
+            Section("tasks", to_prompt_lines(tasks), priority=1),
+        ])
+        content = prompt.format(tasks=packed["tasks"])
+        if ranked:
+            content += "\n\nComputed priority ranking (keep this order unless there is a clear reason not to):\n" + packed["ranked"]
         
         llm = self.llm_service.get_llm()
-        
-        tasks_json = json.dumps(tasks, default=json_serializer)
-        
-        # response = await llm.ainvoke([
-        #     HumanMessage(content=prompt.format(tasks=json.dumps(tasks)))
-        # ])
             
+        response = await llm.ainvoke([HumanMessage(content=content)])
+        
+        return {"results": {"task_analysis": {"analysis": response.content, **ranking_results}}}
+
+    def build_schedule(self, state: AcademicState, ranking: Optional[TaskRanking] = None) -> Schedule:
+        """Solves the study schedule from state; both inputs are local computations."""
+        profile = state.get("profile")
+        availability = analyze_calendar(
+            state["calendar"].get("events", []), profile,
+            days=self.scheduling.get("lookahead_days", 7), settings=self.scheduling,
+        )
+        if ranking is None:
+            ranking = prioritize_tasks(state["tasks"].get("tasks", []), profile, settings=self.prioritization)
+        return solve_schedule(availability, ranking, profile, self.solver_settings)
+
+    async def llm_analyses(self, state: AcademicState) -> Dict:
+        """
+        Runs, side by side, the analyzers whose mode involves the LLM (llm or
+        both). In solver mode their output is commentary for the narration;
+        the schedule itself is always solved from the local computations.
+        """
+        analyzers = {}
+        if self.calendar_mode != "engine":
+            analyzers["calendar_analysis"] = self.calendar_analyzer(state)
+        if self.task_mode != "engine":
+            analyzers["task_analysis"] = self.task_analyzer(state)
+        outputs = await asyncio.gather(*analyzers.values())
+        return {name: output["results"][name] for name, output in zip(analyzers, outputs)}
+
+    def narration_prompt(self, state: AcademicState, analyses: Optional[Dict] = None) -> Tuple[str, str]:
+        """The narration system prompt and the schedule skeleton it describes."""
+        # The ranking is computed here, in the node, so the schedule and the prompt share it.
+        ranking = prioritize_tasks(state["tasks"].get("tasks", []), state.get("profile"), settings=self.prioritization)
+        skeleton = self.build_schedule(state, ranking).to_prompt()
+        analyses = analyses or {}
+        notes = "".join(
+            f"- {label}: {analyses[name]['analysis']}\n"
+            for name, label in (("calendar_analysis", "Calendar Notes"), ("task_analysis", "Task Notes"))
+            if name in analyses
+        )
+        packed = self.packer.pack([
+            Section("schedule", skeleton, priority=0),
+            Section("task_analysis", ranking.to_prompt(), priority=1),
+            Section("profile_analysis", state.get("results", {}).get("profile_analysis", {}).get(
+                "analysis", "No profile analysis provided."), priority=2),
+            Section("analyst_notes", notes, priority=3),
+        ])
+        return PLANNER_NARRATE_PROMPT.format(**packed), skeleton
+
+    async def narrate_plan(self, state: AcademicState) -> Dict:
+        # Only the analyzers set to llm/both cost a call; in engine mode this is a no-op.
+        analyses = await self.llm_analyses(state)
+        prompt, skeleton = self.narration_prompt(state, analyses)
+        request = state["atlas_message"][-1].content
+
+        llm = self.llm_service.get_llm()
+
         response = await llm.ainvoke([
-            HumanMessage(content=prompt.format(tasks=tasks_json))
+            SystemMessage(content=prompt),
+            HumanMessage(content=request)
+        ], config={"configurable": {"temperature": 0.5}})
+
+        return {"results": {**analyses, "planner_output": {"plan": response.content, "schedule": skeleton}}}
+
+    async def plan_prompt(self, state: AcademicState) -> Tuple[str, Dict]:
+        """The plan-generation system prompt (plan_generation: llm) and the analyses it was built from."""
+        # The analyzers aren't graph nodes, so they run here, fresh for this request and side by side;
+        # in engine mode both are local computations, no LLM call.
+        calendar_output, task_output = await asyncio.gather(self.calendar_analyzer(state), self.task_analyzer(state))
+        calendar_results = calendar_output["results"]["calendar_analysis"]
+        task_results = task_output["results"]["task_analysis"]
+
+        profile_analysis = state.get("results", {}).get("profile_analysis", {}).get("analysis", "No profile analysis provided.")
+        calendar_analysis = calendar_results["analysis"]
+        availability = calendar_results.get("availability")
+        if availability and availability != calendar_analysis:
+            calendar_analysis = f"{calendar_analysis}\n\nComputed availability:\n{availability}"
+        task_analysis = task_results["analysis"]
+        ranked = task_results.get("ranked")
+        if ranked and ranked != task_analysis:
+            task_analysis = f"{task_analysis}\n\nPriority ranking:\n{ranked}"
+
+        # Calendar and tasks are what the plan is built from; the profile analysis only flavours it
+        packed = self.packer.pack([
+            Section("calendar_analysis", calendar_analysis, priority=1),
+            Section("task_analysis", task_analysis, priority=1),
+            Section("profile_analysis", profile_analysis, priority=2),
         ])
-        
-        return {"results": {"task_analysis": {"analysis": response.content}}}
+        prompt = PLANNER_PROMPT.format(**packed)
+        return prompt, {"calendar_analysis": calendar_results, "task_analysis": task_results}
 
     async def plan_generator(self, state: AcademicState) -> Dict:
-        print("--- (Node) Executing Planner: Plan Generator ---")
+        logger.debug("Executing Planner: Plan Generator", extra={"mode": self.plan_mode})
+        if self.plan_mode == "solver":
+            return await self.narrate_plan(state)
         
-        profile_analysis = state.get("results", {}).get("profile_analysis", {}).get("analysis", "No profile analysis provided.")
-        calendar_analysis = state.get("results", {}).get("calendar_analysis", {}).get("analysis", "No calendar analysis provided.")
-        task_analysis = state.get("results", {}).get("task_analysis", {}).get("analysis", "No task analysis provided.")
+        prompt, analyses = await self.plan_prompt(state)
         request = state["atlas_message"][-1].content
         
-        prompt = PLANNER_PROMPT.format(
-            profile_analysis=profile_analysis,
-            calendar_analysis=calendar_analysis,
-            task_analysis=task_analysis,
-            request=request
-        )
-        
         llm = self.llm_service.get_llm()
         
         response = await llm.ainvoke([
@@ -81,7 +199,7 @@ class PlannerAgent(ReActAgent):
             HumanMessage(content=request)
         ], config={"configurable": {"temperature": 0.5}}) # Pass config like this
         
-        return {"results": {"planner_output": {"plan": response.content}}}
+        return {"results": {**analyses, "planner_output": {"plan": response.content}}}
     
     
 
@@ -132,6 +250,21 @@ if __name__ == "__main__":
         )
         print("✅ Mock state created.")
 
+        # --- 2b. The ranking must reach the plan prompts without any analyzer node having run ---
+        print("\n[1b. Checking the planner prompts carry the task ranking...]")
+        check_planner = PlannerAgent(llm_service)
+        ranked = prioritize_tasks(mock_state["tasks"]["tasks"], mock_state["profile"],
+                                  settings=check_planner.prioritization).to_prompt()
+        narration, _ = check_planner.narration_prompt(mock_state)
+        assert ranked in narration and "See the schedule order." not in narration
+        # In solver mode, llm/both analyzer output reaches the narration as commentary.
+        narration, _ = check_planner.narration_prompt(mock_state, {"task_analysis": {"analysis": "Start with the midterm."}})
+        assert "- Task Notes: Start with the midterm." in narration and ranked in narration
+        if check_planner.calendar_mode == "engine" and check_planner.task_mode == "engine":
+            plan_prompt, _ = await check_planner.plan_prompt(mock_state)  # local only, no LLM call
+            assert ranked in plan_prompt and "No task analysis provided." not in plan_prompt
+        print("✅ Ranking present in both plan prompts.")
+
         # --- 3. Test the Coordinator Agent ---
         print("\n[2. Testing Coordinator Agent...]")
         
@@ -1,24 +1,30 @@
-import json
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
 from app.prompts.prompts import PROFILE_ANALYZER_PROMPT
+from app.utils.context_packer import ContextPacker, Section, pack_profile
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 async def profile_analyzer_agent(state: AcademicState, llm_service: LLMService) -> dict:
     """
     Analyzes the student profile to extract key learning patterns. 
     """
-    print("--- (Node) Executing Profile Analyzer Agent ---")
+    logger.debug("Executing Profile Analyzer Agent")
     profile = state.get("profile", {})
     
-    prompt = PROFILE_ANALYZER_PROMPT.format(profile=json.dumps(profile, indent=2))
+    packed = ContextPacker.for_node("profile_analyzer", llm_service.config).pack([
+        Section("profile", pack_profile(profile)),
+    ])
+    prompt = PROFILE_ANALYZER_PROMPT.format(profile=packed["profile"])
     
     # *** CORRECTED LOGIC ***
     llm = llm_service.get_llm()
-    # Using the original message structure from the reference code
+    # The profile goes out once, in the system prompt; the user turn only asks for the analysis
     messages = [
         {"role": "system", "content": prompt},
-        {"role": "user", "content": json.dumps(profile)}
+        {"role": "user", "content": "Analyze this student's profile."}
     ]
     response_obj = await llm.ainvoke(messages)
     
@@ -1,49 +1,67 @@
 # app/agents/senior.py
 
-from typing import Dict, Literal
-# Import the helper function for converting tools
-from langchain_core.utils.function_calling import convert_to_openai_tool
+from typing import Dict, Literal, Optional
 
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
-from app.tools.executor import tools
+from app.tools.executor import current_tool_usage
+from app.tools.registry import ToolRegistry, get_registry
 from app.prompts.prompts import SENIOR_AGENT_PROMPT
+from app.utils.context_packer import ContextPacker, Section, render_messages
+from app.utils.logger import get_logger
 from .base import ReActAgent
 
+logger = get_logger(__name__)
+
 class SeniorAgent(ReActAgent):
     """A conversational agent that can use tools."""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self, llm_service: LLMService, registry: Optional[ToolRegistry] = None):
         super().__init__(llm_service)
-        # We can specify the provider here to ensure we get the Groq model
-        self.llm = self.llm_service.get_llm(provider="groq")
+        # The provider is configurable so benchmarks can swap in the fake model
+        provider = self.llm_service.config.get('agents', {}).get('senior', {}).get('provider', 'groq')
+        self.llm = self.llm_service.get_llm(provider=provider)
+        # Schemas are converted and bound once here, not on every turn
+        self.registry = registry or get_registry(self.llm_service.config)
+        self.llm_with_tools = self.registry.bind(self.llm)
+        self.packer = ContextPacker.for_node("senior", self.llm_service.config)
 
     async def run(self, state: AcademicState) -> Dict:
         """Invokes the LLM with the current message history and tools."""
-        print("--- (Node) Executing Senior Agent ---")
+        logger.debug("Executing Senior Agent")
         
         messages = state.get("messages", [])
-        tools_as_dicts = [convert_to_openai_tool(t) for t in tools]
+        # The latest student message is the query; the history around it is rendered without it,
+        # as `role: text` lines, keeping the most recent turns when it is over budget
+        latest = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].type == "human"), len(messages) - 1)
+        packed = self.packer.pack([
+            Section("query", str(messages[latest].content), priority=0),
+            Section("history", render_messages(messages[:latest] + messages[latest + 1:]), priority=1, keep="tail"),
+        ])
         prompt = SENIOR_AGENT_PROMPT.format(
-            messages = messages,
-            query = messages[-1].content,
-            tools = tools_as_dicts
+            messages = packed["history"],
+            query = packed["query"],
+            tools = self.registry.prompt
         )
         
-        ai_response = await self.llm.ainvoke(prompt, tools=tools_as_dicts)
-        print(f"   ↳ AI Response: {ai_response}")
+        if current_tool_usage(state).get("exhausted"):
+            # The tool budget for this request is spent: force a final answer.
+            ai_response = await self.llm.ainvoke(prompt)
+        else:
+            ai_response = await self.llm_with_tools.ainvoke(prompt)
+        logger.debug("Senior Agent response", extra={"tool_calls": len(ai_response.tool_calls or [])})
         
         return {"messages": [ai_response]}
 
 def should_continue(state: AcademicState) -> Literal["tools", "__end__"]:
     """Checks the last message in the 'messages' list for tool calls."""
-    print("--- (Conditional Edge) Checking for Tool Calls ---")
+    logger.debug("Checking for Tool Calls")
     
     last_message = state['messages'][-1]
     
     if last_message.tool_calls:
-        print("   ↳ Decision: Route to Tool Executor.")
+        logger.info("Decision: Route to Tool Executor.")
         return "tools"
     else:
-        print("   ↳ Decision: End of turn.")
+        logger.info("Decision: End of turn.")
         return "__end__"
\ No newline at end of file
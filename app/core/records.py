@@ -0,0 +1,219 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils.context_packer import render_record
+
+
+def parse_datetime(dt_str: str) -> datetime:
+    """Parses various datetime string formats into a UTC datetime object."""
+    try:
+        dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
+        return dt.astimezone(timezone.utc)
+    except ValueError:
+        dt = datetime.fromisoformat(dt_str)
+        return dt.replace(tzinfo=timezone.utc)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _short(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def _extra(raw: Dict[str, Any], known: frozenset) -> Tuple[Tuple[str, Any], ...]:
+    if raw.keys() <= known:
+        return ()
+    return tuple((key, value) for key, value in raw.items() if key not in known)
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """
+    An immutable calendar event. Times are parsed once into UTC epoch seconds;
+    fields the agents don't use are kept in `extra` so `to_dict` round-trips.
+    A recurring event keeps its RRULE/EXDATE lines in `recurrence` (newline
+    separated) and stands for the whole series; see `app.services.recurrence`.
+    """
+    summary: str
+    start_ts: float
+    end_ts: Optional[float] = None
+    student_id: Optional[str] = None
+    id: Optional[str] = None
+    recurrence: Optional[str] = None
+    extra: Tuple[Tuple[str, Any], ...] = ()
+
+    _KNOWN = frozenset(("summary", "start", "end", "student_id", "id", "recurrence"))
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any], start_ts: Optional[float] = None,
+                  end_ts: Optional[float] = None) -> "Event":
+        """
+        Builds an event from the calendar JSON shape. Raises KeyError/ValueError
+        for a missing or malformed start. Pre-parsed timestamps (e.g. from a
+        database column) skip re-parsing.
+        """
+        if start_ts is None:
+            start_ts = parse_datetime(raw["start"]["dateTime"]).timestamp()
+            try:
+                end_ts = parse_datetime(raw["end"]["dateTime"]).timestamp()
+            except (KeyError, ValueError, TypeError, AttributeError):
+                end_ts = None
+        recurrence = raw.get("recurrence")
+        if isinstance(recurrence, list):
+            recurrence = "\n".join(recurrence)
+        return cls(raw.get("summary", ""), start_ts, end_ts, raw.get("student_id"), raw.get("id"),
+                   recurrence or None, _extra(raw, cls._KNOWN))
+
+    @property
+    def start(self) -> datetime:
+        return datetime.fromtimestamp(self.start_ts, timezone.utc)
+
+    @property
+    def end(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.end_ts, timezone.utc) if self.end_ts is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The original calendar JSON shape (JSON-serializable)."""
+        data: Dict[str, Any] = {"summary": self.summary, "start": {"dateTime": _iso(self.start_ts)}}
+        if self.end_ts is not None:
+            data["end"] = {"dateTime": _iso(self.end_ts)}
+        if self.student_id is not None:
+            data["student_id"] = self.student_id
+        if self.id is not None:
+            data["id"] = self.id
+        if self.recurrence:
+            data["recurrence"] = self.recurrence.split("\n")
+        data.update(self.extra)
+        return data
+
+    def to_prompt_line(self) -> str:
+        """One compact line for LLM prompts, e.g. `2025-08-19 16:00-17:00 | Neuroscience Club Meeting`."""
+        when = _short(self.start_ts)
+        if self.end_ts is not None:
+            end = _short(self.end_ts)
+            when += "-" + (end[11:] if end[:10] == when[:10] else end)
+        return f"{when} | {self.summary}"
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """An immutable task with its due date parsed once into UTC epoch seconds."""
+    title: str
+    due_ts: float
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    student_id: Optional[str] = None
+    id: Optional[str] = None
+    extra: Tuple[Tuple[str, Any], ...] = ()
+
+    _KNOWN = frozenset(("title", "due", "status", "notes", "student_id", "id"))
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any], due_ts: Optional[float] = None) -> "Task":
+        """Builds a task from the tasks JSON shape. Raises KeyError/ValueError for a malformed due date."""
+        if due_ts is None:
+            due_ts = parse_datetime(raw["due"]).timestamp()
+        return cls(raw.get("title", ""), due_ts, raw.get("status"), raw.get("notes"), raw.get("student_id"),
+                   raw.get("id"), _extra(raw, cls._KNOWN))
+
+    @property
+    def due(self) -> datetime:
+        return datetime.fromtimestamp(self.due_ts, timezone.utc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The original tasks JSON shape (JSON-serializable)."""
+        data: Dict[str, Any] = {"title": self.title, "due": _iso(self.due_ts)}
+        for key in ("status", "notes", "student_id", "id"):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        data.update(self.extra)
+        return data
+
+    def to_prompt_line(self) -> str:
+        """One compact line for LLM prompts, e.g. `due 2025-08-21 23:59 | needsAction | Chapter 3 Summary | ...`."""
+        line = f"due {_short(self.due_ts)} | {self.status or 'unknown'} | {self.title}"
+        return f"{line} | {self.notes}" if self.notes else line
+
+
+class _RecordColumns(Sequence):
+    """
+    An immutable, column-oriented sequence of records: one list per record
+    field. Checkpoint serializers see a handful of primitive arrays instead
+    of one object per record, and records are materialized on access.
+    """
+    __slots__ = ()
+    _record: type
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "_RecordColumns":
+        records = list(records)
+        return cls(*([getattr(r, f.name) for r in records] for f in fields(cls)))
+
+    def _columns(self) -> List[List[Any]]:
+        return [getattr(self, f.name) for f in fields(self)]
+
+    def __len__(self) -> int:
+        return len(getattr(self, fields(self)[0].name))
+
+    def __getitem__(self, index):
+        columns = self._columns()
+        if isinstance(index, slice):
+            return type(self)(*(column[index] for column in columns))
+        return self._make([column[index] for column in columns])
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._make, zip(*self._columns()))
+
+    def take(self, indices: Iterable[int]) -> "_RecordColumns":
+        """The records at `indices`, in that order, without materializing them."""
+        indices = [int(i) for i in indices]
+        return type(self)(*([column[i] for i in indices] for column in self._columns()))
+
+    def _make(self, values) -> Any:
+        *values, extra = values
+        # Serializers hand tuples back as lists; restore the immutable form.
+        return self._record(*values, tuple(map(tuple, extra)) if extra else ())
+
+
+@dataclass(frozen=True, slots=True)
+class EventList(_RecordColumns):
+    """Events in state, stored column-wise (see `_RecordColumns`)."""
+    summary: List[str]
+    start_ts: List[float]
+    end_ts: List[Optional[float]]
+    student_id: List[Optional[str]]
+    id: List[Optional[str]]
+    recurrence: List[Optional[str]]
+    extra: List[Tuple[Tuple[str, Any], ...]]
+
+    _record = Event
+
+
+@dataclass(frozen=True, slots=True)
+class TaskList(_RecordColumns):
+    """Tasks in state, stored column-wise (see `_RecordColumns`)."""
+    title: List[str]
+    due_ts: List[float]
+    status: List[Optional[str]]
+    notes: List[Optional[str]]
+    student_id: List[Optional[str]]
+    id: List[Optional[str]]
+    extra: List[Tuple[Tuple[str, Any], ...]]
+
+    _record = Task
+
+
+# Types the LangGraph checkpointer may deserialize from state.
+RECORD_TYPES = [("app.core.records", name) for name in ("Event", "Task", "EventList", "TaskList")]
+
+
+def to_prompt_lines(records: Iterable[Any]) -> str:
+    """Renders events/tasks one per line; raw dicts (e.g. from older checkpoints) are packed onto one line."""
+    return "\n".join(
+        r.to_prompt_line() if isinstance(r, (Event, Task)) else render_record(r) for r in records
+    ) or "(none)"
@@ -0,0 +1,82 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer. A waiting writer blocks new
+    readers, so a steady stream of reads can't starve it. Not reentrant:
+    don't take `read()` again while holding it, or a waiting writer deadlocks
+    both.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.core.rwlock` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("\n--- Running ReadWriteLock Test ---")
+    lock = ReadWriteLock()
+    shared = {"a": 0, "b": 0}      # a writer keeps a == b; readers must never see them differ
+    torn = []
+
+    def write(n: int):
+        for _ in range(n):
+            with lock.write():
+                shared["a"] += 1
+                time.sleep(0)
+                shared["b"] += 1
+
+    def read(n: int):
+        for _ in range(n):
+            with lock.read():
+                a = shared["a"]
+                time.sleep(0)
+                if a != shared["b"]:
+                    torn.append(a)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(write, 500) for _ in range(2)] + [pool.submit(read, 2000) for _ in range(6)]
+        for future in futures:
+            future.result()
+    assert not torn and shared["a"] == shared["b"] == 1000, (torn[:5], shared)
+    print(f"   -> {shared['a']} writes, no torn reads.")
+    print("\n✅ ReadWriteLock test passed!")
@@ -0,0 +1,137 @@
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+from typing import Any, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class SortedIndex(Generic[V]):
+    """
+    Values ordered by a float key (e.g. an event's start), stored as a list of
+    small sorted buckets. Inserts and deletes bisect the bucket maxima and
+    then edit one bucket of at most `2 * load` entries, so a change costs
+    O(log n) plus a bounded memmove instead of shifting the whole list.
+    Equal keys keep insertion order.
+    """
+    __slots__ = ("_load", "_keys", "_values", "_maxes", "_len")
+
+    def __init__(self, items: Iterable[Tuple[float, V]] = (), load: int = 512):
+        self._load = load
+        pairs = sorted(items, key=lambda pair: pair[0])
+        self._keys: List[List[float]] = [[k for k, _ in pairs[i:i + load]] for i in range(0, len(pairs), load)]
+        self._values: List[List[V]] = [[v for _, v in pairs[i:i + load]] for i in range(0, len(pairs), load)]
+        self._maxes: List[float] = [keys[-1] for keys in self._keys]
+        self._len = len(pairs)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[V]:
+        return chain.from_iterable(self._values)
+
+    def add(self, key: float, value: V) -> None:
+        if not self._keys:
+            self._keys.append([key])
+            self._values.append([value])
+            self._maxes.append(key)
+        else:
+            b = min(bisect_right(self._maxes, key), len(self._maxes) - 1)
+            keys = self._keys[b]
+            i = bisect_right(keys, key)
+            keys.insert(i, key)
+            self._values[b].insert(i, value)
+            self._maxes[b] = keys[-1]
+            if len(keys) > 2 * self._load:
+                self._split(b)
+        self._len += 1
+
+    def _split(self, b: int) -> None:
+        keys, values, half = self._keys[b], self._values[b], self._load
+        self._keys[b:b + 1] = [keys[:half], keys[half:]]
+        self._values[b:b + 1] = [values[:half], values[half:]]
+        self._maxes[b:b + 1] = [keys[half - 1], keys[-1]]
+
+    def remove(self, key: float, value: Any) -> bool:
+        """Removes `value` (matched by identity) stored under `key`; False if it isn't there."""
+        b = bisect_left(self._maxes, key)
+        while b < len(self._keys):
+            keys, values = self._keys[b], self._values[b]
+            i = bisect_left(keys, key)
+            while i < len(keys) and keys[i] == key:
+                if values[i] is value:
+                    del keys[i], values[i]
+                    if keys:
+                        self._maxes[b] = keys[-1]
+                    else:
+                        del self._keys[b], self._values[b], self._maxes[b]
+                    self._len -= 1
+                    return True
+                i += 1
+            if i < len(keys):
+                return False
+            b += 1      # equal keys can continue in the next bucket
+        return False
+
+    def irange(self, lo: float, hi: float, inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[V]:
+        """Lazily yields values with lo <= key <= hi (bounds exclusive where `inclusive` says so)."""
+        left = bisect_left if inclusive[0] else bisect_right
+        right = bisect_right if inclusive[1] else bisect_left
+        b = left(self._maxes, lo)
+        while b < len(self._keys):
+            keys = self._keys[b]
+            stop = right(keys, hi)
+            yield from islice(self._values[b], left(keys, lo), stop)
+            if stop < len(keys):
+                return
+            b += 1
+
+    def range(self, lo: float, hi: float, inclusive: Tuple[bool, bool] = (True, True)) -> List[V]:
+        """`irange` as a list, built from bucket slices."""
+        out: List[V] = []
+        left = bisect_left if inclusive[0] else bisect_right
+        right = bisect_right if inclusive[1] else bisect_left
+        b = left(self._maxes, lo)
+        while b < len(self._keys):
+            keys = self._keys[b]
+            stop = right(keys, hi)
+            out.extend(self._values[b][left(keys, lo):stop])
+            if stop < len(keys):
+                break
+            b += 1
+        return out
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.core.sorted_index` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import random
+
+    print("\n--- Running SortedIndex Test ---")
+    rng = random.Random(1)
+    reference: List[Tuple[float, object]] = []
+    index: SortedIndex[object] = SortedIndex(load=8)
+    for step in range(5000):
+        if reference and rng.random() < 0.4:
+            key, value = reference.pop(rng.randrange(len(reference)))
+            assert index.remove(key, value)
+        else:
+            key, value = float(rng.randrange(200)), object()
+            reference.append((key, value))
+            index.add(key, value)
+    reference.sort(key=lambda pair: pair[0])
+    assert len(index) == len(reference)
+    assert sorted(map(id, index)) == sorted(id(v) for _, v in reference)
+    assert not index.remove(-1.0, object())
+    for lo, hi in [(0, 199), (10, 10), (50.5, 120), (150, 40)]:
+        for inclusive in [(True, True), (False, True), (True, False), (False, False)]:
+            expected = {id(v) for k, v in reference
+                        if (lo <= k if inclusive[0] else lo < k) and (k <= hi if inclusive[1] else k < hi)}
+            assert {id(v) for v in index.irange(lo, hi, inclusive)} == expected, (lo, hi, inclusive)
+            assert {id(v) for v in index.range(lo, hi, inclusive)} == expected, (lo, hi, inclusive)
+    keys = [k for k, _ in reference]
+    bulk = SortedIndex(reference, load=8)
+    assert [id(v) for v in bulk] == [id(v) for _, v in reference] and keys == sorted(keys)
+    print(f"   -> {len(index)} entries in {len(index._keys)} buckets OK.")
+    print("\n✅ SortedIndex test passed!")
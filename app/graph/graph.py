@@ -3,8 +3,12 @@ from typing import List, Dict
 
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
-memory = MemorySaver()
+from app.core.records import RECORD_TYPES
+
+# State carries Event/Task records; allow-list them so checkpoints restore them as-is.
+memory = MemorySaver(serde=JsonPlusSerializer(allowed_msgpack_modules=RECORD_TYPES))
 
 from app.graph.state import AcademicState
 from app.services.llm_service import LLMService
@@ -15,22 +19,26 @@ from app.agents.planner import PlannerAgent
 from app.agents.notewriter import NoteWriterAgent
 from app.agents.advisor import AdvisorAgent
 from app.agents.senior import SeniorAgent, should_continue
-from app.tools.executor import tool_node
+from app.tools.executor import ToolExecutor, tool_settings
+from app.tools.registry import get_registry
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def master_router(state: AcademicState) -> str:
     """Reads the initial user message and decides which workflow to route to."""
-    print("--- (Router) Executing Master Router ---")
+    logger.debug("Executing Master Router")
     user_message = state["messages"][-1].content.lower()
     if "plan" in user_message or "schedule" in user_message:
-        print("   ↳ Master Router: Routing to Academic Workflow.")
+        logger.info("Master Router: Routing to Academic Workflow.", extra={"route": "academic_workflow"})
         return "academic_workflow"
     else:
-        print("   ↳ Master Router: Routing to Senior Agent.")
+        logger.info("Master Router: Routing to Senior Agent.", extra={"route": "senior_agent"})
         return "senior_agent"
 
 def create_graph() -> StateGraph:
     """Creates and compiles the main workflow graph for the ATLAS system."""
-    print("✅ Initializing agents and compiling graph...")
+    logger.info("Initializing agents and compiling graph...")
 
     llm_service = LLMService()
     planner = PlannerAgent(llm_service)
@@ -44,16 +52,27 @@ def create_graph() -> StateGraph:
 
     # --- Add all Worker Nodes ---
     workflow.add_node("senior_agent", senior_agent_instance.run)
-    workflow.add_node("tools", tool_node)
+    workflow.add_node("tools", ToolExecutor(get_registry(llm_service.config).tools,
+                                            tool_settings(llm_service.config)))
     workflow.add_node("coordinator", coordinator_node)
     workflow.add_node("profile_analyzer", profile_analyzer_node)
     workflow.add_node("planner", planner.plan_generator)
-    workflow.add_node("notewriter", notewriter.generate_notes)
-    workflow.add_node("advisor", advisor.generate_guidance)
+    workflow.add_node("notewriter", notewriter.run)
+    workflow.add_node("advisor", advisor.run)
+    # Two-stage agents analyze alongside the profile analyzer (the analysis only needs the profile and
+    # request), so the analysis call overlaps it instead of adding a sequential one. They only run for
+    # the agents the coordinator selected, keyed here by agent name.
+    analysis_nodes = {}
+    if notewriter.mode == "two_stage":
+        workflow.add_node("notewriter_analysis", notewriter.learning_analysis_node)
+        analysis_nodes["notewriter"] = "notewriter_analysis"
+    if advisor.mode == "two_stage":
+        workflow.add_node("advisor_analysis", advisor.analyze_situation)
+        analysis_nodes["advisor"] = "advisor_analysis"
     
     def entry_point_node(state: AcademicState) -> Dict:
         """A simple node that officially starts the graph."""
-        print("--- (Node) Graph Entry Point ---")
+        logger.debug("Graph Entry Point")
         return {}
     workflow.add_node("entry_point", entry_point_node)
     
@@ -61,14 +80,13 @@ def create_graph() -> StateGraph:
     workflow.set_entry_point("entry_point")
 
     # The master_router now directs traffic to the correct starting node of each workflow
-    workflow.add_conditional_edges(
-        "entry_point",
-        master_router,
-        {
-            "senior_agent": "senior_agent",           # Route directly to the Senior Agent
-            "academic_workflow": "coordinator"      # Route directly to the Coordinator
-        },
-    )
+    def route_entry(state: AcademicState):
+        if master_router(state) == "senior_agent":
+            return "senior_agent"                   # Route directly to the Senior Agent
+        return "coordinator"
+    workflow.add_conditional_edges("entry_point", route_entry, ["senior_agent", "coordinator"])
+    for node in analysis_nodes.values():
+        workflow.add_edge(node, END)                # Results are read by the agent's own node in the next step
 
     # --- Senior Agent Workflow (Tool-using loop) ---
     workflow.add_conditional_edges(
@@ -77,13 +95,19 @@ def create_graph() -> StateGraph:
     workflow.add_edge("tools", "senior_agent") # Loop back to the agent after tool execution
 
     # --- Academic Agent Workflow ---
-    workflow.add_edge("coordinator", "profile_analyzer")
+    def selected_agents(state: AcademicState) -> List[str]:
+        return [agent.lower() for agent in state["results"].get("coordinator_analysis", {}).get("required_agents", [])]
+
+    # The profile analyzer, plus the two-stage analyses of the selected agents only
+    workflow.add_conditional_edges(
+        "coordinator",
+        lambda state: ["profile_analyzer",
+                       *(analysis_nodes[agent] for agent in selected_agents(state) if agent in analysis_nodes)],
+        ["profile_analyzer", *analysis_nodes.values()],
+    )
     workflow.add_conditional_edges(
         "profile_analyzer",
-        lambda state: [
-            agent.lower()
-            for agent in state["results"].get("coordinator_analysis", {}).get("required_agents", [])
-        ],
+        selected_agents,
         {"planner": "planner", "notewriter": "notewriter", "advisor": "advisor"},
     )
     workflow.add_edge("planner", END)
@@ -91,5 +115,37 @@ def create_graph() -> StateGraph:
     workflow.add_edge("advisor", END)
 
     graph = workflow.compile(checkpointer=memory)
-    print("✅ Graph compiled successfully.")
-    return graph
\ No newline at end of file
+    logger.info("Graph compiled successfully.")
+    return graph
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# Runs one academic request and one senior-agent request through the graph.
+# To test this file, run `python -m app.graph.graph` from the root directory.
+# Set ATLAS_CASSETTE_MODE=record|replay (and ATLAS_CASSETTE_PATH) to record or
+# replay every LLM interaction instead of calling the providers live.
+# ==============================================================================
+if __name__ == "__main__":
+    import asyncio
+    from langchain_core.messages import HumanMessage
+
+    async def main_test():
+        graph = create_graph()
+        for index, query in enumerate([
+            "Help me plan my study schedule for next week for my Cognitive Psychology midterm.",
+            "What is an LLM?",
+        ]):
+            print(f"\n[{index + 1}. Invoking graph with: {query!r}]")
+            state = AcademicState(
+                messages=[HumanMessage(content=query)], atlas_message=[HumanMessage(content=query)],
+                profile={}, calendar={}, tasks={}, results={},
+            )
+            final_state = await graph.ainvoke(state, {"configurable": {"thread_id": f"test-{index}"}})
+            print("   ↳ Result keys:", sorted(final_state.get("results", {})))
+            print("   ↳ Last message:", str(final_state["messages"][-1].content)[:200])
+        print("\n✅ Graph test passed!")
+
+    try:
+        asyncio.run(main_test())
+    except Exception as e:
+        print(f"An error occurred during the test: {e}")
@@ -23,4 +23,5 @@ class AcademicState(TypedDict):
     calendar: Annotated[Dict, dict_reducer]
     tasks: Annotated[Dict, dict_reducer]
     results: Annotated[Dict[str, Any], dict_reducer]
-    chat_history: Annotated[List[BaseMessage], add]
\ No newline at end of file
+    chat_history: Annotated[List[BaseMessage], add]
+    source_material: str    # text the NoteWriter builds notes from (e.g. a whole chapter)
\ No newline at end of file
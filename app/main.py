@@ -1,18 +1,30 @@
 # app/main.py
 
 import asyncio
-from fastapi import FastAPI
+import uuid
+from contextlib import nullcontext
+from fastapi import FastAPI, Header, HTTPException, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any
-from IPython.display import Image, display
+from typing import List, Dict, Any, Optional
 
 from app.graph.graph import create_graph
 from app.graph.state import AcademicState
+from app.services.data_store import build_academic_state, create_change_feed, create_data_manager
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger, request_context
+from app.utils.profiling import (
+    NodeSpanRecorder, PROFILE_HEADER, ProfilingBusyError, profile_request, profiling_settings, track_request,
+)
+
+logger = get_logger(__name__)
 
-# --- 1. Pydantic Models for API (No changes needed) ---
+# --- 1. Pydantic Models for API ---
 class InvokeRequest(BaseModel):
     query: str
+    thread_id: Optional[str] = None
+    student_id: Optional[str] = None  # when set, profile/calendar/tasks are read from the data store
+    source_material: Optional[str] = None  # course text (e.g. a chapter) for the NoteWriter to build notes from
 
 class InvokeResponse(BaseModel):
     response: str
@@ -26,17 +38,32 @@ app = FastAPI(
 )
 
 graph = create_graph()
-graph.get_graph().print_ascii()
-img = Image(graph.get_graph().draw_mermaid_png())
-png_bytes = graph.get_graph().draw_mermaid_png()
 
-# We then write these bytes to a file
-with open("my_workflow_graph.png", "wb") as f:
-    f.write(png_bytes)
-    
-print("✅ Success! Graph image saved as 'my_workflow_graph.png' in your root directory.")
+# Rendering goes through the mermaid.ink web service, so it can be switched off
+# for offline runs and benchmarks that import the app in-process.
+if load_config().get("app", {}).get("export_graph_image", True):
+    graph.get_graph().print_ascii()
+    png_bytes = graph.get_graph().draw_mermaid_png()
+
+    # We then write these bytes to a file
+    with open("my_workflow_graph.png", "wb") as f:
+        f.write(png_bytes)
+
+    logger.info("Graph image saved as 'my_workflow_graph.png' in your root directory.")
 
-config = {"configurable": {"thread_id": "1"}}
+DEFAULT_THREAD_ID = "1"
+DATA_STORE_DAYS = load_config().get("data_store", {}).get("upcoming_days", 7)
+data_manager = create_data_manager()
+change_feed = create_change_feed()
+PROFILING = profiling_settings()
+
+
+@app.on_event("shutdown")
+def close_data_manager():
+    """Closes the SQLite store's per-thread connections, including those of to_thread workers."""
+    close = getattr(data_manager, "close", None)
+    if close is not None:
+        close()
 
 def _serialize_messages(messages: List[BaseMessage]) -> List[Dict[str, Any]]:
     """Helper to convert BaseMessage objects to a JSON-serializable format."""
@@ -58,15 +85,69 @@ def _serialize_messages(messages: List[BaseMessage]) -> List[Dict[str, Any]]:
     return serialized
 
 # --- 3. API Endpoint (CORRECTED) ---
+def _profiling_requested(query_flag: bool, header_value: Optional[str]) -> bool:
+    requested = query_flag or (header_value or "").lower() in ("1", "true", "yes")
+    if requested and not PROFILING["enabled"]:
+        logger.warning("Profiling requested but disabled in config; ignoring")
+        return False
+    return requested
+
+
 @app.post("/invoke", response_model=InvokeResponse)
-async def invoke_agent(request: InvokeRequest):
+async def invoke_agent(
+    request: InvokeRequest,
+    response: Response,
+    profile: bool = False,
+    x_request_id: Optional[str] = Header(default=None),
+    x_atlas_profile: Optional[str] = Header(default=None),
+):
     """
     Invokes the multi-agent system with a user query.
+    Pass `?profile=true` or an `X-Atlas-Profile: 1` header to capture a
+    cProfile/tracemalloc profile of the request (requires profiling.enabled).
+    A profiled request is rejected with 409 while other requests are in flight,
+    and requests arriving during a profile wait for it to finish.
     """
-    initial_state = AcademicState(
-        messages=[HumanMessage(content=request.query)],
-        profile={}, calendar={}, tasks={}, results={}, atlas_message=[]
-    )
+    thread_id = request.thread_id or DEFAULT_THREAD_ID
+    request_id = x_request_id or uuid.uuid4().hex
+    with request_context(request_id=request_id, thread_id=thread_id):
+        logger.info("Invoke request received")
+        if not _profiling_requested(profile, x_atlas_profile):
+            # The in-flight gate only matters when a profile could be requested.
+            async with track_request() if PROFILING["enabled"] else nullcontext():
+                return await _run_invoke(request, thread_id)
+        try:
+            async with profile_request(request_id, PROFILING) as recorder:
+                response.headers[PROFILE_HEADER] = request_id
+                return await _run_invoke(request, thread_id, recorder)
+        except ProfilingBusyError as exc:
+            logger.warning("Profiling rejected", extra={"reason": str(exc)})
+            raise HTTPException(status_code=409, detail=f"Cannot profile while other requests run: {exc}")
+
+
+async def _run_invoke(request: InvokeRequest, thread_id: str,
+                      recorder: Optional[NodeSpanRecorder] = None) -> InvokeResponse:
+    config = {"configurable": {"thread_id": thread_id}}
+    if recorder is not None:
+        config["callbacks"] = [recorder]
+    if request.student_id:
+        # Store reads are blocking (SQLite), so keep them off the event loop. The
+        # in-memory store's reader/writer lock keeps these worker threads apart.
+        if change_feed is not None:
+            await asyncio.to_thread(change_feed.sync, data_manager)
+        initial_state = await asyncio.to_thread(
+            build_academic_state, data_manager, request.query, request.student_id, DATA_STORE_DAYS
+        )
+    else:
+        # The academic agents read the request from atlas_message, so seed it as well.
+        initial_state = AcademicState(
+            messages=[HumanMessage(content=request.query)],
+            profile={}, calendar={}, tasks={}, results={},
+            atlas_message=[HumanMessage(content=request.query)]
+        )
+
+    if request.source_material:
+        initial_state["source_material"] = request.source_material
 
     final_state = await graph.ainvoke(initial_state, config)
 
@@ -97,14 +178,16 @@ async def invoke_agent(request: InvokeRequest):
     if not isinstance(final_history[-1], AIMessage):
          final_history.append(AIMessage(content=response_content))
     
-    full_history_serialized = _serialize_messages(final_history)
+    with recorder.span("serialize_response") if recorder else nullcontext():
+        full_history_serialized = _serialize_messages(final_history)
 
+    logger.info("Invoke request completed", extra={"history_length": len(full_history_serialized)})
     return InvokeResponse(
         response=response_content,
         full_history=full_history_serialized
     )
 
-# --- 4. Root Endpoint for Health Check (No changes needed) ---
+# --- 4. Root Endpoint for Health Check ---
 @app.get("/")
 def read_root():
     return {"status": "Atlas is running"}
\ No newline at end of file
@@ -30,7 +30,7 @@ Decision: Required agents are [List of agent names, e.g., PLANNER, NOTEWRITER].
 
 # Prompt for the Profile Analyzer to extract learning patterns.
 PROFILE_ANALYZER_PROMPT = """
-You are a Profile Analysis Agent. Your goal is to analyze the provided student profile JSON and extract key, actionable insights about their learning patterns.
+You are a Profile Analysis Agent. Your goal is to analyze the provided student profile and extract key, actionable insights about their learning patterns.
 
 PROFILE DATA:
 {profile}
@@ -67,7 +67,8 @@ CONTEXT:
 
 INSTRUCTIONS:
 1.  Use a friendly, encouraging, and informal tone.
-2.  Create a structured schedule (e.g., daily breakdown).
+2.  Create a structured schedule (e.g., daily breakdown). When the calendar analysis lists computed free blocks, place study sessions only inside them, preferring peak-energy blocks for the hardest work.
+    When the task analysis is a ranked priority list, schedule tasks in that order and give each at least its estimated hours.
 3.  Incorporate specific strategies based on the student's learning style and challenges.
 4.  Include "Emergency Protocols" for when the student gets stuck or distracted.
 5.  Follow a ReACT pattern in your output: Thought, Action, Observation, Plan.
@@ -75,6 +76,48 @@ INSTRUCTIONS:
 Your final output should be the complete plan in markdown format.
 """
 
+# Prompt for the Planner Agent when the schedule was already solved locally: the LLM only narrates it.
+PLANNER_NARRATE_PROMPT = """
+You are an expert AI Academic Planner. The study schedule below has already been computed from the
+student's free time and task priorities. Do not move, add or drop sessions.
+
+CONTEXT:
+- Profile Analysis: {profile_analysis}
+- Priority Ranking: {task_analysis}
+{analyst_notes}
+FIXED SCHEDULE:
+{schedule}
+
+INSTRUCTIONS:
+1.  Use a friendly, encouraging, and informal tone.
+2.  Present the schedule day by day, adding one short study tip per session based on the student's learning style.
+3.  If some tasks did not fit, say so and suggest what to drop or shorten.
+4.  Add brief "Emergency Protocols" for when the student gets stuck or distracted.
+5.  Keep it concise: no more than a few sentences beyond the schedule itself.
+
+Your final output should be the plan in markdown format.
+"""
+
+# Prompts for the NoteWriter's long-input mode: chunks of the source material are summarized,
+# then the summaries are merged until they fit in the note-generation prompt.
+CHUNK_SUMMARY_PROMPT = """
+Summarize this excerpt of the student's course material for use in study notes.
+Keep every definition, formula, named theory, example and key fact; drop filler and repetition.
+Write compact bullet points in the order the material presents them.
+
+TEXT:
+{text}
+"""
+
+MERGE_SUMMARIES_PROMPT = """
+Merge these consecutive summaries of the same course material into one summary.
+Keep every definition, formula, named theory and key fact, remove overlap between the parts,
+and preserve the order of the material.
+
+TEXT:
+{text}
+"""
+
 SENIOR_AGENT_PROMPT = """
 You are the Senior Agent, a core member of the Co-Study Partner agent suite.
 
@@ -121,4 +164,45 @@ keep conversation flowing.
 
 
 
-# Add other prompts for Notewriter and Advisor as you expand...
\ No newline at end of file
+# Add other prompts for Notewriter and Advisor as you expand...
+
+# Fused single-call prompts: the analysis and the final output come back as two headed sections,
+# which the agents split into separate `results` keys with `parse_sections`.
+ANALYSIS_SECTION = "ANALYSIS"
+STUDY_GUIDE_SECTION = "STUDY GUIDE"
+GUIDANCE_SECTION = "GUIDANCE"
+
+NOTEWRITER_FUSED_PROMPT = """
+Create concise, high-impact study materials for the student's request, adapted to their learning style.
+- Learning Style: {learning_style}
+- Request: {request}
+{material}
+Respond with exactly these two sections, each starting with its heading line:
+### ANALYSIS
+Content requirements in a few bullets: Key Topics (80/20 principle), Learning Style Adaptations, and Quick Reference Format.
+### STUDY GUIDE
+An **INTENSIVE STUDY GUIDE** following that analysis, with weekly/daily focus areas and core concepts.
+"""
+
+ADVISOR_FUSED_PROMPT = """
+Give the student personalized academic guidance.
+- Profile:
+{profile}
+- Request: {request}
+{library}
+Respond with exactly these two sections, each starting with its heading line:
+### ANALYSIS
+A few bullets on current challenges, learning style compatibility and time/stress management needs.
+### GUIDANCE
+Actionable steps for schedule optimization, energy management, support strategies, and emergency protocols, based on that analysis.
+"""
+
+# Added to the Advisor's guidance prompts when the advice library has matching snippets: the LLM
+# personalizes and stitches vetted advice instead of writing all of it from scratch.
+ADVICE_LIBRARY_BLOCK = """
+- Vetted advice matched to this student:
+{snippets}
+Build the guidance from these snippets: adapt their wording and examples to the student's profile and request,
+put them in a sensible order and connect them in a sentence or two. Do not add advice beyond them.
+Keep the guidance under {max_words} words.
+"""
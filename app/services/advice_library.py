@@ -0,0 +1,181 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+    from app.services.vector_index import top_k_indices
+except ImportError:  # the library is optional; without it the Advisor writes guidance from scratch
+    np = None
+
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {
+    "enabled": True,
+    "path": "data/advice_library.json",
+    "top_k": 5,
+    "max_per_category": 2,          # keeps the stitched guidance broad (stress, time, study, ...)
+    "situation_weight": 0.6,        # share of the score from situation similarity; the rest is profile match
+    "min_score": 0.2,               # below this a snippet is not relevant enough to include
+    "max_words": 220,               # length the advisor asks for when stitching snippets
+}
+
+FEATURE_GROUPS = ("learning_styles", "peak_energy", "challenges")
+
+
+def advice_library_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    return {**_DEFAULTS, **((config or load_config()).get("advice_library") or {})}
+
+
+def profile_features(profile: Optional[Dict]) -> Dict[str, float]:
+    """The profile's library features ("group:value") with weights; a secondary learning style counts half."""
+    profile = profile or {}
+    preferences = profile.get("learning_preferences", {})
+    style = preferences.get("learning_style", {})
+    features: Dict[str, float] = {}
+    if style.get("primary"):
+        features[f"learning_styles:{style['primary']}"] = 1.0
+    if style.get("secondary"):
+        features.setdefault(f"learning_styles:{style['secondary']}", 0.5)
+    peak = preferences.get("study_patterns", {}).get("peak_energy")
+    if peak:
+        features[f"peak_energy:{peak}"] = 1.0
+    for source in (profile, preferences, profile.get("academic_info", {})):
+        for challenge in source.get("challenges") or []:
+            name = challenge if isinstance(challenge, str) else challenge.get("name", "")
+            if name:
+                features[f"challenges:{name.lower().replace(' ', '_')}"] = 1.0
+    return features
+
+
+@dataclass(frozen=True)
+class AdviceSnippet:
+    id: str
+    category: str
+    text: str
+    score: float
+
+    def to_prompt(self) -> str:
+        return f"- [{self.category}] {self.text}"
+
+
+class AdviceLibrary:
+    """
+    Vetted guidance snippets matched to a student by two scores, both one
+    matrix-vector product over the whole library: cosine similarity of the
+    snippet's situation embedding to the request, and of its profile
+    features (learning styles, peak energy, challenges) to the student's.
+    Snippets without features apply to everyone but only earn the situation
+    share of the score (at most `situation_weight`), so they rank below a
+    snippet that is as relevant to the request and also fits the profile.
+    """
+    def __init__(self, snippets: List[Dict[str, Any]], situation_vectors: "np.ndarray",
+                 settings: Optional[Dict[str, Any]] = None):
+        if np is None:
+            raise ImportError("numpy is required for the advice library")
+        self.settings = {**_DEFAULTS, **(settings or {})}
+        self.snippets = snippets
+        self.categories = np.array([s["category"] for s in snippets])
+        vectors = np.asarray(situation_vectors, dtype=np.float32)
+        self.situations = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        vocabulary = sorted({f"{group}:{value}" for s in snippets
+                             for group in FEATURE_GROUPS for value in s.get("features", {}).get(group, [])})
+        self.vocabulary = {feature: i for i, feature in enumerate(vocabulary)}
+        features = np.zeros((len(snippets), len(vocabulary)), dtype=np.float32)
+        for row, snippet in enumerate(snippets):
+            for group in FEATURE_GROUPS:
+                for value in snippet.get("features", {}).get(group, []):
+                    features[row, self.vocabulary[f"{group}:{value}"]] = 1.0
+        self.features = features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+
+    def __len__(self) -> int:
+        return len(self.snippets)
+
+    @staticmethod
+    def load_snippets(path: Union[str, Path]) -> List[Dict[str, Any]]:
+        with open(path, "r") as fp:
+            return json.load(fp)["snippets"]
+
+    @classmethod
+    async def aload(cls, path: Union[str, Path], embeddings: Any,
+                    settings: Optional[Dict[str, Any]] = None) -> "AdviceLibrary":
+        """Reads the library and embeds every snippet's situation in one batched call."""
+        if np is None:
+            raise ImportError("numpy is required for the advice library")
+        snippets = await asyncio.to_thread(cls.load_snippets, path)
+        vectors = await embeddings.aembed_documents([f"{s['situation']}\n{s['text']}" for s in snippets])
+        logger.info("Advice library loaded", extra={"path": str(path), "snippets": len(snippets)})
+        return cls(snippets, np.array(vectors, dtype=np.float32), settings)
+
+    def profile_vector(self, profile: Optional[Dict]) -> "np.ndarray":
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for feature, weight in profile_features(profile).items():
+            index = self.vocabulary.get(feature)
+            if index is not None:
+                vector[index] = weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, profile: Optional[Dict], situation: Sequence[float], k: Optional[int] = None) -> List[AdviceSnippet]:
+        """The best `k` snippets for the student and situation, at most `max_per_category` from each category."""
+        k = k or self.settings["top_k"]
+        query = np.asarray(situation, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        weight = self.settings["situation_weight"]
+        scores = weight * (self.situations @ query) + (1 - weight) * (self.features @ self.profile_vector(profile))
+
+        # Enough candidates to fill k even when the best ones crowd into a few categories
+        candidates = top_k_indices(scores, min(len(scores), k * self.settings["max_per_category"] * 4))
+        picked: List[AdviceSnippet] = []
+        per_category: Dict[str, int] = {}
+        for i in candidates:
+            if scores[i] < self.settings["min_score"] or len(picked) == k:
+                break
+            category = self.categories[i]
+            if per_category.get(category, 0) < self.settings["max_per_category"]:
+                per_category[category] = per_category.get(category, 0) + 1
+                snippet = self.snippets[i]
+                picked.append(AdviceSnippet(snippet["id"], category, snippet["text"], float(scores[i])))
+        return picked
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.advice_library` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    from app.services.fake_llm import FakeEmbeddings
+
+    async def main_test():
+        print("\n--- Running AdviceLibrary Test ---")
+        embeddings = FakeEmbeddings()
+        library = await AdviceLibrary.aload(_DEFAULTS["path"], embeddings)
+        with open("data/profile.json") as fp:
+            profile = json.load(fp)["profiles"][0]
+        assert profile_features(profile) == {"learning_styles:visual": 1.0, "learning_styles:kinesthetic": 0.5,
+                                             "peak_energy:late_morning": 1.0}
+
+        situation = await embeddings.aembed_query("I'm anxious and panicking about my statistics exam next week")
+        hits = library.search(profile, situation)
+        for hit in hits:
+            print(f"   -> {hit.score:.2f} {hit.id}: {hit.text[:70]}")
+        assert 0 < len(hits) <= 5
+        assert any(hit.category == "stress" for hit in hits)
+        assert max(sum(h.category == c for h in hits) for c in {h.category for h in hits}) <= 2
+
+        # The learning style shifts the ranking between otherwise similar study snippets
+        study = await embeddings.aembed_query("how to study effectively")
+        visual = [h.id for h in library.search(profile, study, k=2)]
+        auditory = [h.id for h in library.search(
+            {"learning_preferences": {"learning_style": {"primary": "auditory"}}}, study, k=2)]
+        print(f"   -> visual: {visual}, auditory: {auditory}")
+        assert visual != auditory
+        print("\n✅ AdviceLibrary test passed!")
+
+    asyncio.run(main_test())
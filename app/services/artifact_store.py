@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from app.utils.cache import TTLCache
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {
+    "enabled": True,
+    "path": "data/artifacts",
+    "max_bytes": 256 * 1024 * 1024,     # compressed size on disk before least-recently-used artifacts go
+    "max_entries": 20000,
+    "memory_entries": 256,              # decompressed artifacts kept in memory
+    "compress_level": 6,
+}
+
+FORMAT_VERSION = 1
+_SUFFIX = ".z"
+
+
+def artifact_store_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    return {**_DEFAULTS, **((config or load_config()).get("artifact_store") or {})}
+
+
+def artifact_digest(key: Tuple) -> str:
+    return hashlib.blake2b(json.dumps(key, separators=(",", ":")).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Generated artifacts (study guides) shared between requests with the same
+    inputs. Each artifact is a zlib-compressed JSON file named by the digest
+    of its key, so every process pointed at the directory shares it; the
+    most recently used ones are also kept decompressed in memory. The
+    directory is authoritative: a lookup missing from this process's index
+    reads the file another worker may have written, and each write syncs
+    the index with the directory listing (stat-ing only files it hasn't
+    seen) before deleting the least recently used files past `max_bytes` or
+    `max_entries`, so the limits hold across processes. Recency is kept in
+    the files' mtimes, which also survive restarts; an eviction candidate's
+    mtime is checked first, so one another worker has just used is kept.
+
+    `get_or_create` is single-flight within a process: concurrent requests
+    for a key that is being generated wait for that generation instead of
+    starting their own.
+    """
+    def __init__(self, path: Union[str, Path], settings: Optional[Dict[str, Any]] = None):
+        self.settings = {**_DEFAULTS, **(settings or {})}
+        self.path = Path(path) / f"v{FORMAT_VERSION}"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()  # digest -> (bytes, mtime_ns), LRU first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._memory: TTLCache = TTLCache(self.settings["memory_entries"])
+        self._inflight: Dict[str, asyncio.Future] = {}           # digest -> generation task
+        self.hits = self.misses = self.shared = self.evictions = 0
+        self._load_index()
+
+    def _file(self, digest: str) -> Path:
+        return self.path / f"{digest}{_SUFFIX}"
+
+    def _load_index(self) -> None:
+        with self._lock:
+            self._rescan()
+            self._evict()
+        logger.info("Artifact store opened", extra={"path": str(self.path), "entries": len(self._index),
+                                                     "bytes": self._bytes})
+
+    def _rescan(self) -> None:
+        """
+        Syncs the index with the directory, which other processes also write
+        and evict: files that went are dropped, files that appeared are
+        stat'ed and added as most recent. Callers hold the lock.
+        """
+        with os.scandir(self.path) as entries:
+            names = {entry.name[:-len(_SUFFIX)] for entry in entries if entry.name.endswith(_SUFFIX)}
+        for digest in self._index.keys() - names:
+            self._drop(digest)
+        new = []
+        for digest in names - self._index.keys():
+            try:
+                stat = self._file(digest).stat()
+            except OSError:
+                continue                    # evicted by another process meanwhile
+            new.append((stat.st_mtime_ns, digest, stat.st_size))
+        for mtime_ns, digest, size in sorted(new):
+            self._track(digest, size, mtime_ns)
+
+    def _track(self, digest: str, size: int, mtime_ns: int) -> None:
+        """Records an artifact file as the most recently used; callers hold the lock."""
+        self._drop(digest)
+        self._index[digest] = (size, mtime_ns)
+        self._bytes += size
+
+    def _drop(self, digest: str) -> None:
+        size, _ = self._index.pop(digest, (0, 0))
+        self._bytes -= size
+
+    def _touch(self, file: Path) -> int:
+        """Marks the file used now, for every process; returns the mtime set."""
+        now = time.time_ns()
+        os.utime(file, ns=(now, now))
+        return now
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        digest = artifact_digest(key)
+        value = self._memory.get(digest)
+        if value is not None:
+            try:
+                used = self._touch(self._file(digest))     # recency is what the other workers evict by
+            except OSError:
+                used = None
+            with self._lock:
+                if digest in self._index and used is not None:
+                    self._track(digest, self._index[digest][0], used)
+            return value
+        # Not in the index is not a miss: another worker may have written it since we scanned.
+        file = self._file(digest)
+        try:
+            data = file.read_bytes()
+            used = self._touch(file)
+        except FileNotFoundError:
+            with self._lock:
+                self._drop(digest)          # never written, or evicted elsewhere
+            return None
+        except OSError as e:
+            logger.warning("Dropping unreadable artifact", extra={"digest": digest, "error": str(e)})
+            self._remove(digest)
+            return None
+        with self._lock:
+            adopted = digest not in self._index
+            self._track(digest, len(data), used)
+            if adopted:
+                # Another worker wrote it, so our view of the directory is stale and may now be past the limits.
+                self._rescan()
+                self._evict()
+        try:
+            payload = json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError) as e:
+            logger.warning("Dropping unreadable artifact", extra={"digest": digest, "error": str(e)})
+            self._remove(digest)
+            return None
+        if payload.get("key") != json.loads(json.dumps(key)):
+            return None                     # digest collision: treat as a miss, the put will overwrite
+        self._memory.set(digest, payload["value"])
+        return payload["value"]
+
+    def put(self, key: Tuple, value: Any) -> None:
+        digest = artifact_digest(key)
+        payload = {"format": FORMAT_VERSION, "key": key, "created": time.time(), "value": value}
+        data = zlib.compress(json.dumps(payload).encode("utf-8"), self.settings["compress_level"])
+        file = self._file(digest)
+        tmp = file.with_name(f"{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, file)               # readers (and other processes) never see a partial file
+        with self._lock:
+            self._track(digest, len(data), time.time_ns())
+            self._rescan()                  # count what the other workers wrote (or evicted) before evicting
+            self._evict()
+        self._memory.set(digest, value)
+
+    def _remove(self, digest: str) -> None:
+        with self._lock:
+            self._drop(digest)
+        self._memory.pop(digest)
+        self._file(digest).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Drops least recently used artifacts until both limits hold; callers hold the lock."""
+        while self._index and (self._bytes > self.settings["max_bytes"]
+                               or len(self._index) > self.settings["max_entries"]):
+            digest, (_, mtime_ns) = next(iter(self._index.items()))
+            try:
+                stat = self._file(digest).stat()
+            except FileNotFoundError:
+                self._drop(digest)          # evicted by another process
+                continue
+            if stat.st_mtime_ns > mtime_ns:
+                self._track(digest, stat.st_size, stat.st_mtime_ns)     # used by another process since
+                continue
+            self._drop(digest)
+            self._memory.pop(digest)
+            self._file(digest).unlink(missing_ok=True)
+            self.evictions += 1
+
+    async def get_or_create(self, key: Tuple, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        The artifact for `key`, generating it with `factory` if needed.
+        Returns it with how it was obtained: "hit", "shared" (waited on a
+        generation already in flight) or "miss" (generated here). A failed
+        generation is not stored; its waiters get the same exception. The
+        generation runs as its own task, so a requester that is cancelled
+        stops waiting without cancelling it for the others.
+        """
+        digest = artifact_digest(key)
+        task = self._inflight.get(digest)
+        if task is not None:
+            self.shared += 1
+            value, _ = await asyncio.shield(task)
+            return value, "shared"
+
+        task = asyncio.ensure_future(self._create(key, factory))
+        self._inflight[digest] = task
+        task.add_done_callback(lambda done: self._finish(digest, done))
+        return await asyncio.shield(task)
+
+    async def _create(self, key: Tuple, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            self.hits += 1
+            return value, "hit"
+        value = await factory()
+        await asyncio.to_thread(self.put, key, value)
+        self.misses += 1
+        return value, "miss"
+
+    def _finish(self, digest: str, task: asyncio.Future) -> None:
+        if self._inflight.get(digest) is task:
+            del self._inflight[digest]
+        if not task.cancelled():
+            task.exception()                # retrieved even if every requester was cancelled; waiters re-raise it
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._index), "bytes": self._bytes, "hits": self.hits, "misses": self.misses,
+                "shared": self.shared, "evictions": self.evictions}
+
+
+def open_artifact_store(settings: Optional[Dict[str, Any]] = None) -> Optional[ArtifactStore]:
+    """The configured store, or None when `artifact_store.enabled` is off."""
+    settings = {**_DEFAULTS, **(settings or {})}
+    return ArtifactStore(settings["path"], settings) if settings["enabled"] else None
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.artifact_store` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    async def main_test():
+        print("\n--- Running ArtifactStore Test ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ArtifactStore(tmp, {"max_entries": 3})
+            generations = []
+
+            async def generate(topic: str):
+                generations.append(topic)
+                await asyncio.sleep(0.05)
+                return {"notes": f"Study guide on {topic}. " * 200}
+
+            # 20 concurrent identical requests share one generation
+            key = ("notes", "Cognitive Psychology", "memory", "visual", "fused-v1")
+            outcomes = await asyncio.gather(*(store.get_or_create(key, lambda: generate("memory")) for _ in range(20)))
+            assert generations == ["memory"], generations
+            assert sorted(status for _, status in outcomes) == ["miss"] + ["shared"] * 19
+            assert (await store.get_or_create(key, lambda: generate("memory")))[1] == "hit"
+
+            size = store.stats()["bytes"]
+            raw = len(json.dumps(outcomes[0][0]))
+            print(f"   -> {raw:,} bytes of JSON stored in {size:,} bytes")
+            assert size < raw / 10
+
+            # A failed generation reaches every waiter and is not stored
+            async def fail():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("provider down")
+            results = await asyncio.gather(*(store.get_or_create(("bad",), fail) for _ in range(3)),
+                                           return_exceptions=True)
+            assert all(isinstance(r, RuntimeError) for r in results) and store.get(("bad",)) is None
+
+            # LRU eviction, and the index (with recency) is rebuilt by a new process
+            for topic in ("a", "b", "c"):
+                await store.get_or_create(("notes", topic), lambda t=topic: generate(t))
+            assert store.get(key) is None and len(store) == 3 and store.evictions == 1
+            reopened = ArtifactStore(tmp, {"max_entries": 3})
+            assert reopened.get(("notes", "a"))["notes"].startswith("Study guide on a")
+
+            # Cancelling the request that started a generation doesn't fail those sharing it
+            first = asyncio.create_task(reopened.get_or_create(("notes", "e"), lambda: generate("e")))
+            await asyncio.sleep(0.01)
+            waiters = [asyncio.create_task(reopened.get_or_create(("notes", "e"), lambda: generate("e")))
+                       for _ in range(3)]
+            await asyncio.sleep(0.01)
+            first.cancel()
+            shared = await asyncio.gather(*waiters)
+            assert [status for _, status in shared] == ["shared"] * 3 and generations.count("e") == 1
+
+            # A guide written by another worker after startup is found, not regenerated,
+            # and the entry limit holds for the directory, not per process
+            await reopened.get_or_create(("notes", "d"), lambda: generate("d"))
+            assert (await store.get_or_create(("notes", "d"), lambda: generate("d")))[1] == "hit"
+            assert generations.count("d") == 1 and len(list(store.path.glob(f"*{_SUFFIX}"))) == 3
+            on_disk = sum(f.stat().st_size for f in store.path.glob(f"*{_SUFFIX}"))
+            assert len(store) == store.stats()["entries"] == 3 and store.stats()["bytes"] == on_disk
+            print(f"   -> {store.stats()}")
+        print("\n✅ ArtifactStore test passed!")
+
+    asyncio.run(main_test())
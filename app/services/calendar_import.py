@@ -0,0 +1,573 @@
+import csv
+import hashlib
+import io
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.records import Event
+from app.services.json_stream import LoadStats, Source
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FORMATS = ("ics", "csv")
+
+_DEFAULTS = {
+    "default_timezone": None,   # floating (zone-less) times; None falls back to scheduling.timezone
+    "chunk_size": 5000,         # events handed to the data store per batch
+}
+
+_DURATION = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_ICS_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+# Column names used by Google Calendar, Outlook and hand-made exports (lowercased).
+CSV_COLUMNS = {
+    "summary": ("subject", "summary", "title", "event", "name"),
+    "start_date": ("start date", "start", "start_date", "dtstart", "begin"),
+    "start_time": ("start time", "start_time"),
+    "end_date": ("end date", "end", "end_date", "dtend"),
+    "end_time": ("end time", "end_time"),
+    "all_day": ("all day event", "all day", "all_day"),
+    "id": ("id", "uid", "event id"),
+    "recurrence": ("recurrence", "rrule"),
+    "location": ("location",),
+    "description": ("description", "notes"),
+}
+CSV_DATETIME_FORMATS = (
+    "%m/%d/%Y %I:%M %p", "%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y",
+    "%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y/%m/%d %H:%M", "%Y/%m/%d",
+)
+
+
+@dataclass
+class ImportStats(LoadStats):
+    """Throughput figures for one imported calendar file."""
+    lines: int = 0
+    skipped: int = 0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+
+@lru_cache(maxsize=None)
+def resolve_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """
+    A TZID or IANA name as a tzinfo, resolved once per name. Unknown names
+    (e.g. Windows zone names) return None so callers fall back to the default.
+    """
+    if not name:
+        return None
+    name = name.strip().strip('"')
+    if name.upper() in ("UTC", "Z", "GMT", "ETC/UTC"):
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown timezone in calendar import; using the default", extra={"tzid": name})
+        return None
+
+
+def _fallback_id(summary: str, start_ts: float, student_id: Optional[str]) -> str:
+    """A stable id for records without one, so re-importing the same file upserts instead of duplicating."""
+    digest = hashlib.sha1(f"{student_id}|{start_ts}|{summary}".encode("utf-8")).hexdigest()[:16]
+    return f"import_{digest}"
+
+
+def _utc_stamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+# --- iCalendar -----------------------------------------------------------------
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Joins RFC 5545 folded lines (continuations start with a space or tab)."""
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def _content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """`NAME;PARAM=x:value` as (NAME, {PARAM: x}, value)."""
+    head, _, value = line.partition(":")
+    if '"' in head:     # a quoted parameter may contain ':'
+        head, value = _split_quoted(line)
+    name, *params = head.split(";")
+    return name.upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+def _split_quoted(line: str) -> Tuple[str, str]:
+    quoted = False
+    for i, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            return line[:i], line[i + 1:]
+    return line, ""
+
+
+def _ics_time(value: str, params: Dict[str, str], default_tz: tzinfo) -> Tuple[float, bool]:
+    """A DATE or DATE-TIME value as UTC epoch seconds (plus whether it was a date), converted once here."""
+    value = value.strip()
+    year, month, day = int(value[0:4]), int(value[4:6]), int(value[6:8])
+    if len(value) == 8 or params.get("VALUE") == "DATE":
+        return datetime(year, month, day, tzinfo=default_tz).timestamp(), True
+    tz = timezone.utc if value.endswith("Z") else (resolve_timezone(params.get("TZID")) or default_tz)
+    return datetime(year, month, day, int(value[9:11]), int(value[11:13]), int(value[13:15]),
+                    tzinfo=tz).timestamp(), False
+
+
+def _series_zone(value: str, params: Dict[str, str], default_tz: tzinfo) -> Optional[str]:
+    """The IANA zone a DTSTART is in, when it is a named zone other than UTC."""
+    value = value.strip()
+    if value.endswith("Z"):
+        return None
+    tz = default_tz if len(value) == 8 or params.get("VALUE") == "DATE" else (
+        resolve_timezone(params.get("TZID")) or default_tz)
+    return getattr(tz, "key", None) if isinstance(tz, ZoneInfo) else None
+
+
+def _duration(value: str) -> Optional[float]:
+    match = _DURATION.match(value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    total = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0)).total_seconds()
+    return -total if sign == "-" else total
+
+
+def _ics_text(value: str) -> str:
+    return _ICS_UNESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _ics_event(props: Dict[str, Any], student_id: Optional[str], default_tz: tzinfo) -> Event:
+    """Builds an Event from one VEVENT's properties. Raises KeyError/ValueError when DTSTART is unusable."""
+    value, params = props["DTSTART"]
+    start_ts, is_date = _ics_time(value, params, default_tz)
+    end_ts = None
+    if "DTEND" in props:
+        end_ts = _ics_time(*props["DTEND"], default_tz)[0]
+    elif "DURATION" in props and _duration(props["DURATION"]) is not None:
+        end_ts = start_ts + _duration(props["DURATION"])
+    elif is_date:
+        end_ts = start_ts + 86400
+    summary = _ics_text(props.get("SUMMARY", ""))
+
+    recurrence = None
+    if props.get("RRULE"):
+        lines = [f"RRULE:{rule}" for rule in props["RRULE"]]
+        zone = _series_zone(value, params, default_tz)
+        if zone:
+            # The series repeats on local weekdays at its local time of day, so its zone travels with it.
+            lines.insert(0, f"DTSTART;TZID={zone}:{value.strip()}")
+        for stamps, exparams in props.get("EXDATE", ()):
+            # Excluded times are stored in UTC so the recurrence expander can match them;
+            # excluded dates stay local dates, matched against the series' local date.
+            converted = [(stamp.strip(), *_ics_time(stamp, exparams, default_tz))
+                         for stamp in stamps.split(",") if stamp.strip()]
+            lines.append("EXDATE:" + ",".join(stamp[:8] if date else _utc_stamp(ts) for stamp, ts, date in converted))
+        recurrence = "\n".join(lines)
+
+    event_id = props.get("UID")
+    if "RECURRENCE-ID" in props and event_id:
+        # A moved/edited instance of a series gets the instance id `expand` would give it.
+        event_id = f"{event_id}_{_utc_stamp(_ics_time(*props['RECURRENCE-ID'], default_tz)[0])}"
+    extra = tuple((key, _ics_text(props[prop])) for key, prop in (("location", "LOCATION"),
+                                                                   ("description", "DESCRIPTION")) if prop in props)
+    return Event(summary, start_ts, end_ts, student_id, event_id or _fallback_id(summary, start_ts, student_id),
+                 recurrence, extra)
+
+
+def iter_ics_events(lines: Iterable[str], student_id: Optional[str] = None, default_tz: tzinfo = timezone.utc,
+                    stats: Optional[ImportStats] = None) -> Iterator[Event]:
+    """
+    Streams VEVENTs from iCalendar text, one line at a time, as Event records.
+    Times are converted to UTC as they are read: `Z` times directly, TZID
+    times through a cached zone lookup, floating times and all-day dates in
+    `default_tz`. RRULE/EXDATE become the event's `recurrence` (expanded
+    lazily by the data store); a series in a named zone also keeps a
+    `DTSTART;TZID=` line, so it repeats on local weekdays at its local time
+    of day. Cancelled
+    events and events without a usable DTSTART are skipped. An edited
+    instance (RECURRENCE-ID) is imported as its own event next to the series.
+    """
+    stats = stats if stats is not None else ImportStats()
+    props: Optional[Dict[str, Any]] = None
+    depth = 0       # nested components inside a VEVENT (VALARM)
+    for line in _unfold(lines):
+        if not line:
+            continue
+        if line.startswith(("BEGIN:", "END:")):
+            component = line[line.index(":") + 1:].strip().upper()
+            if line.startswith("BEGIN:"):
+                if component == "VEVENT" and props is None:
+                    props = {}
+                elif props is not None:
+                    depth += 1
+            elif props is not None:
+                if depth:
+                    depth -= 1
+                elif component == "VEVENT":
+                    if props.get("STATUS", "").upper() == "CANCELLED":
+                        stats.skipped += 1
+                    else:
+                        try:
+                            event = _ics_event(props, student_id, default_tz)
+                        except (KeyError, ValueError, TypeError, IndexError):
+                            stats.skipped += 1
+                            logger.debug("Skipping VEVENT without a usable DTSTART", extra={"uid": props.get("UID")})
+                        else:
+                            stats.records += 1
+                            yield event
+                    props = None
+            continue
+        if props is None or depth:
+            continue
+        name, params, value = _content_line(line)
+        if name in ("DTSTART", "DTEND", "RECURRENCE-ID"):
+            props[name] = (value, params)
+        elif name in ("RRULE", "EXDATE"):
+            props.setdefault(name, []).append(value if name == "RRULE" else (value, params))
+        elif name in ("UID", "SUMMARY", "DURATION", "STATUS", "LOCATION", "DESCRIPTION"):
+            props[name] = value
+
+
+# --- CSV -----------------------------------------------------------------------
+class _DateTimeParser:
+    """
+    Parses CSV date/time cells in `tz`, trying the format that matched last
+    first. Exports repeat the same few dates and times on many rows, so each
+    distinct cell is parsed and converted to UTC once (up to `cache_size`).
+    """
+    def __init__(self, tz: tzinfo, cache_size: int = 1 << 16):
+        self.tz = tz
+        self.formats = list(CSV_DATETIME_FORMATS)
+        self.cache_size = cache_size
+        self._cache: Dict[str, Tuple[float, bool]] = {}
+
+    def __call__(self, text: str) -> Tuple[float, bool]:
+        cached = self._cache.get(text)
+        if cached is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            cached = self._cache[text] = self._parse(text)
+        return cached
+
+    def _parse(self, text: str) -> Tuple[float, bool]:
+        text = text.strip()
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            has_time = "T" in text or " " in text or ":" in text
+        except ValueError:
+            dt, has_time = self._strptime(text)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=self.tz)
+        return dt.timestamp(), not has_time
+
+    def _strptime(self, text: str) -> Tuple[datetime, bool]:
+        for i, fmt in enumerate(self.formats):
+            try:
+                dt = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            return dt, "%H" in fmt or "%I" in fmt
+        raise ValueError(f"unrecognized date/time: {text!r}")
+
+
+def _csv_columns(header: List[str]) -> Dict[str, int]:
+    """Maps our field names to column positions for a CSV header."""
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    return columns
+
+
+def iter_csv_events(lines: Iterable[str], student_id: Optional[str] = None, default_tz: tzinfo = timezone.utc,
+                    stats: Optional[ImportStats] = None) -> Iterator[Event]:
+    """
+    Streams events from a CSV export (Google Calendar / Outlook columns such
+    as `Subject, Start Date, Start Time, End Date, End Time, All Day Event`,
+    or ISO-8601 `start`/`end`) as Event records. Times without an offset are
+    in `default_tz`. Rows without a parseable start are skipped.
+    """
+    stats = stats if stats is not None else ImportStats()
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _csv_columns(header)
+    if "start_date" not in columns:
+        raise ValueError(f"CSV calendar has no start column (header: {header})")
+    parse = _DateTimeParser(default_tz)
+    # Every field's column (missing fields read an empty padding cell), unpacked once per row.
+    fields = tuple(CSV_COLUMNS)
+    width = len(header)
+    positions = [columns.get(field, width) for field in fields]
+    padding = [""] * (width + 1)
+
+    for row in reader:
+        if not any(row):
+            continue
+        cells = (row + padding)[:width + 1] if len(row) != width + 1 else row
+        (summary, start_date, start_time, end_date, end_time, all_day, record_id, recurrence, location,
+         description) = [cells[i].strip() for i in positions]
+        try:
+            start_ts, is_date = parse(f"{start_date} {start_time}" if start_time else start_date)
+            if end_time:
+                end_ts = parse(f"{end_date or start_date} {end_time}")[0]
+            else:
+                end_ts = parse(end_date)[0] if end_date else None
+        except (ValueError, IndexError):
+            stats.skipped += 1
+            logger.debug("Skipping CSV row without a usable start")
+            continue
+        if (all_day.lower() in ("true", "yes", "1") or is_date) and (end_ts is None or end_ts <= start_ts):
+            end_ts = start_ts + 86400
+        if recurrence and not recurrence.upper().startswith("RRULE:"):
+            recurrence = "RRULE:" + recurrence
+        extra = ()
+        if location or description:
+            extra = tuple((key, value) for key, value in (("location", location), ("description", description))
+                          if value)
+        stats.records += 1
+        yield Event(summary, start_ts, end_ts, student_id,
+                    record_id or _fallback_id(summary, start_ts, student_id), recurrence or None, extra)
+
+
+# --- Sources -------------------------------------------------------------------
+def detect_format(name: Optional[str], first_line: str = "") -> str:
+    """`ics` or `csv`, from the file name's suffix or else from its first line."""
+    suffix = Path(name).suffix.lower().lstrip(".") if name else ""
+    if suffix in ("ics", "ical", "ifb", "icalendar"):
+        return "ics"
+    if suffix == "csv":
+        return "csv"
+    return "ics" if first_line.lstrip("﻿").strip().upper().startswith("BEGIN:VCALENDAR") else "csv"
+
+
+@contextmanager
+def open_lines(source: Source):
+    """
+    A text line iterator over a path or an open file (text or binary, e.g. a
+    Streamlit upload). A UTF-8 BOM is dropped; newlines are left to the parsers.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "r", encoding="utf-8-sig", newline="") as fp:
+            yield fp
+        return
+    if isinstance(source, io.TextIOBase):
+        yield source
+        return
+    wrapper = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        yield wrapper
+    finally:
+        wrapper.detach()    # leave the caller's stream open
+
+
+def _counted(lines: Iterable[str], stats: ImportStats) -> Iterator[str]:
+    for line in lines:
+        stats.lines += 1
+        stats.bytes_read += len(line)
+        yield line
+
+
+def iter_calendar_events(source: Source, fmt: Optional[str] = None, student_id: Optional[str] = None,
+                         default_tz: Optional[tzinfo] = None, stats: Optional[ImportStats] = None,
+                         name: Optional[str] = None) -> Iterator[Event]:
+    """
+    Streams Event records from an `.ics` or `.csv` file; `fmt` is detected
+    from `name` (or the path) and the first line when not given. Nothing but
+    the current line and event is held in memory.
+    """
+    stats = stats if stats is not None else ImportStats()
+    default_tz = default_tz or timezone.utc
+    started = time.perf_counter()
+    with open_lines(source) as fp:
+        lines = _counted(fp, stats)
+        first = next(lines, "")
+        fmt = fmt or detect_format(name or (str(source) if isinstance(source, (str, Path)) else None), first)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported calendar format: {fmt}")
+        parser = iter_ics_events if fmt == "ics" else iter_csv_events
+        yield from parser(_chain_first(first, lines), student_id, default_tz, stats)
+    stats.seconds = time.perf_counter() - started
+
+
+def _chain_first(first: str, rest: Iterator[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from rest
+
+
+def import_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    """The `calendar_import` config section over the defaults; the timezone falls back to scheduling's."""
+    config = config or {}
+    settings = {**_DEFAULTS, **(config.get("calendar_import") or {})}
+    if not settings["default_timezone"]:
+        settings["default_timezone"] = config.get("scheduling", {}).get("timezone", "UTC")
+    return settings
+
+
+def import_calendar(data_manager: Any, source: Source, fmt: Optional[str] = None, student_id: Optional[str] = None,
+                    settings: Optional[Dict[str, Any]] = None, name: Optional[str] = None) -> ImportStats:
+    """
+    Streams a calendar export into a data store (in-memory or SQLite) via its
+    `import_events`, which takes the events in `chunk_size` batches. Returns
+    the import's throughput figures.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    default_tz = resolve_timezone(settings["default_timezone"]) or timezone.utc
+    stats = ImportStats()
+    events = iter_calendar_events(source, fmt, student_id, default_tz, stats, name=name)
+    data_manager.import_events(events, chunk_size=int(settings["chunk_size"]))
+    logger.info("Calendar imported", extra={
+        "records": stats.records, "skipped": stats.skipped, "lines": stats.lines,
+        "lines_per_second": round(stats.lines_per_second),
+    })
+    return stats
+
+
+# ==============================================================================
+# ✅ CLI / TEST BLOCK
+# Import an export into the data store (or convert it to calendar JSON):
+#   python -m app.services.calendar_import import semester.ics --student-id student_123 --db data/atlas.db
+#   python -m app.services.calendar_import import semester.csv --tz Europe/Berlin --output data/calendar.json
+# Run the self-test:
+#   python -m app.services.calendar_import test
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from app.services.data_manager import DataManager
+    from app.services.sqlite_store import SQLiteDataManager
+    from app.utils.config_loader import load_config
+
+    parser = argparse.ArgumentParser(description="Streaming .ics/.csv calendar import.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Stream a calendar export into a store or a calendar JSON file.")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=FORMATS)
+    importer.add_argument("--student-id")
+    importer.add_argument("--tz", help="Timezone for times without one (default: config).")
+    importer.add_argument("--db", help="SQLite database to append the events to.")
+    importer.add_argument("--output", help="Write the events as a calendar JSON document instead.")
+    sub.add_parser("test", help="Parse sample ICS and CSV documents.")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        settings = import_settings(load_config())
+        if args.tz:
+            settings["default_timezone"] = args.tz
+        if args.output:
+            stats = ImportStats()
+            tz = resolve_timezone(settings["default_timezone"]) or timezone.utc
+            with open(args.output, "w", encoding="utf-8") as out:
+                out.write('{"events": [\n')
+                for i, event in enumerate(iter_calendar_events(args.path, args.format, args.student_id, tz, stats)):
+                    out.write((",\n" if i else "") + json.dumps(event.to_dict()))
+                out.write("\n]}\n")
+        else:
+            store = SQLiteDataManager(args.db) if args.db else DataManager()
+            stats = import_calendar(store, args.path, args.format, args.student_id, settings)
+            if args.db:
+                store.close()
+        print(f"✅ {stats.records:,} events ({stats.skipped:,} skipped) from {stats.lines:,} lines in "
+              f"{stats.seconds:.2f}s ({stats.lines_per_second:,.0f} lines/s)")
+    else:
+        print("\n--- Running Calendar Import Test ---")
+        ics = "\r\n".join([
+            "BEGIN:VCALENDAR", "VERSION:2.0",
+            "BEGIN:VTIMEZONE", "TZID:America/New_York", "BEGIN:STANDARD", "DTSTART:19701101T020000",
+            "END:STANDARD", "END:VTIMEZONE",
+            "BEGIN:VEVENT", "UID:cogpsy", "SUMMARY:Cognitive Psychology Lecture",
+            "DTSTART;TZID=America/New_York:20250901T090000", "DTEND;TZID=America/New_York:20250901T101500",
+            "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251212T235959Z",
+            "EXDATE;TZID=America/New_York:20250903T090000",
+            "DESCRIPTION:Room 101\\, bring the\\n textbook", "BEGIN:VALARM", "DTSTART:20250101T000000Z",
+            "END:VALARM", "END:VEVENT",
+            "BEGIN:VEVENT", "UID:club", "SUMMARY:Neuroscience Club", "  Meeting",
+            "DTSTART:20250902T160000Z", "DURATION:PT1H30M", "END:VEVENT",
+            "BEGIN:VEVENT", "UID:cancelled", "SUMMARY:Gone", "DTSTART:20250903T160000Z",
+            "STATUS:CANCELLED", "END:VEVENT",
+            "BEGIN:VEVENT", "SUMMARY:Reading Day", "DTSTART;VALUE=DATE:20250905", "END:VEVENT",
+            "END:VCALENDAR", "",
+        ])
+        stats = ImportStats()
+        events = list(iter_calendar_events(io.BytesIO(ics.encode()), student_id="student_123", stats=stats,
+                                           name="semester.ics"))
+        assert [e.summary for e in events] == ["Cognitive Psychology Lecture", "Neuroscience Club Meeting",
+                                               "Reading Day"], events
+        lecture, club, reading = events
+        assert lecture.start == datetime(2025, 9, 1, 13, 0, tzinfo=timezone.utc)     # 09:00 EDT
+        assert lecture.end_ts - lecture.start_ts == 4500
+        assert lecture.recurrence.splitlines()[0] == "DTSTART;TZID=America/New_York:20250901T090000"
+        assert lecture.recurrence.splitlines()[2] == "EXDATE:20250903T130000Z"
+        assert dict(lecture.extra)["description"] == "Room 101, bring the\n textbook"
+        assert club.end_ts - club.start_ts == 5400 and club.id == "club"
+        assert reading.end_ts - reading.start_ts == 86400 and reading.id.startswith("import_")
+        assert stats.skipped == 1 and stats.records == 3
+
+        csv_text = ("Subject,Start Date,Start Time,End Date,End Time,All Day Event,Location\n"
+                    "Stats Study Group,09/02/2025,10:00 AM,09/02/2025,11:30 AM,False,Library\n"
+                    "Broken,not a date,,,,False,\n"
+                    "Midterm Week,09/15/2025,,09/20/2025,,True,\n")
+        csv_events = list(iter_csv_events(io.StringIO(csv_text), default_tz=ZoneInfo("Europe/Berlin")))
+        assert [e.summary for e in csv_events] == ["Stats Study Group", "Midterm Week"]
+        assert csv_events[0].start == datetime(2025, 9, 2, 8, 0, tzinfo=timezone.utc)      # 10:00 CEST
+        assert dict(csv_events[0].extra) == {"location": "Library"}
+
+        data_manager = DataManager()
+        imported = import_calendar(data_manager, io.StringIO(ics), "ics", "student_123", {"chunk_size": 2})
+        again = import_calendar(data_manager, io.StringIO(ics), "ics", "student_123")
+        week = data_manager.get_events_between(datetime(2025, 9, 1, tzinfo=timezone.utc),
+                                               datetime(2025, 9, 7, tzinfo=timezone.utc), "student_123")
+        assert [e.summary for e in week].count("Cognitive Psychology Lecture") == 1, week     # Wednesday excluded
+        assert len(data_manager.calendar_data["events"]) == 3 and again.records == 3
+
+        # An evening class in a US zone starts the next day in UTC; it must still repeat on its local weekdays.
+        evening_ics = "\r\n".join([
+            "BEGIN:VCALENDAR", "BEGIN:VEVENT", "UID:evening", "SUMMARY:Evening Seminar",
+            "DTSTART;TZID=America/New_York:20250901T200000", "DURATION:PT1H",
+            "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4", "EXDATE;VALUE=DATE:20250908", "END:VEVENT",
+            "BEGIN:VEVENT", "UID:winter", "SUMMARY:Winter Seminar",
+            "DTSTART;TZID=America/New_York:20251029T200000", "DURATION:PT1H",
+            "RRULE:FREQ=WEEKLY;COUNT=2", "END:VEVENT", "END:VCALENDAR", "",
+        ])
+        evening_store = DataManager()
+        import_calendar(evening_store, io.StringIO(evening_ics), "ics", "student_123")
+        seminars = evening_store.get_events_between(datetime(2025, 8, 1, tzinfo=timezone.utc),
+                                                    datetime(2025, 12, 1, tzinfo=timezone.utc))
+        new_york = ZoneInfo("America/New_York")
+        local = [e.start.astimezone(new_york) for e in seminars]
+        assert [(d.strftime("%a %m-%d %H:%M")) for d in local] == [
+            "Mon 09-01 20:00", "Wed 09-03 20:00", "Wed 09-10 20:00",       # Monday 09-08 excluded
+            "Wed 10-29 20:00", "Wed 11-05 20:00",                          # 20:00 local across the DST change
+        ], local
+        assert seminars[0].start == datetime(2025, 9, 2, 0, 0, tzinfo=timezone.utc)
+        assert seminars[-1].start == datetime(2025, 11, 6, 1, 0, tzinfo=timezone.utc)
+        print(f"   -> {imported.records} ICS events, {len(csv_events)} CSV events, {len(week)} in the first week.")
+        print("\n✅ Calendar import test passed!")
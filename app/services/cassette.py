@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# Run IDs, tool-call IDs and UUIDs change on every run but leak into prompts
+# (the senior agent renders its message history into the prompt string).
+_VOLATILE_IDS = re.compile(
+    r"(?:run-)?[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(?:-\d+)?"
+    r"|call_[A-Za-z0-9]+"
+)
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _normalize_text(text: Any) -> Any:
+    if not isinstance(text, str):
+        return text
+    return _VOLATILE_IDS.sub("<id>", _TRAILING_SPACE.sub("\n", text)).strip()
+
+
+def normalize_messages(messages: List[BaseMessage]) -> List[Dict]:
+    """Reduces messages to the fields that determine the model's answer."""
+    normalized = []
+    for message in messages:
+        entry = {"type": message.type, "content": _normalize_text(message.content)}
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            entry["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in tool_calls]
+        normalized.append(entry)
+    return normalized
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keeps request parameters in a provider-independent form. Tools are reduced
+    to their names because each provider formats bound schemas differently.
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if key == "tools":
+            value = sorted(
+                t.get("function", t).get("name") if isinstance(t, dict) else getattr(t, "name", str(t))
+                for t in value
+            )
+        normalized[key] = value
+    return normalized
+
+
+def request_key(model: str, messages: List[Dict], params: Dict[str, Any]) -> str:
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    A JSON-lines file of recorded LLM interactions. Each line holds the request
+    key, the normalized request, the response (a message, or vectors for
+    embedding calls) and the observed latency. Identical requests recorded more
+    than once are replayed in recording order.
+    """
+    def __init__(self, path: str, mode: str):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette not found at: {self.path}")
+        with open(self.path, "r", encoding="utf-8") as fp:
+            for line in fp:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info("Cassette loaded", extra={"path": str(self.path), "requests": len(self._entries)})
+
+    def record(self, key: str, request: Dict, response: Any, latency_ms: float) -> None:
+        line = json.dumps({
+            "key": key,
+            "request": request,
+            "response": message_to_dict(response) if isinstance(response, BaseMessage) else response,
+            "latency_ms": round(latency_ms, 3),
+        }, separators=(",", ":"), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fp:
+            fp.write(line + "\n")
+
+    def replay(self, key: str) -> Dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"No recorded response for request {key} in {self.path}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every call is recorded to, or served from, a cassette.
+    In replay mode no underlying model is needed and nothing touches the network.
+    """
+    cassette: Any
+    model_name: str
+    inner: Optional[Any] = None
+    replay_timing: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _request(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict) -> Dict:
+        return {
+            "model": self.model_name,
+            "messages": normalize_messages(messages),
+            "params": normalize_params({"stop": stop, **kwargs}),
+        }
+
+    def _from_cassette(self, key: str) -> Tuple[ChatResult, float]:
+        entry = self.cassette.replay(key)
+        message = messages_from_dict([entry["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)]), entry["latency_ms"]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        request = self._request(messages, stop, kwargs)
+        key = request_key(**request)
+        if self.cassette.mode == "replay":
+            result, latency_ms = self._from_cassette(key)
+            if self.replay_timing:
+                time.sleep(latency_ms / 1000)
+            return result
+        start = time.perf_counter()
+        response = self.inner.invoke(messages, stop=stop, **kwargs)
+        self.cassette.record(key, request, response, (time.perf_counter() - start) * 1000)
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        request = self._request(messages, stop, kwargs)
+        key = request_key(**request)
+        if self.cassette.mode == "replay":
+            result, latency_ms = self._from_cassette(key)
+            if self.replay_timing:
+                await asyncio.sleep(latency_ms / 1000)
+            return result
+        start = time.perf_counter()
+        response = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self.cassette.record(key, request, response, (time.perf_counter() - start) * 1000)
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any) -> Any:
+        if self.inner is not None:
+            # Let the real provider format the schemas, but keep calls flowing through the cassette.
+            return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+class CassetteEmbeddings(Embeddings):
+    """
+    Wraps an embedding model the same way CassetteChatModel wraps a chat model,
+    so retrieval and the advice library are offline and deterministic on replay.
+    """
+    def __init__(self, cassette: Cassette, model_name: str, inner: Optional[Embeddings] = None,
+                 replay_timing: bool = False):
+        self.cassette = cassette
+        self.model_name = model_name
+        self.inner = inner
+        self.replay_timing = replay_timing
+
+    def _request(self, texts: List[str], method: str) -> Dict:
+        return {
+            "model": self.model_name,
+            "messages": [_normalize_text(text) for text in texts],
+            "params": {"embedding": method},
+        }
+
+    def _from_cassette(self, key: str) -> Tuple[Any, float]:
+        entry = self.cassette.replay(key)
+        return entry["response"], entry["latency_ms"]
+
+    def _embed(self, texts: List[str], method: str) -> Any:
+        request = self._request(texts, method)
+        key = request_key(**request)
+        if self.cassette.mode == "replay":
+            vectors, latency_ms = self._from_cassette(key)
+            if self.replay_timing:
+                time.sleep(latency_ms / 1000)
+            return vectors
+        start = time.perf_counter()
+        vectors = getattr(self.inner, method)(texts if method == "embed_documents" else texts[0])
+        self.cassette.record(key, request, vectors, (time.perf_counter() - start) * 1000)
+        return vectors
+
+    async def _aembed(self, texts: List[str], method: str) -> Any:
+        request = self._request(texts, method)
+        key = request_key(**request)
+        if self.cassette.mode == "replay":
+            vectors, latency_ms = self._from_cassette(key)
+            if self.replay_timing:
+                await asyncio.sleep(latency_ms / 1000)
+            return vectors
+        start = time.perf_counter()
+        vectors = await getattr(self.inner, f"a{method}")(texts if method == "embed_documents" else texts[0])
+        self.cassette.record(key, request, vectors, (time.perf_counter() - start) * 1000)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "embed_documents")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "embed_query")
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed(list(texts), "embed_documents")
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._aembed([text], "embed_query")
@@ -0,0 +1,118 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FileChangeFeed:
+    """
+    A local stand-in for a calendar/task sync source: a JSON-lines file where
+    each line is `{"seq": <n>, "delta": <DataManager.apply_delta payload>}`.
+    Writers append lines; `sync` tails the file from the last byte it read and
+    applies only the new, complete lines, so each sync costs O(changes)
+    regardless of how much data is loaded.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.last_seq = 0
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def append(self, delta: Dict[str, Any]) -> int:
+        """Appends a delta and returns its sequence number."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            seq = self._last_written_seq() + 1
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"seq": seq, "delta": delta}, separators=(",", ":")) + "\n")
+            return seq
+
+    def _last_written_seq(self) -> int:
+        if not self.path.exists():
+            return 0
+        with open(self.path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - 65536))
+            lines = f.read().splitlines()
+        for line in reversed(lines):
+            try:
+                return int(json.loads(line)["seq"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        return 0
+
+    def read_new(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        (seq, delta) pairs appended since the last read. A trailing line that
+        is still being written is left for the next call; malformed lines and
+        entries at or below `last_seq` are skipped.
+        """
+        if not self.path.exists():
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        self._offset += complete
+        entries = []
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                seq, delta = int(entry["seq"]), entry["delta"]
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping malformed change feed line", extra={"path": str(self.path)})
+                continue
+            if seq > self.last_seq:
+                entries.append((seq, delta))
+                self.last_seq = seq
+        return entries
+
+    def sync(self, data_manager: Any) -> int:
+        """Applies the new deltas to `data_manager`; returns the number of records changed."""
+        with self._lock:
+            changed = 0
+            for _, delta in self.read_new():
+                changed += data_manager.apply_delta(delta)
+        if changed:
+            logger.info("Change feed synced", extra={"changed": changed, "seq": self.last_seq})
+        return changed
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.change_feed` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    from app.services.data_manager import DataManager
+
+    print("\n--- Running FileChangeFeed Test ---")
+    data_manager = DataManager()
+    data_manager.load_data('{"profiles": [{"id": "student_1"}]}', '{"events": []}', '{"tasks": []}')
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = FileChangeFeed(Path(tmp) / "changes.jsonl")
+        assert feed.sync(data_manager) == 0
+        event = {"id": "e1", "summary": "Lab", "student_id": "student_1",
+                 "start": {"dateTime": "2025-09-01T09:00:00Z"}, "end": {"dateTime": "2025-09-01T11:00:00Z"}}
+        assert feed.append({"events": {"upsert": [event]}}) == 1
+        assert feed.append({"tasks": {"upsert": [{"id": "t1", "title": "Report", "due": "2025-09-02T12:00:00Z",
+                                                  "status": "needsAction", "student_id": "student_1"}]}}) == 2
+        with open(feed.path, "a") as f:
+            f.write('{"seq": 3, "delta": {"events": {"delete": ["e1"]}}')     # not finished yet
+        assert feed.sync(data_manager) == 2 and feed.last_seq == 2
+        assert len(data_manager.calendar_data["events"]) == 1 and len(data_manager.task_data["tasks"]) == 1
+        with open(feed.path, "a") as f:
+            f.write("}\n")
+        assert feed.sync(data_manager) == 1 and feed.last_seq == 3
+        assert len(data_manager.calendar_data["events"]) == 0
+        assert feed.append({"events": {"delete": ["e1"]}}) == 4
+        print(f"   -> synced to seq {feed.last_seq}, data version {data_manager.version}.")
+    print("\n✅ FileChangeFeed test passed!")
@@ -1,74 +1,597 @@
-import json
+import heapq
+import io
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict
+from itertools import count
+from operator import attrgetter
+from typing import Any, Hashable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # columnar (cohort) queries are optional
+    np = None
+
+from app.core.records import Event, Task, parse_datetime
+from app.core.rwlock import ReadWriteLock
+from app.core.sorted_index import SortedIndex
+from app.services.json_stream import LoadStats, Source, iter_json_array, open_source
+from app.services.recurrence import RecurrenceRule, expand, rule_for
+from app.services.scheduling import CalendarAvailability, analyze_calendar
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Task status codes used by the columnar store; anything else maps to OTHER.
+TASK_STATUS_CODES = {"needsAction": 0, "completed": 1}
+TASK_STATUS_OTHER = 2
+NO_STUDENT = -1
+
+# A recurring event with its parsed rule and an upper bound on its last start (None: forever).
+Series = Tuple[Event, RecurrenceRule, Optional[float]]
+_start_ts = attrgetter("start_ts")
+
+# Delta sections, in the order `apply_delta` applies them.
+DELTA_KINDS = ("profiles", "events", "tasks")
+
+# How far past "now" the columnar store expands recurring series when it is built.
+COLUMNAR_HORIZON_DAYS = 365
+
+
+@dataclass
+class EventWindow:
+    """
+    Cohort events starting inside a time window. `start`, `end` and `student`
+    are views into the columnar arrays; row i is event `offset + i`.
+    """
+    start: Any
+    end: Any
+    student: Any
+    offset: int
+    store: "ColumnarStore"
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def counts_per_student(self) -> Any:
+        """Number of events per student index (events without a student are ignored)."""
+        owned = self.student[self.student >= 0]
+        return np.bincount(owned, minlength=len(self.store.student_ids))
+
+    def records(self) -> List[Event]:
+        return self.store.events[self.offset:self.offset + len(self.start)]
+
+
+@dataclass
+class TaskSelection:
+    """
+    Cohort tasks matching a status and due window. `due` and `student` are
+    views over the due-date window; `mask` selects the matching status within it.
+    """
+    due: Any
+    student: Any
+    mask: Any
+    offset: int
+    store: "ColumnarStore"
+
+    def __len__(self) -> int:
+        return int(self.mask.sum())
+
+    def rows(self) -> Any:
+        return np.flatnonzero(self.mask) + self.offset
+
+    def counts_per_student(self) -> Any:
+        owned = self.student[self.mask & (self.student >= 0)]
+        return np.bincount(owned, minlength=len(self.store.student_ids))
+
+    def records(self) -> List[Task]:
+        return [self.store.tasks[i] for i in self.rows()]
+
+
+class ColumnarStore:
+    """
+    A struct-of-arrays copy of every event and task for cohort-wide queries.
+    Timestamps are int64 epoch seconds, students are int32 indexes into
+    `student_ids` and task statuses are int8 codes. Events are ordered by start
+    and tasks by due date, so time windows are contiguous slices (views) and
+    status filters are a single vectorized mask.
+    """
+    def __init__(self, student_ids: List[str], events: List[Event], tasks: List[Task],
+                 expanded_until: float = float("inf")):
+        """
+        `events` must be sorted by start and `tasks` by due date. Recurring
+        series are passed in as their occurrences up to `expanded_until`.
+        """
+        if np is None:
+            raise ImportError("numpy is required for columnar DataManager queries")
+        self.expanded_until = expanded_until
+        self.student_ids = list(student_ids)
+        self._student_index = {sid: i for i, sid in enumerate(self.student_ids)}
+
+        self.events = events
+        self.event_start = np.fromiter((e.start_ts for e in events), dtype=np.int64, count=len(events))
+        self.event_end = np.fromiter(
+            (e.start_ts if e.end_ts is None else e.end_ts for e in events), dtype=np.int64, count=len(events)
+        )
+        self.event_student = np.fromiter((self._student(e) for e in events), dtype=np.int32, count=len(events))
+
+        self.tasks = tasks
+        self.task_due = np.fromiter((t.due_ts for t in tasks), dtype=np.int64, count=len(tasks))
+        self.task_student = np.fromiter((self._student(t) for t in tasks), dtype=np.int32, count=len(tasks))
+        self.task_status = np.fromiter(
+            (TASK_STATUS_CODES.get(t.status, TASK_STATUS_OTHER) for t in tasks),
+            dtype=np.int8, count=len(tasks),
+        )
+
+    def _student(self, record: Union[Event, Task]) -> int:
+        student_id = record.student_id
+        if student_id is None:
+            return NO_STUDENT
+        if student_id not in self._student_index:
+            self._student_index[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+        return self._student_index[student_id]
+
+    def events_between(self, start: datetime, end: datetime) -> EventWindow:
+        lo = int(np.searchsorted(self.event_start, int(start.timestamp()), side="left"))
+        hi = int(np.searchsorted(self.event_start, int(end.timestamp()), side="right"))
+        return EventWindow(self.event_start[lo:hi], self.event_end[lo:hi], self.event_student[lo:hi], lo, self)
+
+    def tasks_due(self, status: str, due_after: Optional[datetime] = None,
+                  due_before: Optional[datetime] = None) -> TaskSelection:
+        lo = int(np.searchsorted(self.task_due, int(due_after.timestamp()), side="right")) if due_after else 0
+        hi = (int(np.searchsorted(self.task_due, int(due_before.timestamp()), side="right"))
+              if due_before else len(self.task_due))
+        code = TASK_STATUS_CODES.get(status, TASK_STATUS_OTHER)
+        return TaskSelection(self.task_due[lo:hi], self.task_student[lo:hi],
+                             self.task_status[lo:hi] == code, lo, self)
+
+def _parser(record_type: type):
+    """`record_type.from_dict` that passes already built records through."""
+    def parse(raw: Any) -> Any:
+        return raw if isinstance(raw, record_type) else record_type.from_dict(raw)
+    return parse
+
+
+def _owner(kind: str, record: Union[Dict, Event, Task]) -> Optional[str]:
+    """The student a record belongs to (None: shared with everyone)."""
+    return record.get("id") if kind == "profiles" else record.student_id
+
+
+def _owned_by(records: List[Any], student_id: Optional[str]) -> List[Any]:
+    """Keeps records belonging to `student_id`; records without a `student_id` are shared."""
+    if student_id is None:
+        return records
+    return [r for r in records if r.student_id in (student_id, None)]
+
 
 class DataManager:
     """
     A centralized data management system for AI agents.
+
+    Lookup structures are built once while loading, so queries don't rescan
+    or re-parse the raw documents:
+    - profiles, events and tasks are hashed by id,
+    - events become immutable `Event` records, kept in a `SortedIndex` by
+      start time and range-queried by bisection,
+    - recurring events are kept once, as a series with its rule, and expanded
+      lazily into the occurrences inside each query window,
+    - tasks become immutable `Task` records, grouped by status and sorted by
+      due date.
+    Malformed events and tasks are skipped at load time.
+
+    After loading, `apply_delta` upserts and deletes individual records by id
+    in O(log n) each instead of reloading everything. `version` increases with
+    every load and every delta that changes something; `version_for` gives
+    the version a student's data last changed at, so downstream caches can be
+    keyed on it.
+
+    Loads and deltas take the write side of a reader/writer lock, so a sync
+    running in a worker thread never interleaves with readers; readers that
+    make several queries wrap them in `reading()` to see one consistent version.
     """
     def __init__(self):
         self.profile_data = None
         self.calendar_data = None
         self.task_data = None
-        print("✅ DataManager initialized.")
+        # id -> record, in load order; records without an id (or repeating
+        # one) get a private key so they are kept but can't be targeted by deltas
+        self._profiles_by_id: Dict[Hashable, Dict] = {}
+        self._events: Dict[Hashable, Event] = {}
+        self._tasks: Dict[Hashable, Task] = {}
+        self._anonymous = count()
+        # one-off events by start time
+        self._events_by_start: SortedIndex[Event] = SortedIndex()
+        # owner student_id (None: shared) -> event id -> recurring series
+        self._series: Dict[Optional[str], Dict[Hashable, Series]] = {}
+        # status -> tasks by due time
+        self._tasks_by_status: Dict[str, SortedIndex[Task]] = {}
+        self._columnar: Optional[ColumnarStore] = None
+        self.version = 0
+        self._load_version = 0
+        # owner student_id (None: shared records) -> version of its last change
+        self._versions: Dict[Optional[str], int] = {}
+        self._lock = ReadWriteLock()
+        logger.info("DataManager initialized.")
+
+
+    def reading(self):
+        """Holds off loads and deltas for the enclosed queries; don't nest it."""
+        return self._lock.read()
 
 
     def load_data(self, profile_json: str, calendar_json: str, task_json: str):
         """Loads and parses JSON data sources."""
-        self.profile_data = json.loads(profile_json)
-        self.calendar_data = json.loads(calendar_json)
-        self.task_data = json.loads(task_json)
-        print("✅ Profile, Calendar, and Task data loaded.")
+        self.load_files(io.StringIO(profile_json), io.StringIO(calendar_json), io.StringIO(task_json))
+
+
+    def load_files(self, profile_source: Source, calendar_source: Source, task_source: Source,
+                   use_mmap: bool = False, chunk_size: int = 1 << 16) -> Dict[str, LoadStats]:
+        """
+        Streams profiles, events and tasks from paths or file-like objects,
+        indexing each record as it is decoded, so peak memory is the indexed
+        records plus one read buffer rather than the whole document. Paths can
+        optionally be memory-mapped. Returns per-source throughput figures.
+        """
+        with self._lock.write():
+            return self._load_files(profile_source, calendar_source, task_source, use_mmap, chunk_size)
+
+
+    def _load_files(self, profile_source: Source, calendar_source: Source, task_source: Source,
+                    use_mmap: bool, chunk_size: int) -> Dict[str, LoadStats]:
+        self._reset_indexes()
+        stats = {name: LoadStats() for name in ("profiles", "events", "tasks")}
+        sources = [
+            ("profiles", profile_source, self._index_profile),
+            ("events", calendar_source, self._index_event),
+            ("tasks", task_source, self._index_task),
+        ]
+        for key, source, index_record in sources:
+            with open_source(source, use_mmap=use_mmap) as fp:
+                for record in iter_json_array(fp, key=key, chunk_size=chunk_size, stats=stats[key]):
+                    index_record(record)
+            logger.info("Streamed %s", key, extra={
+                "records": stats[key].records,
+                "records_per_second": round(stats[key].records_per_second),
+                "mb_per_second": round(stats[key].megabytes_per_second, 2),
+            })
+        self._finalize_indexes()
+        logger.info("Profile, Calendar, and Task data loaded.")
+        return stats
+
+
+    def _reset_indexes(self):
+        self._profiles_by_id, self._events, self._tasks = {}, {}, {}
+        # Live views: they follow the records through later deltas.
+        self.profile_data = {"profiles": self._profiles_by_id.values()}
+        self.calendar_data = {"events": self._events.values()}
+        self.task_data = {"tasks": self._tasks.values()}
+        self._columnar = None
+
+
+    def _key(self, records: Dict[Hashable, Any], record_id: Any) -> Hashable:
+        """The record's id, or a private key when it has none or the id is taken (first occurrence wins)."""
+        if record_id is None or record_id in records:
+            return ("anonymous", next(self._anonymous))
+        return record_id
+
+
+    def _index_profile(self, profile: Dict):
+        record_id = profile.get("id")
+        self._profiles_by_id[self._key(self._profiles_by_id, record_id)] = profile
+
+
+    def _index_event(self, event: Dict):
+        try:
+            record = Event.from_dict(event)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            logger.debug("Skipping calendar event with a malformed start time")
+            return
+        self._events[self._key(self._events, record.id)] = record
+
+
+    def _index_task(self, task: Dict):
+        try:
+            record = Task.from_dict(task)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            logger.debug("Skipping task with a malformed due date")
+            return
+        self._tasks[self._key(self._tasks, record.id)] = record
+
+
+    def _finalize_indexes(self):
+        """Sorts the parsed records into the bisectable lookup structures."""
+        singles, self._series = [], {}
+        for key, event in self._events.items():
+            rule = rule_for(event)
+            if rule is None:
+                singles.append((event.start_ts, event))
+            else:
+                self._series.setdefault(event.student_id, {})[key] = (event, rule, rule.last_start(event.start_ts))
+        self._events_by_start = SortedIndex(singles)
+
+        by_status: Dict[str, List[Tuple[float, Task]]] = {}
+        for task in self._tasks.values():
+            by_status.setdefault(task.status, []).append((task.due_ts, task))
+        self._tasks_by_status = {status: SortedIndex(tasks) for status, tasks in by_status.items()}
+        self._columnar = None
+        self.version += 1
+        self._load_version, self._versions = self.version, {}
+        logger.debug("DataManager indexes built", extra={
+            "profiles": len(self._profiles_by_id),
+            "events": len(self._events_by_start),
+            "series": sum(len(series) for series in self._series.values()),
+            "tasks": len(self._tasks),
+            "version": self.version,
+        })
+
+
+    def _add_event(self, key: Hashable, event: Event):
+        self._events[key] = event
+        rule = rule_for(event)
+        if rule is None:
+            self._events_by_start.add(event.start_ts, event)
+        else:
+            self._series.setdefault(event.student_id, {})[key] = (event, rule, rule.last_start(event.start_ts))
+
+
+    def _drop_event(self, key: Hashable) -> Optional[Event]:
+        event = self._events.pop(key, None)
+        if event is None:
+            return None
+        series = self._series.get(event.student_id)
+        if series is not None and series.pop(key, None) is not None:
+            if not series:
+                del self._series[event.student_id]
+        else:
+            self._events_by_start.remove(event.start_ts, event)
+        return event
+
+
+    def _add_task(self, key: Hashable, task: Task):
+        self._tasks[key] = task
+        self._tasks_by_status.setdefault(task.status, SortedIndex()).add(task.due_ts, task)
+
+
+    def _drop_task(self, key: Hashable) -> Optional[Task]:
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            self._tasks_by_status[task.status].remove(task.due_ts, task)
+        return task
+
+
+    def _add_profile(self, key: Hashable, profile: Dict):
+        self._profiles_by_id[key] = profile
+
+
+    def _drop_profile(self, key: Hashable) -> Optional[Dict]:
+        return self._profiles_by_id.pop(key, None)
+
+
+    def apply_delta(self, delta: Dict[str, Dict[str, List]]) -> int:
+        """
+        Applies a change set without reloading:
+
+            {"events":   {"upsert": [<event>, ...], "delete": [<event id>, ...]},
+             "tasks":    {...},
+             "profiles": {...}}
+
+        Upserts are raw records in the load format (or already built `Event`
+        / `Task` records), matched by their `id`; within a section upserts are
+        applied before deletes. Each change
+        re-indexes only the affected record. Records without an id, malformed
+        records and deletes of unknown ids are skipped, and upserts identical
+        to the stored record are not counted as changes. Returns the number of
+        records changed; when it is non-zero `version` is bumped and the owning
+        students' versions are moved to it.
+        """
+        with self._lock.write():
+            return self._apply_delta(delta)
+
+
+    def _apply_delta(self, delta: Dict[str, Dict[str, List]]) -> int:
+        if self.calendar_data is None:
+            self._reset_indexes()
+            self._finalize_indexes()
+        handlers = {
+            "profiles": (self._profiles_by_id, dict, self._add_profile, self._drop_profile),
+            "events": (self._events, _parser(Event), self._add_event, self._drop_event),
+            "tasks": (self._tasks, _parser(Task), self._add_task, self._drop_task),
+        }
+        changed, owners = 0, set()
+        for kind in DELTA_KINDS:
+            section = delta.get(kind) or {}
+            records, parse, add, drop = handlers[kind]
+            for raw in section.get("upsert") or ():
+                try:
+                    record = parse(raw)
+                except (KeyError, ValueError, TypeError, AttributeError):
+                    logger.debug("Skipping malformed delta record", extra={"kind": kind})
+                    continue
+                key = record.get("id") if kind == "profiles" else record.id
+                if key is None:
+                    logger.debug("Skipping delta record without an id", extra={"kind": kind})
+                    continue
+                old = records.get(key)
+                if old == record:
+                    continue
+                if old is not None:
+                    drop(key)
+                    owners.add(_owner(kind, old))
+                add(key, record)
+                owners.add(_owner(kind, record))
+                changed += 1
+            for key in section.get("delete") or ():
+                old = drop(key)
+                if old is not None:
+                    owners.add(_owner(kind, old))
+                    changed += 1
+        if changed:
+            self.version += 1
+            for owner in owners:
+                self._versions[owner] = self.version
+            self._columnar = None
+            logger.debug("Delta applied", extra={"changed": changed, "version": self.version})
+        return changed
+
+
+    def import_events(self, events: Iterable[Event], chunk_size: int = 5000) -> int:
+        """
+        Upserts a stream of events (e.g. from `calendar_import`) in deltas of
+        `chunk_size`, so only one chunk is buffered. Returns the number changed.
+        """
+        changed, chunk = 0, []
+        for event in events:
+            chunk.append(event)
+            if len(chunk) >= chunk_size:
+                changed += self.apply_delta({"events": {"upsert": chunk}})
+                chunk = []
+        if chunk:
+            changed += self.apply_delta({"events": {"upsert": chunk}})
+        return changed
+
+
+    def version_for(self, student_id: Optional[str] = None) -> int:
+        """
+        The version at which the data visible to `student_id` (their own
+        records plus shared ones) last changed; the global `version` without one.
+        """
+        if student_id is None:
+            return self.version
+        return max(self._load_version, self._versions.get(None, 0), self._versions.get(student_id, 0))
 
 
     def get_student_profile(self, student_id: str) -> Dict:
         """Retrieves a specific student's profile."""
         if self.profile_data:
-            return next((p for p in self.profile_data.get("profiles", [])
-                         if p.get("id") == student_id), None)
+            return self._profiles_by_id.get(student_id)
+        logger.debug("Profile lookup before data was loaded", extra={"student_id": student_id})
         return None
 
 
     def _parse_datetime(self, dt_str: str) -> datetime:
         """Parses various datetime string formats into a UTC datetime object."""
-        try:
-            dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-            return dt.astimezone(timezone.utc)
-        except ValueError:
-            dt = datetime.fromisoformat(dt_str)
-            return dt.replace(tzinfo=timezone.utc)
+        return parse_datetime(dt_str)
+
+
+    def iter_events_between(self, start: datetime, end: datetime,
+                            student_id: Optional[str] = None) -> Iterator[Event]:
+        """
+        Lazily yields events and recurring occurrences starting within
+        [start, end] in start order: the bisected one-off events and one
+        generator per overlapping series, merged with a heap. Nothing outside
+        the window is expanded and the window itself is never materialized.
+        """
+        lo_ts, hi_ts = start.timestamp(), end.timestamp()
+        events: Iterator[Event] = self._events_by_start.irange(lo_ts, hi_ts)
+        if student_id is None:
+            groups = list(self._series.values())
+        else:
+            events = (event for event in events if event.student_id in (student_id, None))
+            groups = [self._series.get(student_id, {}), self._series.get(None, {})]
+        occurrences = [
+            expand(event, rule, lo_ts, hi_ts)
+            for series in groups for event, rule, last in list(series.values())
+            if event.start_ts <= hi_ts and (last is None or last >= lo_ts)
+        ]
+        return heapq.merge(events, *occurrences, key=_start_ts) if occurrences else events
+
 
+    def get_events_between(self, start: datetime, end: datetime, student_id: Optional[str] = None) -> List[Event]:
+        """Returns events (including recurring occurrences) starting within [start, end], ordered by start time."""
+        if not self._series:
+            return _owned_by(self._events_by_start.range(start.timestamp(), end.timestamp()), student_id)
+        return list(self.iter_events_between(start, end, student_id))
 
-    def get_upcoming_events(self, days: int = 7) -> List[Dict]:
-        """Filters and retrieves upcoming calendar events."""
+
+    def get_upcoming_events(self, days: int = 7, student_id: Optional[str] = None) -> List[Event]:
+        """
+        Filters and retrieves upcoming calendar events. With `student_id`, only
+        that student's events and events without an owner are returned.
+        """
         if not self.calendar_data: return []
         now = datetime.now(timezone.utc)
-        future = now + timedelta(days=days)
-        events = []
-        for event in self.calendar_data.get("events", []):
-            try:
-                start_time = self._parse_datetime(event["start"]["dateTime"])
-                if now <= start_time <= future:
-                    events.append(event)
-            except (KeyError, ValueError):
-                continue
-        return events
+        return self.get_events_between(now, now + timedelta(days=days), student_id)
+
+
+    def iter_upcoming_events(self, days: int = 7, student_id: Optional[str] = None) -> Iterator[Event]:
+        """The stream behind `get_upcoming_events`, for consumers that don't need a list."""
+        if not self.calendar_data: return iter(())
+        now = datetime.now(timezone.utc)
+        return self.iter_events_between(now, now + timedelta(days=days), student_id)
+
+
+    def analyze_availability(self, days: int = 7, student_id: Optional[str] = None, profile: Optional[Dict] = None,
+                             settings: Optional[Dict[str, Any]] = None,
+                             start: Optional[datetime] = None) -> CalendarAvailability:
+        """Free time over the next `days` days, computed straight from the event stream."""
+        start = start or datetime.now(timezone.utc)
+        events = self.iter_events_between(start, start + timedelta(days=days), student_id)
+        return analyze_calendar(events, profile, start=start, days=days, settings=settings, presorted=True)
 
 
-    def get_active_tasks(self) -> List[Dict]:
-        """Retrieves and filters active, non-completed tasks."""
+    def get_tasks(self, status: str, due_after: Optional[datetime] = None,
+                  due_before: Optional[datetime] = None) -> List[Task]:
+        """
+        Returns tasks with the given status whose due date is strictly after
+        `due_after` and at or before `due_before`, ordered by due date.
+        """
+        tasks = self._tasks_by_status.get(status)
+        if tasks is None:
+            return []
+        lo = due_after.timestamp() if due_after else float("-inf")
+        hi = due_before.timestamp() if due_before else float("inf")
+        return tasks.range(lo, hi, inclusive=(due_after is None, True))
+
+
+    def get_active_tasks(self, student_id: Optional[str] = None) -> List[Task]:
+        """Retrieves and filters active, non-completed tasks (optionally for one student)."""
         if not self.task_data: return []
+        return _owned_by(self.get_tasks("needsAction", due_after=datetime.now(timezone.utc)), student_id)
+
+
+    @property
+    def columnar(self) -> ColumnarStore:
+        """The columnar copy of the data; see `columnar_until`."""
+        return self.columnar_until(datetime.now(timezone.utc))
+
+
+    def columnar_until(self, end: datetime) -> ColumnarStore:
+        """
+        The columnar copy of the data, built on first use after each load or
+        delta. Recurring series are stored as their occurrences, expanded from
+        each series' start through `COLUMNAR_HORIZON_DAYS` past now; the copy
+        is rebuilt further out when a query reaches beyond that.
+        """
+        if self._columnar is None or self._columnar.expanded_until < end.timestamp():
+            horizon = max(end, datetime.now(timezone.utc) + timedelta(days=COLUMNAR_HORIZON_DAYS)).timestamp()
+            occurrences = sorted(
+                (occurrence for series in self._series.values() for event, rule, _ in series.values()
+                 for occurrence in expand(event, rule, event.start_ts, horizon)),
+                key=_start_ts,
+            )
+            self._columnar = ColumnarStore(
+                student_ids=[key for key in self._profiles_by_id if not isinstance(key, tuple)],
+                events=list(heapq.merge(self._events_by_start, occurrences, key=_start_ts)),
+                tasks=sorted(self._tasks.values(), key=lambda task: task.due_ts),
+                expanded_until=horizon,
+            )
+            logger.info("Columnar store built", extra={
+                "events": len(self._columnar.events), "occurrences": len(occurrences),
+                "tasks": len(self._columnar.tasks), "students": len(self._columnar.student_ids),
+            })
+        return self._columnar
+
+
+    def get_cohort_upcoming_events(self, days: int = 7) -> EventWindow:
+        """All students' events starting in the next `days` days, as column views."""
         now = datetime.now(timezone.utc)
-        active_tasks = []
-        for task in self.task_data.get("tasks", []):
-            try:
-                due_date = self._parse_datetime(task["due"])
-                if task.get("status") == "needsAction" and due_date > now:
-                    task["due_datetime"] = due_date
-                    active_tasks.append(task)
-            except (KeyError, ValueError):
-                continue
-        return active_tasks
+        return self.columnar_until(now + timedelta(days=days)).events_between(now, now + timedelta(days=days))
+
+
+    def get_cohort_tasks_due(self, days: int = 7, status: str = "needsAction") -> TaskSelection:
+        """All students' tasks with `status` falling due in the next `days` days."""
+        now = datetime.now(timezone.utc)
+        return self.columnar.tasks_due(status, due_after=now, due_before=now + timedelta(days=days))
 
 
 # ==============================================================================
@@ -87,10 +610,12 @@ if __name__ == "__main__":
         # Mock the current time to be a specific date in 2025
         # This ensures the date-based functions work correctly.
         mock_now = datetime(2025, 8, 18, 10, 0, 0, tzinfo=timezone.utc)
+        real_fromisoformat = datetime.fromisoformat
 
-        with patch('app.services.data_manager.datetime') as mock_date:
+        # Patch the module this code is running in (`__main__` when run with -m).
+        with patch(f'{__name__}.datetime') as mock_date:
             mock_date.now.return_value = mock_now
-            mock_date.fromisoformat.side_effect = lambda *args, **kwargs: datetime.fromisoformat(*args, **kwargs)
+            mock_date.fromisoformat.side_effect = real_fromisoformat
 
             try:
                 # 1. Initialize the DataManager
@@ -126,13 +651,63 @@ if __name__ == "__main__":
                 events = data_manager.get_upcoming_events()
                 assert len(events) > 0, "Should find at least one upcoming event."
                 print(f"   -> Found {len(events)} upcoming event(s) in the next 7 days.")
-                print(f"      - First upcoming event: {events[0]['summary']}")
+                print(f"      - First upcoming event: {events[0].summary}")
+
+                # Recurring lectures are expanded lazily, only inside the window
+                lectures = [e for e in events if e.summary == "Cognitive Psychology Lecture"]
+                assert [e.start.day for e in lectures] == [20, 25], lectures
+                semester = data_manager.get_events_between(mock_now, mock_now + timedelta(days=120))
+                assert sum(e.summary == "Cognitive Psychology Lecture" for e in semester) == 33
+                if np is not None:
+                    # Cohort queries see the series' occurrences too, not just one-off events
+                    cohort = data_manager.get_cohort_upcoming_events()
+                    assert [e.start.day for e in cohort.records()
+                            if e.summary == "Cognitive Psychology Lecture"] == [20, 25]
+                availability = data_manager.analyze_availability(start=mock_now)
+                print(f"   -> {len(lectures)} lecture occurrence(s) this week, "
+                      f"{availability.free_hours:.1f}h free.")
 
                 # Test get_active_tasks
                 tasks = data_manager.get_active_tasks()
                 assert len(tasks) > 0, "Should find at least one active task."
                 print(f"   -> Found {len(tasks)} active task(s).")
-                print(f"      - First active task: {tasks[0]['title']}")
+                print(f"      - First active task: {tasks[0].title}")
+
+                # Incremental sync: upsert/delete by id, with per-student versions
+                print("\n[3. Applying a delta...]")
+                version, other = data_manager.version, data_manager.version_for("student_456")
+                lecture = next(e for e in events if e.summary == "Cognitive Psychology Lecture")
+                changed = data_manager.apply_delta({
+                    "events": {"upsert": [{"id": "delta_review", "summary": "Review Session",
+                                           "student_id": "student_123",
+                                           "start": {"dateTime": "2025-08-19T15:00:00Z"},
+                                           "end": {"dateTime": "2025-08-19T16:00:00Z"}}],
+                               "delete": ["no_such_event"]},
+                    "tasks": {"upsert": [{"id": "delta_reading", "title": "Read Chapter 4",
+                                          "due": "2025-08-22T23:59:59Z", "status": "needsAction",
+                                          "student_id": "student_123"}]},
+                })
+                assert changed == 2, changed
+                assert "Review Session" in [e.summary for e in data_manager.get_upcoming_events(student_id="student_123")]
+                assert len(data_manager.get_active_tasks("student_123")) == len(tasks) + 1
+                assert data_manager.version == version + 1
+                assert data_manager.version_for("student_123") == version + 1
+                assert data_manager.version_for("student_456") == other
+
+                # Shared records (no student_id) invalidate every student
+                assert data_manager.apply_delta({"events": {"delete": ["cogpsy_lecture"]}}) == 1
+                assert lecture.summary not in [e.summary for e in data_manager.get_upcoming_events()]
+                assert data_manager.version_for("student_456") == version + 2
+                assert data_manager.apply_delta({"events": {"delete": ["cogpsy_lecture"]}}) == 0
+                assert data_manager.version == version + 2
+
+                # Completing the task moves it between status indexes
+                reading = next(t for t in data_manager.get_active_tasks() if t.id == "delta_reading")
+                done = {**reading.to_dict(), "status": "completed"}
+                assert data_manager.apply_delta({"tasks": {"upsert": [done]}}) == 1
+                assert len(data_manager.get_active_tasks()) == len(tasks)
+                assert data_manager.get_tasks("completed")[-1].id == "delta_reading"
+                print(f"   -> Deltas applied, now at version {data_manager.version}.")
 
                 print("\n✅ DataManager test passed!")
 
@@ -0,0 +1,78 @@
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from langchain_core.messages import HumanMessage
+
+from app.core.records import EventList, TaskList
+from app.graph.state import AcademicState
+from app.services.change_feed import FileChangeFeed
+from app.services.data_manager import DataManager
+from app.services.sqlite_store import SQLiteDataManager
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DataStore = Union[DataManager, SQLiteDataManager]
+
+SEED_FILES = ("profile.json", "calendar.json", "tasks.json")
+
+
+def create_data_manager(config: Optional[Dict] = None) -> DataStore:
+    """
+    Builds the DataManager backend selected by the `data_store` section of config.yml:
+    - memory: the in-process DataManager, streamed from the JSON files in `seed_dir`,
+    - sqlite: a SQLiteDataManager over `sqlite_path`, shared by every worker process.
+    """
+    store_config = (config or load_config()).get('data_store', {})
+    backend = store_config.get('backend', 'memory')
+
+    if backend == "sqlite":
+        return SQLiteDataManager(store_config.get('sqlite_path', 'data/atlas.db'))
+    if backend != "memory":
+        raise ValueError(f"Unsupported data_store backend: {backend}")
+
+    data_manager = DataManager()
+    seed_dir = Path(store_config.get('seed_dir', 'data'))
+    paths = [seed_dir / name for name in SEED_FILES]
+    if all(path.exists() for path in paths):
+        data_manager.load_files(*paths)
+    else:
+        logger.warning("Seed data not found; starting with an empty store", extra={"seed_dir": str(seed_dir)})
+    return data_manager
+
+
+def create_change_feed(config: Optional[Dict] = None) -> Optional[FileChangeFeed]:
+    """
+    The change feed named by `data_store.change_feed`, if any. Only the memory
+    backend applies deltas; a SQLite store is refreshed with a re-import.
+    """
+    store_config = (config or load_config()).get('data_store', {})
+    path = store_config.get('change_feed')
+    if not path:
+        return None
+    if store_config.get('backend', 'memory') != "memory":
+        logger.warning("change_feed is only applied to the memory backend", extra={"path": path})
+        return None
+    return FileChangeFeed(path)
+
+
+def build_academic_state(data_manager: DataStore, query: str, student_id: str, days: int = 7) -> AcademicState:
+    """
+    Assembles the graph's initial state for one student straight from the
+    store. Events and tasks are stored column-wise so checkpoints stay cheap.
+    The reads hold off concurrent deltas, so profile, events and tasks come
+    from the same version of the data.
+    """
+    with data_manager.reading():
+        profile = data_manager.get_student_profile(student_id) or {}
+        events = EventList.from_records(data_manager.get_upcoming_events(days, student_id=student_id))
+        tasks = TaskList.from_records(data_manager.get_active_tasks(student_id=student_id))
+    return AcademicState(
+        messages=[HumanMessage(content=query)],
+        atlas_message=[HumanMessage(content=query)],
+        profile=profile,
+        calendar={"events": events},
+        tasks={"tasks": tasks},
+        results={},
+    )
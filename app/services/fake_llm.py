@@ -0,0 +1,116 @@
+import asyncio
+import math
+import re
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+_RENDERED_TOOL_RESULT = re.compile(r"^tool \w+: |ToolMessage\(", re.MULTILINE)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    An offline chat model for benchmarks and local runs. It waits for a
+    configurable latency and returns a canned response, so graph overhead
+    can be measured without network calls or API costs.
+    """
+    model_name: str = "fake-chat"
+    latency_ms: float = 0.0
+    emit_tool_calls: bool = False
+    response: str = (
+        "Thought: The student needs a structured schedule.\n"
+        "Decision: Required agents are PLANNER."
+    )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @staticmethod
+    def _has_tool_result(messages: List[BaseMessage]) -> bool:
+        # The senior agent renders its history into one prompt string (`tool <name>: ...`
+        # lines), so look for tool results both as messages and inside the rendered text.
+        return any(isinstance(m, ToolMessage) or _RENDERED_TOOL_RESULT.search(str(m.content)) for m in messages)
+
+    @staticmethod
+    def _tool_call(tool: Any, query: str) -> Dict:
+        if isinstance(tool, dict):
+            function = tool.get("function", tool)
+            name = function["name"]
+            properties = function.get("parameters", {}).get("properties", {})
+        else:
+            name = tool.name
+            properties = tool.args
+        arg_name = next(iter(properties), "query")
+        return {"name": name, "args": {arg_name: query}, "id": f"call_{uuid.uuid4().hex[:12]}"}
+
+    def _build_result(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        tools = kwargs.get("tools")
+        if self.emit_tool_calls and tools and not self._has_tool_result(messages):
+            query = str(messages[-1].content)[-200:] if messages else ""
+            message = AIMessage(content="", tool_calls=[self._tool_call(tools[0], query)])
+        else:
+            message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._build_result(messages, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._build_result(messages, **kwargs)
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=tools, **kwargs)
+
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Offline embeddings for benchmarks and local runs: words and word bigrams
+    are hashed (with a stable CRC, not Python's salted hash) into signed
+    buckets and the vector is L2-normalized, so texts sharing vocabulary are
+    close in cosine similarity without any model or network.
+    """
+    def __init__(self, dimensions: int = 256, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        words = _WORD.findall(text.lower())
+        for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
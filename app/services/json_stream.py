@@ -0,0 +1,210 @@
+import codecs
+import json
+import mmap
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+Source = Union[str, Path, Any]
+
+_WHITESPACE = re.compile(r"[ \t\n\r,]*")
+_STRUCTURE = re.compile(r'["{}\[\]:,]')
+_STRING_END = re.compile(r'["\\]')
+_DECODER = json.JSONDecoder()
+
+
+@dataclass
+class LoadStats:
+    """Throughput figures for one streamed document."""
+    records: int = 0
+    bytes_read: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_read / 2**20 / self.seconds if self.seconds else 0.0
+
+
+class _ChunkReader:
+    """Yields text chunks from a text stream, a binary stream or an mmap, counting bytes."""
+    def __init__(self, fp: Any, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self) -> str:
+        data = self.fp.read(self.chunk_size)
+        if isinstance(data, bytes):
+            self.bytes_read += len(data)
+            return self._decoder.decode(data, final=not data)
+        # Text streams are counted in characters to avoid re-encoding every chunk.
+        self.bytes_read += len(data)
+        return data
+
+
+@contextmanager
+def open_source(source: Source, use_mmap: bool = False):
+    """Opens a path (optionally memory-mapped) or passes an already open file-like object through."""
+    if not isinstance(source, (str, Path)):
+        yield source
+        return
+    with open(source, "rb") as fp:
+        if use_mmap and Path(source).stat().st_size > 0:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        else:
+            yield fp
+
+
+class _TopLevelKey:
+    """
+    Finds the `"key": [` that is a member of the document's top-level object,
+    skipping over nested objects and arrays (and strings that merely look like
+    the key) without decoding them. Scans incrementally across chunks.
+    """
+    def __init__(self, key: str):
+        self.key = key
+        self.limit = 12 * len(key)      # longest escaped spelling of the key
+        self.depth = 0
+        self.in_string = self.escape = False
+        self.collecting: Optional[str] = None   # raw text of a top-level member name being read
+        self.expect = "key"             # at depth 1: "key", "colon" or "value"
+        self.matched = False
+
+    def _is_key(self, raw: str) -> bool:
+        if len(raw) > self.limit:
+            return False
+        try:
+            return json.loads(f'"{raw}"') == self.key
+        except ValueError:
+            return False
+
+    def scan(self, text: str, pos: int) -> Optional[int]:
+        """Consumes text[pos:]; returns the index just past the array's `[`, or None if more input is needed."""
+        while pos < len(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    if self.collecting is not None:
+                        self.collecting = (self.collecting + text[pos])[:self.limit + 1]
+                    pos += 1
+                    continue
+                match = _STRING_END.search(text, pos)
+                end = match.start() if match else len(text)
+                if self.collecting is not None:
+                    self.collecting = (self.collecting + text[pos:end + 1 if match else end])[:self.limit + 1]
+                if not match:
+                    return None
+                pos = end + 1
+                if match.group() == "\\":
+                    self.escape = True
+                    continue
+                self.in_string = False
+                if self.collecting is not None:
+                    self.matched = self._is_key(self.collecting[:-1])
+                    self.collecting, self.expect = None, "colon"
+                elif self.depth == 1:
+                    self.expect = "key"
+                continue
+            match = _STRUCTURE.search(text, pos)
+            if not match:
+                return None
+            char, pos = match.group(), match.end()
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect == "key":
+                    self.collecting = ""
+            elif char in "{[":
+                if self.depth == 1 and char == "[" and self.expect == "value" and self.matched:
+                    return pos
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1:
+                    self.expect = "key"
+            elif self.depth == 1:
+                self.expect = "value" if char == ":" else "key"
+        return None
+
+
+def iter_json_array(fp: Any, key: Optional[str] = None, chunk_size: int = 1 << 16,
+                    stats: Optional[LoadStats] = None) -> Iterator[Any]:
+    """
+    Lazily yields the elements of a JSON array without loading the document.
+    With `key`, the array is the value of the top-level member `key` (e.g.
+    {"events": [...]}); arrays under the same name in nested objects are
+    skipped. Without it, the document itself must be an array. Memory is
+    bounded by `chunk_size` plus the largest element.
+    """
+    reader = _ChunkReader(fp, chunk_size)
+    start_pattern = re.compile(r"\s*\[")
+    started = time.perf_counter()
+    buffer, eof = "", False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = reader.read()
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    # 1. Find the opening bracket of the array.
+    scanner = _TopLevelKey(key) if key else None
+    while True:
+        if scanner is not None:
+            pos = scanner.scan(buffer, 0)
+            if pos is not None:
+                break
+            buffer = ""     # the scanner carries its state across chunks
+        else:
+            match = start_pattern.match(buffer)
+            if match:
+                pos = match.end()
+                break
+        if not fill():
+            if key:
+                return
+            raise ValueError("Expected a JSON array")
+
+    # 2. Decode elements one at a time.
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            buffer, pos = "", 0
+            if not fill():
+                raise ValueError("Unterminated JSON array")
+            continue
+        if buffer[pos] == "]":
+            break
+        try:
+            item, end = _DECODER.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            item, end = None, None
+        # A number touching the end of the buffer, or cut before its fraction or
+        # exponent ("2." / "1e"), may be truncated: only accept it once more
+        # input or EOF confirms it.
+        if end is None or (not eof and (end == len(buffer) or buffer[end] in ".eE")):
+            buffer, pos = buffer[pos:], 0
+            if not fill() and end is None:
+                raise ValueError("Truncated JSON element")
+            continue
+        if stats is not None:
+            stats.records += 1
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+    if stats is not None:
+        stats.bytes_read = reader.bytes_read
+        stats.seconds = time.perf_counter() - started
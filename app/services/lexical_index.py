@@ -0,0 +1,328 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from app.services.vector_index import meta_stamp, top_k_indices
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were "
+    "which with what how why when who does do".split()
+)
+MAX_TF = np.iinfo(np.uint16).max
+
+# Files inside an index directory.
+META_FILE = "meta.json"
+VOCAB_FILE = "vocab.txt"                # one term per line; the line number is the term id
+DOC_LENGTHS_FILE = "doc_lengths.i32"    # tokens per document, by document number
+# Each segment is four arrays named "<segment>.<suffix>": the sorted term ids it
+# contains, where each term's postings start, and the postings themselves.
+SEGMENT_FILES = ("terms.i32", "offsets.i64", "docs.i32", "tfs.u16")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords; used for documents and queries alike."""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class _Segment:
+    """
+    An immutable slice of the inverted index: for each term in `terms`
+    (sorted), its postings are docs[offsets[i]:offsets[i + 1]] with the
+    matching term frequencies, documents in ascending order.
+    """
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, docs: np.ndarray, tfs: np.ndarray):
+        self.terms, self.offsets, self.docs, self.tfs = terms, offsets, docs, tfs
+
+    @classmethod
+    def build(cls, term_ids: np.ndarray, docs: np.ndarray, tfs: np.ndarray) -> "_Segment":
+        """From parallel (term, doc, tf) arrays in document order."""
+        order = np.argsort(term_ids, kind="stable")
+        term_ids = term_ids[order]
+        terms, starts = np.unique(term_ids, return_index=True)
+        offsets = np.append(starts, len(term_ids)).astype(np.int64)
+        return cls(terms.astype(np.int32), offsets, docs[order].astype(np.int32),
+                   np.minimum(tfs[order], MAX_TF).astype(np.uint16))
+
+    @classmethod
+    def load(cls, path: Path, name: str) -> "_Segment":
+        terms = np.fromfile(path / f"{name}.terms.i32", dtype=np.int32)
+        offsets = np.fromfile(path / f"{name}.offsets.i64", dtype=np.int64)
+        postings = int(offsets[-1]) if len(offsets) else 0
+        if not postings:
+            return cls(terms, offsets, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16))
+        return cls(terms, offsets, np.memmap(path / f"{name}.docs.i32", dtype=np.int32, mode="r", shape=(postings,)),
+                   np.memmap(path / f"{name}.tfs.u16", dtype=np.uint16, mode="r", shape=(postings,)))
+
+    def save(self, path: Path, name: str) -> None:
+        for suffix, array in zip(SEGMENT_FILES, (self.terms, self.offsets, self.docs, self.tfs)):
+            np.asarray(array).tofile(path / f"{name}.{suffix}")
+
+    @property
+    def document_frequencies(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def postings(self, term_ids: np.ndarray) -> List[Tuple[int, slice]]:
+        """(term id, postings slice) for each of `term_ids` present in this segment."""
+        found = np.searchsorted(self.terms, term_ids)
+        return [(int(t), slice(int(self.offsets[i]), int(self.offsets[i + 1])))
+                for t, i in zip(term_ids, found) if i < len(self.terms) and self.terms[i] == t]
+
+    @staticmethod
+    def merge(segments: List["_Segment"]) -> "_Segment":
+        """One segment with the postings of all of them (given in document order)."""
+        term_ids = np.concatenate([np.repeat(s.terms, s.document_frequencies) for s in segments])
+        docs = np.concatenate([np.asarray(s.docs) for s in segments])
+        tfs = np.concatenate([np.asarray(s.tfs) for s in segments])
+        return _Segment.build(term_ids, docs, tfs)
+
+
+class LexicalIndex:
+    """
+    An on-disk BM25 index over numbered documents (the same chunk numbers as
+    the `VectorIndex` it sits next to).
+
+    Postings are flat numpy arrays (int32 document numbers, uint16 term
+    frequencies) grouped by term, so a query gathers a few contiguous slices
+    and scores every candidate at once: no per-posting Python objects. IDF
+    and the per-document length normalization are precomputed and refreshed
+    only when documents are added.
+
+    Each `add` writes a new immutable segment; trailing segments of similar
+    size are merged (like a binary counter), so there are O(log n) segments
+    and each posting is rewritten O(log n) times. The vocabulary file and the
+    document-length file are append-only, and `meta.json` is written last,
+    so an interrupted add leaves the previous state.
+    """
+    def __init__(self, path: Union[str, Path], k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path)
+        self.k1, self.b = k1, b
+        self._stamp = meta_stamp(self.path)
+        meta = json.loads((self.path / META_FILE).read_text())
+        self.count: int = meta["count"]
+        self.tokens: int = meta["tokens"]
+        self._segment_meta: List[Dict[str, Any]] = meta["segments"]
+        self._next_segment: int = meta["next_segment"]
+        self._vocab_bytes: int = meta["vocab_bytes"]
+        with open(self.path / VOCAB_FILE, encoding="utf-8") as fp:
+            terms = [line.rstrip("\n") for _, line in zip(range(meta["terms"]), fp)]
+        self.vocab: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.doc_lengths = np.fromfile(self.path / DOC_LENGTHS_FILE, dtype=np.int32, count=self.count)
+        self.segments = [_Segment.load(self.path, s["name"]) for s in self._segment_meta]
+        self.df = np.zeros(len(self.vocab), dtype=np.int64)
+        for segment in self.segments:
+            np.add.at(self.df, segment.terms, segment.document_frequencies)
+        self._lock = threading.Lock()
+        self._refresh_weights()
+
+    # --- Creation / persistence -------------------------------------------------
+    @classmethod
+    def create(cls, path: Union[str, Path], **kwargs) -> "LexicalIndex":
+        """Opens the index at `path`, creating an empty one if there is none."""
+        path = Path(path)
+        if not (path / META_FILE).exists():
+            path.mkdir(parents=True, exist_ok=True)
+            for name in (VOCAB_FILE, DOC_LENGTHS_FILE):
+                (path / name).write_bytes(b"")
+            cls._write_meta(path, {"count": 0, "tokens": 0, "terms": 0, "vocab_bytes": 0, "segments": [],
+                                    "next_segment": 0})
+        return cls(path, **kwargs)
+
+    @staticmethod
+    def _write_meta(path: Path, meta: Dict[str, Any]) -> None:
+        tmp = path / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path / META_FILE)
+
+    def _save_meta(self) -> None:
+        self._write_meta(self.path, {"count": self.count, "tokens": self.tokens, "terms": len(self.vocab),
+                                     "vocab_bytes": self._vocab_bytes, "segments": self._segment_meta,
+                                     "next_segment": self._next_segment})
+        self._stamp = meta_stamp(self.path)
+
+    def changed_on_disk(self) -> bool:
+        """Whether meta.json was rewritten by someone else since this index read it."""
+        return meta_stamp(self.path) != self._stamp
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        """Bytes on disk for everything the current state references."""
+        names = [META_FILE, VOCAB_FILE, DOC_LENGTHS_FILE]
+        names += [f"{s['name']}.{suffix}" for s in self._segment_meta for suffix in SEGMENT_FILES]
+        return sum((self.path / name).stat().st_size for name in names if (self.path / name).exists())
+
+    def _refresh_weights(self) -> None:
+        """Recomputes IDF per term and the BM25 length normalization per document."""
+        n = self.count
+        self.idf = np.log1p((n - self.df + 0.5) / (self.df + 0.5)).astype(np.float32)
+        avg_length = self.tokens / n if n else 1.0
+        self._length_norm = (self.k1 * (1 - self.b + self.b * self.doc_lengths / max(avg_length, 1e-9))
+                             ).astype(np.float32)
+
+    # --- Writing --------------------------------------------------------------
+    def add(self, texts: Iterable[str]) -> List[int]:
+        """Tokenizes and indexes the texts as the next document numbers, which are returned."""
+        with self._lock:
+            first = self.count
+            new_terms: List[str] = []
+            term_ids: List[int] = []
+            docs: List[int] = []
+            tfs: List[int] = []
+            lengths: List[int] = []
+            vocab = self.vocab
+            for number, text in enumerate(texts, start=first):
+                tokens = tokenize(text)
+                lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    term_id = vocab.get(term)
+                    if term_id is None:
+                        term_id = vocab[term] = len(vocab)
+                        new_terms.append(term)
+                    term_ids.append(term_id)
+                    tfs.append(tf)
+                docs.extend([number] * (len(term_ids) - len(docs)))
+            if not lengths:
+                return []
+            try:
+                self._write(first, new_terms, np.array(term_ids, dtype=np.int32), np.array(docs, dtype=np.int32),
+                            np.array(tfs, dtype=np.int64), np.array(lengths, dtype=np.int32))
+            except BaseException:
+                for term in new_terms:
+                    del vocab[term]
+                raise
+        return list(range(first, first + len(lengths)))
+
+    def _write(self, first: int, new_terms: List[str], term_ids: np.ndarray, docs: np.ndarray, tfs: np.ndarray,
+               lengths: np.ndarray) -> None:
+        self._truncate_to_meta()
+        vocab_lines = "".join(term + "\n" for term in new_terms).encode("utf-8")
+        with open(self.path / VOCAB_FILE, "ab") as fp:
+            fp.write(vocab_lines)
+        with open(self.path / DOC_LENGTHS_FILE, "ab") as fp:
+            lengths.tofile(fp)
+
+        segments = self.segments + [_Segment.build(term_ids, docs, tfs)]
+        segment_meta = self._segment_meta + [{"name": self._new_segment_name(), "docs": len(lengths)}]
+        segments[-1].save(self.path, segment_meta[-1]["name"])
+        # Merge trailing segments while the newest is at least as large as the one before it.
+        while len(segments) > 1 and segment_meta[-1]["docs"] >= segment_meta[-2]["docs"]:
+            merged = _Segment.merge(segments[-2:])
+            info = {"name": self._new_segment_name(), "docs": segment_meta[-2]["docs"] + segment_meta[-1]["docs"]}
+            merged.save(self.path, info["name"])
+            segments[-2:] = [_Segment.load(self.path, info["name"])]
+            segment_meta[-2:] = [info]
+        stale = {s["name"] for s in self._segment_meta} - {s["name"] for s in segment_meta}
+
+        self.count = first + len(lengths)
+        self.tokens += int(lengths.sum())
+        self._vocab_bytes += len(vocab_lines)
+        self.segments, self._segment_meta = segments, segment_meta
+        self._save_meta()
+        self._remove_segments(stale | self._orphans())
+
+        self.doc_lengths = np.concatenate([self.doc_lengths, lengths])
+        self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int64)])
+        np.add.at(self.df, term_ids, 1)
+        self._refresh_weights()
+
+    def _new_segment_name(self) -> str:
+        name = f"seg_{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+
+    def _orphans(self) -> set:
+        """
+        Segments on disk that meta.json does not reference (left by an
+        interrupted add). Only meaningful to the single writer that holds
+        the index's writer lock; another writer's new segments look the same.
+        """
+        live = {s["name"] for s in self._segment_meta}
+        return {p.name.split(".")[0] for p in self.path.glob("seg_*.*")} - live
+
+    def _remove_segments(self, names: Iterable[str]) -> None:
+        for name in names:
+            for suffix in SEGMENT_FILES:
+                try:
+                    os.remove(self.path / f"{name}.{suffix}")
+                except FileNotFoundError:
+                    pass
+
+    def _truncate_to_meta(self) -> None:
+        """Drops vocabulary lines and document lengths past what meta.json records."""
+        if (self.path / DOC_LENGTHS_FILE).stat().st_size > self.count * 4:
+            os.truncate(self.path / DOC_LENGTHS_FILE, self.count * 4)
+        if (self.path / VOCAB_FILE).stat().st_size > self._vocab_bytes:
+            os.truncate(self.path / VOCAB_FILE, self._vocab_bytes)
+
+    # --- Search ---------------------------------------------------------------
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """The k best BM25 matches as (document number, score), best first."""
+        term_ids = np.unique([self.vocab[t] for t in tokenize(query) if t in self.vocab]).astype(np.int32)
+        if not len(term_ids) or k <= 0:
+            return []
+        docs, weights = [], []
+        for segment in self.segments:
+            for term_id, span in segment.postings(term_ids):
+                tfs = segment.tfs[span].astype(np.float32)
+                segment_docs = np.asarray(segment.docs[span])
+                docs.append(segment_docs)
+                weights.append(self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + self._length_norm[segment_docs]))
+        if not docs:
+            return []
+        docs, weights = np.concatenate(docs), np.concatenate(weights)
+        if len(docs) * 8 > self.count:
+            # Common terms: summing into one slot per document beats sorting the postings.
+            scores = np.bincount(docs, weights=weights, minlength=self.count)
+            top = top_k_indices(scores, k)
+            return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights, minlength=len(candidates))
+        top = top_k_indices(scores, k)
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.lexical_index` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    print("\n--- Running LexicalIndex Test ---")
+    texts = [
+        "Baddeley's model of working memory has a phonological loop and a visuospatial sketchpad.",
+        "The central limit theorem says sample means are approximately normal.",
+        "Bayes' theorem relates a conditional probability to its inverse.",
+        "Working memory capacity predicts reading comprehension.",
+        "A p-value is the probability of data at least as extreme under the null hypothesis.",
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex.create(tmp)
+        assert index.add(texts[:2]) == [0, 1]
+        assert index.add(texts[2:3]) == [2]
+        assert len(index.segments) == 2         # 1 doc after 2: kept apart
+        assert index.add(texts[3:]) == [3, 4]  # 2 >= 1, then 3 >= 2: merged into one
+        assert len(index.segments) == 1, [s["docs"] for s in index._segment_meta]
+        assert index.search("Bayes theorem")[0][0] == 2
+        assert {n for n, _ in index.search("working memory", k=2)} == {0, 3}
+        assert index.search("central limit theorem")[0][0] == 1
+        assert index.search("quantum chromodynamics") == []
+
+        reopened = LexicalIndex(tmp)
+        assert reopened.count == 5 and reopened.search("p-value null")[0][0] == 4
+        assert reopened.search("Bayes theorem") == index.search("Bayes theorem")
+        assert not list(Path(tmp).glob("*.tmp")) and not reopened._orphans()
+        print(f"   -> {reopened.count} docs, {len(reopened.vocab)} terms, {reopened.size_bytes} bytes on disk")
+    print("\n✅ LexicalIndex test passed!")
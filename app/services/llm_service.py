@@ -9,6 +9,11 @@ from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGener
 # Utility imports for config and secrets
 from app.utils.env_loader import settings
 from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+from app.services.fake_llm import FakeChatModel, FakeEmbeddings
+from app.services.cassette import Cassette, CassetteChatModel, CassetteEmbeddings
+
+logger = get_logger(__name__)
 
 class LLMService:
     """
@@ -17,7 +22,21 @@ class LLMService:
     """
     def __init__(self):
         self.config = load_config()
-        print("✅ LLMService initialized with config.")
+        self.cassette = self._load_cassette()
+        logger.info("LLMService initialized with config.")
+
+    def _load_cassette(self) -> Optional[Cassette]:
+        """
+        Builds the record/replay cassette from config.yml, with the
+        ATLAS_CASSETTE_MODE / ATLAS_CASSETTE_PATH environment variables taking precedence.
+        """
+        cassette_config = self.config.get('cassette', {})
+        mode = settings.ATLAS_CASSETTE_MODE or cassette_config.get('mode', 'off')
+        if mode == "off":
+            return None
+        path = settings.ATLAS_CASSETTE_PATH or cassette_config.get('path', 'cassettes/atlas.jsonl')
+        logger.info("LLM cassette enabled", extra={"mode": mode, "path": path})
+        return Cassette(path, mode)
 
     def get_llm(self, provider: Optional[str] = None) -> Any:
         """
@@ -27,15 +46,38 @@ class LLMService:
         if provider is None:
             provider = self.config['llm']['default_provider']
         
-        model_name = self.config['llm']['providers'][provider]['model_name']
-        print(f"   ↳ Getting LLM for provider: '{provider}', model: '{model_name}'")
-
+        provider_config = self.config['llm']['providers'][provider]
+        model_name = provider_config['model_name']
+        logger.debug("Getting LLM", extra={"provider": provider, "model": model_name})
+
+        if self.cassette is None:
+            return self._create_llm(provider, model_name, provider_config)
+
+        replay_timing = self.config.get('cassette', {}).get('replay_timing', False)
+        if self.cassette.mode == "replay":
+            # Replay never needs the real client, so no API keys or network are required.
+            return CassetteChatModel(cassette=self.cassette, model_name=model_name, replay_timing=replay_timing)
+        return CassetteChatModel(
+            cassette=self.cassette,
+            model_name=model_name,
+            inner=self._create_llm(provider, model_name, provider_config),
+        )
+
+    def _create_llm(self, provider: str, model_name: str, provider_config: Dict) -> Any:
+        """Instantiates the provider's LangChain chat model."""
         if provider == "openai":
             return ChatOpenAI(model=model_name, api_key=settings.OPENAI_API_KEY)
         elif provider == "groq":
             return ChatGroq(model=model_name, api_key=settings.GROQ_API_KEY)
         elif provider == "google":
             return ChatGoogleGenerativeAI(model=model_name, google_api_key=settings.GOOGLE_API_KEY)
+        elif provider == "fake":
+            return FakeChatModel(
+                model_name=model_name,
+                latency_ms=provider_config.get('latency_ms', 0),
+                emit_tool_calls=provider_config.get('emit_tool_calls', False),
+                **({'response': provider_config['response']} if 'response' in provider_config else {}),
+            )
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
 
@@ -47,13 +89,29 @@ class LLMService:
         if provider is None:
             provider = self.config['embedding_model']['default_provider']
 
-        model_name = self.config['embedding_model']['providers'][provider]['model_name']
-        print(f"   ↳ Getting Embedding Model for provider: '{provider}', model: '{model_name}'")
+        provider_config = self.config['embedding_model']['providers'][provider]
+        model_name = provider_config['model_name']
+        logger.debug("Getting embedding model", extra={"provider": provider, "model": model_name})
+
+        if self.cassette is None:
+            return self._create_embedding_model(provider, model_name, provider_config)
 
+        replay_timing = self.config.get('cassette', {}).get('replay_timing', False)
+        if self.cassette.mode == "replay":
+            return CassetteEmbeddings(self.cassette, model_name, replay_timing=replay_timing)
+        return CassetteEmbeddings(
+            self.cassette, model_name, inner=self._create_embedding_model(provider, model_name, provider_config)
+        )
+
+    def _create_embedding_model(self, provider: str, model_name: str, provider_config: Dict) -> Any:
+        """Instantiates the provider's LangChain embedding model."""
         if provider == "openai":
             return OpenAIEmbeddings(model=model_name, api_key=settings.OPENAI_API_KEY)
         elif provider == "google":
             return GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=settings.GOOGLE_API_KEY)
+        elif provider == "fake":
+            return FakeEmbeddings(dimensions=provider_config.get('dimensions', 256),
+                                  latency_ms=provider_config.get('latency_ms', 0))
         else:
             raise ValueError(f"Unsupported Embedding provider: {provider}")
             
@@ -72,6 +130,13 @@ class LLMService:
         embedding_model = self.get_embedding_model(provider)
         return await embedding_model.aembed_query(text)
 
+    async def aget_embeddings(self, texts: List[str], provider: Optional[str] = None) -> List[List[float]]:
+        """
+        Embeds many texts in one batched call, for indexing.
+        """
+        embedding_model = self.get_embedding_model(provider)
+        return await embedding_model.aembed_documents(texts)
+
 # ==============================================================================
 # ✅ TEST BLOCK
 # To test this file, run `python -m app.services.llm_service` from the root directory.
@@ -0,0 +1,229 @@
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.core.records import Task, TaskList
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+GRADE_POINTS = {
+    "A+": 4.0, "A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
+    "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "D-": 0.7, "F": 0.0,
+}
+
+# Rough hours for a task whose title/notes mention the keyword; the largest match wins.
+EFFORT_KEYWORDS: Tuple[Tuple[str, float], ...] = (
+    ("final", 8.0), ("project", 8.0), ("midterm", 6.0), ("exam", 6.0), ("thesis", 6.0),
+    ("essay", 5.0), ("paper", 5.0), ("report", 4.0), ("presentation", 4.0),
+    ("problem set", 3.0), ("lab", 3.0), ("assignment", 3.0),
+    ("summary", 2.0), ("summarize", 2.0), ("review", 2.0),
+    ("reading", 1.5), ("read", 1.5), ("quiz", 1.5),
+)
+_RANGE = re.compile(r"(\d+)\s*(?:-|–|to)\s*(\d+)")
+_WORD = re.compile(r"[a-z]+")
+_STOPWORDS = frozenset(("and", "for", "the", "with", "from", "into", "intro", "introduction", "course", "class"))
+
+_DEFAULTS = {
+    "weights": {"urgency": 0.5, "pressure": 0.3, "grade": 0.2},
+    "status_weights": {"needsAction": 1.0, "completed": 0.0},
+    "urgency_half_life_hours": 48,
+    "default_effort_hours": 2.0,
+    "hours_per_item": 0.2,          # e.g. "problems 1-15"
+    "hours_per_chapter": 1.5,       # e.g. "chapters 3-5"
+    "max_tasks_in_prompt": 15,
+}
+
+
+@lru_cache(maxsize=65536)
+def estimate_effort_hours(text: str, default: float = 2.0, per_item: float = 0.2, per_chapter: float = 1.5) -> float:
+    """
+    Heuristic effort from a task's title and notes: the largest keyword
+    estimate, raised by any numbered range ("problems 1-15", "chapters 3-5").
+    """
+    text = text.lower()
+    hours = max((h for keyword, h in EFFORT_KEYWORDS if keyword in text), default=default)
+    for lo, hi in _RANGE.findall(text):
+        count = abs(int(hi) - int(lo)) + 1
+        hours = max(hours, count * (per_chapter if "chapter" in text else per_item))
+    return hours
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(w for w in _WORD.findall(text.lower()) if len(w) > 3 and w not in _STOPWORDS)
+
+
+@lru_cache(maxsize=65536)
+def match_course(text: str, courses: Tuple[str, ...]) -> int:
+    """Index of the course sharing the most words with the task text, or -1."""
+    words = _words(text)
+    best, best_overlap = -1, 0
+    for i, name in enumerate(courses):
+        overlap = len(words & _words(name))
+        if overlap > best_overlap:
+            best, best_overlap = i, overlap
+    return best
+
+
+@lru_cache(maxsize=65536)
+def _text_features(title: str, notes: Optional[str], courses: Tuple[str, ...],
+                   effort_args: Tuple[float, float, float]) -> Tuple[float, int]:
+    text = f"{title} {notes}" if notes else title
+    return estimate_effort_hours(text, *effort_args), match_course(text, courses)
+
+
+def _courses(profile: Optional[Dict]) -> Tuple[Tuple[str, ...], Tuple[str, ...], np.ndarray]:
+    """Course names, display labels and grade need (0 for an A, 1 for an F) from `academic_info`."""
+    courses = (profile or {}).get("academic_info", {}).get("current_courses", []) or []
+    names = tuple(c.get("name", "") for c in courses)
+    labels = tuple(f"{c.get('name', '')} ({c['grade']})" if c.get("grade") else c.get("name", "") for c in courses)
+    need = [(4.0 - GRADE_POINTS.get(str(c.get("grade", "")).strip().upper(), 4.0)) / 4.0 for c in courses]
+    # A trailing 0 makes index -1 (no matching course) score as "no grade pressure".
+    return names, labels, np.array(need + [0.0])
+
+
+@dataclass
+class TaskFeatures:
+    """Per-task inputs to the scorer, one array entry per task."""
+    tasks: TaskList
+    due_ts: np.ndarray
+    status_weight: np.ndarray
+    effort_hours: np.ndarray
+    course: np.ndarray          # index into `course_labels`, -1 when unmatched
+    grade_need: np.ndarray
+    course_labels: Tuple[str, ...]
+
+
+def extract_features(tasks: Iterable[Any], profile: Optional[Dict] = None,
+                     settings: Optional[Dict[str, Any]] = None) -> TaskFeatures:
+    """
+    Builds the scorer's arrays. Column-wise `TaskList`s are read without
+    materializing records; text heuristics are memoized per distinct string.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    if not isinstance(tasks, TaskList):
+        tasks = TaskList.from_records(t if isinstance(t, Task) else Task.from_dict(t) for t in tasks)
+    status_weights = {**_DEFAULTS["status_weights"], **settings.get("status_weights", {})}
+    names, labels, need = _courses(profile)
+    effort_args = (float(settings["default_effort_hours"]), float(settings["hours_per_item"]),
+                   float(settings["hours_per_chapter"]))
+    # Keyed on the stored strings, whose hashes Python caches, so repeat calls are dict hits.
+    text_features = [_text_features(title, notes, names, effort_args) for title, notes in zip(tasks.title, tasks.notes)]
+    effort, course = (np.array(column) for column in zip(*text_features)) if text_features else ([], [])
+
+    return TaskFeatures(
+        tasks=tasks,
+        due_ts=np.asarray(tasks.due_ts, dtype=np.float64),
+        status_weight=np.array([status_weights.get(s, 1.0) for s in tasks.status], dtype=np.float64),
+        effort_hours=np.asarray(effort, dtype=np.float64),
+        course=np.asarray(course, dtype=np.int32),
+        grade_need=need[course],
+        course_labels=labels,
+    )
+
+
+def score_tasks(features: TaskFeatures, now_ts: float, settings: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Vectorized priority in [0, 1] (times the status weight):
+      urgency  - 1 when overdue, halving every `urgency_half_life_hours` until due,
+      pressure - share of the remaining time the estimated effort needs,
+      grade    - how far the matched course's grade is below an A.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    weights = {**_DEFAULTS["weights"], **settings.get("weights", {})}
+    hours_left = (features.due_ts - now_ts) / 3600.0
+    decay = math.log(2) / float(settings["urgency_half_life_hours"])
+    urgency = np.exp(-decay * np.maximum(hours_left, 0.0))
+    pressure = np.minimum(features.effort_hours / np.maximum(hours_left, 1.0), 1.0)
+    total = weights["urgency"] + weights["pressure"] + weights["grade"]
+    score = (weights["urgency"] * urgency + weights["pressure"] * pressure + weights["grade"] * features.grade_need)
+    return features.status_weight * score / total
+
+
+@dataclass
+class TaskRanking:
+    """Tasks ordered by descending priority score."""
+    features: TaskFeatures
+    order: np.ndarray
+    score: np.ndarray
+    now_ts: float
+    settings: Dict[str, Any]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def ranked(self, limit: Optional[int] = None) -> TaskList:
+        """The tasks in priority order, column-wise."""
+        return self.features.tasks.take(self.order[:limit])
+
+    def _line(self, rank: int, i: int) -> str:
+        task = self.features.tasks[i]
+        hours_left = (task.due_ts - self.now_ts) / 3600
+        when = f"overdue {-hours_left:.0f}h" if hours_left < 0 else (
+            f"in {hours_left:.0f}h" if hours_left < 48 else f"in {hours_left / 24:.1f}d")
+        due = datetime.fromtimestamp(task.due_ts, timezone.utc)
+        line = f"{rank}. {task.title} | due {due:%Y-%m-%d %H:%M} ({when}) | ~{self.features.effort_hours[i]:.1f}h"
+        course = int(self.features.course[i])
+        if course >= 0:
+            line += f" | {self.features.course_labels[course]}"
+        return f"{line} | score {self.score[i]:.2f}"
+
+    def to_prompt(self, limit: Optional[int] = None) -> str:
+        """Ranked lines for the planner prompt (UTC due dates, effort in hours)."""
+        limit = limit or int(self.settings.get("max_tasks_in_prompt", _DEFAULTS["max_tasks_in_prompt"]))
+        shown = [self._line(rank, int(i)) for rank, i in enumerate(self.order[:limit], 1) if self.score[i] > 0]
+        hidden = int(np.count_nonzero(self.score > 0)) - len(shown)
+        if hidden > 0:
+            shown.append(f"(+{hidden} lower-priority tasks)")
+        return "\n".join(shown) or "(no open tasks)"
+
+
+def prioritize_tasks(tasks: Iterable[Any], profile: Optional[Dict] = None, now: Optional[datetime] = None,
+                     settings: Optional[Dict[str, Any]] = None) -> TaskRanking:
+    """Scores and ranks tasks (records, raw dicts or a TaskList) for one student."""
+    settings = {**_DEFAULTS, **(settings or {})}
+    now_ts = (now or datetime.now(timezone.utc)).timestamp()
+    features = extract_features(tasks, profile, settings)
+    score = score_tasks(features, now_ts, settings)
+    order = np.argsort(-score, kind="stable")
+    logger.debug("Tasks prioritized", extra={"tasks": len(order)})
+    return TaskRanking(features, order, score, now_ts, settings)
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.prioritizer` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running Task Prioritizer Test ---")
+    now = datetime(2025, 8, 19, 9, 0, tzinfo=timezone.utc)
+    profile = {"academic_info": {"current_courses": [
+        {"name": "Cognitive Psychology", "grade": "B+"},
+        {"name": "Statistics for Behavioral Sciences", "grade": "A-"},
+    ]}}
+    tasks = [
+        Task("Chapter 3 Summary", datetime(2025, 8, 21, 23, 59, tzinfo=timezone.utc).timestamp(), "needsAction",
+             "Summarize key concepts from the Cognitive Psychology textbook."),
+        Task("Statistics Problem Set", datetime(2025, 8, 23, 23, 59, tzinfo=timezone.utc).timestamp(), "needsAction",
+             "Complete problems 1-15 on probability distributions."),
+        Task("Old Quiz", datetime(2025, 8, 18, 12, 0, tzinfo=timezone.utc).timestamp(), "needsAction"),
+        Task("Done Reading", datetime(2025, 8, 20, 12, 0, tzinfo=timezone.utc).timestamp(), "completed"),
+    ]
+    assert estimate_effort_hours("Statistics Problem Set Complete problems 1-15") == 3.0
+    assert estimate_effort_hours("Read chapters 3-5") == 4.5
+    assert match_course("Chapter 3 Summary Summarize the Cognitive Psychology textbook",
+                        ("Cognitive Psychology", "Statistics for Behavioral Sciences")) == 0
+
+    ranking = prioritize_tasks(tasks, profile, now=now)
+    titles = [t.title for t in ranking.ranked()]
+    assert titles[0] == "Old Quiz" and titles[-1] == "Done Reading", titles
+    assert titles.index("Chapter 3 Summary") < titles.index("Statistics Problem Set"), titles
+    same = prioritize_tasks(TaskList.from_records(tasks), profile, now=now)
+    assert np.array_equal(same.order, ranking.order)
+    print(ranking.to_prompt())
+    print("\n✅ Task prioritizer test passed!")
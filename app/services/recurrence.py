@@ -0,0 +1,282 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import FrozenSet, Iterator, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.records import Event
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DAY = 86400.0
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+SUPPORTED_FREQS = ("DAILY", "WEEKLY", "MONTHLY")
+# Anything else (BYMONTHDAY, BYSETPOS, BYMONTH, ...) would change which dates occur.
+SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY"}
+
+
+def _parse_stamp(value: str, tz: tzinfo = timezone.utc) -> Tuple[float, bool]:
+    """
+    An iCalendar DATE or DATE-TIME (`20250901`, `20250901T090000Z`) as UTC
+    seconds, plus whether it was a date. Dates and zone-less times are in `tz`.
+    """
+    value = value.strip()
+    if "T" not in value:
+        return datetime.strptime(value, "%Y%m%d").replace(tzinfo=tz).timestamp(), True
+    zone = timezone.utc if value.endswith("Z") else tz
+    return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S").replace(tzinfo=zone).timestamp(), False
+
+
+def _zone(name: str) -> tzinfo:
+    try:
+        return ZoneInfo(name.strip().strip('"'))
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown recurrence timezone: {name}")
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """
+    The subset of RFC 5545 recurrence that calendar exports use for classes:
+    FREQ=DAILY|WEEKLY|MONTHLY with INTERVAL, COUNT, UNTIL and (weekly) BYDAY,
+    plus EXDATE exclusions. A `DTSTART;TZID=<zone>:...` line makes occurrences
+    repeat at the series' local time of day, on local weekdays and dates
+    (following DST); without one they repeat at its UTC time of day.
+    """
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until_ts: Optional[float] = None
+    byday: Tuple[int, ...] = ()                 # weekdays, Monday = 0
+    exdates: FrozenSet[float] = frozenset()     # excluded occurrence starts
+    exdays: FrozenSet[int] = frozenset()        # excluded local dates (date ordinals)
+    tz: Optional[tzinfo] = None                 # the series' zone; None: UTC
+
+    @classmethod
+    def parse(cls, recurrence: str) -> "RecurrenceRule":
+        """
+        Parses newline-separated `DTSTART:`/`RRULE:`/`EXDATE:` lines (DTSTART
+        only contributes its TZID). Raises ValueError for an unknown zone and
+        for any rule part, or combination of parts, that isn't expanded here.
+        """
+        lines = [line.strip().partition(":") for line in recurrence.splitlines()]
+        tz = None
+        for head, _, _ in lines:
+            name, *params = head.split(";")
+            if name.upper() == "DTSTART":
+                tzid = dict(param.partition("=")[::2] for param in params).get("TZID")
+                tz = _zone(tzid) if tzid else None
+        parts, exdates, exdays = None, set(), set()
+        for name, _, value in lines:
+            name = name.split(";")[0].upper()
+            if name == "RRULE":
+                parts = dict(item.split("=", 1) for item in value.upper().split(";") if "=" in item)
+            elif name == "EXDATE":
+                for stamp in value.split(","):
+                    ts, is_date = _parse_stamp(stamp, tz or timezone.utc)
+                    if is_date:
+                        exdays.add(datetime.strptime(stamp.strip(), "%Y%m%d").toordinal())
+                    else:
+                        exdates.add(ts)
+        if not parts:
+            raise ValueError("recurrence has no RRULE")
+        freq = parts.get("FREQ")
+        if freq not in SUPPORTED_FREQS:
+            raise ValueError(f"unsupported recurrence frequency: {freq}")
+        unsupported = set(parts) - SUPPORTED_PARTS
+        if parts.get("WKST", "MO") == "MO":
+            unsupported.discard("WKST")     # weeks already start on Monday
+        if unsupported:
+            raise ValueError(f"unsupported recurrence parts: {', '.join(sorted(unsupported))}")
+
+        until_ts = None
+        if "UNTIL" in parts:
+            until_ts, is_date = _parse_stamp(parts["UNTIL"], tz or timezone.utc)
+            if is_date:
+                until_ts += DAY - 1     # a date UNTIL includes that whole (local) day
+        byday = ()
+        if "BYDAY" in parts:
+            # Only weekly rules over plain weekdays; ordinal forms like "1MO" aren't expanded.
+            days = parts["BYDAY"].split(",")
+            if freq != "WEEKLY" or any(day not in WEEKDAYS for day in days):
+                raise ValueError(f"unsupported BYDAY for {freq}: {parts['BYDAY']}")
+            byday = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+        return cls(
+            freq=freq,
+            interval=max(1, int(parts.get("INTERVAL", 1))),
+            count=int(parts["COUNT"]) if "COUNT" in parts else None,
+            until_ts=until_ts,
+            byday=byday,
+            exdates=frozenset(exdates),
+            exdays=frozenset(exdays),
+            tz=tz,
+        )
+
+    # Expansion runs on local wall-clock time written as if it were UTC, so the
+    # day/week arithmetic below needs no zone handling; starts convert back.
+    def _to_local(self, ts: float) -> float:
+        if self.tz is None or ts in (float("inf"), float("-inf")):
+            return ts
+        return datetime.fromtimestamp(ts, self.tz).replace(tzinfo=timezone.utc).timestamp()
+
+    def _to_utc(self, local: float) -> float:
+        if self.tz is None:
+            return local
+        return datetime.fromtimestamp(local, timezone.utc).replace(tzinfo=self.tz).timestamp()
+
+    def _excluded(self, ts: float, local: float) -> bool:
+        return ts in self.exdates or (
+            bool(self.exdays) and datetime.fromtimestamp(local, timezone.utc).toordinal() in self.exdays)
+
+    def _occurrences(self, dtstart: float, after: float) -> Iterator[Tuple[int, float, float]]:
+        """(occurrence number, UTC start, local start) triples from the first period that can contain `after`."""
+        for number, local in self._candidates(self._to_local(dtstart), self._to_local(after)):
+            yield number, self._to_utc(local), local
+
+    def _candidates(self, dtstart: float, after: float) -> Iterator[Tuple[int, float]]:
+        """
+        (1-based occurrence number, start) pairs in order, from the first
+        period that can contain `after`. Periods before it are skipped
+        arithmetically, so a query late in a long series costs the same as an
+        early one; only MONTHLY rules with COUNT walk from the series start.
+        """
+        if self.freq == "MONTHLY":
+            yield from self._monthly(dtstart, after)
+            return
+        if self.freq == "DAILY":
+            period, anchor, offsets = self.interval * DAY, dtstart, (0.0,)
+        else:
+            weekday = datetime.fromtimestamp(dtstart, timezone.utc).weekday()
+            period, anchor = self.interval * 7 * DAY, dtstart - weekday * DAY
+            offsets = tuple(day * DAY for day in (self.byday or (weekday,)))
+        first = sum(1 for offset in offsets if anchor + offset >= dtstart)
+
+        p = max(0, int((after - anchor) // period))
+        number = 0 if p == 0 else first + (p - 1) * len(offsets)
+        while True:
+            base = anchor + p * period
+            for offset in offsets:
+                ts = base + offset
+                if p == 0 and ts < dtstart:
+                    continue
+                number += 1
+                yield number, ts
+            p += 1
+
+    def _monthly(self, dtstart: float, after: float) -> Iterator[Tuple[int, float]]:
+        start = datetime.fromtimestamp(dtstart, timezone.utc)
+        months = 0
+        if self.count is None:
+            target = datetime.fromtimestamp(max(after, dtstart), timezone.utc)
+            months = max(0, (target.year - start.year) * 12 + target.month - start.month - 1)
+            months -= months % self.interval
+        number = 0
+        while True:
+            year, month = divmod(start.month - 1 + months, 12)
+            try:
+                ts = start.replace(year=start.year + year, month=month + 1).timestamp()
+            except ValueError:      # e.g. the 31st in a 30-day month: no occurrence
+                months += self.interval
+                continue
+            number += 1
+            yield number, ts
+            months += self.interval
+
+    def starts(self, dtstart: float, window_start: float, window_end: float) -> Iterator[float]:
+        """Lazily yields the occurrence starts in [window_start, window_end], in order."""
+        for number, ts, local in self._occurrences(dtstart, window_start):
+            if (self.count is not None and number > self.count) or (
+                    self.until_ts is not None and ts > self.until_ts) or ts > window_end:
+                return
+            if ts >= window_start and not self._excluded(ts, local):
+                yield ts
+
+    def last_start(self, dtstart: float) -> Optional[float]:
+        """
+        An upper bound on the series' last start: UNTIL when there is no
+        COUNT, otherwise the last counted occurrence. None if it repeats forever.
+        """
+        if self.count is None:
+            return self.until_ts
+        last = None
+        for number, ts, _ in self._occurrences(dtstart, dtstart):
+            if (self.count is not None and number > self.count) or (
+                    self.until_ts is not None and ts > self.until_ts):
+                break
+            last = ts
+        return last
+
+
+def rule_for(event: Event) -> Optional[RecurrenceRule]:
+    """The event's parsed rule; None for one-off events and for rules we can't expand (kept as one occurrence)."""
+    if not event.recurrence:
+        return None
+    try:
+        return RecurrenceRule.parse(event.recurrence)
+    except (ValueError, KeyError):
+        logger.debug("Unsupported recurrence; keeping only the first occurrence", extra={"event_id": event.id})
+        return None
+
+
+def expand(event: Event, rule: RecurrenceRule, window_start: float, window_end: float) -> Iterator[Event]:
+    """
+    Lazily yields the series' occurrences starting in [window_start,
+    window_end] as plain events; each gets a Google-style instance id
+    (`<series id>_<UTC start>`) and no recurrence of its own.
+    """
+    duration = None if event.end_ts is None else event.end_ts - event.start_ts
+    for ts in rule.starts(event.start_ts, window_start, window_end):
+        instance_id = None
+        if event.id is not None:
+            instance_id = f"{event.id}_{datetime.fromtimestamp(ts, timezone.utc):%Y%m%dT%H%M%SZ}"
+        yield Event(event.summary, ts, None if duration is None else ts + duration, event.student_id,
+                    instance_id, None, event.extra)
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.recurrence` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running Recurrence Test ---")
+    # Monday 2025-09-01 09:00 UTC, Mondays and Wednesdays.
+    start = datetime(2025, 9, 1, 9, 0, tzinfo=timezone.utc)
+    lecture = Event("Cognitive Psychology Lecture", start.timestamp(), (start + timedelta(hours=1, minutes=15)).timestamp(),
+                    id="cogpsy", recurrence="RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251212\nEXDATE:20250903T090000Z")
+    rule = RecurrenceRule.parse(lecture.recurrence)
+    everything = list(expand(lecture, rule, 0, float("inf")))
+    assert len(everything) == 29, len(everything)   # 15 Mondays + 15 Wednesdays - 1 EXDATE
+    assert everything[0].start == start and everything[1].start == start + timedelta(days=7)
+    assert everything[0].id == "cogpsy_20250901T090000Z" and everything[0].recurrence is None
+    assert all(e.end_ts - e.start_ts == 4500 for e in everything)
+
+    # A window late in the series starts from the right period and yields the same occurrences.
+    lo, hi = (start + timedelta(days=60)).timestamp(), (start + timedelta(days=74)).timestamp()
+    window = [e.start_ts for e in expand(lecture, rule, lo, hi)]
+    assert window == [e.start_ts for e in everything if lo <= e.start_ts <= hi] and len(window) == 4, window
+    assert rule.last_start(lecture.start_ts) >= everything[-1].start_ts
+    assert RecurrenceRule.parse("RRULE:FREQ=WEEKLY;COUNT=3").last_start(lecture.start_ts) == (start + timedelta(days=14)).timestamp()
+
+    daily = RecurrenceRule.parse("RRULE:FREQ=DAILY;INTERVAL=2;COUNT=5")
+    starts = list(daily.starts(start.timestamp(), start.timestamp() + 3 * DAY, float("inf")))
+    assert starts == [start.timestamp() + d * DAY for d in (4, 6, 8)], starts
+    monthly = RecurrenceRule.parse("RRULE:FREQ=MONTHLY;COUNT=3")
+    jan31 = datetime(2025, 1, 31, 12, tzinfo=timezone.utc).timestamp()
+    assert [datetime.fromtimestamp(ts, timezone.utc).month for ts in monthly.starts(jan31, 0, float("inf"))] == [1, 3, 5]
+    for unsupported in ("FREQ=YEARLY", "FREQ=DAILY;BYDAY=MO,WE,FR;COUNT=6", "FREQ=MONTHLY;BYDAY=1MO;COUNT=3",
+                        "FREQ=WEEKLY;BYDAY=1MO", "FREQ=MONTHLY;BYMONTHDAY=15", "FREQ=WEEKLY;BYSETPOS=1",
+                        "FREQ=WEEKLY;BYMONTH=9", "FREQ=WEEKLY;INTERVAL=2;WKST=SU"):
+        try:
+            RecurrenceRule.parse(f"RRULE:{unsupported}")
+            raise AssertionError(f"{unsupported} should be rejected")
+        except ValueError:
+            pass
+    assert RecurrenceRule.parse("RRULE:FREQ=WEEKLY;WKST=MO;BYDAY=TU").byday == (1,)
+    # With the series' zone, BYDAY and the time of day are local: Mon/Wed 20:00 New York is Tue/Thu in UTC.
+    evening = datetime(2025, 9, 2, 0, 0, tzinfo=timezone.utc).timestamp()      # Mon 09-01 20:00 EDT
+    local_rule = RecurrenceRule.parse("DTSTART;TZID=America/New_York:20250901T200000\n"
+                                      "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4")
+    assert [datetime.fromtimestamp(ts, timezone.utc).strftime("%a %d %H") for ts in local_rule.starts(
+        evening, 0, float("inf"))] == ["Tue 02 00", "Thu 04 00", "Tue 09 00", "Thu 11 00"]
+    print(f"   -> {len(everything)} occurrences, window of {len(window)} OK.")
+    print("\n✅ Recurrence test passed!")
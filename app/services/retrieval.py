@@ -0,0 +1,332 @@
+import asyncio
+import fcntl
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_index import META_FILE, VectorIndex
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULTS = {
+    "index_path": "data/index",
+    "mode": "auto",
+    "top_k": 4,
+    "n_probe": 8,
+    "max_chars_per_hit": 800,
+    "hybrid": True,
+    "candidates": 50,
+    "rrf_k": 60,
+    "bm25_k1": 1.2,
+    "bm25_b": 0.75,
+}
+LEXICAL_DIR = "lexical"     # BM25 index, inside the vector index directory
+WRITER_LOCK_FILE = "writer.lock"
+TOMBSTONES_FILE = "tombstones.i64"  # chunk numbers hidden from search (earlier versions of changed documents)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """One retrieved chunk with its score (cosine, or the fused rank score in hybrid mode)."""
+    chunk: int
+    score: float
+    text: str
+    source: Optional[str] = None
+
+    def to_prompt(self, max_chars: int) -> str:
+        text = self.text if len(self.text) <= max_chars else self.text[:max_chars].rstrip() + "…"
+        source = f"({self.source})" if self.source else ""
+        return f"{source.strip()} {text}".strip()
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[Tuple[int, float]]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merges ranked (id, score) lists by summing 1 / (k + rank) per id. Only
+    ranks are used, so cosine and BM25 scores need no calibration.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (number, _) in enumerate(ranking, start=1):
+            fused[number] = fused.get(number, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+class Retriever:
+    """
+    Course-material search for the agents: embeds the query through the
+    configured embedding model (from `LLMService`), then searches the
+    memory-mapped `VectorIndex` in a worker thread so the event loop is free
+    while the matrix is scanned.
+
+    With a `LexicalIndex` (hybrid mode) the query is also BM25-scored, which
+    catches exact terms (theorem and author names, formula labels) that
+    embeddings blur, and the two candidate lists are combined with
+    reciprocal rank fusion. Both indexes share chunk numbers; a writer
+    catches up a lexical index that is behind (e.g. created after the
+    vectors) from the stored chunk texts with `catch_up_lexical`. Readers
+    only search the chunks both indexes have.
+
+    Chunks are never rewritten in place: `remove` appends their numbers to a
+    tombstone file, and searches over-fetch by that many and drop them.
+
+    Before each search the indexes' meta.json files are checked, and the
+    indexes are reopened when another process (the ingestion CLI) has
+    written to them, so new chunks become searchable without a restart.
+    """
+    def __init__(self, index: VectorIndex, embeddings: Any, settings: Optional[Dict[str, Any]] = None,
+                 lexical: Optional[LexicalIndex] = None):
+        self.index = index
+        self.embeddings = embeddings
+        self.settings = {**_DEFAULTS, **(settings or {})}
+        self.lexical = lexical
+        self._write_lock = threading.Lock()
+        self.tombstones: frozenset = frozenset()
+        self._tombstones_size = 0
+        self._load_tombstones()
+
+    def _load_tombstones(self) -> None:
+        """Re-reads the tombstone file if it grew (it is append-only)."""
+        path = self.index.path / TOMBSTONES_FILE
+        size = path.stat().st_size // 8 * 8 if path.exists() else 0
+        if size != self._tombstones_size:
+            self.tombstones = frozenset(np.fromfile(path, dtype=np.int64, count=size // 8).tolist())
+            self._tombstones_size = size
+
+    def catch_up_lexical(self, batch_size: int = 10_000) -> None:
+        """Indexes the chunks the lexical index is missing. Writers only: hold `writer_lock`."""
+        if self.lexical is None:
+            return
+        if self.lexical.count > self.index.count:
+            logger.warning("Lexical index is ahead of the vector index; using vector search only",
+                           extra={"lexical": self.lexical.count, "vector": self.index.count})
+            self.lexical = None
+            return
+        missing = self.index.count - self.lexical.count
+        for lo in range(self.lexical.count, self.index.count, batch_size):
+            numbers = range(lo, min(lo + batch_size, self.index.count))
+            self.lexical.add(chunk.get("text", "") for chunk in self.index.get_chunks(numbers))
+        if missing:
+            logger.info("Lexical index caught up", extra={"chunks": missing, "path": str(self.lexical.path)})
+
+    def refresh(self) -> Tuple[VectorIndex, Optional[LexicalIndex]]:
+        """
+        The current (vector, lexical) indexes, reopened first if another
+        process has written to either. Searches already running keep the
+        instances they started with.
+        """
+        index, lexical = self.index, self.lexical
+        if index.changed_on_disk() or (lexical.changed_on_disk() if lexical is not None else self._lexical_created()):
+            with self._write_lock:
+                try:
+                    if self.index.changed_on_disk():
+                        self.index = VectorIndex(self.index.path)
+                    if self.lexical is not None and self.lexical.changed_on_disk():
+                        self.lexical = LexicalIndex(self.lexical.path, k1=self.lexical.k1, b=self.lexical.b)
+                    elif self._lexical_created():
+                        self.lexical = LexicalIndex(self.index.path / LEXICAL_DIR, k1=self.settings["bm25_k1"],
+                                                    b=self.settings["bm25_b"])
+                except (OSError, ValueError):
+                    # The writer replaced files between our reads; keep what we have and retry next search.
+                    logger.debug("Index changed while reloading; retrying on the next search")
+                index, lexical = self.index, self.lexical
+            logger.info("Retriever reloaded", extra={"path": str(index.path), "chunks": index.count})
+        self._load_tombstones()
+        return index, lexical
+
+    def _lexical_created(self) -> bool:
+        """Whether a writer has since created the BM25 index this hybrid retriever opened without."""
+        return (self.lexical is None and self.settings["hybrid"]
+                and (self.index.path / LEXICAL_DIR / META_FILE).exists())
+
+    async def asearch(self, query: str, k: Optional[int] = None) -> List[SearchHit]:
+        vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self.search, query, vector, k)
+
+    def search(self, query: str, vector: Sequence[float], k: Optional[int] = None) -> List[SearchHit]:
+        k = k or self.settings["top_k"]
+        index, lexical = self.refresh()
+        dead = self.tombstones
+        if lexical is None:
+            matches = self._vector_matches(index, vector, k, dead)[:k]
+        else:
+            candidates = max(k, self.settings["candidates"])
+            # The lexical index is written after the vectors, but may have been read later.
+            lexical_matches = [(n, s) for n, s in lexical.search(query, candidates + len(dead))
+                               if n < index.count and n not in dead][:candidates]
+            matches = reciprocal_rank_fusion([self._vector_matches(index, vector, candidates, dead)[:candidates],
+                                              lexical_matches], self.settings["rrf_k"])[:k]
+        chunks = index.get_chunks(number for number, _ in matches)
+        return [SearchHit(number, score, chunk.get("text", ""), chunk.get("source"))
+                for (number, score), chunk in zip(matches, chunks)]
+
+    def _vector_matches(self, index: VectorIndex, vector: Sequence[float], k: int,
+                        dead: frozenset) -> List[Tuple[int, float]]:
+        matches = index.search(vector, k + len(dead), mode=self.settings["mode"], n_probe=self.settings["n_probe"])
+        return [(n, s) for n, s in matches if n not in dead]
+
+    async def aadd_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """Embeds texts in one batch and appends them (with their metadata) to the index."""
+        if not texts:
+            return []
+        vectors = await self.embeddings.aembed_documents(texts)
+        chunks = [{"text": text, **(metadata or {})} for text, metadata in zip(texts, metadatas or [None] * len(texts))]
+        return await asyncio.to_thread(self.add, vectors, chunks)
+
+    def add(self, vectors: Any, chunks: List[Dict[str, Any]]) -> List[int]:
+        """Appends embedded chunks to the vector index and, in hybrid mode, the lexical index."""
+        with self._write_lock:
+            numbers = self.index.add(vectors, chunks)
+            if self.lexical is not None:
+                self.lexical.add(chunk.get("text", "") for chunk in chunks)
+        return numbers
+
+    def remove(self, chunk_numbers: Iterable[int]) -> None:
+        """Hides chunks from search from now on, in this and every other process."""
+        numbers = np.fromiter(chunk_numbers, dtype=np.int64)
+        if not len(numbers):
+            return
+        with self._write_lock:
+            self._load_tombstones()
+            with open(self.index.path / TOMBSTONES_FILE, "ab") as fp:
+                fp.truncate(self._tombstones_size)      # a torn entry from an interrupted write
+                numbers.tofile(fp)
+            self._load_tombstones()
+
+    def to_prompt(self, hits: List[SearchHit]) -> str:
+        return "\n".join(f"[{i}] {hit.to_prompt(self.settings['max_chars_per_hit'])}"
+                         for i, hit in enumerate(hits, start=1))
+
+
+def retrieval_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    return {**_DEFAULTS, **((config or load_config()).get("retrieval") or {})}
+
+
+@contextmanager
+def writer_lock(path: Union[str, Path]) -> Iterator[None]:
+    """
+    Held by the one process that may write the index at `path` (the
+    ingestion CLI) for as long as it writes. Readers never take it, so
+    several runs queue up here while the API keeps serving searches.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / WRITER_LOCK_FILE, "a") as fp:
+        try:
+            fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Waiting for another index writer", extra={"path": str(path)})
+            fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def open_retriever(path: Union[str, Path], embeddings: Any, settings: Optional[Dict[str, Any]] = None,
+                   writable: bool = True) -> Retriever:
+    """
+    A retriever over the existing vector index at `path`, plus its BM25 index
+    in hybrid mode. A writable one (opened under `writer_lock`) creates and
+    catches up the BM25 index; a read-only one never writes and uses the
+    BM25 index only once a writer has created it.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    lexical_path = Path(path) / LEXICAL_DIR
+    lexical = None
+    if settings["hybrid"] and (writable or (lexical_path / META_FILE).exists()):
+        lexical = LexicalIndex.create(lexical_path, k1=settings["bm25_k1"], b=settings["bm25_b"])
+    retriever = Retriever(VectorIndex(path), embeddings, settings, lexical)
+    if writable:
+        retriever.catch_up_lexical()
+    return retriever
+
+
+_default: Dict[str, Retriever] = {}
+_default_lock = threading.Lock()
+
+
+def get_retriever(llm_service: Any = None) -> Optional[Retriever]:
+    """
+    The process-wide, read-only retriever over `retrieval.index_path`,
+    opened on first use (the index is memory-mapped once and shared), with
+    the BM25 index in its `lexical/` subdirectory when `retrieval.hybrid` is
+    on. None while nothing has been indexed yet. Opening reads from disk, so
+    call it off the event loop.
+    """
+    settings = retrieval_settings()
+    path = settings["index_path"]
+    with _default_lock:
+        if path not in _default:
+            if not (Path(path) / META_FILE).exists():
+                return None
+            if llm_service is None:
+                from app.services.llm_service import LLMService
+                llm_service = LLMService()
+            _default[path] = open_retriever(path, llm_service.get_embedding_model(), settings, writable=False)
+            logger.info("Retriever opened", extra={"path": path, "chunks": len(_default[path].index)})
+        return _default[path]
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.retrieval` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    from app.services.fake_llm import FakeEmbeddings
+
+    async def main():
+        print("\n--- Running Retriever Test ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            embeddings = FakeEmbeddings(dimensions=256)
+            texts = [
+                "Working memory holds a limited number of items for a short time (Baddeley's model).",
+                "A p-value is the probability of data at least as extreme under the null hypothesis.",
+                "Long-term potentiation strengthens synapses and underlies learning and memory.",
+                "A Large Language Model (LLM) is a neural network trained to predict text.",
+            ]
+            sources = [{"source": "cogpsy.md"}, {"source": "stats.md"}, {"source": "neuro.md"}, {"source": "ai.md"}]
+            dense = Retriever(VectorIndex.create(tmp, dim=256), embeddings, {"top_k": 2})
+            await dense.aadd_texts(texts[:2], sources[:2])
+
+            # A read-only retriever has no BM25 index to use yet, and doesn't create one.
+            early = open_retriever(tmp, embeddings, {"top_k": 2}, writable=False)
+            assert early.lexical is None and not (Path(tmp) / LEXICAL_DIR).exists()
+            # A writer's lexical index opened later catches up on the chunks already stored.
+            with writer_lock(tmp):
+                retriever = open_retriever(tmp, embeddings, {"top_k": 2})
+            assert retriever.lexical.count == 2
+            # A reader opened now (as the API would be) sees chunks another writer adds later.
+            reader = Retriever(VectorIndex(tmp), embeddings, {"top_k": 2}, LexicalIndex(Path(tmp) / LEXICAL_DIR))
+            await retriever.aadd_texts(texts[2:], sources[2:])
+            assert retriever.lexical.count == retriever.index.count == 4
+            assert (await reader.asearch("What is an LLM?"))[0].source == "ai.md"
+            assert reader.index.count == reader.lexical.count == 4
+            assert (await early.asearch("Baddeley"))[0].source == "cogpsy.md" and early.lexical.count == 4
+
+            hits = await retriever.asearch("What is a p-value under the null hypothesis?")
+            assert hits[0].source == "stats.md", hits
+            # Removed chunks disappear for this retriever and for readers.
+            retriever.remove([1])
+            for searcher in (retriever, reader):
+                hits = await searcher.asearch("What is a p-value under the null hypothesis?", k=4)
+                assert len(hits) == 3 and "stats.md" not in {hit.source for hit in hits}, hits
+            hits = await retriever.asearch("Baddeley")
+            assert hits[0].source == "cogpsy.md", hits
+            hits = await retriever.asearch("What is an LLM?")
+            assert hits[0].source == "ai.md", hits
+            print(retriever.to_prompt(hits))
+
+            fused = reciprocal_rank_fusion([[(1, 0.9), (2, 0.5)], [(2, 7.0), (3, 1.0)]], k=60)
+            assert [n for n, _ in fused] == [2, 1, 3], fused
+        print("\n✅ Retriever test passed!")
+
+    asyncio.run(main())
@@ -0,0 +1,372 @@
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, tzinfo
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.prioritizer import TaskRanking
+from app.services.scheduling import CalendarAvailability, Interval
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULTS = {
+    "session_minutes": 50,
+    "break_minutes": 10,
+    "max_daily_hours": 6,
+    "max_tasks": 50,                # top-ranked tasks considered
+    "time_budget_ms": 50,           # local search stops at whichever limit comes first,
+    "max_iterations": 200_000,
+    "stale_iterations": 20,         # or after this many moves per slot without an improvement
+    "seed": 0,
+    "max_sessions_in_prompt": 40,
+    # peak:    hard (high-effort) tasks in peak-energy slots
+    # early:   high-priority tasks early in the window
+    # crowd:   per extra session of the same task on the same day
+    # missing: per session of a task that could not be scheduled, times its priority
+    "weights": {"peak": 1.0, "early": 0.5, "crowd": 0.3, "missing": 2.0},
+}
+
+
+@dataclass(frozen=True)
+class StudyItem:
+    """A task to schedule: `sessions` slots of study, all ending before `due_ts` unless already overdue."""
+    title: str
+    sessions: int
+    due_ts: float
+    priority: float
+    difficulty: float               # 0..1, relative effort
+    label: str = ""
+
+
+@dataclass
+class SlotTable:
+    """Fixed-length study slots cut from the free blocks, as parallel arrays."""
+    start: np.ndarray
+    end: np.ndarray
+    peak: np.ndarray
+    day: np.ndarray                 # local day index from the first slot's day
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def build_slots(free_blocks: List[Interval], peak_blocks: List[Interval], session_s: float, break_s: float,
+                tz: tzinfo = timezone.utc) -> SlotTable:
+    """Cuts every free block into back-to-back sessions separated by breaks; a slot is peak if a peak block covers it."""
+    starts = []
+    for block_start, block_end in free_blocks:
+        t = block_start
+        while t + session_s <= block_end:
+            starts.append(t)
+            t += session_s + break_s
+    start = np.array(starts, dtype=np.float64)
+    end = start + session_s
+
+    peak = np.zeros(len(start), dtype=bool)
+    if len(start) and peak_blocks:
+        peak_start = np.array([b[0] for b in peak_blocks])
+        peak_end = np.array([b[1] for b in peak_blocks])
+        # Peak blocks are sorted and disjoint: the only candidate is the last one starting at or before the slot.
+        k = np.searchsorted(peak_start, start, side="right") - 1
+        valid = k >= 0
+        peak[valid] = end[valid] <= peak_end[k[valid]]
+
+    ordinals = [datetime.fromtimestamp(ts, tz).toordinal() for ts in starts]
+    day = np.array(ordinals, dtype=np.int64) - (ordinals[0] if ordinals else 0)
+    return SlotTable(start, end, peak, day)
+
+
+def items_from_ranking(ranking: TaskRanking, session_s: float, limit: Optional[int] = None) -> List[StudyItem]:
+    """Open tasks in priority order, each needing enough sessions to cover its estimated effort."""
+    features = ranking.features
+    order = [int(i) for i in ranking.order[:limit] if ranking.score[i] > 0]
+    max_effort = max((features.effort_hours[i] for i in order), default=1.0) or 1.0
+    items = []
+    for i in order:
+        course = int(features.course[i])
+        items.append(StudyItem(
+            title=features.tasks.title[i],
+            sessions=max(1, math.ceil(features.effort_hours[i] * 3600 / session_s - 1e-9)),
+            due_ts=float(features.due_ts[i]),
+            priority=float(ranking.score[i]),
+            difficulty=float(features.effort_hours[i] / max_effort),
+            label=features.course_labels[course] if course >= 0 else "",
+        ))
+    return items
+
+
+@dataclass
+class Schedule:
+    """A slot-by-slot study schedule: `assignment[j]` is the item index in slot j, or -1."""
+    items: List[StudyItem]
+    slots: SlotTable
+    assignment: List[int]
+    objective: float
+    greedy_objective: float
+    iterations: int
+    tz: tzinfo = timezone.utc
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    def sessions(self) -> List[Tuple[int, int]]:
+        """(slot, item) pairs in time order."""
+        return [(j, i) for j, i in enumerate(self.assignment) if i >= 0]
+
+    def unscheduled(self) -> Dict[int, int]:
+        """Item index -> sessions that did not fit."""
+        placed = [0] * len(self.items)
+        for i in self.assignment:
+            if i >= 0:
+                placed[i] += 1
+        return {i: item.sessions - placed[i] for i, item in enumerate(self.items) if placed[i] < item.sessions}
+
+    def to_prompt(self) -> str:
+        """The fixed skeleton for the narration prompt, one line per day."""
+        limit = int(self.settings.get("max_sessions_in_prompt", _DEFAULTS["max_sessions_in_prompt"]))
+        days: Dict[str, List[str]] = {}
+        sessions = self.sessions()
+        for j, i in sessions[:limit]:
+            start = datetime.fromtimestamp(self.slots.start[j], self.tz)
+            end = datetime.fromtimestamp(self.slots.end[j], self.tz)
+            entry = f"{start:%H:%M}-{end:%H:%M} {self.items[i].title}" + (" (peak)" if self.slots.peak[j] else "")
+            days.setdefault(f"{start:%a %m-%d}", []).append(entry)
+        lines = [f"{day}: " + "; ".join(entries) for day, entries in days.items()]
+        if len(sessions) > limit:
+            lines.append(f"(+{len(sessions) - limit} more sessions)")
+        missing = list(self.unscheduled().items())
+        if missing:
+            minutes = self.settings.get("session_minutes", _DEFAULTS["session_minutes"])
+            shown = ", ".join(f"{self.items[i].title} ({n} x {minutes}min)" for i, n in missing[:limit])
+            more = f" (+{len(missing) - limit} more tasks)" if len(missing) > limit else ""
+            lines.append(f"Not enough free time for: {shown}{more}")
+        return "\n".join(lines) or "(nothing to schedule)"
+
+
+class _Solver:
+    """Greedy construction followed by hill-climbing local search with O(1) move deltas."""
+
+    def __init__(self, items: List[StudyItem], slots: SlotTable, window_start: float, settings: Dict[str, Any]):
+        self.items, self.slots = items, slots
+        weights = {**_DEFAULTS["weights"], **settings.get("weights", {})}
+        self.w_peak, self.w_early = float(weights["peak"]), float(weights["early"])
+        self.w_crowd, self.w_missing = float(weights["crowd"]), float(weights["missing"])
+        session_s = float(settings["session_minutes"]) * 60
+        self.day_cap = max(1, int(float(settings["max_daily_hours"]) * 3600 // session_s))
+
+        # Python lists: the local search touches single elements, where lists beat array indexing.
+        self.start = slots.start.tolist()
+        self.end = slots.end.tolist()
+        self.peak = slots.peak.astype(np.float64).tolist()
+        self.day = slots.day.tolist()
+        horizon = max((self.end[-1] if self.end else window_start) - window_start, 1.0)
+        self.early = (1.0 - (slots.start - window_start) / horizon).tolist()
+        n_days = (max(self.day) + 1) if self.day else 1
+
+        self.priority = [item.priority for item in items]
+        self.difficulty = [item.difficulty for item in items]
+        self.due = [item.due_ts for item in items]
+        self.overdue = [item.due_ts <= window_start for item in items]
+        self.assignment = [-1] * len(slots)
+        self.day_load = [0] * n_days
+        self.count = [[0] * n_days for _ in items]      # sessions per (item, day)
+        self.missing = [item.sessions for item in items]
+
+    # --- scoring ---
+    def fit(self, i: int, j: int) -> float:
+        return self.w_peak * self.difficulty[i] * self.peak[j] + self.w_early * self.priority[i] * self.early[j]
+
+    def feasible(self, i: int, j: int) -> bool:
+        return self.overdue[i] or self.end[j] <= self.due[i]
+
+    def objective(self) -> float:
+        total = sum(self.fit(i, j) for j, i in enumerate(self.assignment) if i >= 0)
+        total -= self.w_crowd * sum(c * (c - 1) / 2 for row in self.count for c in row)
+        total -= self.w_missing * sum(p * m for p, m in zip(self.priority, self.missing))
+        return total
+
+    def _place(self, i: int, j: int) -> None:
+        self.assignment[j] = i
+        self.day_load[self.day[j]] += 1
+        self.count[i][self.day[j]] += 1
+        self.missing[i] -= 1
+
+    def _remove(self, j: int) -> int:
+        i = self.assignment[j]
+        self.assignment[j] = -1
+        self.day_load[self.day[j]] -= 1
+        self.count[i][self.day[j]] -= 1
+        self.missing[i] += 1
+        return i
+
+    # --- construction ---
+    def greedy(self) -> None:
+        """Items in priority order take their best remaining slots (vectorized over slots)."""
+        slots = self.slots
+        taken = np.zeros(len(slots), dtype=bool)
+        day_full = np.zeros(len(self.day_load), dtype=bool)
+        base_peak, base_early = slots.peak.astype(np.float64), np.asarray(self.early)
+        for i, item in enumerate(self.items):
+            allowed = ~taken & (True if self.overdue[i] else slots.end <= item.due_ts)
+            gain = self.w_peak * item.difficulty * base_peak + self.w_early * item.priority * base_early
+            counts = np.zeros(len(self.day_load))
+            for _ in range(item.sessions):
+                candidates = allowed & ~day_full[slots.day]
+                if not candidates.any():
+                    break
+                j = int(np.argmax(np.where(candidates, gain - self.w_crowd * counts[slots.day], -np.inf)))
+                self._place(i, j)
+                taken[j] = True
+                allowed[j] = False
+                counts[self.day[j]] += 1
+                day_full[self.day[j]] = self.day_load[self.day[j]] >= self.day_cap
+
+    # --- improvement ---
+    def _move_delta(self, i: int, src_day: int, dst_day: int) -> float:
+        """Crowding change when one session of item i moves between days."""
+        if src_day == dst_day:
+            return 0.0
+        return -self.w_crowd * (self.count[i][dst_day] - (self.count[i][src_day] - 1))
+
+    def local_search(self, budget_s: float, max_iterations: int, stale_limit: int, seed: int) -> int:
+        rng = random.Random(seed)
+        n_slots = len(self.assignment)
+        if not n_slots:
+            return 0
+        deadline = time.perf_counter() + budget_s
+        short = [x for x, m in enumerate(self.missing) if m]
+        iterations = last_improvement = 0
+        while iterations < max_iterations and iterations - last_improvement < stale_limit:
+            iterations += 1
+            if not iterations & 255 and time.perf_counter() > deadline:
+                break
+            a, b = rng.randrange(n_slots), rng.randrange(n_slots)
+            i, k = self.assignment[a], self.assignment[b]
+            da, db = self.day[a], self.day[b]
+            if i < 0 and k < 0:
+                # Both free: try to place a session that did not fit.
+                if not short or self.day_load[db] >= self.day_cap:
+                    continue
+                x = rng.choice(short)
+                if not self.missing[x]:
+                    short.remove(x)
+                    continue
+                delta = self.w_missing * self.priority[x] + self.fit(x, b) - self.w_crowd * self.count[x][db]
+                if self.feasible(x, b) and delta > 1e-12:
+                    self._place(x, b)
+                    last_improvement = iterations
+                continue
+            if k < 0:
+                # Relocate a's session into free slot b.
+                if (da != db and self.day_load[db] >= self.day_cap) or not self.feasible(i, b):
+                    continue
+                delta = self.fit(i, b) - self.fit(i, a) + self._move_delta(i, da, db)
+                if delta > 1e-12:
+                    self._remove(a)
+                    self._place(i, b)
+                    last_improvement = iterations
+                continue
+            if i < 0 or i == k:
+                continue
+            if not (self.feasible(i, b) and self.feasible(k, a)):
+                continue
+            # Swap; day loads are unchanged.
+            delta = self.fit(i, b) + self.fit(k, a) - self.fit(i, a) - self.fit(k, b)
+            if da != db:
+                delta += self._move_delta(i, da, db) + self._move_delta(k, db, da)
+            if delta > 1e-12:
+                self._remove(a)
+                self._remove(b)
+                self._place(i, b)
+                self._place(k, a)
+                last_improvement = iterations
+        return iterations
+
+
+def solve(items: List[StudyItem], slots: SlotTable, window_start: float,
+          settings: Optional[Dict[str, Any]] = None, tz: tzinfo = timezone.utc) -> Schedule:
+    """Assigns study sessions to slots: greedy by priority, then local search within `time_budget_ms`."""
+    settings = {**_DEFAULTS, **(settings or {})}
+    solver = _Solver(items, slots, window_start, settings)
+    solver.greedy()
+    greedy_objective = solver.objective()
+    iterations = solver.local_search(
+        float(settings["time_budget_ms"]) / 1000, int(settings["max_iterations"]),
+        max(1000, int(settings["stale_iterations"]) * len(slots)), int(settings["seed"]),
+    )
+    schedule = Schedule(items, slots, solver.assignment, solver.objective(), greedy_objective, iterations,
+                        tz=tz, settings=settings)
+    logger.debug("Schedule solved", extra={
+        "items": len(items), "slots": len(slots), "iterations": iterations,
+        "greedy_objective": round(greedy_objective, 4), "objective": round(schedule.objective, 4),
+    })
+    return schedule
+
+
+def solve_schedule(availability: CalendarAvailability, ranking: TaskRanking, profile: Optional[Dict] = None,
+                   settings: Optional[Dict[str, Any]] = None) -> Schedule:
+    """
+    Builds the study-plan skeleton from the computed availability and task
+    ranking. A profile's `study_patterns.session_minutes` overrides the
+    configured session length.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    patterns = (profile or {}).get("learning_preferences", {}).get("study_patterns", {})
+    if patterns.get("session_minutes"):
+        settings["session_minutes"] = patterns["session_minutes"]
+    session_s = float(settings["session_minutes"]) * 60
+    slots = build_slots(availability.free_blocks, availability.peak_blocks, session_s,
+                        float(settings["break_minutes"]) * 60, availability.tz)
+    items = items_from_ranking(ranking, session_s, int(settings["max_tasks"]))
+    return solve(items, slots, availability.window[0], settings, availability.tz)
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.schedule_solver` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    from app.core.records import Event, Task
+    from app.services.prioritizer import prioritize_tasks
+    from app.services.scheduling import analyze_calendar
+
+    print("\n--- Running Schedule Solver Test ---")
+    monday = datetime(2025, 8, 18, 0, 0, tzinfo=timezone.utc)
+
+    def at(day: int, hour: float) -> float:
+        return (monday + timedelta(days=day, hours=hour)).timestamp()
+
+    profile = {
+        "learning_preferences": {"study_patterns": {"peak_energy": "late_morning"}},
+        "academic_info": {"current_courses": [{"name": "Cognitive Psychology", "grade": "B+"}]},
+    }
+    events = [Event("Lecture", at(0, 7), at(0, 12)), Event("Lecture", at(1, 7), at(1, 12)),
+              Event("Lecture", at(2, 7), at(2, 12))]
+    tasks = [
+        Task("Cognitive Psychology Essay", at(2, 23), "needsAction", "Essay on memory models."),
+        Task("Quiz Prep", at(1, 18), "needsAction"),
+        Task("Done", at(1, 18), "completed"),
+    ]
+    settings = {"session_minutes": 60, "break_minutes": 0, "max_daily_hours": 4}
+    availability = analyze_calendar(events, profile, start=monday, days=3,
+                                    settings={"waking_hours": [7, 18]})
+    ranking = prioritize_tasks(tasks, profile, now=monday)
+    schedule = solve_schedule(availability, ranking, profile, settings)
+
+    assert len(schedule.slots) == 18, len(schedule.slots)  # 3 days x 12:00-18:00
+    titles = {schedule.items[i].title for i in schedule.assignment if i >= 0}
+    assert titles == {"Cognitive Psychology Essay", "Quiz Prep"}, titles
+    assert not schedule.unscheduled(), schedule.unscheduled()
+    for j, i in schedule.sessions():
+        assert schedule.slots.end[j] <= schedule.items[i].due_ts
+    loads = np.bincount(schedule.slots.day[[j for j, _ in schedule.sessions()]])
+    assert loads.max() <= 4, loads
+    assert schedule.objective >= schedule.greedy_objective - 1e-9
+    print(schedule.to_prompt())
+    print(f"   -> objective {schedule.greedy_objective:.3f} -> {schedule.objective:.3f} "
+          f"in {schedule.iterations} iterations")
+    print("\n✅ Schedule solver test passed!")
@@ -0,0 +1,263 @@
+import heapq
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.records import Event
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Interval = Tuple[float, float]
+
+# Local hours (start, end) for each `study_patterns.peak_energy` value in a profile.
+DEFAULT_ENERGY_WINDOWS: Dict[str, Tuple[int, int]] = {
+    "early_morning": (6, 9),
+    "morning": (8, 12),
+    "late_morning": (10, 13),
+    "afternoon": (13, 17),
+    "evening": (17, 21),
+    "night": (20, 24),
+}
+
+_DEFAULTS = {
+    "timezone": "UTC",
+    "waking_hours": [7, 23],
+    "min_block_minutes": 30,
+    "max_blocks_in_prompt": 20,
+    "max_conflicts_in_prompt": 10,
+    "max_conflicts": 1000,  # conflicting pairs kept; the total is always counted
+}
+
+
+def merge_busy(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sweep line: sorts intervals by start and merges every overlapping or touching run."""
+    merged: List[List[float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def sweep_calendar(events: Iterable[Event], limit: Optional[int] = None
+                   ) -> Tuple[List[Interval], List[Tuple[Event, Event]], int, int]:
+    """
+    One pass over events already sorted by start, which may be a lazy stream:
+    merges busy time and finds conflicts with a min-heap of the active
+    events' ends (every event still active when another starts overlaps it).
+    Keeps up to `limit` overlapping pairs but counts them all, so dense
+    calendars cost O(n log n + limit) rather than O(number of conflicts).
+    Returns (busy, conflicts, conflict count, events seen).
+    """
+    busy: List[List[float]] = []
+    conflicts: List[Tuple[Event, Event]] = []
+    total = seen = 0
+    active: List[Tuple[float, int, Event]] = []
+    for seen, event in enumerate(events, 1):
+        start, end = event.start_ts, _end_ts(event)
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        total += len(active)
+        if limit is None or len(conflicts) < limit:
+            room = len(active) if limit is None else limit - len(conflicts)
+            conflicts.extend((other, event) for _, _, other in active[:room])
+        if end > start:
+            heapq.heappush(active, (end, seen, event))
+            if busy and start <= busy[-1][1]:
+                if end > busy[-1][1]:
+                    busy[-1][1] = end
+            else:
+                busy.append([start, end])
+    return [(start, end) for start, end in busy], conflicts, total, seen
+
+
+def find_conflicts(events: Iterable[Event], limit: Optional[int] = None) -> Tuple[List[Tuple[Event, Event]], int]:
+    """Overlapping event pairs (up to `limit`) and their exact count; see `sweep_calendar`."""
+    _, conflicts, total, _ = sweep_calendar(sorted(events, key=lambda e: e.start_ts), limit)
+    return conflicts, total
+
+
+def subtract(window: Interval, busy: List[Interval], min_length: float = 0.0,
+             busy_ends: Optional[List[float]] = None) -> List[Interval]:
+    """
+    Free sub-intervals of `window` not covered by the merged, sorted `busy`
+    intervals. Pass `busy_ends` (the intervals' end times) to bisect straight
+    to the first interval that can overlap the window.
+    """
+    free = []
+    cursor, window_end = window
+    first = bisect_right(busy_ends, cursor) if busy_ends is not None else 0
+    for k in range(first, len(busy)):
+        start, end = busy[k]
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start - cursor >= min_length and start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if window_end - cursor >= min_length and window_end > cursor:
+        free.append((cursor, window_end))
+    return free
+
+
+def daily_windows(start: datetime, end: datetime, hours: Tuple[int, int], tz: tzinfo) -> List[Interval]:
+    """The local [hours[0], hours[1]) window of every day touching [start, end), clipped to it."""
+    windows = []
+    day = start.astimezone(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    lo, hi = start.timestamp(), end.timestamp()
+    while day.timestamp() < hi:
+        open_ts = day.replace(hour=hours[0]).timestamp()
+        close_ts = (day + timedelta(days=1) if hours[1] >= 24 else day.replace(hour=hours[1])).timestamp()
+        if close_ts > lo and open_ts < hi:
+            windows.append((max(open_ts, lo), min(close_ts, hi)))
+        # Aware-datetime arithmetic is wall-clock, so days stay aligned across DST changes.
+        day += timedelta(days=1)
+    return windows
+
+
+def _end_ts(event: Event) -> float:
+    return event.end_ts if event.end_ts is not None else event.start_ts
+
+
+def _as_event(event: Any) -> Event:
+    return event if isinstance(event, Event) else Event.from_dict(event)
+
+
+@dataclass
+class CalendarAvailability:
+    """Deterministic calendar analysis: merged busy time, free blocks, peak-energy blocks and conflicts."""
+    window: Interval
+    busy: List[Interval]
+    free_blocks: List[Interval]
+    peak_blocks: List[Interval]
+    conflicts: List[Tuple[Event, Event]]
+    conflict_count: int
+    tz: tzinfo = timezone.utc
+    peak_energy: Optional[str] = None
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def free_hours(self) -> float:
+        return sum(end - start for start, end in self.free_blocks) / 3600
+
+    @property
+    def busy_hours(self) -> float:
+        return sum(end - start for start, end in self.busy) / 3600
+
+    def _fmt(self, interval: Interval) -> str:
+        start = datetime.fromtimestamp(interval[0], self.tz)
+        end = datetime.fromtimestamp(interval[1], self.tz)
+        return f"{start:%a %m-%d %H:%M}-{end:%H:%M}"
+
+    def to_prompt(self) -> str:
+        """A compact, line-oriented summary for the planner prompt."""
+        max_blocks = int(self.settings.get("max_blocks_in_prompt", _DEFAULTS["max_blocks_in_prompt"]))
+        max_conflicts = int(self.settings.get("max_conflicts_in_prompt", _DEFAULTS["max_conflicts_in_prompt"]))
+        start, end = (datetime.fromtimestamp(ts, self.tz) for ts in self.window)
+        lines = [
+            f"Window: {start:%a %m-%d %H:%M} to {end:%a %m-%d %H:%M} ({self.tz}); busy {self.busy_hours:.1f}h, "
+            f"free {self.free_hours:.1f}h in {len(self.free_blocks)} blocks.",
+        ]
+        if self.peak_energy:
+            peak = ", ".join(self._fmt(b) for b in self.peak_blocks[:max_blocks]) or "none"
+            lines.append(f"Free during peak energy ({self.peak_energy}): {peak}")
+        longest = sorted(self.free_blocks, key=lambda b: b[1] - b[0], reverse=True)[:max_blocks]
+        lines.append("Longest free blocks: " + (", ".join(self._fmt(b) for b in sorted(longest)) or "none"))
+        if self.conflict_count:
+            shown = "; ".join(f"{a.summary} x {b.summary}" for a, b in self.conflicts[:max_conflicts])
+            hidden = self.conflict_count - min(len(self.conflicts), max_conflicts)
+            more = f" (+{hidden} more)" if hidden else ""
+            lines.append(f"Conflicts ({self.conflict_count}): {shown}{more}")
+        else:
+            lines.append("Conflicts: none")
+        return "\n".join(lines)
+
+
+def analyze_calendar(events: Iterable[Any], profile: Optional[Dict] = None, start: Optional[datetime] = None,
+                     days: int = 7, settings: Optional[Dict[str, Any]] = None,
+                     presorted: bool = False) -> CalendarAvailability:
+    """
+    Computes availability over [start, start + days) from calendar events.
+    Free blocks lie inside the configured waking hours and are at least
+    `min_block_minutes` long; peak blocks are the free time inside the
+    profile's `peak_energy` window. With `presorted`, `events` is consumed
+    as a stream in start order and never held in memory as a whole.
+    """
+    settings = {**_DEFAULTS, **(settings or {})}
+    tz = ZoneInfo(settings["timezone"])
+    start = start or datetime.now(timezone.utc)
+    end = start + timedelta(days=days)
+    events = map(_as_event, events)
+    if not presorted:
+        events = sorted(events, key=lambda e: e.start_ts)
+    busy, conflicts, conflict_count, seen = sweep_calendar(events, limit=int(settings["max_conflicts"]))
+
+    min_length = float(settings["min_block_minutes"]) * 60
+    waking = tuple(settings["waking_hours"])
+    busy_ends = [end for _, end in busy]
+    free = []
+    for window in daily_windows(start, end, waking, tz):
+        free.extend(subtract(window, busy, min_length, busy_ends))
+
+    peak_energy = (profile or {}).get("learning_preferences", {}).get("study_patterns", {}).get("peak_energy")
+    energy_windows = {**DEFAULT_ENERGY_WINDOWS, **settings.get("energy_windows", {})}
+    peak_blocks: List[Interval] = []
+    if peak_energy in energy_windows:
+        peak_windows = daily_windows(start, end, tuple(energy_windows[peak_energy]), tz)
+        # Both lists are sorted and disjoint, so a two-pointer walk intersects them.
+        i = j = 0
+        while i < len(free) and j < len(peak_windows):
+            lo = max(free[i][0], peak_windows[j][0])
+            hi = min(free[i][1], peak_windows[j][1])
+            if hi - lo >= min_length:
+                peak_blocks.append((lo, hi))
+            if free[i][1] < peak_windows[j][1]:
+                i += 1
+            else:
+                j += 1
+
+    availability = CalendarAvailability(
+        window=(start.timestamp(), end.timestamp()), busy=busy, free_blocks=free, peak_blocks=peak_blocks,
+        conflicts=conflicts, conflict_count=conflict_count, tz=tz, peak_energy=peak_energy, settings=settings,
+    )
+    logger.debug("Calendar analyzed", extra={
+        "events": seen, "free_blocks": len(free), "conflicts": conflict_count,
+    })
+    return availability
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.scheduling` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running Scheduling Engine Test ---")
+    monday = datetime(2025, 8, 18, 0, 0, tzinfo=timezone.utc)
+
+    def at(day: int, hour: float) -> float:
+        return (monday + timedelta(days=day, hours=hour)).timestamp()
+
+    events = [
+        Event("Lecture", at(0, 9), at(0, 11)),
+        Event("Lab", at(0, 10), at(0, 12)),          # overlaps Lecture
+        Event("Club", at(0, 12), at(0, 13)),         # touches Lab, no conflict
+        Event("Study Group", at(1, 10), at(1, 12)),
+    ]
+    assert merge_busy([(1, 3), (2, 4), (5, 6), (6, 7)]) == [(1, 4), (5, 7)]
+    conflicts, total = find_conflicts(events)
+    assert [(a.summary, b.summary) for a, b in conflicts] == [("Lecture", "Lab")] and total == 1, conflicts
+    print("   -> Merge and conflict detection OK.")
+
+    profile = {"learning_preferences": {"study_patterns": {"peak_energy": "late_morning"}}}
+    availability = analyze_calendar(events, profile, start=monday, days=2)
+    assert availability.busy == [(at(0, 9), at(0, 13)), (at(1, 10), at(1, 12))]
+    assert availability.free_blocks[:2] == [(at(0, 7), at(0, 9)), (at(0, 13), at(0, 23))]
+    assert availability.peak_blocks == [(at(1, 12), at(1, 13))], availability.peak_blocks
+    print(availability.to_prompt())
+    print("\n✅ Scheduling engine test passed!")
@@ -0,0 +1,374 @@
+import hashlib
+import heapq
+import io
+import json
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.records import Event, Task
+from app.services.json_stream import LoadStats, Source, iter_json_array, open_source
+from app.services.recurrence import expand, rule_for
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Events and tasks without a `student_id` are stored under this owner and are
+# visible to every student, matching the in-memory DataManager.
+SHARED_OWNER = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id  TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id         TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    start_ts   REAL NOT NULL,
+    end_ts     REAL,
+    doc        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS event_series (
+    id         TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    start_ts   REAL NOT NULL,
+    end_ts     REAL,
+    last_ts    REAL,        -- upper bound on the last occurrence's start; NULL repeats forever
+    doc        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id         TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    status     TEXT,
+    due_ts     REAL NOT NULL,
+    doc        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_student_start ON events (student_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_ts);
+CREATE INDEX IF NOT EXISTS idx_series_student_start ON event_series (student_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_tasks_student_status_due ON tasks (student_id, status, due_ts);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks (status, due_ts);
+"""
+
+# The statements are module constants: sqlite3 keeps a per-connection cache of
+# prepared statements keyed by SQL text, so each one is compiled once per
+# connection and only re-bound with new parameters afterwards.
+SQL_PROFILE = "SELECT doc FROM profiles WHERE id = ?"
+SQL_EVENTS = "SELECT doc, start_ts, end_ts FROM events WHERE start_ts BETWEEN ? AND ? ORDER BY start_ts"
+SQL_STUDENT_EVENTS = (
+    "SELECT doc, start_ts, end_ts FROM events "
+    "WHERE student_id IN (?, ?) AND start_ts BETWEEN ? AND ? ORDER BY start_ts"
+)
+# Recurring events are stored once per series and expanded per query window.
+SQL_SERIES = (
+    "SELECT doc, start_ts, end_ts FROM event_series WHERE start_ts <= ? AND (last_ts IS NULL OR last_ts >= ?)"
+)
+SQL_STUDENT_SERIES = (
+    "SELECT doc, start_ts, end_ts FROM event_series "
+    "WHERE student_id IN (?, ?) AND start_ts <= ? AND (last_ts IS NULL OR last_ts >= ?)"
+)
+SQL_TASKS = "SELECT doc, due_ts FROM tasks WHERE status = ? AND due_ts > ? ORDER BY due_ts"
+SQL_STUDENT_TASKS = (
+    "SELECT doc, due_ts FROM tasks WHERE student_id IN (?, ?) AND status = ? AND due_ts > ? ORDER BY due_ts"
+)
+SQL_INSERT_PROFILE = "INSERT OR REPLACE INTO profiles (id, doc) VALUES (?, ?)"
+# Events and tasks are upserted by id, so re-importing the same calendar
+# updates rows in place instead of duplicating them.
+SQL_INSERT_EVENT = (
+    "INSERT INTO events (id, student_id, start_ts, end_ts, doc) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET student_id = excluded.student_id, start_ts = excluded.start_ts, "
+    "end_ts = excluded.end_ts, doc = excluded.doc"
+)
+SQL_INSERT_SERIES = (
+    "INSERT INTO event_series (id, student_id, start_ts, end_ts, last_ts, doc) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET student_id = excluded.student_id, start_ts = excluded.start_ts, "
+    "end_ts = excluded.end_ts, last_ts = excluded.last_ts, doc = excluded.doc"
+)
+SQL_INSERT_TASK = (
+    "INSERT INTO tasks (id, student_id, status, due_ts, doc) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET student_id = excluded.student_id, status = excluded.status, "
+    "due_ts = excluded.due_ts, doc = excluded.doc"
+)
+# An event that gains or loses its recurrence rule moves between the two tables.
+SQL_DELETE_EVENT = "DELETE FROM events WHERE id = ?"
+SQL_DELETE_SERIES = "DELETE FROM event_series WHERE id = ?"
+
+
+class SQLiteDataManager:
+    """
+    A DataManager backed by a SQLite file, so every uvicorn worker (and the
+    Streamlit app) shares one copy of the data instead of loading it into
+    each process. Exposes the same query methods as the in-memory DataManager.
+
+    The database runs in WAL mode, so readers never block each other or the
+    bulk importer. Each thread (including `asyncio.to_thread` workers) gets its
+    own connection; `close()` closes all of them and is called at shutdown.
+    """
+    def __init__(self, path: str, cached_statements: int = 64):
+        self.path = str(path)
+        self.cached_statements = cached_statements
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        logger.info("SQLiteDataManager initialized.", extra={"path": self.path})
+
+    def _connect(self) -> sqlite3.Connection:
+        thread = threading.get_ident()
+        conn = self._connections.get(thread)
+        if conn is None:
+            # Each connection is only used by the thread that opened it; the
+            # same-thread check is off so `close()` can close it from another.
+            conn = sqlite3.connect(self.path, cached_statements=self.cached_statements, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._connections[thread] = conn
+        return conn
+
+    def close(self):
+        """Closes every thread's connection; later queries reopen one."""
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            conn.close()
+
+    def reading(self):
+        """Each query reads one SQLite snapshot; imports don't block readers, so nothing to hold."""
+        return nullcontext()
+
+    # --- Queries ---
+    def get_student_profile(self, student_id: str) -> Optional[Dict]:
+        """Retrieves a specific student's profile."""
+        row = self._connect().execute(SQL_PROFILE, (student_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_events_between(self, start: datetime, end: datetime, student_id: Optional[str] = None) -> List[Event]:
+        """Returns events (including recurring occurrences) starting within [start, end], ordered by start time."""
+        lo, hi = start.timestamp(), end.timestamp()
+        conn = self._connect()
+        if student_id is None:
+            rows = conn.execute(SQL_EVENTS, (lo, hi))
+            series_rows = conn.execute(SQL_SERIES, (hi, lo)).fetchall()
+        else:
+            rows = conn.execute(SQL_STUDENT_EVENTS, (student_id, SHARED_OWNER, lo, hi))
+            series_rows = conn.execute(SQL_STUDENT_SERIES, (student_id, SHARED_OWNER, hi, lo)).fetchall()
+        # Timestamps come from their columns, so only the document body is decoded.
+        events = [Event.from_dict(json.loads(doc), start_ts, end_ts) for doc, start_ts, end_ts in rows]
+        if not series_rows:
+            return events
+        occurrences = []
+        for doc, start_ts, end_ts in series_rows:
+            series = Event.from_dict(json.loads(doc), start_ts, end_ts)
+            occurrences.append(expand(series, rule_for(series), lo, hi))
+        return list(heapq.merge(events, *occurrences, key=lambda event: event.start_ts))
+
+    def get_upcoming_events(self, days: int = 7, student_id: Optional[str] = None) -> List[Event]:
+        """Retrieves calendar events starting in the next `days` days."""
+        now = datetime.now(timezone.utc)
+        return self.get_events_between(now, now + timedelta(days=days), student_id)
+
+    def get_active_tasks(self, student_id: Optional[str] = None) -> List[Task]:
+        """Retrieves active, non-completed tasks that are not yet due."""
+        now = datetime.now(timezone.utc).timestamp()
+        if student_id is None:
+            rows = self._connect().execute(SQL_TASKS, ("needsAction", now))
+        else:
+            rows = self._connect().execute(SQL_STUDENT_TASKS, (student_id, SHARED_OWNER, "needsAction", now))
+        return [Task.from_dict(json.loads(doc), due_ts) for doc, due_ts in rows]
+
+    # --- Bulk import ---
+    def load_data(self, profile_json: str, calendar_json: str, task_json: str):
+        """Replaces the stored data with the given JSON documents."""
+        self.import_files(io.StringIO(profile_json), io.StringIO(calendar_json), io.StringIO(task_json),
+                          replace=True)
+
+    def import_files(self, profile_source: Source, calendar_source: Source, task_source: Source,
+                     replace: bool = False, use_mmap: bool = False, chunk_size: int = 1 << 16,
+                     batch_size: int = 5000) -> Dict[str, LoadStats]:
+        """
+        Streams profile/calendar/task exports into the database in batched
+        inserts, inside one transaction, so memory stays bounded by the batch
+        size. With `replace`, existing rows are deleted first; otherwise
+        profiles, events and tasks are upserted by id (see `_record_id`).
+        """
+        conn = self._connect()
+        stats = {name: LoadStats() for name in ("profiles", "events", "tasks")}
+        sources = [
+            ("profiles", profile_source, self._profile_row),
+            ("events", calendar_source, self._event_row),
+            ("tasks", task_source, self._task_row),
+        ]
+        with conn:
+            if replace:
+                for table in ("profiles", "events", "event_series", "tasks"):
+                    conn.execute(f"DELETE FROM {table}")
+            for key, source, to_row in sources:
+                started = time.perf_counter()
+                with open_source(source, use_mmap=use_mmap) as fp:
+                    records = iter_json_array(fp, key=key, chunk_size=chunk_size, stats=stats[key])
+                    for batch in _batched(_rows(records, to_row), batch_size):
+                        by_statement: Dict[str, List[Tuple]] = {}
+                        for sql, row in batch:
+                            by_statement.setdefault(sql, []).append(row)
+                        for sql, rows in by_statement.items():
+                            conn.executemany(sql, rows)
+                stats[key].seconds = time.perf_counter() - started
+                logger.info("Imported %s", key, extra={
+                    "records": stats[key].records,
+                    "records_per_second": round(stats[key].records_per_second),
+                })
+        # Refresh planner statistics so per-student queries pick the (student_id, ...) indexes.
+        conn.execute("ANALYZE")
+        return stats
+
+    def import_events(self, events: Iterable[Event], chunk_size: int = 5000) -> int:
+        """
+        Upserts a stream of Event records (e.g. from `calendar_import`) by id
+        in batches inside one transaction, so re-importing a calendar updates
+        it in place. Returns the number of events written.
+        """
+        conn = self._connect()
+        written = 0
+        with conn:
+            rows = _rows((event.to_dict() for event in events), self._event_row)
+            for batch in _batched(rows, chunk_size):
+                by_statement: Dict[str, List[Tuple]] = {}
+                for sql, row in batch:
+                    by_statement.setdefault(sql, []).append(row)
+                for sql, rows_for_sql in by_statement.items():
+                    conn.executemany(sql, rows_for_sql)
+                written += sum(sql in (SQL_INSERT_EVENT, SQL_INSERT_SERIES) for sql, _ in batch)
+        return written
+
+    # Each converter returns the statements (and rows) that store the record.
+    @staticmethod
+    def _profile_row(profile: Dict) -> List[Tuple[str, Tuple]]:
+        return [(SQL_INSERT_PROFILE, (profile["id"], json.dumps(profile)))]
+
+    @staticmethod
+    def _event_row(event: Dict) -> List[Tuple[str, Tuple]]:
+        record = Event.from_dict(event)
+        owner = record.student_id or SHARED_OWNER
+        doc = json.dumps(event)
+        record_id = _record_id(record.id, owner, doc)
+        rule = rule_for(record)
+        if rule is not None:
+            return [(SQL_INSERT_SERIES, (record_id, owner, record.start_ts, record.end_ts,
+                                         rule.last_start(record.start_ts), doc)),
+                    (SQL_DELETE_EVENT, (record_id,))]
+        return [(SQL_INSERT_EVENT, (record_id, owner, record.start_ts, record.end_ts, doc)),
+                (SQL_DELETE_SERIES, (record_id,))]
+
+    @staticmethod
+    def _task_row(task: Dict) -> List[Tuple[str, Tuple]]:
+        record = Task.from_dict(task)
+        owner = record.student_id or SHARED_OWNER
+        doc = json.dumps(task)
+        return [(SQL_INSERT_TASK, (_record_id(record.id, owner, doc), owner, record.status, record.due_ts, doc))]
+
+
+def _record_id(record_id: Optional[str], owner: str, doc: str) -> str:
+    """
+    The record's own id, or a digest of its owner and document when it has
+    none, so identical id-less records from a repeated import collapse too.
+    """
+    if record_id is not None:
+        return str(record_id)
+    return "sha1:" + hashlib.sha1(f"{owner}\0{doc}".encode("utf-8")).hexdigest()
+
+
+def _rows(records: Iterable[Dict], to_row) -> Iterator[Tuple[str, Tuple]]:
+    """Converts records to rows, skipping (and logging) malformed ones like DataManager does."""
+    for record in records:
+        try:
+            statements = to_row(record)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            logger.debug("Skipping malformed record during import")
+            continue
+        yield from statements
+
+
+def _batched(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==============================================================================
+# ✅ CLI / TEST BLOCK
+# Bulk-import exports into a database:
+#   python -m app.services.sqlite_store import --db data/atlas.db \
+#       --profiles data/profile.json --calendar data/calendar.json --tasks data/tasks.json
+# Run the self-test against the sample data:
+#   python -m app.services.sqlite_store test
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    from unittest.mock import patch
+
+    parser = argparse.ArgumentParser(description="Bulk import and self-test for the SQLite data store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Stream JSON exports into a SQLite database.")
+    importer.add_argument("--db", required=True)
+    importer.add_argument("--profiles", required=True)
+    importer.add_argument("--calendar", required=True)
+    importer.add_argument("--tasks", required=True)
+    importer.add_argument("--replace", action="store_true", help="Delete existing rows first.")
+    importer.add_argument("--mmap", action="store_true", help="Memory-map the input files.")
+    importer.add_argument("--batch-size", type=int, default=5000)
+    sub.add_parser("test", help="Import the sample data into a temporary database and query it.")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = SQLiteDataManager(args.db)
+        results = store.import_files(args.profiles, args.calendar, args.tasks, replace=args.replace,
+                                     use_mmap=args.mmap, batch_size=args.batch_size)
+        for name, stat in results.items():
+            print(f"✅ {name}: {stat.records} records in {stat.seconds:.2f}s "
+                  f"({stat.records_per_second:,.0f} records/s)")
+    else:
+        print("\n--- Running SQLiteDataManager Test ---")
+        data_path = Path(__file__).parent.parent.parent / "data"
+        mock_now = datetime(2025, 8, 18, 10, 0, 0, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as tmp, patch(f'{__name__}.datetime') as mock_date:
+            mock_date.now.return_value = mock_now
+
+            store = SQLiteDataManager(Path(tmp) / "atlas.db")
+            store.import_files(data_path / "profile.json", data_path / "calendar.json", data_path / "tasks.json")
+            profile = store.get_student_profile("student_123")
+            assert profile is not None, "Profile for student_123 should be found."
+            print(f"   -> Found profile for: {profile.get('personal_info', {}).get('name', 'N/A')}")
+            events = store.get_upcoming_events(student_id="student_123")
+            assert len(events) > 0, "Should find at least one upcoming event."
+            print(f"   -> Found {len(events)} upcoming event(s); first: {events[0].summary}")
+            lectures = [e.start.day for e in events if e.summary == "Cognitive Psychology Lecture"]
+            assert lectures == [20, 25], lectures
+            tasks = store.get_active_tasks(student_id="student_123")
+            assert len(tasks) > 0, "Should find at least one active task."
+            print(f"   -> Found {len(tasks)} active task(s); first: {tasks[0].title}")
+            plan = store._connect().execute("EXPLAIN QUERY PLAN " + SQL_STUDENT_TASKS,
+                                            ("student_123", SHARED_OWNER, "needsAction", 0)).fetchall()
+            print(f"   -> Task query plan: {plan[0][-1]}")
+
+            # Re-importing the same data upserts instead of duplicating rows.
+            store.import_files(data_path / "profile.json", data_path / "calendar.json", data_path / "tasks.json")
+            assert len(store.get_upcoming_events(student_id="student_123")) == len(events)
+            assert len(store.get_active_tasks(student_id="student_123")) == len(tasks)
+            store.import_events(events[:1])
+            assert len(store.get_upcoming_events(student_id="student_123")) == len(events)
+            print("   -> Re-import kept the event and task counts unchanged")
+            store.close()
+        print("\n✅ SQLiteDataManager test passed!")
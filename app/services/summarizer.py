@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from app.prompts.prompts import CHUNK_SUMMARY_PROMPT, MERGE_SUMMARIES_PROMPT
+from app.utils.cache import TTLCache
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+from app.utils.tokens import get_encoding, split_tokens
+
+logger = get_logger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {
+    "encoding": "cl100k_base",
+    "long_input_tokens": 3000,      # material above this is map-reduced instead of pasted into the prompt
+    "chunk_tokens": 1500,           # upper bound per chunk
+    "boundary_paragraphs": 8,       # expected paragraphs per chunk (cut points are content-defined)
+    "reduce_tokens": 3000,          # summaries merged per reduce call, and the size the final prompt gets
+    "concurrency": 4,               # summarization calls in flight per document
+    "cache": {"max_entries": 4096, "ttl_seconds": None},
+}
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def summarization_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    return {**_DEFAULTS, **((config or load_config()).get("summarization") or {})}
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def chunk_material(text: str, max_tokens: int, boundary_paragraphs: int = 4,
+                   encoding: Optional[str] = None) -> List[str]:
+    """
+    Splits text into chunks of whole paragraphs, at most `max_tokens` each
+    (longer paragraphs are split by tokens). A chunk ends after a paragraph
+    whose hash is 0 mod `boundary_paragraphs`, so the cut points depend on
+    the paragraphs themselves rather than on their offsets: editing one
+    paragraph changes its own chunk, and the chunks after it are the same
+    as before.
+    """
+    enc = get_encoding(encoding)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal size
+        if current:
+            chunks.append("\n\n".join(current))
+            current.clear()
+            size = 0
+
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = len(enc.encode(paragraph))
+        pieces = [paragraph] if tokens <= max_tokens else split_tokens(paragraph, max_tokens, 0, encoding)
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else len(enc.encode(piece))
+            if current and size + piece_tokens > max_tokens:
+                flush()
+            current.append(piece)
+            size += piece_tokens
+            if int.from_bytes(_digest(piece)[:8], "little") % boundary_paragraphs == 0:
+                flush()
+    flush()
+    return chunks
+
+
+@dataclass
+class SummaryResult:
+    summary: str
+    chunks: int
+    cached: int         # chunk summaries reused from earlier runs
+    llm_calls: int
+    levels: int         # reduce rounds before the summaries fit `reduce_tokens`
+
+    def stats(self) -> Dict[str, int]:
+        return {k: v for k, v in asdict(self).items() if k != "summary"}
+
+
+class MapReduceSummarizer:
+    """
+    Condenses material too long for one prompt: the chunks are summarized
+    concurrently (at most `concurrency` calls in flight), then neighbouring
+    summaries are merged level by level until they fit `reduce_tokens`.
+    Chunk and merge summaries are cached by content hash, so re-running on
+    an edited chapter only summarizes the chunks that changed.
+    """
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, cache: Optional[TTLCache] = None):
+        self.settings = {**_DEFAULTS, **(settings or {})}
+        cache_settings = {**_DEFAULTS["cache"], **(self.settings.get("cache") or {})}
+        self.cache = cache or TTLCache(cache_settings["max_entries"], cache_settings["ttl_seconds"])
+        self.encoding = self.settings["encoding"]
+
+    def count_tokens(self, text: str) -> int:
+        return len(get_encoding(self.encoding).encode(text))
+
+    def needs_map_reduce(self, text: str) -> bool:
+        return self.count_tokens(text) > self.settings["long_input_tokens"]
+
+    async def asummarize(self, llm: Any, text: str) -> SummaryResult:
+        chunks = chunk_material(text, self.settings["chunk_tokens"], self.settings["boundary_paragraphs"],
+                                self.encoding)
+        semaphore = asyncio.Semaphore(self.settings["concurrency"])
+        calls = [0]
+        cached = sum(("chunk", _digest(chunk)) in self.cache for chunk in chunks)
+
+        async def summarize(kind: str, prompt: str, content: str) -> str:
+            key = (kind, _digest(content))
+            summary = self.cache.get(key)
+            if summary is None:
+                async with semaphore:
+                    response = await llm.ainvoke([HumanMessage(content=prompt.format(text=content))])
+                calls[0] += 1
+                summary = str(response.content).strip()
+                self.cache.set(key, summary)
+            return summary
+
+        summaries = list(await asyncio.gather(
+            *(summarize("chunk", CHUNK_SUMMARY_PROMPT, chunk) for chunk in chunks)))
+        levels = 0
+        while len(summaries) > 1 and self.count_tokens("\n\n".join(summaries)) > self.settings["reduce_tokens"]:
+            groups = self._group(summaries)
+            summaries = list(await asyncio.gather(
+                *(summarize("merge", MERGE_SUMMARIES_PROMPT, "\n\n---\n\n".join(group)) for group in groups)))
+            levels += 1
+
+        result = SummaryResult("\n\n".join(summaries), len(chunks), cached, calls[0], levels)
+        logger.info("Material summarized", extra=result.stats())
+        return result
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        """Neighbouring summaries packed up to `reduce_tokens`, at least two per group so every level shrinks."""
+        budget = self.settings["reduce_tokens"]
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for summary in summaries:
+            tokens = self.count_tokens(summary)
+            if len(current) >= 2 and size + tokens > budget:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += tokens
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        elif current:
+            groups.append(current)
+        return groups
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.services.summarizer` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import random
+
+    from langchain_core.messages import AIMessage
+
+    class _EchoLLM:
+        """Returns the first words of the text it was asked to summarize; tracks concurrency."""
+        def __init__(self):
+            self.calls = self.in_flight = self.peak = 0
+
+        async def ainvoke(self, messages):
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            text = messages[-1].content.rsplit("TEXT:", 1)[-1]
+            return AIMessage(content=" ".join(text.split()[:40]))
+
+    print("\n--- Running MapReduceSummarizer Test ---")
+    rng = random.Random(3)
+    words = [f"concept{i}" for i in range(400)]
+    chapter = "\n\n".join(" ".join(rng.choice(words) for _ in range(rng.randint(40, 120))) + "."
+                          for _ in range(150))
+    settings = {"encoding": "approx", "chunk_tokens": 600, "boundary_paragraphs": 4, "reduce_tokens": 800,
+                "concurrency": 3}
+    summarizer = MapReduceSummarizer(settings)
+    assert summarizer.needs_map_reduce(chapter) and not summarizer.needs_map_reduce("A short request.")
+
+    chunks = chunk_material(chapter, 600, 4, "approx")
+    assert all(summarizer.count_tokens(c) <= 600 for c in chunks) and len(chunks) > 10
+    llm = _EchoLLM()
+    first = asyncio.run(summarizer.asummarize(llm, chapter))
+    print(f"   -> {first.stats()}")
+    assert first.chunks == len(chunks) and first.cached == 0 and first.levels >= 1
+    assert llm.peak <= 3 and summarizer.count_tokens(first.summary) <= 800
+
+    # Edit one paragraph in the middle: only the chunk holding it is summarized again
+    paragraphs = chapter.split("\n\n")
+    paragraphs[75] = "An edited paragraph about spaced repetition."
+    edited = chunk_material("\n\n".join(paragraphs), 600, 4, "approx")
+    assert len(set(edited) - set(chunks)) <= 2, len(set(edited) - set(chunks))
+    second = asyncio.run(summarizer.asummarize(llm, "\n\n".join(paragraphs)))
+    print(f"   -> after editing one paragraph: {second.stats()}")
+    assert second.cached >= second.chunks - 2 and second.llm_calls < first.llm_calls / 2
+    print("\n✅ MapReduceSummarizer test passed!")
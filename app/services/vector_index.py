@@ -0,0 +1,401 @@
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SEARCH_MODES = ("flat", "ivf", "auto")
+BLOCK_ROWS = 1 << 16     # rows per matmul when scanning the memory-mapped matrix
+
+# Files inside an index directory.
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"            # float32 (count, dim), unit-normalized rows
+ROWS_FILE = "rows.i64"                  # physical row -> chunk number
+CHUNKS_FILE = "chunks.jsonl"            # chunk documents, in insertion order
+CHUNK_OFFSETS_FILE = "chunk_offsets.i64"
+CENTROIDS_FILE = "centroids.f32"        # float32 (n_lists, dim)
+LIST_OFFSETS_FILE = "list_offsets.i64"  # IVF list l is physical rows [off[l], off[l + 1])
+# Files in physical (IVF-grouped) order; each `build_ivf` writes a new generation of them.
+GENERATION_FILES = (VECTORS_FILE, ROWS_FILE, CENTROIDS_FILE, LIST_OFFSETS_FILE)
+
+
+def normalize(vectors: Any) -> np.ndarray:
+    """Rows scaled to unit length (zero rows stay zero), as a float32 matrix."""
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def generation_file(name: str, generation: int) -> str:
+    """`name` for generation 0, e.g. "vectors.g3.f32" for generation 3."""
+    if not generation:
+        return name
+    stem, _, suffix = name.rpartition(".")
+    return f"{stem}.g{generation}.{suffix}"
+
+
+def meta_stamp(path: Path) -> Tuple[int, int, int]:
+    """Identifies one version of an index directory's meta.json (each write replaces the file)."""
+    stat = os.stat(path / META_FILE)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndex:
+    """
+    A dense-vector index stored as flat files in one directory. Vectors are
+    unit-normalized float32 rows in a raw file that is memory-mapped, so a
+    million chunks cost page cache rather than heap, and cosine similarity is
+    a matrix-vector product.
+
+    - flat: exact top-k by scanning the whole matrix in blocks.
+    - ivf: after `build_ivf`, rows are clustered with spherical k-means and
+      stored grouped by cluster; a query scores the centroids, then only the
+      `n_probe` closest clusters. Rows added after training form an
+      unclustered tail that is always scanned exactly until the next build.
+
+    Chunk documents (text plus metadata) are kept in a JSON-lines file with
+    an offset table, and read back only for the hits. `meta.json` is written
+    last on every change, so a crash mid-append leaves the previous state.
+    `build_ivf` writes the reordered files under new generation names and
+    switches to them in meta.json, keeping the previous generation on disk
+    for readers still using it.
+    An open index is a snapshot of one meta.json; `changed_on_disk` tells a
+    reader when another process has written a newer one.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._stamp = meta_stamp(self.path)
+        meta = json.loads((self.path / META_FILE).read_text())
+        self.dim: int = meta["dim"]
+        self.count: int = meta["count"]
+        self.ivf_rows: int = meta.get("ivf_rows", 0)
+        self.n_lists: int = meta.get("n_lists", 0)
+        self.generation: int = meta.get("generation", 0)
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._chunk_offsets: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+    # --- Creation / persistence -------------------------------------------------
+    @classmethod
+    def create(cls, path: Union[str, Path], dim: int, exist_ok: bool = True) -> "VectorIndex":
+        """Opens the index at `path`, creating an empty one with `dim` dimensions if there is none."""
+        path = Path(path)
+        if (path / META_FILE).exists():
+            if not exist_ok:
+                raise FileExistsError(f"vector index already exists at {path}")
+            index = cls(path)
+            if index.dim != dim:
+                raise ValueError(f"index at {path} has dimension {index.dim}, not {dim}")
+            return index
+        path.mkdir(parents=True, exist_ok=True)
+        for name in (VECTORS_FILE, ROWS_FILE, CHUNKS_FILE, CHUNK_OFFSETS_FILE):
+            (path / name).write_bytes(b"")
+        cls._write_meta(path, {"dim": dim, "count": 0, "ivf_rows": 0, "n_lists": 0})
+        return cls(path)
+
+    @staticmethod
+    def _write_meta(path: Path, meta: Dict[str, Any]) -> None:
+        tmp = path / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path / META_FILE)
+
+    def _save_meta(self) -> None:
+        self._write_meta(self.path, {"dim": self.dim, "count": self.count, "ivf_rows": self.ivf_rows,
+                                     "n_lists": self.n_lists, "generation": self.generation})
+        self._stamp = meta_stamp(self.path)
+
+    def changed_on_disk(self) -> bool:
+        """Whether meta.json was rewritten by someone else since this index read it."""
+        return meta_stamp(self.path) != self._stamp
+
+    def _file(self, name: str, generation: Optional[int] = None) -> Path:
+        """Where `name` lives for this index's generation (or the given one)."""
+        if name not in GENERATION_FILES:
+            return self.path / name
+        return self.path / generation_file(name, self.generation if generation is None else generation)
+
+    def _invalidate(self) -> None:
+        self._vectors = self._rows = self._chunk_offsets = None
+        self._centroids = self._list_offsets = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The (count, dim) memory-mapped matrix, in physical (IVF-grouped) order."""
+        if self._vectors is None:
+            if self.count == 0:
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r",
+                                          shape=(self.count, self.dim))
+        return self._vectors
+
+    @property
+    def rows(self) -> np.ndarray:
+        if self._rows is None:
+            self._rows = np.fromfile(self._file(ROWS_FILE), dtype=np.int64, count=self.count)
+        return self._rows
+
+    # --- Writing --------------------------------------------------------------
+    def add(self, vectors: Any, chunks: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Appends vectors (normalized here) with their chunk documents and returns
+        the new chunk numbers. New rows are searched exactly until the next
+        `build_ivf`.
+        """
+        matrix = normalize(vectors)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+        if len(matrix) != len(chunks):
+            raise ValueError("vectors and chunks must have the same length")
+        if not len(chunks):
+            return []
+        with self._lock:
+            first = self.count
+            self._truncate_to_meta()
+            with open(self.path / CHUNKS_FILE, "ab") as fp:
+                start = fp.tell()
+                encoded = [(json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8") for chunk in chunks]
+                fp.write(b"".join(encoded))
+            offsets = start + np.cumsum([0] + [len(line) for line in encoded[:-1]], dtype=np.int64)
+            with open(self.path / CHUNK_OFFSETS_FILE, "ab") as fp:
+                offsets.astype(np.int64).tofile(fp)
+            with open(self._file(VECTORS_FILE), "ab") as fp:
+                matrix.tofile(fp)
+            with open(self._file(ROWS_FILE), "ab") as fp:
+                np.arange(first, first + len(matrix), dtype=np.int64).tofile(fp)
+            self.count += len(matrix)
+            self._save_meta()
+            self._invalidate()
+        return list(range(first, first + len(matrix)))
+
+    def _truncate_to_meta(self) -> None:
+        """Drops bytes past what meta.json records (left by an interrupted append)."""
+        sizes = {VECTORS_FILE: self.count * self.dim * 4, ROWS_FILE: self.count * 8,
+                 CHUNK_OFFSETS_FILE: self.count * 8}
+        for name, size in sizes.items():
+            if self._file(name).stat().st_size > size:
+                os.truncate(self._file(name), size)
+        if self.count:
+            last = int(np.fromfile(self.path / CHUNK_OFFSETS_FILE, dtype=np.int64, count=1,
+                                   offset=(self.count - 1) * 8)[0])
+            with open(self.path / CHUNKS_FILE, "rb") as fp:
+                fp.seek(last)
+                fp.readline()
+                end = fp.tell()
+        else:
+            end = 0
+        if (self.path / CHUNKS_FILE).stat().st_size > end:
+            os.truncate(self.path / CHUNKS_FILE, end)
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 100_000,
+                  seed: int = 0) -> None:
+        """
+        Clusters every row with spherical k-means (trained on a sample) and
+        rewrites the matrix grouped by cluster. `n_lists` defaults to about
+        sqrt(count). Cost is a few passes over a sample plus one over all rows.
+        Readers keep searching the previous generation until meta.json names
+        the new one.
+        """
+        with self._lock:
+            if self.count == 0:
+                return
+            n_lists = max(1, min(n_lists or int(round(math.sqrt(self.count))), self.count))
+            vectors = self.vectors
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(self.count, size=min(self.count, max(sample_size, n_lists)),
+                                             replace=False))
+            centroids = _spherical_kmeans(np.asarray(vectors[sample_rows]), n_lists, iterations, rng)
+
+            labels = np.empty(self.count, dtype=np.int32)
+            for lo in range(0, self.count, BLOCK_ROWS):
+                labels[lo:lo + BLOCK_ROWS] = np.argmax(np.asarray(vectors[lo:lo + BLOCK_ROWS]) @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            list_offsets = np.searchsorted(labels[order], np.arange(n_lists + 1)).astype(np.int64)
+
+            generation = self.generation + 1
+            with open(self._file(VECTORS_FILE, generation), "wb") as fp:
+                for lo in range(0, self.count, BLOCK_ROWS):
+                    np.asarray(vectors[order[lo:lo + BLOCK_ROWS]]).tofile(fp)
+            self.rows[order].tofile(self._file(ROWS_FILE, generation))
+            centroids.astype(np.float32).tofile(self._file(CENTROIDS_FILE, generation))
+            list_offsets.tofile(self._file(LIST_OFFSETS_FILE, generation))
+            self._invalidate()
+            self.ivf_rows, self.n_lists, self.generation = self.count, n_lists, generation
+            self._save_meta()
+            # Readers of the generation just replaced may still open its files; the one before is unreferenced.
+            if generation >= 2:
+                for name in GENERATION_FILES:
+                    self._file(name, generation - 2).unlink(missing_ok=True)
+        sizes = np.diff(list_offsets)
+        logger.info("IVF index built", extra={"rows": self.count, "lists": n_lists,
+                                              "largest_list": int(sizes.max()), "path": str(self.path)})
+
+    # --- Search ---------------------------------------------------------------
+    def _ivf(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._centroids is None:
+            self._centroids = np.fromfile(self._file(CENTROIDS_FILE), dtype=np.float32).reshape(self.n_lists, self.dim)
+            self._list_offsets = np.fromfile(self._file(LIST_OFFSETS_FILE), dtype=np.int64)
+        return self._centroids, self._list_offsets
+
+    def search(self, query: Any, k: int = 5, mode: str = "auto", n_probe: int = 8) -> List[Tuple[int, float]]:
+        """
+        The k most similar chunks as (chunk number, cosine score), best first.
+        `auto` uses the IVF lists once they are built and exact search before.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {mode}")
+        if self.count == 0 or k <= 0:
+            return []
+        q = normalize(query)[0]
+        use_ivf = self.ivf_rows > 0 and mode != "flat"
+        if mode == "ivf" and not self.ivf_rows:
+            logger.debug("IVF search requested before build_ivf; scanning exactly")
+        vectors = self.vectors
+        if use_ivf:
+            positions, scores = self._search_ivf(vectors, q, k, n_probe)
+        else:
+            positions, scores = self._scan(vectors, q, k, 0, self.count)
+        rows = self.rows
+        return [(int(rows[p]), float(s)) for p, s in zip(positions, scores)]
+
+    @staticmethod
+    def _scan(vectors: np.ndarray, q: np.ndarray, k: int, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k over physical rows [lo, hi), one block-sized matmul at a time."""
+        best_pos = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(lo, hi, BLOCK_ROWS):
+            stop = min(hi, start + BLOCK_ROWS)
+            scores = vectors[start:stop] @ q
+            top = top_k_indices(scores, k)
+            best_pos = np.concatenate([best_pos, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_pos) > k:
+                keep = top_k_indices(best_scores, k)
+                best_pos, best_scores = best_pos[keep], best_scores[keep]
+        keep = top_k_indices(best_scores, k)
+        return best_pos[keep], best_scores[keep]
+
+    def _search_ivf(self, vectors: np.ndarray, q: np.ndarray, k: int, n_probe: int) -> Tuple[np.ndarray, np.ndarray]:
+        centroids, offsets = self._ivf()
+        lists = top_k_indices(centroids @ q, min(n_probe, self.n_lists))
+        candidates = np.concatenate([np.arange(offsets[l], offsets[l + 1]) for l in lists] +
+                                    [np.arange(self.ivf_rows, self.count)])
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float32)
+        # The probed lists are contiguous row ranges, so gather them as slices.
+        blocks = [vectors[offsets[l]:offsets[l + 1]] for l in lists]
+        if self.count > self.ivf_rows:
+            blocks.append(vectors[self.ivf_rows:self.count])
+        scores = np.concatenate([block @ q for block in blocks])
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+
+    # --- Chunk documents ------------------------------------------------------
+    def get_chunks(self, chunk_numbers: Iterable[int]) -> List[Dict[str, Any]]:
+        """Reads the documents of the given chunks from disk, in the given order."""
+        if self._chunk_offsets is None:
+            self._chunk_offsets = np.fromfile(self.path / CHUNK_OFFSETS_FILE, dtype=np.int64, count=self.count)
+        chunks = []
+        with open(self.path / CHUNKS_FILE, "rb") as fp:
+            for number in chunk_numbers:
+                fp.seek(int(self._chunk_offsets[number]))
+                chunks.append(json.loads(fp.readline()))
+        return chunks
+
+
+def _spherical_kmeans(sample: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Cosine k-means on unit rows; empty clusters are re-seeded from random sample rows."""
+    centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.empty(len(sample), dtype=np.int64)
+        for lo in range(0, len(sample), BLOCK_ROWS):
+            labels[lo:lo + BLOCK_ROWS] = np.argmax(sample[lo:lo + BLOCK_ROWS] @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+# ==============================================================================
+# ✅ CLI / TEST BLOCK
+# Cluster an existing index for IVF search:
+#   python -m app.services.vector_index build-ivf --path data/index [--lists 1000]
+# Run the self-test:
+#   python -m app.services.vector_index test
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Vector index maintenance and self-test.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    builder = sub.add_parser("build-ivf", help="Cluster the index for IVF search.")
+    builder.add_argument("--path", required=True)
+    builder.add_argument("--lists", type=int)
+    builder.add_argument("--iterations", type=int, default=10)
+    sub.add_parser("test", help="Build a small index and check flat and IVF search.")
+    args = parser.parse_args()
+
+    if args.command == "build-ivf":
+        index = VectorIndex(args.path)
+        index.build_ivf(args.lists, args.iterations)
+        print(f"✅ {index.count:,} rows in {index.n_lists:,} lists")
+    else:
+        print("\n--- Running VectorIndex Test ---")
+        rng = np.random.default_rng(1)
+        centers = normalize(rng.normal(size=(20, 32)))
+        data = normalize(centers[rng.integers(0, 20, size=5000)] + 0.1 * rng.normal(size=(5000, 32)))
+        with tempfile.TemporaryDirectory() as tmp:
+            index = VectorIndex.create(tmp, dim=32)
+            numbers = index.add(data[:4000], [{"text": f"chunk {i}"} for i in range(4000)])
+            assert numbers[:2] == [0, 1] and len(index) == 4000
+            hits = index.search(data[123], k=3)
+            assert hits[0][0] == 123 and abs(hits[0][1] - 1.0) < 1e-5, hits
+            assert index.get_chunks([hits[0][0]]) == [{"text": "chunk 123"}]
+
+            stale = VectorIndex(tmp)                 # a reader opened before the build keeps its files
+            index.build_ivf(n_lists=20)
+            assert stale.search(data[123], k=1)[0][0] == 123 and stale.changed_on_disk()
+            index.add(data[4000:], [{"text": f"chunk {i}"} for i in range(4000, 5000)])    # unclustered tail
+            reopened = VectorIndex(tmp)
+            assert (reopened.count, reopened.ivf_rows, reopened.n_lists) == (5000, 4000, 20)
+            recall = 0
+            for i in rng.integers(0, 5000, size=50):
+                exact = {n for n, _ in reopened.search(data[i], k=10, mode="flat")}
+                approx = {n for n, _ in reopened.search(data[i], k=10, mode="ivf", n_probe=3)}
+                recall += len(exact & approx)
+            assert recall / 500 > 0.9, recall / 500
+            assert reopened.search(data[4500], k=1, mode="ivf")[0][0] == 4500
+            assert reopened.get_chunks([4999, 0]) == [{"text": "chunk 4999"}, {"text": "chunk 0"}]
+            reopened.build_ivf(n_lists=20)
+            reopened.build_ivf(n_lists=20)
+            assert reopened.generation == 3 and not (Path(tmp) / generation_file(VECTORS_FILE, 1)).exists()
+            assert reopened.search(data[4500], k=1)[0][0] == 4500
+            print(f"   -> 5000 rows, IVF recall@10 with 3/20 lists probed: {recall / 500:.2f}")
+        print("\n✅ VectorIndex test passed!")
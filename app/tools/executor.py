@@ -1,19 +1,266 @@
-from typing import List
-from langchain_core.tools import tool
-from langgraph.prebuilt import ToolNode
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool, tool
+
+from app.services.retrieval import get_retriever
+from app.utils.cache import TTLCache
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULTS = {
+    "timeout_seconds": 15.0,        # per tool call, unless overridden in `timeouts`
+    "timeouts": {},
+    "max_iterations": 4,            # tool rounds per request
+    "max_tool_seconds": 30.0,       # wall time spent in tools per request
+    "cache": {"max_entries": 1024, "ttl_seconds": 600, "tools": ["rag_search"]},
+}
+
+BUDGET_EXHAUSTED = "Tool budget for this request is used up; answer with the information you already have."
 
 
 @tool
-def rag_search(query: str) -> str:
+async def rag_search(query: str) -> str:
     """
     Searches the knowledge base for information related to the user's query.
     Use this to answer questions about specific academic topics, concepts, or facts.
     """
-    print(f"--- (Tool) Executing RAG Search for: '{query}' ---")
-    if "llm" in query.lower():
-        return "A Large Language Model (LLM) is a type of AI designed to understand and generate human-like text."
-    return f"No specific information found for '{query}'. Try a more general topic."
-    
+    logger.info("Executing RAG Search", extra={"query": query})
+    retriever = await asyncio.to_thread(get_retriever)
+    if retriever is None:
+        return f"No course material has been indexed yet, so nothing was found for '{query}'."
+    hits = await retriever.asearch(query)
+    logger.debug("RAG Search hits", extra={"hits": len(hits), "top_score": hits[0].score if hits else None})
+    if not hits:
+        return f"No specific information found for '{query}'. Try a more general topic."
+    return retriever.to_prompt(hits)
+
 tools = [rag_search]
 
-tool_node = ToolNode(tools)
\ No newline at end of file
+
+def tool_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    settings = {**_DEFAULTS, **((config or load_config()).get("tools") or {})}
+    settings["cache"] = {**_DEFAULTS["cache"], **(settings.get("cache") or {})}
+    return settings
+
+
+def normalize_args(value: Any) -> Any:
+    """Args with strings case-folded and whitespace-collapsed, so trivially different calls share a cache entry."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: normalize_args(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_args(v) for v in value]
+    return value
+
+
+def _current_request(messages: Sequence[Any]) -> int:
+    """Position of the latest user message; the thread's history before it belongs to earlier requests."""
+    for position in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[position], HumanMessage):
+            return position
+    return 0
+
+
+def current_tool_usage(state: Dict[str, Any]) -> Dict[str, Any]:
+    """This request's `results["tool_usage"]`, or an empty dict if tools have not run for it yet."""
+    usage = (state.get("results") or {}).get("tool_usage") or {}
+    return usage if usage.get("request") == _current_request(state.get("messages", [])) else {}
+
+
+class ToolExecutor:
+    """
+    The graph's tool node. Runs every tool call of the last AIMessage
+    concurrently, each under its own timeout, and memoizes results of the
+    cacheable tools by (tool, normalized args) in a process-wide LRU/TTL
+    cache, so repeated `rag_search` queries within and across sessions skip
+    the embedding and index search. Identical cacheable calls in one round
+    run once.
+
+    A request is limited to `max_iterations` tool rounds and
+    `max_tool_seconds` of tool wall time; past either, calls are answered
+    with a budget notice and the SeniorAgent is told to answer without tools.
+    Per-request figures go to `results["tool_usage"]`; process-wide latency
+    and hit-rate figures are kept in `metrics()`.
+    """
+    def __init__(self, tools: Sequence[BaseTool], settings: Optional[Dict[str, Any]] = None):
+        self.tools = {t.name: t for t in tools}
+        self.settings = {**_DEFAULTS, **(settings or {})}
+        cache_settings = {**_DEFAULTS["cache"], **(self.settings.get("cache") or {})}
+        self.cacheable = set(cache_settings["tools"] or ())
+        self.cache: TTLCache[str] = TTLCache(cache_settings["max_entries"], cache_settings["ttl_seconds"])
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def timeout_for(self, name: str) -> float:
+        return float(self.settings["timeouts"].get(name, self.settings["timeout_seconds"]))
+
+    async def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        messages = state.get("messages", [])
+        message = messages[-1] if messages else None
+        calls = list(getattr(message, "tool_calls", None) or []) if isinstance(message, AIMessage) else []
+        usage = current_tool_usage(state) or {"request": _current_request(messages), "rounds": 0,
+                                               "tool_seconds": 0.0, "calls": []}
+        remaining = self.settings["max_tool_seconds"] - usage["tool_seconds"]
+        if usage["rounds"] >= self.settings["max_iterations"] or remaining <= 0:
+            logger.warning("Tool budget exhausted", extra={"rounds": usage["rounds"],
+                                                           "tool_seconds": round(usage["tool_seconds"], 3)})
+            replies = [ToolMessage(content=BUDGET_EXHAUSTED, tool_call_id=call["id"], name=call["name"],
+                                   status="error") for call in calls]
+            return {"messages": replies, "results": {"tool_usage": {**usage, "exhausted": True}}}
+
+        started = time.perf_counter()
+        outcomes = await self.run_calls(calls, remaining)
+        elapsed = time.perf_counter() - started
+        replies = [ToolMessage(content=content, tool_call_id=call["id"], name=call["name"],
+                               status="success" if status == "success" else "error")
+                   for call, (content, status, _, _) in zip(calls, outcomes)]
+        records = [{"tool": call["name"], "ms": round(ms, 2), "cached": cached, "status": status}
+                   for call, (_, status, ms, cached) in zip(calls, outcomes)]
+        usage = {**usage, "rounds": usage["rounds"] + 1, "tool_seconds": usage["tool_seconds"] + elapsed,
+                 "calls": usage["calls"] + records, "exhausted": False}
+        logger.info("Tool round finished", extra={
+            "calls": len(calls), "cache_hits": sum(r["cached"] for r in records),
+            "round_ms": round(elapsed * 1000, 2), "cache_hit_rate": round(self.cache.hit_rate, 4),
+        })
+        return {"messages": replies, "results": {"tool_usage": usage}}
+
+    async def run_calls(self, calls: List[Dict[str, Any]], budget: Optional[float] = None
+                        ) -> List[Tuple[str, str, float, bool]]:
+        """
+        (content, status, latency ms, served from cache) per call, in order;
+        status is success, error or timeout. Identical calls to a cacheable
+        tool run once.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        keys = []
+        for call in calls:
+            key = self._cache_key(call)
+            keys.append(key)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(self._run_one(call["name"], call.get("args") or {}, key, budget))
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        return [results[key] for key in keys]
+
+    def _cache_key(self, call: Dict[str, Any]) -> str:
+        if call["name"] not in self.cacheable:
+            return call["id"]     # may have side effects: every call runs
+        return json.dumps([call["name"], normalize_args(call.get("args") or {})], sort_keys=True, default=str)
+
+    async def _run_one(self, name: str, args: Dict[str, Any], key: str, budget: Optional[float]
+                       ) -> Tuple[str, str, float, bool]:
+        started = time.perf_counter()
+        if name in self.cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(name, 0.0, "success", cached=True)
+                return cached, "success", (time.perf_counter() - started) * 1000, True
+        tool_ = self.tools.get(name)
+        if tool_ is None:
+            content, status = f"Error: {name} is not a valid tool, try one of [{', '.join(self.tools)}].", "error"
+        else:
+            timeout = self.timeout_for(name) if budget is None else min(self.timeout_for(name), budget)
+            try:
+                result = await asyncio.wait_for(tool_.ainvoke(args), timeout)
+                content = result if isinstance(result, str) else json.dumps(result, default=str)
+                status = "success"
+                if name in self.cacheable:
+                    self.cache.set(key, content)
+            except asyncio.TimeoutError:
+                content, status = f"Error: {name} timed out after {timeout:.1f}s.", "timeout"
+            except Exception as e:
+                logger.warning("Tool call failed", extra={"tool": name, "error": repr(e)})
+                content, status = f"Error: {e!r}\n Please fix your mistakes.", "error"
+        ms = (time.perf_counter() - started) * 1000
+        self._record(name, ms, status, cached=False)
+        return content, status, ms, False
+
+    def _record(self, name: str, ms: float, status: str, cached: bool) -> None:
+        m = self._metrics.setdefault(name, {"calls": 0, "cache_hits": 0, "errors": 0, "timeouts": 0,
+                                            "total_ms": 0.0, "max_ms": 0.0})
+        m["calls"] += 1
+        m["cache_hits"] += cached
+        m["errors"] += status == "error"
+        m["timeouts"] += status == "timeout"
+        if not cached:
+            m["total_ms"] += ms
+            m["max_ms"] = max(m["max_ms"], ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Process-wide figures per tool (executed-call latency, hit rate) plus the cache's own counters."""
+        per_tool = {}
+        for name, m in self._metrics.items():
+            executed = m["calls"] - m["cache_hits"]
+            per_tool[name] = {**m, "total_ms": round(m["total_ms"], 2), "max_ms": round(m["max_ms"], 2),
+                              "mean_ms": round(m["total_ms"] / executed, 2) if executed else 0.0,
+                              "hit_rate": round(m["cache_hits"] / m["calls"], 4) if m["calls"] else 0.0}
+        return {"tools": per_tool, "cache": self.cache.stats()}
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.tools.executor` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running ToolExecutor Test ---")
+    executed = []
+
+    @tool
+    async def lookup(query: str) -> str:
+        """Looks a topic up slowly."""
+        executed.append(query)
+        await asyncio.sleep(0.05)
+        return f"notes on {query}"
+
+    @tool
+    async def stuck(query: str) -> str:
+        """Never answers in time."""
+        await asyncio.sleep(5)
+        return "late"
+
+    def ai(*queries: Tuple[str, str]) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"name": n, "args": {"query": q}, "id": f"call_{i}"}
+                                                 for i, (n, q) in enumerate(queries)])
+
+    async def main():
+        executor = ToolExecutor([lookup, stuck], {"timeouts": {"stuck": 0.1}, "max_iterations": 2,
+                                                  "cache": {"tools": ["lookup"]}})
+        state = {"messages": [HumanMessage(content="q"), ai(("lookup", "Working Memory"), ("lookup", "LTP"),
+                                                            ("lookup", "working  memory"), ("stuck", "x"))],
+                 "results": {}}
+        started = time.perf_counter()
+        update = await executor(state)
+        elapsed = time.perf_counter() - started
+        assert elapsed < 0.3, elapsed       # concurrent, and the stuck call is cut off at 0.1s
+        assert sorted(executed) == ["LTP", "Working Memory"], executed
+        contents = [m.content for m in update["messages"]]
+        assert contents[0] == contents[2] == "notes on Working Memory" and "timed out" in contents[3], contents
+        usage = update["results"]["tool_usage"]
+        assert usage["rounds"] == 1 and usage["calls"][-1]["status"] == "timeout", usage
+        assert update["messages"][3].status == "error"
+
+        # Second round hits the cache; a third is over the iteration cap.
+        state["messages"] += update["messages"] + [ai(("lookup", "LTP"))]
+        state["results"] = update["results"]
+        update = await executor(state)
+        assert executed.count("LTP") == 1 and update["results"]["tool_usage"]["calls"][-1]["cached"]
+        state["messages"] += update["messages"] + [ai(("lookup", "sleep"))]
+        state["results"] = update["results"]
+        update = await executor(state)
+        assert update["messages"][0].content == BUDGET_EXHAUSTED and update["results"]["tool_usage"]["exhausted"]
+        assert current_tool_usage(state)["rounds"] == 2
+
+        # A new user message starts a fresh budget.
+        state["messages"] += update["messages"] + [HumanMessage(content="next"), ai(("lookup", "sleep"))]
+        assert current_tool_usage(state) == {}
+        update = await executor(state)
+        assert update["results"]["tool_usage"]["rounds"] == 1
+        print("   ->", executor.metrics())
+        print("\n✅ ToolExecutor test passed!")
+
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+import asyncio
+import importlib
+import inspect
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.tools.executor import tools as builtin_tools
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")    # what the OpenAI-style tool APIs accept
+
+
+def _resolve(target: str) -> Any:
+    """Imports "package.module:attribute"."""
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Plugin target must look like 'package.module:attribute', got {target!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def lazy_tool(name: str, description: str, parameters: Dict[str, Any], target: str) -> StructuredTool:
+    """
+    A tool whose schema is declared up front and whose implementation
+    (`target`, a tool or a sync/async callable taking the arguments as
+    keywords) is imported on its first call, so registering plugins costs
+    no imports at startup.
+    """
+    loaded: List[Any] = []
+    # A threading lock, taken in the worker thread that imports: an asyncio.Lock
+    # made here would be bound to whichever event loop first awaited it, and
+    # callers such as Streamlit run every request under a fresh asyncio.run().
+    lock = threading.Lock()
+
+    def load() -> Any:
+        with lock:
+            if not loaded:
+                loaded.append(_resolve(target))
+                logger.info("Plugin tool loaded", extra={"tool": name, "target": target})
+        return loaded[0]
+
+    async def call(**kwargs: Any) -> Any:
+        implementation = loaded[0] if loaded else await asyncio.to_thread(load)
+        if isinstance(implementation, BaseTool):
+            return await implementation.ainvoke(kwargs)
+        if inspect.iscoroutinefunction(implementation):
+            return await implementation(**kwargs)
+        return await asyncio.to_thread(implementation, **kwargs)
+
+    return StructuredTool(name=name, description=description, args_schema=parameters, coroutine=call)
+
+
+class ToolRegistry:
+    """
+    The SeniorAgent's tools, validated and converted once: the OpenAI-style
+    schemas (for `bind_tools`) and the compact prompt listing are built at
+    registration and reused on every turn, instead of re-converting every
+    tool and pasting the full schemas into each prompt.
+
+    Plugins (`tools.plugins` in config.yml) declare their name, description
+    and JSON-schema parameters, so they are bound and listed without being
+    imported; see `lazy_tool`.
+    """
+    def __init__(self, tools: Iterable[BaseTool] = (), plugins: Iterable[Dict[str, Any]] = ()):
+        self._tools: Dict[str, BaseTool] = {}
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._prompt: Optional[str] = None
+        for tool_ in tools:
+            self.register(tool_)
+        for plugin in plugins:
+            self.register_plugin(**plugin)
+
+    def register(self, tool_: BaseTool) -> BaseTool:
+        """Validates the tool and converts its schema; raises ValueError for a bad or duplicate tool."""
+        if not _NAME.match(tool_.name or ""):
+            raise ValueError(f"Invalid tool name {tool_.name!r}: use 1-64 letters, digits, '_' or '-'")
+        if tool_.name in self._tools:
+            raise ValueError(f"Tool {tool_.name!r} is already registered")
+        if not (tool_.description or "").strip():
+            raise ValueError(f"Tool {tool_.name!r} needs a description; the model chooses tools by it")
+        schema = convert_to_openai_tool(tool_)
+        if schema["function"].get("parameters", {}).get("type", "object") != "object":
+            raise ValueError(f"Tool {tool_.name!r} parameters must be a JSON object schema")
+        self._tools[tool_.name] = tool_
+        self._schemas[tool_.name] = schema
+        self._prompt = None
+        return tool_
+
+    def register_plugin(self, name: str, description: str, target: str,
+                        parameters: Optional[Dict[str, Any]] = None) -> BaseTool:
+        parameters = parameters or {"type": "object", "properties": {}}
+        return self.register(lazy_tool(name, description, parameters, target))
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        return self._tools.get(name)
+
+    @property
+    def tools(self) -> List[BaseTool]:
+        return list(self._tools.values())
+
+    @property
+    def openai_schemas(self) -> List[Dict[str, Any]]:
+        return list(self._schemas.values())
+
+    @property
+    def prompt(self) -> str:
+        """One line per tool, `name(arg, optional_arg?): first line of the description`."""
+        if self._prompt is None:
+            lines = []
+            for name, schema in self._schemas.items():
+                function = schema["function"]
+                parameters = function.get("parameters", {})
+                required = set(parameters.get("required", []))
+                args = ", ".join(arg if arg in required else f"{arg}?" for arg in parameters.get("properties", {}))
+                summary = next((line.strip() for line in function.get("description", "").splitlines()
+                                if line.strip()), "")
+                lines.append(f"- {name}({args}): {summary}")
+            self._prompt = "\n".join(lines)
+        return self._prompt
+
+    def bind(self, llm: Any) -> Any:
+        """`llm` with every registered tool bound, from the precomputed schemas."""
+        return llm.bind_tools(self.openai_schemas)
+
+
+_default: Optional[ToolRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry(config: Optional[Dict] = None) -> ToolRegistry:
+    """The process-wide registry: the built-in tools plus the configured plugins, built on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            plugins = ((config or load_config()).get("tools") or {}).get("plugins") or []
+            _default = ToolRegistry(builtin_tools, plugins)
+            logger.info("Tool registry built", extra={"tools": len(_default), "plugins": len(plugins)})
+        return _default
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.tools.registry` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    import sys
+
+    from app.services.fake_llm import FakeChatModel
+
+    print("\n--- Running ToolRegistry Test ---")
+    registry = ToolRegistry(builtin_tools, [{
+        "name": "average",
+        "description": "Averages a list of numbers.\nUse it for grade and study-time arithmetic.",
+        "target": "statistics:fmean",
+        "parameters": {"type": "object", "properties": {"data": {"type": "array", "items": {"type": "number"}},
+                                                        "weights": {"type": "array", "items": {"type": "number"}}},
+                       "required": ["data"]},
+    }])
+    assert "statistics" not in sys.modules                   # declared, bound and listed without importing
+    assert [s["function"]["name"] for s in registry.openai_schemas] == ["rag_search", "average"]
+    assert registry.prompt.splitlines()[1] == \
+        "- average(data, weights?): Averages a list of numbers.", registry.prompt
+    assert registry.openai_schemas[0] is registry.openai_schemas[0]    # converted once
+
+    for bad in (StructuredTool.from_function(lambda q: q, name="bad name", description="x"),
+                StructuredTool.from_function(lambda q: q, name="rag_search", description="duplicate")):
+        try:
+            registry.register(bad)
+        except ValueError as e:
+            print(f"   -> rejected: {e}")
+        else:
+            raise AssertionError(f"{bad.name} should be rejected")
+
+    result = asyncio.run(registry.get("average").ainvoke({"data": [1, 2, 6]}))
+    assert "statistics" in sys.modules and result == 3.0, result
+
+    bound = registry.bind(FakeChatModel(emit_tool_calls=True))
+    reply = asyncio.run(bound.ainvoke("What is working memory?"))
+    assert reply.tool_calls[0]["name"] == "rag_search", reply
+    print(registry.prompt)
+    print("\n✅ ToolRegistry test passed!")
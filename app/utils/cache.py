@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    A thread-safe LRU cache whose entries also expire `ttl` seconds after
+    they were stored (never, if ttl is None). Expired entries are dropped
+    lazily on lookup or when they reach the LRU end. Counts hits, misses
+    and evictions for metrics.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize, self.ttl, self.clock = maxsize, ttl, clock
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > self.clock()):
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            if count:
+                self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (None if ttl is None else self.clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": round(self.hit_rate, 4)}
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.utils.cache` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running TTLCache Test ---")
+    now = [0.0]
+    cache: TTLCache[str] = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"            # "a" is now most recently used
+    cache.set("c", "C")                     # evicts "b"
+    assert cache.get("b") is None and "a" in cache and "c" in cache
+    now[0] = 11
+    assert cache.get("a") is None and len(cache) == 1     # expired, dropped on lookup
+    cache.set("d", "D", ttl=100)
+    now[0] = 50
+    assert cache.get("d") == "D"
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 2, "evictions": 1, "hit_rate": 0.5}, cache.stats()
+    print("\n✅ TTLCache test passed!")
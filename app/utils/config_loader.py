@@ -1,7 +1,11 @@
+import os
 import yaml
 from pathlib import Path
+from typing import Optional
 
-def load_config(config_path: str = "config.yml") -> dict:
+def load_config(config_path: Optional[str] = None) -> dict:
+    # ATLAS_CONFIG_PATH lets benchmarks and deployments swap the whole config file.
+    config_path = config_path or os.environ.get("ATLAS_CONFIG_PATH", "config.yml")
     path = Path(config_path)
     if not path.exists():
         raise FileNotFoundError(f"Config file not found at: {config_path}")
@@ -0,0 +1,311 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+from app.utils.tokens import get_encoding
+
+logger = get_logger(__name__)
+
+_DEFAULTS: Dict[str, Any] = {
+    "encoding": "cl100k_base",
+    # Tokens of packed context per node; the prompt's fixed instructions are not counted. null = no limit.
+    "budgets": {
+        "coordinator": 1000,
+        "profile_analyzer": 1500,
+        "planner": 3000,
+        "notewriter": 4500,
+        "advisor": 1500,
+        "senior": 3000,
+    },
+}
+
+# Fields no agent reasons about: record ids and bookkeeping
+IRRELEVANT_FIELDS = frozenset(("id", "student_id", "created_at", "updated_at", "etag"))
+
+# Single-key wrappers around one value, e.g. Google Calendar's {"start": {"dateTime": ...}}
+_WRAPPERS = frozenset(("dateTime", "date", "value"))
+_UTC_TIMESTAMP = re.compile(r"^(\d{4}-\d\d-\d\d)T(\d\d:\d\d)(?::\d\d(?:\.\d+)?)?(?:Z|[+-]00:?00)?$")
+_ROLES = {"human": "student", "ai": "assistant", "system": "system", "tool": "tool"}
+_TRUNCATION_RESERVE = 12         # tokens kept free for the "[... omitted]" marker
+
+
+def context_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    settings = {**_DEFAULTS, **((config or load_config()).get("context") or {})}
+    settings["budgets"] = {**_DEFAULTS["budgets"], **(settings.get("budgets") or {})}
+    return settings
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, tuple, dict)) and not value)
+
+
+def canonicalize(value: Any, drop: Iterable[str] = IRRELEVANT_FIELDS) -> Any:
+    """
+    A compact copy of JSON-like data: null and empty values, `drop` keys and
+    private (`_`-prefixed) keys removed, single-value wrappers unwrapped,
+    whitespace collapsed, UTC timestamps shortened to `YYYY-MM-DD HH:MM`,
+    and duplicate list items removed (first occurrence kept).
+    """
+    drop = frozenset(drop)
+    if isinstance(value, dict):
+        if len(value) == 1 and next(iter(value)) in _WRAPPERS:
+            return canonicalize(next(iter(value.values())), drop)
+        packed = {}
+        for key, item in value.items():
+            key = str(key)
+            if key in drop or key.startswith("_"):
+                continue
+            item = canonicalize(item, drop)
+            if not _is_empty(item):
+                packed[key] = item
+        return packed
+    if isinstance(value, (list, tuple)):
+        seen, packed = set(), []
+        for item in value:
+            item = canonicalize(item, drop)
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if not _is_empty(item) and marker not in seen:
+                seen.add(marker)
+                packed.append(item)
+        return packed
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        match = _UTC_TIMESTAMP.match(value)
+        return f"{match.group(1)} {match.group(2)}" if match else value
+    return value
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def _is_flat(value: Any) -> bool:
+    return not isinstance(value, (dict, list, tuple))
+
+
+def _is_flat_mapping(data: Dict[str, Any]) -> bool:
+    return all(_is_flat(v) or (isinstance(v, (list, tuple)) and all(map(_is_flat, v))) for v in data.values())
+
+
+def render_inline(data: Dict[str, Any], separator: str = ", ") -> str:
+    """A flat mapping on one line: `primary=visual, secondary=kinesthetic`."""
+    return separator.join(
+        f"{key}={'/'.join(map(_scalar, value)) if isinstance(value, (list, tuple)) else _scalar(value)}"
+        for key, value in data.items()
+    )
+
+
+def render_fields(data: Dict[str, Any], prefix: str = "") -> List[str]:
+    """
+    Canonicalized data as `path: value` lines. Flat mappings collapse into
+    one `k=v, k=v` line and lists of records into one `- ...` line per item:
+
+        personal_info: name=Sarah, major=Psychology, academic_year=3
+        academic_info.current_courses:
+        - name=Cognitive Psychology, grade=B+
+    """
+    lines: List[str] = []
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            if _is_flat_mapping(value):
+                lines.append(f"{path}: {render_inline(value)}")
+            else:
+                lines.extend(render_fields(value, path))
+        elif isinstance(value, (list, tuple)):
+            if all(map(_is_flat, value)):
+                lines.append(f"{path}: {', '.join(map(_scalar, value))}")
+            else:
+                lines.append(f"{path}:")
+                lines.extend(f"- {render_inline(item)}" if isinstance(item, dict) and _is_flat_mapping(item)
+                             else f"- {render_record(item)}" for item in value)
+        else:
+            lines.append(f"{path}: {_scalar(value)}")
+    return lines
+
+
+def render_record(record: Any) -> str:
+    """One canonicalized record (e.g. a raw calendar event dict) on one line."""
+    record = canonicalize(record)
+    if isinstance(record, dict):
+        return "; ".join(render_inline({key: value}) if _is_flat_mapping({key: value})
+                         else "; ".join(render_fields({key: value})) for key, value in record.items())
+    return _scalar(record) if _is_flat(record) else json.dumps(record, separators=(",", ":"), default=str)
+
+
+def pack_profile(profile: Optional[Dict[str, Any]], sections: Optional[Sequence[str]] = None) -> str:
+    """
+    The student profile as compact lines, optionally only its top-level
+    `sections` (e.g. `learning_preferences`), without ids and empty fields.
+    """
+    profile = profile or {}
+    if sections is not None:
+        profile = {key: profile[key] for key in sections if key in profile}
+    return "\n".join(render_fields(canonicalize(profile))) or "(no profile)"
+
+
+def _message_text(message: Any) -> str:
+    content = getattr(message, "content", message)
+    if isinstance(content, list):       # content blocks
+        content = " ".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return " ".join(str(content).split())
+
+
+def render_messages(messages: Sequence[Any]) -> str:
+    """
+    Chat history as `role: text` lines instead of message reprs. Tool calls
+    are summarized as `[calls name(args)]`, tool results are labelled
+    `tool <name>:`, and consecutive duplicate lines are dropped.
+    """
+    lines: List[str] = []
+    for message in messages:
+        role = _ROLES.get(getattr(message, "type", ""), "user")
+        if role == "tool":
+            role = f"tool {getattr(message, 'name', None) or 'result'}"
+        text = _message_text(message)
+        calls = getattr(message, "tool_calls", None) or []
+        if calls:
+            rendered = ", ".join(f"{c['name']}({render_inline(canonicalize(c.get('args') or {}))})" for c in calls)
+            text = f"{text} [calls {rendered}]".strip()
+        line = f"{role}: {text}"
+        if text and (not lines or lines[-1] != line):
+            lines.append(line)
+    return "\n".join(lines) or "(none)"
+
+
+@dataclass
+class Section:
+    """One piece of a node's context. Lower `priority` values are truncated last."""
+    name: str
+    text: str
+    priority: int = 0
+    keep: str = "head"          # which end survives truncation; "tail" for chat history
+
+
+class ContextPacker:
+    """
+    Fits a node's context sections into its token budget. When they don't
+    fit, sections are served in priority order: a priority level that fits
+    is kept whole, and the first one that doesn't shares what is left in
+    proportion to its sections' sizes, cut at line boundaries (whole lines
+    from the head, or from the tail for `keep="tail"`). Lower-priority
+    sections after it are reduced to an omission marker.
+    """
+    def __init__(self, node: str, budget: Optional[int], encoding: Optional[str] = None):
+        self.node = node
+        self.budget = budget
+        self.encoding = encoding
+        self.last_report: Dict[str, Any] = {}
+
+    @classmethod
+    def for_node(cls, node: str, config: Optional[Dict] = None) -> "ContextPacker":
+        settings = context_settings(config)
+        return cls(node, settings["budgets"].get(node), settings["encoding"])
+
+    def count(self, text: str) -> int:
+        return len(get_encoding(self.encoding).encode(text))
+
+    def pack(self, sections: Sequence[Section]) -> Dict[str, str]:
+        """The sections' texts by name, truncated to fit the budget."""
+        counts = {s.name: self.count(s.text) for s in sections}
+        total = sum(counts.values())
+        packed = {s.name: s.text for s in sections}
+        truncated: List[str] = []
+        if self.budget is not None and total > self.budget:
+            remaining = self.budget
+            for priority in sorted({s.priority for s in sections}):
+                level = [s for s in sections if s.priority == priority]
+                size = sum(counts[s.name] for s in level)
+                if size <= remaining:
+                    remaining -= size
+                    continue
+                share = max(remaining, 0)
+                for s in level:
+                    packed[s.name] = self.truncate(s.text, share * counts[s.name] // max(size, 1), s.keep)
+                    truncated.append(s.name)
+                remaining = 0
+        self.last_report = {"node": self.node, "budget": self.budget, "tokens": total,
+                            "packed_tokens": sum(map(self.count, packed.values())), "truncated": truncated}
+        if truncated:
+            logger.info("Context truncated to budget", extra=self.last_report)
+        return packed
+
+    def truncate(self, text: str, max_tokens: int, keep: str = "head") -> str:
+        """Whole lines of `text` from the kept end within `max_tokens`, with a marker for what was cut."""
+        lines = text.splitlines()
+        room = max_tokens - _TRUNCATION_RESERVE
+        kept: List[str] = []
+        used = 0
+        for line in (lines if keep == "head" else reversed(lines)):
+            tokens = self.count(line) + 1
+            if used + tokens > room:
+                break
+            kept.append(line)
+            used += tokens
+        if not kept and lines and room > 0:
+            # Not even one whole line fits: keep part of the nearest one
+            enc = get_encoding(self.encoding)
+            line = lines[0] if keep == "head" else lines[-1]
+            tokens = enc.encode(line)
+            kept = [enc.decode(tokens[:room] if keep == "head" else tokens[-room:]).strip()]
+        omitted = len(lines) - len(kept) + (1 if kept and kept[0] not in lines else 0)
+        if keep == "head":
+            return "\n".join(kept + [f"[... {omitted} more lines omitted]"])
+        return "\n".join([f"[... {omitted} earlier lines omitted]"] + kept[::-1])
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.utils.context_packer` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    print("\n--- Running Context Packer Test ---")
+    with open("data/profile.json") as fp:
+        profile = json.load(fp)["profiles"][0]
+    packed = pack_profile({**profile, "notes": None, "tags": ["a", "a", ""]})
+    print(packed)
+    assert "student_123" not in packed and "notes" not in packed and "tags: a\n" in packed + "\n"
+    assert "learning_preferences.learning_style: primary=visual, secondary=kinesthetic" in packed
+    assert "- name=Cognitive Psychology, grade=B+" in packed
+    before = ContextPacker("test", None, "approx").count(json.dumps(profile, indent=2))
+    after = ContextPacker("test", None, "approx").count(packed)
+    print(f"   -> profile: {before} tokens as indented JSON, {after} packed")
+    assert after < before / 2
+
+    event = {"id": "x1", "summary": "Study Group", "start": {"dateTime": "2025-08-20T10:00:00Z"},
+             "end": {"dateTime": "2025-08-20T12:00:00Z"}, "location": None}
+    assert render_record(event) == "summary=Study Group; start=2025-08-20 10:00; end=2025-08-20 12:00", \
+        render_record(event)
+
+    history = render_messages([
+        HumanMessage(content="What is  cognitive dissonance?"),
+        AIMessage(content="", tool_calls=[{"name": "rag_search", "args": {"query": "cognitive dissonance"},
+                                           "id": "c1"}]),
+        ToolMessage(content="Cognitive dissonance is ...", name="rag_search", tool_call_id="c1"),
+    ])
+    print(history)
+    assert history.splitlines() == ["student: What is cognitive dissonance?",
+                                    "assistant: [calls rag_search(query=cognitive dissonance)]",
+                                    "tool rag_search: Cognitive dissonance is ..."]
+
+    packer = ContextPacker("test", budget=120, encoding="approx")
+    sections = [Section("request", "Plan my week.", 0),
+                Section("history", "\n".join(f"student: message {i} " + "word " * 10 for i in range(40)), 1, "tail"),
+                Section("extra", "\n".join(f"line {i}" for i in range(100)), 2)]
+    result = packer.pack(sections)
+    print(f"   -> {packer.last_report}")
+    assert result["request"] == "Plan my week."
+    assert result["history"].splitlines()[-1].startswith("student: message 39")
+    assert result["extra"].startswith("[... 100 more lines omitted]")
+    assert packer.last_report["packed_tokens"] <= 120 + 2 * _TRUNCATION_RESERVE
+    assert ContextPacker("test", None).pack(sections)["extra"] == sections[2].text
+    print("\n✅ Context packer test passed!")
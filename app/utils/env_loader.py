@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     LANGSMITH_ENDPOINT: str = "https://api.smith.langchain.com"
     LANGSMITH_API_KEY: Optional[str] = None
     LANGSMITH_PROJECT: Optional[str] = None
+
+    # --- LLM Cassettes (Optional, override the `cassette` section of config.yml) ---
+    ATLAS_CASSETTE_MODE: Optional[str] = None
+    ATLAS_CASSETTE_PATH: Optional[str] = None
     
 
     @model_validator(mode='after')
@@ -0,0 +1,184 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.utils.config_loader import load_config
+
+# Request correlation IDs. asyncio tasks copy the current context when they are
+# created, so values bound at the API boundary follow the request through every
+# graph node (and into LangGraph's executor threads for sync nodes).
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+thread_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("thread_id", default=None)
+
+_DEFAULTS = {
+    "level": "INFO",
+    "format": "json",
+    "queue_size": 10000,
+    "debug_sample_rate": 1.0,
+}
+
+# Attributes present on every LogRecord; anything else was passed via `extra=`.
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id", "thread_id"}
+
+_setup_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None, thread_id: Optional[str] = None):
+    """Binds request/thread IDs to every log record emitted inside the block."""
+    tokens = [request_id_var.set(request_id), thread_id_var.set(thread_id)]
+    try:
+        yield
+    finally:
+        thread_id_var.reset(tokens[1])
+        request_id_var.reset(tokens[0])
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the current request/thread IDs onto the record."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.thread_id = thread_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every N DEBUG records per call site so chatty events
+    (per-call LLM lookups, node entry) don't flood the queue under load.
+    Records at INFO and above always pass.
+    """
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self._counters: Dict[Tuple[str, int], int] = {}
+        # Records are filtered on whichever thread logs them (event loop,
+        # to_thread workers), so the read-increment must be atomic.
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.every == 0:
+            return False
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counters.get(key, 0)
+            self._counters[key] = count + 1
+        return count % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Renders each record as a single-line JSON object."""
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread_id": getattr(record, "thread_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that never blocks the caller: records are dropped when the queue is full."""
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config: Optional[Dict] = None, stream=None, force: bool = False) -> logging.Logger:
+    """
+    Configures the `app` logger hierarchy from the `logging` section of config.yml.
+    Records are pushed onto a bounded queue by the calling coroutine and written
+    to the stream by a background QueueListener thread. Safe to call repeatedly.
+    """
+    global _listener
+    root = logging.getLogger("app")
+    with _setup_lock:
+        if _listener is not None and not force:
+            return root
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+        if config is None:
+            try:
+                config = load_config().get("logging", {})
+            except FileNotFoundError:
+                config = {}
+        settings = {**_DEFAULTS, **(config or {})}
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if settings["format"] == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+            ))
+
+        handler = DroppingQueueHandler(queue.Queue(maxsize=int(settings["queue_size"])))
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(float(settings["debug_sample_rate"])))
+
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(settings["level"])
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    return root
+
+
+def shutdown_logging() -> None:
+    """Flushes any queued records and stops the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a logger under the configured `app` hierarchy."""
+    if _listener is None:
+        setup_logging()
+    if not name.startswith("app"):
+        name = f"app.{name}"
+    return logging.getLogger(name)
+
+
+if __name__ == "__main__":
+    logger = get_logger(__name__)
+    with request_context(request_id="req-demo", thread_id="1"):
+        logger.info("Logger smoke test", extra={"node": "demo"})
+        for i in range(5):
+            logger.debug("Sampled debug event %d", i)
+    shutdown_logging()
@@ -0,0 +1,296 @@
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.utils.config_loader import load_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = "X-Atlas-Profile"
+
+_DEFAULTS = {
+    "enabled": False,
+    "output_dir": "profiles",
+    "top_allocations": 25,
+    "tracemalloc_frames": 5,
+}
+
+
+
+class ProfilingBusyError(RuntimeError):
+    """Raised when a profile is requested while other requests are in flight."""
+
+
+class _RequestGate:
+    """
+    cProfile and tracemalloc are process-global, so anything else running on
+    the event loop during a profile would be attributed to it. The gate admits
+    a profiled request only when nothing else is in flight, and holds new
+    requests back until the profile is finished.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.profiling = False
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _cond(self) -> asyncio.Condition:
+        # Created inside the running loop rather than at import time.
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def request(self):
+        cond = self._cond()
+        async with cond:
+            await cond.wait_for(lambda: not self.profiling)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with cond:
+                self.in_flight -= 1
+                cond.notify_all()
+
+    async def begin_profile(self) -> None:
+        cond = self._cond()
+        async with cond:
+            if self.profiling or self.in_flight:
+                raise ProfilingBusyError(
+                    f"{self.in_flight} request(s) in flight{' and a profile running' if self.profiling else ''}"
+                )
+            self.profiling = True
+
+    async def end_profile(self) -> None:
+        cond = self._cond()
+        async with cond:
+            self.profiling = False
+            cond.notify_all()
+
+
+_gate = _RequestGate()
+
+
+def track_request():
+    """
+    Marks an unprofiled request as in flight; waits while a profile is running.
+    Only needed when profiling is enabled; otherwise skip the gate entirely.
+    """
+    return _gate.request()
+
+
+def profiling_settings() -> Dict[str, Any]:
+    """Returns the `profiling` section of config.yml merged over the defaults."""
+    return {**_DEFAULTS, **(load_config().get("profiling") or {})}
+
+
+class NodeSpanRecorder(BaseCallbackHandler):
+    """
+    Collects a timeline of graph node, LLM and tool spans from LangChain
+    callbacks. Each span records the asyncio task it ran on, so parallel
+    branches of the graph show up as overlapping lanes.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    @staticmethod
+    def _task_name() -> Optional[str]:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return None
+        return task.get_name() if task else None
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str) -> None:
+        self._open[run_id] = {
+            "name": name,
+            "kind": kind,
+            "run_id": str(run_id),
+            "parent_run_id": str(parent_run_id) if parent_run_id else None,
+            "task": self._task_name(),
+            "start_ms": self._now_ms(),
+        }
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span["end_ms"] = self._now_ms()
+        span["duration_ms"] = span["end_ms"] - span["start_ms"]
+        if error is not None:
+            span["error"] = repr(error)
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "app"):
+        """Times a block of application code that isn't a LangChain run."""
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            end = self._now_ms()
+            self.spans.append({"name": name, "kind": kind, "task": self._task_name(),
+                               "start_ms": start, "end_ms": end, "duration_ms": end - start})
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        node = (metadata or {}).get("langgraph_node")
+        self._start(run_id, parent_run_id, name, "node" if name == node else "chain")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or "chat_model", "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or (serialized or {}).get("name", "tool"), "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    stats = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]).statistics("lineno")
+    return [
+        {"location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_bytes": s.size, "count": s.count}
+        for s in stats[:limit]
+    ]
+
+
+def _write_profile(out_dir: Path, request_id: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot,
+                   current: int, peak: int, recorder: NodeSpanRecorder, wall_ms: float, top: int) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(out_dir / "profile.pstats")
+    (out_dir / "allocations.json").write_text(json.dumps({
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": _top_allocations(snapshot, top),
+    }, indent=2))
+    (out_dir / "timeline.json").write_text(json.dumps({
+        "request_id": request_id,
+        "wall_ms": wall_ms,
+        "spans": sorted(recorder.spans, key=lambda s: s["start_ms"]),
+    }, indent=2))
+
+
+@asynccontextmanager
+async def profile_request(request_id: str, settings: Optional[Dict[str, Any]] = None):
+    """
+    Runs the enclosed block under cProfile and tracemalloc and writes
+    `profile.pstats`, `allocations.json` and `timeline.json` to a per-request
+    directory. Yields the span recorder to pass as a LangGraph callback.
+    Raises ProfilingBusyError unless the request has the process to itself;
+    requests arriving meanwhile wait in `track_request` until it finishes.
+    """
+    settings = settings or profiling_settings()
+    await _gate.begin_profile()
+    started_tracing = not tracemalloc.is_tracing()
+    recorder = NodeSpanRecorder()
+    profiler = cProfile.Profile()
+    try:
+        if started_tracing:
+            tracemalloc.start(int(settings["tracemalloc_frames"]))
+        profiler.enable()
+        try:
+            yield recorder
+        finally:
+            profiler.disable()
+            wall_ms = recorder._now_ms()
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            out_dir = Path(settings["output_dir"]) / f"{stamp}_{request_id}"
+            # pstats/JSON serialization and the writes stay off the event loop.
+            await asyncio.to_thread(_write_profile, out_dir, request_id, profiler, snapshot, current, peak,
+                                    recorder, wall_ms, int(settings["top_allocations"]))
+            logger.info("Request profile saved", extra={"path": str(out_dir)})
+    finally:
+        await _gate.end_profile()
+
+
+def summarize_profiles(profile_dir: str, top: int = 20, sort: str = "cumulative") -> str:
+    """Aggregates every captured profile under `profile_dir` into a hot-spot report."""
+    root = Path(profile_dir)
+    runs = sorted(p for p in root.iterdir() if (p / "profile.pstats").exists()) if root.exists() else []
+    if not runs:
+        return f"No profiles found in {root}"
+
+    out = io.StringIO()
+    out.write(f"Profiles analysed: {len(runs)}\n\n== Top {top} functions by {sort} time ==\n")
+    stats = pstats.Stats(*(str(p / "profile.pstats") for p in runs), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    allocations: Dict[str, int] = defaultdict(int)
+    for run in runs:
+        timeline = json.loads((run / "timeline.json").read_text())
+        for span in timeline["spans"]:
+            if span["kind"] in ("node", "llm", "tool", "app"):
+                durations[f"{span['kind']}:{span['name']}"].append(span["duration_ms"])
+        for entry in json.loads((run / "allocations.json").read_text())["top"]:
+            allocations[entry["location"]] += entry["size_bytes"]
+
+    out.write(f"\n== Top {top} spans by total time ==\n")
+    ranked = sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True)[:top]
+    for name, values in ranked:
+        out.write(f"{sum(values):10.1f}ms total  {sum(values) / len(values):8.1f}ms mean  x{len(values):<4} {name}\n")
+
+    out.write(f"\n== Top {top} allocation sites (summed across profiles) ==\n")
+    for location, size in sorted(allocations.items(), key=lambda item: item[1], reverse=True)[:top]:
+        out.write(f"{size / 1024:10.1f} KiB  {location}\n")
+    return out.getvalue()
+
+
+# ==============================================================================
+# ✅ CLI
+# Summarize captured request profiles:
+#   python -m app.utils.profiling --top 20 --sort tottime
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize hot spots across captured /invoke profiles.")
+    parser.add_argument("--dir", default=None, help="Profile directory (defaults to profiling.output_dir).")
+    parser.add_argument("--top", type=int, default=20, help="Number of entries per section.")
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    args = parser.parse_args()
+    print(summarize_profiles(args.dir or profiling_settings()["output_dir"], args.top, args.sort))
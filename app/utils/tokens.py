@@ -0,0 +1,107 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+APPROXIMATE = "approx"
+# A failed tiktoken load is retried after this long rather than remembered for
+# the life of the process; until then counts fall back to ApproximateEncoding.
+RETRY_SECONDS = 60.0
+
+_encodings: Dict[str, Any] = {}
+_failed_at: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+class ApproximateEncoding:
+    """
+    A dependency-free stand-in for a BPE encoding: a word or punctuation mark
+    with its leading whitespace is one token. Counts land close to
+    cl100k_base on English prose, and decode(encode(text)) gives the text
+    back (minus trailing whitespace), so windows can be sliced the same way.
+    """
+    name = APPROXIMATE
+    _token = re.compile(r"\s*(?:\w+|[^\w\s])")
+
+    def encode(self, text: str) -> List[str]:
+        return self._token.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+def get_encoding(name: Optional[str] = None) -> Any:
+    """
+    The tiktoken encoding `name` (default cl100k_base), loaded once per
+    process. Falls back to `ApproximateEncoding` when `name` is "approx", or,
+    with an error logged, when tiktoken is missing or its vocabulary cannot be
+    fetched; only successful loads are kept, so a transient failure is retried.
+    """
+    name = name or DEFAULT_ENCODING
+    if name == APPROXIMATE:
+        return ApproximateEncoding()
+    encoding = _encodings.get(name)
+    if encoding is not None:
+        return encoding
+    with _lock:
+        if name in _encodings:
+            return _encodings[name]
+        failed_at = _failed_at.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_SECONDS:
+            return ApproximateEncoding()
+        try:
+            import tiktoken
+            encoding = _encodings[name] = tiktoken.get_encoding(name)
+            _failed_at.pop(name, None)
+            return encoding
+        except Exception as e:
+            _failed_at[name] = time.monotonic()
+            logger.error("Tokenizer unavailable; counting tokens approximately",
+                         extra={"encoding": name, "error": str(e), "retry_seconds": RETRY_SECONDS})
+            return ApproximateEncoding()
+
+
+def count_tokens(text: str, encoding: Optional[str] = None) -> int:
+    return len(get_encoding(encoding).encode(text))
+
+
+def split_tokens(text: str, max_tokens: int, overlap: int = 0, encoding: Optional[str] = None) -> List[str]:
+    """
+    Splits text into windows of at most `max_tokens` tokens, each starting
+    `overlap` tokens before the previous one ended, so a sentence cut at a
+    boundary appears whole in one of the two windows. Text is encoded once.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    enc = get_encoding(encoding)
+    tokens = enc.encode(text)
+    step = max_tokens - overlap
+    windows = []
+    for start in range(0, max(len(tokens) - overlap, 1), step):
+        window = enc.decode(tokens[start:start + max_tokens]).strip()
+        if window:
+            windows.append(window)
+    return windows
+
+
+# ==============================================================================
+# ✅ TEST BLOCK
+# To test this file, run `python -m app.utils.tokens` from the root directory.
+# ==============================================================================
+if __name__ == "__main__":
+    print("\n--- Running Token Utilities Test ---")
+    text = "The central limit theorem, stated simply: sample means are approximately normal. " * 20
+    for name in (APPROXIMATE, None):
+        enc = get_encoding(name)
+        windows = split_tokens(text, max_tokens=50, overlap=10, encoding=name)
+        assert all(count_tokens(w, name) <= 50 for w in windows), windows
+        assert windows[0].startswith("The central") and windows[-1].endswith("normal.")
+        print(f"   -> {enc.name}: {count_tokens(text, name)} tokens in {len(windows)} windows of 50 (overlap 10)")
+    assert split_tokens("short note", 50, 10, APPROXIMATE) == ["short note"]
+    assert split_tokens("", 50, 10, APPROXIMATE) == []
+    print("\n✅ Token utilities test passed!")
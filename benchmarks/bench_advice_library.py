@@ -0,0 +1,170 @@
+"""
+The Advisor with and without the advice library, offline.
+
+  lookup  - latency of the vectorized library search (situation similarity
+            plus profile-feature match, both one matrix-vector product) on
+            the shipped library and on synthetic libraries of --sizes
+            snippets, against scoring each snippet in a Python loop
+  advisor - AdvisorAgent.advise_fused end to end on a simulated model that
+            takes --ttft-ms plus --ms-per-token per output token. Written
+            from scratch it produces --scratch-tokens (a typical full
+            guidance answer); when stitching library snippets it follows
+            the prompt's word limit (about 1.3 tokens per word). Prompt
+            tokens are counted from the real prompts. Requests run
+            concurrently.
+
+Run from the repository root:
+    python -m benchmarks.bench_advice_library --requests 40 --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.common import configure_offline_env, summarize_latencies, write_offline_config
+
+configure_offline_env()
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from app.services.advice_library import FEATURE_GROUPS, AdviceLibrary, profile_features  # noqa: E402
+from app.services.fake_llm import FakeEmbeddings  # noqa: E402
+from app.utils.tokens import count_tokens  # noqa: E402
+
+SITUATIONS = [
+    "I'm anxious and panicking about my statistics exam next week",
+    "I keep procrastinating on my cognitive psychology essay",
+    "I'm exhausted and burning out from too many deadlines",
+    "How should I organize my study time across my courses?",
+    "I get distracted by my phone whenever I try to study",
+    "My mind goes blank during exams even when I know the material",
+    "I have three assignments due and feel overwhelmed",
+    "How can I remember what I read for longer?",
+]
+
+
+class SimulatedLLM:
+    """Answers in the fused format; output length and latency as described in the module docstring."""
+    def __init__(self, ttft_ms: float, ms_per_token: float, scratch_tokens: int):
+        self.ttft_ms, self.ms_per_token, self.scratch_tokens = ttft_ms, ms_per_token, scratch_tokens
+        self.prompt_tokens = self.output_tokens = 0
+
+    async def ainvoke(self, messages: List[HumanMessage]) -> AIMessage:
+        self.prompt_tokens += count_tokens(messages[-1].content, "approx")
+        limit = re.search(r"under (\d+) words", messages[-1].content)
+        tokens = int(int(limit.group(1)) * 1.3) if limit else self.scratch_tokens
+        self.output_tokens += tokens
+        await asyncio.sleep((self.ttft_ms + tokens * self.ms_per_token) / 1000)
+        return AIMessage(content="### ANALYSIS\n- Exam stress.\n### GUIDANCE\n" + "step " * tokens)
+
+
+def synthetic_library(size: int, dims: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    values = {"learning_styles": ["visual", "auditory", "kinesthetic", "reading_writing"],
+              "peak_energy": ["early_morning", "late_morning", "afternoon", "evening", "night"],
+              "challenges": ["procrastination", "test_anxiety", "time_management", "focus", "burnout", "sleep"]}
+    categories = ["stress", "time", "motivation", "energy", "study", "support", "emergency"]
+    snippets = [{"id": f"s{i}", "category": categories[i % len(categories)], "text": f"Snippet {i}.",
+                 "features": {group: list(rng.choice(values[group], size=rng.integers(0, 3), replace=False))
+                              for group in FEATURE_GROUPS}} for i in range(size)]
+    return snippets, rng.standard_normal((size, dims)).astype(np.float32)
+
+
+def loop_search(library: AdviceLibrary, profile: Dict, situation: List[float], k: int) -> List[str]:
+    """Per-snippet scoring in Python, as a baseline for the vectorized search."""
+    weight = library.settings["situation_weight"]
+    wanted = profile_features(profile)
+    norm = sum(v * v for v in wanted.values()) ** 0.5 or 1.0
+    query = list(situation)
+    query_norm = sum(v * v for v in query) ** 0.5
+    scored = []
+    for snippet, vector in zip(library.snippets, library.situations.tolist()):
+        similarity = sum(a * b for a, b in zip(vector, query)) / query_norm
+        features = [f"{g}:{v}" for g in FEATURE_GROUPS for v in snippet["features"].get(g, [])]
+        match = sum(wanted.get(f, 0.0) for f in features) / ((len(features) ** 0.5 or 1.0) * norm)
+        scored.append((weight * similarity + (1 - weight) * match, snippet["id"]))
+    return [i for _, i in sorted(scored, reverse=True)[:k]]
+
+
+def bench_lookup(sizes: List[int], profile: Dict, repeats: int = 50) -> None:
+    embeddings = FakeEmbeddings()
+    queries = [embeddings.embed_query(s) for s in SITUATIONS]
+    print(f"{'snippets':>10}{'vectorized p50 ms':>19}{'p95 ms':>9}{'python loop p50 ms':>20}")
+    shipped = AdviceLibrary.load_snippets("data/advice_library.json")
+    libraries = [(len(shipped), AdviceLibrary(shipped, np.array(embeddings.embed_documents(
+        [f"{s['situation']}\n{s['text']}" for s in shipped]), dtype=np.float32)))]
+    libraries += [(size, AdviceLibrary(*synthetic_library(size, embeddings.dimensions))) for size in sizes]
+    for size, library in libraries:
+        latencies = []
+        for i in range(repeats):
+            started = time.perf_counter()
+            library.search(profile, queries[i % len(queries)])
+            latencies.append((time.perf_counter() - started) * 1000)
+        stats = summarize_latencies(latencies)
+        loop = "-"
+        if size <= 20000:
+            loop_latencies = []
+            for i in range(max(3, repeats // 10)):
+                started = time.perf_counter()
+                loop_search(library, profile, queries[i % len(queries)], 5)
+                loop_latencies.append((time.perf_counter() - started) * 1000)
+            loop = f"{summarize_latencies(loop_latencies)['p50_ms']:.2f}"
+        print(f"{size:>10,}{stats['p50_ms']:>19.3f}{stats['p95_ms']:>9.3f}{loop:>20}")
+
+
+async def bench_advisor(requests: int, profile: Dict, args: argparse.Namespace) -> None:
+    from app.agents.advisor import AdvisorAgent
+    from app.services.llm_service import LLMService
+
+    print(f"\n{'advisor':<10}{'p50 ms':>9}{'p95 ms':>9}{'prompt tok':>12}{'output tok':>12}{'snippets':>10}")
+    for enabled in (False, True):
+        llm = SimulatedLLM(args.ttft_ms, args.ms_per_token, args.scratch_tokens)
+        service = LLMService()
+        service.get_llm = lambda provider=None: llm
+        advisor = AdvisorAgent(service)
+        advisor.library_settings = {**advisor.library_settings, "enabled": enabled}
+
+        async def advise(query: str) -> Dict[str, Any]:
+            state = {"atlas_message": [HumanMessage(content=query)], "profile": profile, "results": {}}
+            started = time.perf_counter()
+            output = await advisor.advise_fused(state)
+            return {"ms": (time.perf_counter() - started) * 1000,
+                    "snippets": len(output["results"]["advisor_output"]["library"])}
+
+        await advise(SITUATIONS[0])                 # loads and embeds the library
+        llm.prompt_tokens = llm.output_tokens = 0
+        runs = await asyncio.gather(*(advise(SITUATIONS[i % len(SITUATIONS)]) for i in range(requests)))
+        latencies = [run["ms"] for run in runs]
+        snippets = sum(run["snippets"] for run in runs)
+        stats = summarize_latencies(latencies)
+        name = "library" if enabled else "scratch"
+        print(f"{name:<10}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{llm.prompt_tokens / requests:>12,.0f}"
+              f"{llm.output_tokens / requests:>12,.0f}{snippets / requests:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10000, 100000])
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--ms-per-token", type=float, default=10)
+    parser.add_argument("--scratch-tokens", type=int, default=650)
+    args = parser.parse_args()
+
+    with open("data/profile.json") as fp:
+        profile = json.load(fp)["profiles"][0]
+    bench_lookup(args.sizes, profile)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ATLAS_CONFIG_PATH"] = write_offline_config(0, str(Path(tmp) / "config.yml"))
+        asyncio.run(bench_advisor(args.requests, profile, args))
+
+
+if __name__ == "__main__":
+    main()
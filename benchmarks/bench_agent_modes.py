@@ -0,0 +1,101 @@
+"""
+Latency and prompt tokens of the academic workflow with the NoteWriter and
+Advisor in each mode, through the real graph against the fake provider
+(`--llm-latency-ms` per call). The coordinator is scripted to pick both
+agents (plus the planner, which it always adds).
+
+  two_stage - the analysis runs as its own node alongside the profile analyzer,
+              then the agent's node generates on it (two calls per agent)
+  fused     - one call per agent returns the analysis and the output as
+              two sections, parsed into separate `results` keys
+
+Output tokens depend on the model and are not simulated; the fused
+response asks for the same two parts the two-stage calls produce.
+
+Run from the repository root:
+    python -m benchmarks.bench_agent_modes --requests 30 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_offline_env, summarize_latencies, write_offline_config
+
+configure_offline_env()
+
+from langchain_core.callbacks import AsyncCallbackHandler  # noqa: E402
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from app.graph.state import AcademicState  # noqa: E402
+from app.utils.tokens import count_tokens  # noqa: E402
+
+# The same canned text answers every call: it names both agents for the coordinator and carries the
+# fused sections, so both modes parse real output.
+RESPONSE = (
+    "Thought: The student needs notes and guidance.\n"
+    "Decision: Required agents are NOTEWRITER, ADVISOR.\n"
+    "### ANALYSIS\n- Key topics: memory models, encoding.\n- Visual learner: use diagrams.\n"
+    "### STUDY GUIDE\n**INTENSIVE STUDY GUIDE**\nDay 1: memory models.\n"
+    "### GUIDANCE\nStudy in 50-minute blocks with breaks."
+)
+
+
+class PromptCounter(AsyncCallbackHandler):
+    """Counts chat-model calls and their prompt tokens (approximate encoding, no download)."""
+    def __init__(self):
+        self.calls = self.tokens = 0
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs: Any) -> None:
+        self.calls += 1
+        self.tokens += sum(count_tokens(str(m.content), "approx") for batch in messages for m in batch)
+
+
+async def run(requests: int, profile: Dict) -> Dict[str, Any]:
+    from app.graph.graph import create_graph
+
+    graph = create_graph()
+    query = "Make me study notes and give me advice for my Cognitive Psychology midterm plan."
+    counter = PromptCounter()
+    latencies = []
+    for i in range(requests):
+        state = AcademicState(messages=[HumanMessage(content=query)], atlas_message=[HumanMessage(content=query)],
+                              profile=profile, calendar={}, tasks={}, results={})
+        started = time.perf_counter()
+        final = await graph.ainvoke(state, {"configurable": {"thread_id": f"bench-{i}"}, "callbacks": [counter]})
+        latencies.append((time.perf_counter() - started) * 1000)
+        results = final["results"]
+        assert {"learning_analysis", "notewriter_output", "situation_analysis", "advisor_output"} <= set(results)
+    return {**summarize_latencies(latencies), "calls": counter.calls / requests, "tokens": counter.tokens / requests}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    from app.services.data_manager import DataManager
+    data_manager = DataManager()
+    data_manager.load_data(*(Path("data", name).read_text() for name in ("profile.json", "calendar.json", "tasks.json")))
+    profile = data_manager.get_student_profile("student_123")
+
+    print(f"{args.requests} academic requests (planner + notewriter + advisor), "
+          f"{args.llm_latency_ms:.0f} ms per LLM call\n")
+    print(f"{'mode':<11}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'LLM calls':>11}{'prompt tokens':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("two_stage", "fused"):
+            os.environ["ATLAS_CONFIG_PATH"] = write_offline_config(args.llm_latency_ms, str(Path(tmp) / f"{mode}.yml"), {
+                "llm.providers.fake.response": RESPONSE, "notewriter.mode": mode, "advisor.mode": mode,
+                "artifact_store.enabled": False,    # every request generates its own notes
+            })
+            stats = asyncio.run(run(args.requests, profile))
+            print(f"{mode:<11}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['mean_ms']:>9.1f}"
+                  f"{stats['calls']:>11.1f}{stats['tokens']:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
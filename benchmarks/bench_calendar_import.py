@@ -0,0 +1,117 @@
+"""
+Throughput benchmark for the streaming calendar importer on large synthetic
+exports: an `.ics` file (mixed UTC / TZID / all-day / recurring VEVENTs) and a
+Google-Calendar-style `.csv`, each about `--lines` lines long.
+
+  parse     - iter_calendar_events alone: lines/s, MB/s, events/s
+  peak      - tracemalloc peak while streaming vs reading the file whole and
+              materializing every event in a list (timed as a separate pass)
+  import    - parse + chunked upserts into an in-memory DataManager
+
+Run from the repository root:
+    python -m benchmarks.bench_calendar_import --lines 1000000
+"""
+import argparse
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Tuple
+
+from app.services.calendar_import import (ImportStats, import_calendar, iter_calendar_events, iter_csv_events,
+                                          iter_ics_events)
+from app.services.data_manager import DataManager
+
+ORIGIN = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+def write_ics(path: Path, lines: int, seed: int = 5) -> int:
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n")
+        i = 0
+        while written < lines:
+            start = ORIGIN + timedelta(minutes=15 * rng.randrange(4 * 24 * 120))
+            end = start + timedelta(minutes=rng.choice((50, 75, 90, 120)))
+            kind = i % 10
+            if kind < 6:
+                when = [f"DTSTART:{start:%Y%m%dT%H%M%SZ}", f"DTEND:{end:%Y%m%dT%H%M%SZ}"]
+            elif kind < 8:
+                when = [f"DTSTART;TZID=America/New_York:{start:%Y%m%dT%H%M%S}",
+                        f"DTEND;TZID=America/New_York:{end:%Y%m%dT%H%M%S}"]
+            elif kind == 8:
+                when = [f"DTSTART;VALUE=DATE:{start:%Y%m%d}"]
+            else:
+                when = [f"DTSTART:{start:%Y%m%dT%H%M%SZ}", f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+                        "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251212T235959Z"]
+            block = ["BEGIN:VEVENT", f"UID:event-{i}@bench", f"SUMMARY:Event {i}", *when,
+                     f"DESCRIPTION:Synthetic event {i}\\, generated for the import benchmark",
+                     " with a folded continuation line", "END:VEVENT"]
+            f.write("\r\n".join(block) + "\r\n")
+            written += len(block)
+            i += 1
+        f.write("END:VCALENDAR\r\n")
+    return written + 4
+
+
+def write_csv(path: Path, lines: int, seed: int = 5) -> int:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Subject,Start Date,Start Time,End Date,End Time,All Day Event,Location\n")
+        for i in range(lines - 1):
+            start = ORIGIN + timedelta(minutes=15 * rng.randrange(4 * 24 * 120))
+            end = start + timedelta(minutes=rng.choice((50, 75, 90, 120)))
+            f.write(f"Event {i},{start:%m/%d/%Y},{start:%I:%M %p},{end:%m/%d/%Y},{end:%I:%M %p},False,"
+                    f"Room {i % 300}\n")
+    return lines
+
+
+def peak_bytes(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def timed(fn: Callable[[], object]) -> Tuple[float, object]:
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {"ics": Path(tmp) / "semester.ics", "csv": Path(tmp) / "semester.csv"}
+        write_ics(files["ics"], args.lines)
+        write_csv(files["csv"], args.lines)
+
+        print(f"{'format':<7}{'lines':>11}{'events':>10}{'MB':>7}{'parse s':>9}{'lines/s':>11}{'MB/s':>7}"
+              f"{'import s':>10}{'stream peak MB':>16}{'whole-file peak MB':>20}")
+        for fmt, path in files.items():
+            stats = ImportStats()
+            parse_s, _ = timed(lambda: sum(1 for _ in iter_calendar_events(path, stats=stats)))
+            import_s, _ = timed(lambda: import_calendar(DataManager(), path, settings={
+                "default_timezone": "UTC", "chunk_size": args.chunk_size}))
+            streamed = peak_bytes(lambda: sum(1 for _ in iter_calendar_events(path)))
+            parse_whole = iter_ics_events if fmt == "ics" else iter_csv_events
+            whole = peak_bytes(lambda: list(parse_whole(path.read_text(encoding="utf-8").splitlines(True))))
+            size_mb = path.stat().st_size / 1e6
+            print(f"{fmt:<7}{stats.lines:>11,}{stats.records:>10,}{size_mb:>7.0f}{parse_s:>9.2f}"
+                  f"{stats.lines / parse_s:>11,.0f}{size_mb / parse_s:>7.1f}{import_s:>10.2f}"
+                  f"{streamed / 1e6:>16.1f}{whole / 1e6:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
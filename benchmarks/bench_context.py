@@ -0,0 +1,224 @@
+"""
+Prompt tokens per node before and after context packing, offline. The
+"after" prompts are captured from the real agents (through a recording
+model); the "before" prompts are rebuilt the way the agents rendered their
+context previously:
+
+  coordinator      - context counts as indented JSON
+  profile_analyzer - the profile as indented JSON in the system prompt and
+                     again as compact JSON in the user message
+  planner          - calendar and task analysis in `llm` mode; raw event and
+                     task dicts (older checkpoints, imports) as JSON lines
+  notewriter       - fused mode, learning style as JSON
+  advisor          - fused mode, the whole profile as JSON (the advice
+                     library is off in both runs so only the context differs)
+  senior           - the message list's repr as history, plus the query
+
+Two datasets: the sample data in data/, and a synthetic student with
+--courses courses, --events raw events, --tasks raw tasks and --turns
+tool-using chat turns. Token counts use the approximate encoding (no
+vocabulary download); "cut" lists the sections truncated to the node's
+budget from config.yml.
+
+Run from the repository root:
+    python -m benchmarks.bench_context --courses 60 --events 150 --tasks 80 --turns 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_offline_env, write_offline_config
+
+configure_offline_env()
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+
+from app.prompts import prompts  # noqa: E402
+from app.utils.tokens import count_tokens  # noqa: E402
+
+QUERY = "Make me study notes and advice for my Cognitive Psychology midterm, and plan my week."
+NODES = ("coordinator", "profile_analyzer", "planner", "notewriter", "advisor", "senior")
+TOPICS = ["working memory", "encoding", "retrieval cues", "attention", "perception", "schemas",
+          "priming", "decision making", "heuristics", "language", "problem solving", "consolidation"]
+
+
+def _text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(m["content"] if isinstance(m, dict) else m.content) for m in prompt)
+
+
+class RecordingLLM:
+    """Records each prompt's tokens under the node currently being measured."""
+    def __init__(self):
+        self.node = ""
+        self.tokens: Dict[str, int] = {}
+
+    async def ainvoke(self, prompt: Any, config: Any = None, **kwargs: Any) -> AIMessage:
+        self.tokens[self.node] = self.tokens.get(self.node, 0) + count_tokens(_text(prompt), "approx")
+        return AIMessage(content="### ANALYSIS\n- ok\n### STUDY GUIDE\nok\n### GUIDANCE\nok")
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any) -> "RecordingLLM":
+        return self
+
+
+def sample_dataset() -> Dict[str, Any]:
+    profile = json.loads(Path("data/profile.json").read_text())["profiles"][0]
+    events = json.loads(Path("data/calendar.json").read_text())["events"]
+    tasks = json.loads(Path("data/tasks.json").read_text())["tasks"]
+    return {"profile": profile, "events": events, "tasks": tasks, "messages": [HumanMessage(content=QUERY)]}
+
+
+def synthetic_dataset(courses: int, events: int, tasks: int, turns: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    profile = {
+        "id": "student_900", "student_id": "student_900", "created_at": "2025-01-10T08:00:00Z", "_etag": "abc",
+        "personal_info": {"name": "Jordan", "major": "Cognitive Science", "academic_year": 2, "minor": None,
+                          "pronouns": "", "email": "jordan@example.edu"},
+        "learning_preferences": {
+            "learning_style": {"primary": "auditory", "secondary": "visual", "tertiary": None},
+            "study_patterns": {"peak_energy": "evening", "preferred_environment": "home_desk",
+                               "session_minutes": 45, "breaks": {"value": "10 min"}},
+            "accommodations": [],
+        },
+        "academic_info": {"current_courses": [{
+            "id": f"course_{i}", "name": f"Cognitive Psychology {i}" if i == 0 else f"Course {i} {rng.choice(TOPICS).title()}",
+            "grade": rng.choice(["A", "A-", "B+", "B", "C+", None]), "credits": rng.choice([3, 4]),
+            "instructor": {"name": f"Dr. Lee {i}", "office_hours": {"dateTime": "2025-08-19T14:00:00Z"}, "phone": None},
+            "syllabus_topics": rng.sample(TOPICS, 6) + [TOPICS[0]] * 2,     # duplicated topics from merged syllabi
+            "notes": None,
+        } for i in range(courses)]},
+        "challenges": ["procrastination", "test_anxiety", "procrastination", "time_management"],
+        "goals": [{"text": "Raise GPA above 3.5", "deadline": {"date": "2025-12-15"}}, {"text": "", "deadline": None}],
+    }
+    raw_events = [{
+        "id": f"evt_{i}", "etag": f"\"{rng.getrandbits(32)}\"", "summary": f"{rng.choice(TOPICS).title()} session {i}",
+        "start": {"dateTime": f"2025-08-{18 + i % 7:02d}T{8 + i % 10:02d}:00:00Z"},
+        "end": {"dateTime": f"2025-08-{18 + i % 7:02d}T{9 + i % 10:02d}:15:00Z"},
+        "location": None, "recurrence": [], "attendees": [],
+    } for i in range(events)]
+    raw_tasks = [{
+        "id": f"task_{i}", "title": f"Problem set {i}", "due": f"2025-08-{20 + i % 9:02d}T23:59:59Z",
+        "status": "needsAction", "notes": rng.choice(["", None, f"Cover {rng.choice(TOPICS)} exercises 1-10."]),
+        "parent": None, "links": [],
+    } for i in range(tasks)]
+    messages: List[Any] = []
+    for i in range(turns):
+        topic = rng.choice(TOPICS)
+        messages.append(HumanMessage(content=f"What does the research say about {topic}? (turn {i})"))
+        messages.append(AIMessage(content="", tool_calls=[{"name": "rag_search", "args": {"query": topic},
+                                                           "id": f"call_{i}"}]))
+        messages.append(ToolMessage(content=f"{topic.title()}: " + "Key findings and definitions. " * 12,
+                                    name="rag_search", tool_call_id=f"call_{i}"))
+        messages.append(AIMessage(content=f"Here is what matters about {topic}: " + "a short explanation. " * 10))
+    messages.append(HumanMessage(content=QUERY))
+    return {"profile": profile, "events": raw_events, "tasks": raw_tasks, "messages": messages}
+
+
+def before_tokens(data: Dict[str, Any], tools_prompt: str) -> Dict[str, int]:
+    """Prompt tokens per node as the agents rendered their context before packing."""
+    profile, messages = data["profile"], data["messages"]
+    style = profile.get("learning_preferences", {}).get("learning_style", {})
+    context = {"student_major": profile.get("personal_info", {}).get("major", "Unknown"),
+               "upcoming_events": len(data["events"]), "active_tasks": len(data["tasks"])}
+    calendar = ("Analyze these calendar events and identify available time blocks, energy impacts, and conflicts.\n"
+                "Events (UTC start-end | summary):\n" + "\n".join(json.dumps(e) for e in data["events"]))
+    tasks = ("Analyze this task list and create a priority structure considering urgency and complexity.\n"
+             "Tasks (UTC due | status | title | notes):\n" + "\n".join(json.dumps(t) for t in data["tasks"]))
+    prompt_text = {
+        "coordinator": prompts.COORDINATOR_PROMPT.format(request=QUERY, context=json.dumps(context, indent=2)),
+        "profile_analyzer": prompts.PROFILE_ANALYZER_PROMPT.format(profile=json.dumps(profile, indent=2))
+                            + "\n" + json.dumps(profile),
+        "planner": calendar + "\n" + tasks,
+        "notewriter": prompts.NOTEWRITER_FUSED_PROMPT.format(learning_style=json.dumps(style), request=QUERY, material=""),
+        "advisor": prompts.ADVISOR_FUSED_PROMPT.format(profile=json.dumps(profile), request=QUERY, library=""),
+        "senior": prompts.SENIOR_AGENT_PROMPT.format(messages=messages, query=messages[-1].content, tools=tools_prompt),
+    }
+    return {node: count_tokens(text, "approx") for node, text in prompt_text.items()}
+
+
+async def after_tokens(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Prompt tokens per node from the real agents, and the sections each node truncated."""
+    from app.agents.advisor import AdvisorAgent
+    from app.agents.coordinator import coordinator_agent
+    from app.agents.notewriter import NoteWriterAgent
+    from app.agents.planner import PlannerAgent
+    from app.agents.profile_analyzer import profile_analyzer_agent
+    from app.agents.senior import SeniorAgent
+    from app.services.llm_service import LLMService
+    from app.utils import context_packer
+
+    llm = RecordingLLM()
+    service = LLMService()
+    service.get_llm = lambda provider=None: llm
+    senior = SeniorAgent(service)
+    planner, notewriter, advisor = PlannerAgent(service), NoteWriterAgent(service), AdvisorAgent(service)
+
+    truncated: Dict[str, List[str]] = {}
+    original_pack = context_packer.ContextPacker.pack
+
+    def pack(self, sections):
+        packed = original_pack(self, sections)
+        truncated.setdefault(llm.node, []).extend(self.last_report["truncated"])
+        return packed
+
+    context_packer.ContextPacker.pack = pack
+    state = {"messages": data["messages"], "atlas_message": [HumanMessage(content=QUERY)], "profile": data["profile"],
+             "calendar": {"events": data["events"]}, "tasks": {"tasks": data["tasks"]}, "results": {}}
+    steps = {
+        "coordinator": [lambda: coordinator_agent(state, service)],
+        "profile_analyzer": [lambda: profile_analyzer_agent(state, service)],
+        "planner": [lambda: planner.calendar_analyzer(state), lambda: planner.task_analyzer(state)],
+        "notewriter": [lambda: notewriter.write_fused(state)],
+        "advisor": [lambda: advisor.advise_fused(state)],
+        "senior": [lambda: senior.run(state)],
+    }
+    try:
+        for node, calls in steps.items():
+            llm.node = node
+            for call in calls:
+                await call()
+    finally:
+        context_packer.ContextPacker.pack = original_pack
+    return {"tokens": llm.tokens, "truncated": truncated, "tools_prompt": senior.registry.prompt}
+
+
+def report(name: str, data: Dict[str, Any]) -> None:
+    after = asyncio.run(after_tokens(data))
+    before = before_tokens(data, after["tools_prompt"])
+    print(f"\n{name}")
+    print(f"{'node':<18}{'before':>9}{'after':>9}{'saved':>8}  cut")
+    for node in NODES:
+        old, new = before[node], after["tokens"][node]
+        cut = ", ".join(sorted(set(after["truncated"].get(node, [])))) or "-"
+        print(f"{node:<18}{old:>9,}{new:>9,}{1 - new / old:>8.0%}  {cut}")
+    old, new = sum(before.values()), sum(after["tokens"].values())
+    print(f"{'total':<18}{old:>9,}{new:>9,}{1 - new / old:>8.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=60)
+    parser.add_argument("--events", type=int, default=150)
+    parser.add_argument("--tasks", type=int, default=80)
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ATLAS_CONFIG_PATH"] = write_offline_config(0, str(Path(tmp) / "config.yml"), {
+            "planner.calendar_analysis": "llm", "planner.task_analysis": "llm",
+            "advice_library.enabled": False, "artifact_store.enabled": False,
+            "context.encoding": "approx",
+        })
+        report("sample data (data/)", sample_dataset())
+        report(f"synthetic: {args.courses} courses, {args.events} events, {args.tasks} tasks, {args.turns} chat turns",
+               synthetic_dataset(args.courses, args.events, args.tasks, args.turns))
+
+
+if __name__ == "__main__":
+    main()
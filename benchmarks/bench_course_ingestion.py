@@ -0,0 +1,134 @@
+"""
+Throughput of the course-material ingestion pipeline on a synthetic corpus of
+markdown, text and HTML documents, some of them exact copies and some
+lightly edited copies of others. Embeddings come from the fake provider with
+a per-call latency standing in for the embedding API.
+
+For each configuration (chunking processes x embedding calls in flight) the
+corpus is ingested into a fresh index; the last index is then ingested again
+to time a resumed run, where every document is unchanged.
+
+  docs/s, chunks/s  - end-to-end, including the index writes
+  dup / near        - chunks dropped by content hash / by MinHash
+  naive             - one document at a time (read, chunk, one embedding call,
+                      write) on the first `--baseline-docs`, for comparison
+
+Run from the repository root:
+    python -m benchmarks.bench_course_ingestion --docs 2000 --embed-latency-ms 50 --workers 0 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from benchmarks.common import configure_offline_env, write_offline_config
+
+configure_offline_env()
+
+
+def write_corpus(root: Path, docs: int, words: int, dup_rate: float, near_rate: float, seed: int = 3) -> int:
+    """Writes the documents and returns their total size in bytes."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(20_000)])
+    texts = []
+    for i in range(docs):
+        roll = rng.random()
+        if texts and roll < dup_rate:
+            text = texts[rng.integers(0, len(texts))]
+        elif texts and roll < dup_rate + near_rate:
+            tokens = texts[rng.integers(0, len(texts))].split(" ")
+            for j in rng.integers(0, len(tokens), size=max(1, len(tokens) // 100)):
+                tokens[j] = "edited"
+            text = " ".join(tokens)
+        else:
+            drawn = vocab[rng.zipf(1.3, size=words) % len(vocab)]
+            text = " ".join(w + ("." if k % 12 == 11 else "") for k, w in enumerate(drawn))
+        texts.append(text)
+        kind = i % 3
+        directory = root / f"course_{i % 20:02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        if kind == 0:
+            (directory / f"notes_{i}.md").write_text(f"# Lecture {i}\n\n{text}\n")
+        elif kind == 1:
+            (directory / f"transcript_{i}.txt").write_text(text)
+        else:
+            (directory / f"chapter_{i}.html").write_text(
+                f"<html><head><title>Chapter {i}</title><script>var x = 1;</script></head>"
+                f"<body><h1>Chapter {i}</h1><p>{text}</p></body></html>")
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+
+
+async def naive_ingest(root: Path, index: Path, docs: int, llm_service, settings) -> Tuple[int, int, float]:
+    """Sequential per-document ingestion without dedup; returns (documents, chunks, seconds)."""
+    from app.services.ingestion import iter_documents, read_document
+    from app.services.retrieval import open_retriever
+    from app.services.vector_index import VectorIndex
+    from app.utils.tokens import split_tokens
+
+    started, retriever, count, chunks = time.perf_counter(), None, 0, 0
+    for path in iter_documents(root, settings["extensions"]):
+        if count == docs:
+            break
+        text, _ = read_document(path)
+        texts = split_tokens(text, settings["chunk_tokens"], settings["overlap_tokens"], settings["encoding"])
+        vectors = await llm_service.aget_embeddings(texts)
+        if retriever is None:
+            VectorIndex.create(index, len(vectors[0]))
+            retriever = open_retriever(index, llm_service.get_embedding_model(), {"hybrid": True})
+        retriever.add(vectors, [{"text": t, "source": str(path)} for t in texts])
+        count, chunks = count + 1, chunks + len(texts)
+    return count, chunks, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=2500, help="Words per original document.")
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--near-rate", type=float, default=0.05)
+    parser.add_argument("--embed-latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, os.cpu_count() or 1])
+    parser.add_argument("--embed-concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--baseline-docs", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ATLAS_CONFIG_PATH"] = write_offline_config(0, str(Path(tmp) / "config.yml"), {
+            "embedding_model.providers.fake.latency_ms": args.embed_latency_ms})
+        from app.services.ingestion import IngestionPipeline, ingestion_settings
+        from app.services.llm_service import LLMService
+
+        root = Path(tmp) / "corpus"
+        size = write_corpus(root, args.docs, args.words, args.dup_rate, args.near_rate)
+        print(f"{args.docs:,} documents ({size / 1e6:.1f} MB), embedding latency {args.embed_latency_ms:.0f} ms "
+              f"per call\n")
+        print(f"{'workers':>8}{'in flight':>10}{'seconds':>9}{'docs/s':>9}{'chunks':>8}{'chunks/s':>10}"
+              f"{'dup':>6}{'near':>6}")
+        llm_service = LLMService()
+        docs, chunks, seconds = asyncio.run(naive_ingest(root, Path(tmp) / "index_naive", args.baseline_docs,
+                                                         llm_service, ingestion_settings()))
+        print(f"{'naive':>8}{1:>10}{seconds:>9.2f}{docs / seconds:>9.1f}{chunks:>8,}{chunks / seconds:>10.1f}"
+              f"{'-':>6}{'-':>6}")
+        index = None
+        for workers in args.workers:
+            for concurrency in args.embed_concurrency:
+                index = Path(tmp) / f"index_{workers}_{concurrency}"
+                settings = {**ingestion_settings(), "workers": workers, "embed_concurrency": concurrency}
+                stats = asyncio.run(IngestionPipeline(index, settings, llm_service).arun(root))
+                print(f"{workers:>8}{concurrency:>10}{stats.seconds:>9.2f}{stats.documents_per_second:>9.1f}"
+                      f"{stats.chunks:>8,}{stats.chunks_per_second:>10.1f}{stats.duplicates:>6,}"
+                      f"{stats.near_duplicates:>6,}")
+
+        started = time.perf_counter()
+        resumed = asyncio.run(IngestionPipeline(index, settings, llm_service).arun(root))
+        print(f"\nresumed run: {resumed.skipped:,} unchanged documents skipped, {resumed.chunks} chunks written, "
+              f"{time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmarks DataManager lookups on synthetic data: the original linear scans
+(which re-parse every timestamp per call) against the load-time indexes, and
+per-item cohort loops against the vectorized columnar store (needs numpy).
+
+Run from the repository root:
+    python -m benchmarks.bench_data_manager --events 100000 --tasks 100000 --profiles 5000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from app.core.records import parse_datetime
+from app.services import data_manager as data_manager_module
+from app.services.data_manager import DataManager
+
+NOW = datetime(2025, 8, 18, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def synthetic_documents(profiles: int, events: int, tasks: int, seed: int = 7) -> Dict[str, str]:
+    """Builds profile/calendar/task JSON documents spread over a semester around NOW."""
+    rng = random.Random(seed)
+    span = int(timedelta(days=120).total_seconds())
+    origin = NOW - timedelta(days=30)
+
+    def stamp() -> str:
+        return (origin + timedelta(seconds=rng.randrange(span))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    profile_doc = {"profiles": [
+        {"id": f"student_{i}", "personal_info": {"name": f"Student {i}", "major": "Psychology"}}
+        for i in range(profiles)
+    ]}
+    calendar_doc = {"events": []}
+    for i in range(events):
+        start = stamp()
+        calendar_doc["events"].append({
+            "id": f"event_{i}", "summary": f"Event {i}",
+            "start": {"dateTime": start}, "end": {"dateTime": start},
+            "student_id": f"student_{rng.randrange(profiles)}",
+        })
+    task_doc = {"tasks": [
+        {"id": f"task_{i}", "title": f"Task {i}", "due": stamp(),
+         "status": rng.choice(["needsAction", "needsAction", "completed"]),
+         "student_id": f"student_{rng.randrange(profiles)}"}
+        for i in range(tasks)
+    ]}
+    return {
+        "profile_json": json.dumps(profile_doc),
+        "calendar_json": json.dumps(calendar_doc),
+        "task_json": json.dumps(task_doc),
+    }
+
+
+# --- The pre-index implementations over the raw documents, kept as the comparison baseline ---
+def legacy_profile(raw: Dict, student_id: str):
+    return next((p for p in raw["profiles"] if p.get("id") == student_id), None)
+
+
+def legacy_upcoming_events(raw: Dict, now: datetime, days: int = 7) -> List[Dict]:
+    future = now + timedelta(days=days)
+    events = []
+    for event in raw["events"]:
+        try:
+            if now <= parse_datetime(event["start"]["dateTime"]) <= future:
+                events.append(event)
+        except (KeyError, ValueError):
+            continue
+    return events
+
+
+def legacy_active_tasks(raw: Dict, now: datetime) -> List[Dict]:
+    active = []
+    for task in raw["tasks"]:
+        try:
+            due = parse_datetime(task["due"])
+            if task.get("status") == "needsAction" and due > now:
+                active.append(task)
+        except (KeyError, ValueError):
+            continue
+    return active
+
+
+def legacy_cohort_events(raw: Dict, now: datetime, days: int = 7) -> Dict[str, int]:
+    """One parsing pass grouping the window's events per student - the best a loop can do."""
+    future = now + timedelta(days=days)
+    counts: Dict[str, int] = {}
+    for event in raw["events"]:
+        if now <= parse_datetime(event["start"]["dateTime"]) <= future:
+            counts[event.get("student_id")] = counts.get(event.get("student_id"), 0) + 1
+    return counts
+
+
+def legacy_cohort_tasks(raw: Dict, now: datetime, days: int = 7) -> Dict[str, int]:
+    future = now + timedelta(days=days)
+    counts: Dict[str, int] = {}
+    for task in raw["tasks"]:
+        if task.get("status") == "needsAction" and now < parse_datetime(task["due"]) <= future:
+            counts[task.get("student_id")] = counts.get(task.get("student_id"), 0) + 1
+    return counts
+
+
+def time_call(fn: Callable, repeat: int) -> float:
+    """Mean milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = synthetic_documents(args.profiles, args.events, args.tasks)
+    dm = DataManager()
+    start = time.perf_counter()
+    dm.load_data(**docs)
+    print(f"load_data (parse + index): {(time.perf_counter() - start) * 1000:.1f} ms")
+    raw = {key: value for doc in docs.values() for key, value in json.loads(doc).items()}
+
+    last_id = f"student_{args.profiles - 1}"
+    window_end = NOW + timedelta(days=7)
+    rows = [
+        ("profile lookup (worst case)",
+         lambda: legacy_profile(raw, last_id), lambda: dm.get_student_profile(last_id)),
+        ("upcoming events (7 days)",
+         lambda: legacy_upcoming_events(raw, NOW), lambda: dm.get_events_between(NOW, window_end)),
+        ("active tasks",
+         lambda: legacy_active_tasks(raw, NOW), lambda: dm.get_tasks("needsAction", due_after=NOW)),
+    ]
+    assert len(legacy_upcoming_events(raw, NOW)) == len(dm.get_events_between(NOW, window_end))
+    assert len(legacy_active_tasks(raw, NOW)) == len(dm.get_tasks("needsAction", due_after=NOW))
+
+    print(f"\n{'query':<30}{'linear ms':>12}{'indexed ms':>12}{'speedup':>10}")
+    for name, legacy, indexed in rows:
+        legacy_ms = time_call(legacy, args.repeat)
+        indexed_ms = time_call(indexed, args.repeat * 20)
+        print(f"{name:<30}{legacy_ms:>12.3f}{indexed_ms:>12.4f}{legacy_ms / indexed_ms:>9.0f}x")
+
+    if data_manager_module.np is None:
+        print("\nnumpy not installed; skipping columnar cohort queries.")
+        return
+
+    start = time.perf_counter()
+    store = dm.columnar
+    print(f"\ncolumnar store build: {(time.perf_counter() - start) * 1000:.1f} ms")
+    assert store.events_between(NOW, window_end).counts_per_student().sum() == \
+        sum(legacy_cohort_events(raw, NOW).values())
+    assert len(store.tasks_due("needsAction", NOW, window_end)) == sum(legacy_cohort_tasks(raw, NOW).values())
+    cohort_rows = [
+        ("cohort events per student",
+         lambda: legacy_cohort_events(raw, NOW),
+         lambda: store.events_between(NOW, window_end).counts_per_student()),
+        ("cohort tasks due per student",
+         lambda: legacy_cohort_tasks(raw, NOW),
+         lambda: store.tasks_due("needsAction", NOW, window_end).counts_per_student()),
+    ]
+    print(f"{'query':<30}{'loop ms':>12}{'columnar ms':>12}{'speedup':>10}")
+    for name, legacy, vectorized in cohort_rows:
+        legacy_ms = time_call(legacy, args.repeat)
+        vectorized_ms = time_call(vectorized, args.repeat * 20)
+        print(f"{name:<30}{legacy_ms:>12.3f}{vectorized_ms:>12.4f}{legacy_ms / vectorized_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
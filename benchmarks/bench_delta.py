@@ -0,0 +1,111 @@
+"""
+Benchmarks incremental sync: applying a batch of changes (event moves, task
+completions, new and deleted records) with `DataManager.apply_delta` against
+reloading every document, and checks both end in the same query results.
+Also times one `FileChangeFeed.sync` of the same batch read from disk.
+
+Run from the repository root:
+    python -m benchmarks.bench_delta --events 200000 --tasks 200000 --changes 1 100 10000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from app.services.change_feed import FileChangeFeed
+from app.services.data_manager import DataManager
+from benchmarks.bench_data_manager import NOW, synthetic_documents
+
+STAMP = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def make_delta(docs: Dict[str, List[Dict]], changes: int, seed: int = 11) -> Dict[str, Dict[str, List]]:
+    """A mix of moved events, completed tasks, new events and deleted tasks."""
+    rng = random.Random(seed)
+    events, tasks = docs["events"], docs["tasks"]
+    delta = {"events": {"upsert": [], "delete": []}, "tasks": {"upsert": [], "delete": []}}
+    for i in range(changes):
+        kind = i % 4
+        if kind == 0:
+            event = dict(rng.choice(events))
+            start = (NOW + timedelta(minutes=rng.randrange(60 * 24 * 14))).strftime(STAMP)
+            event.update(start={"dateTime": start}, end={"dateTime": start})
+            delta["events"]["upsert"].append(event)
+        elif kind == 1:
+            delta["tasks"]["upsert"].append({**rng.choice(tasks), "status": "completed"})
+        elif kind == 2:
+            start = (NOW + timedelta(minutes=rng.randrange(60 * 24 * 14))).strftime(STAMP)
+            delta["events"]["upsert"].append({"id": f"new_event_{i}", "summary": "New", "student_id": "student_0",
+                                              "start": {"dateTime": start}, "end": {"dateTime": start}})
+        else:
+            delta["tasks"]["delete"].append(rng.choice(tasks)["id"])
+    return delta
+
+
+def apply_to_documents(docs: Dict[str, List[Dict]], delta: Dict[str, Dict[str, List]]) -> Dict[str, str]:
+    """The delta applied to the raw documents, re-serialized for a full reload."""
+    result = {}
+    for kind, records in (("events", docs["events"]), ("tasks", docs["tasks"])):
+        by_id = {record["id"]: record for record in records}
+        for record in delta[kind]["upsert"]:
+            by_id[record["id"]] = record
+        for record_id in delta[kind]["delete"]:
+            by_id.pop(record_id, None)
+        result[kind] = json.dumps({kind: list(by_id.values())})
+    return result
+
+
+def snapshot(dm: DataManager) -> tuple:
+    window = (NOW, NOW + timedelta(days=14))
+    return (sorted(e.id for e in dm.get_events_between(*window)),
+            sorted(t.id for t in dm.get_tasks("needsAction", due_after=NOW)),
+            len(dm.calendar_data["events"]), len(dm.task_data["tasks"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+
+    raw = synthetic_documents(args.profiles, args.events, args.tasks)
+    docs = {"events": json.loads(raw["calendar_json"])["events"], "tasks": json.loads(raw["task_json"])["tasks"]}
+    print(f"{args.events:,} events, {args.tasks:,} tasks\n")
+    print(f"{'changes':>8}{'reload ms':>12}{'delta ms':>11}{'us/change':>11}{'feed ms':>10}{'speedup':>10}{'same':>6}")
+    for changes in args.changes:
+        delta = make_delta(docs, changes)
+        updated = apply_to_documents(docs, delta)
+
+        dm = DataManager()
+        dm.load_data(raw["profile_json"], raw["calendar_json"], raw["task_json"])
+        start = time.perf_counter()
+        dm.apply_delta(delta)
+        delta_s = time.perf_counter() - start
+
+        reloaded = DataManager()
+        start = time.perf_counter()
+        reloaded.load_data(raw["profile_json"], updated["events"], updated["tasks"])
+        reload_s = time.perf_counter() - start
+
+        fed = DataManager()
+        fed.load_data(raw["profile_json"], raw["calendar_json"], raw["task_json"])
+        with tempfile.TemporaryDirectory() as tmp:
+            feed = FileChangeFeed(Path(tmp) / "changes.jsonl")
+            feed.append(delta)
+            start = time.perf_counter()
+            feed.sync(fed)
+            feed_s = time.perf_counter() - start
+
+        same = snapshot(dm) == snapshot(reloaded) == snapshot(fed)
+        print(f"{changes:>8,}{reload_s * 1000:>12.1f}{delta_s * 1000:>11.2f}{delta_s * 1e6 / changes:>11.1f}"
+              f"{feed_s * 1000:>10.2f}{reload_s / delta_s:>9.0f}x{str(same):>6}")
+
+
+if __name__ == "__main__":
+    main()
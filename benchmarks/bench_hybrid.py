@@ -0,0 +1,154 @@
+"""
+Latency and size of the BM25 index that `rag_search` fuses with vector
+search, on a large synthetic corpus: documents drawn from a Zipf-distributed
+vocabulary, each also carrying a rare "named" term (like a theorem or author
+name), added in batches so segments are written and merged incrementally.
+
+  build     - docs/s, segments, bytes on disk vs raw text and per posting
+  baseline  - the same BM25 over a dict of per-term (doc, tf) lists, scored
+              in a Python loop, on a subset (heap size from RSS growth)
+  query     - p50/p95 for 3-term queries (one rare name, two common words)
+  fusion    - reciprocal rank fusion of two candidate lists
+
+Run from the repository root:
+    python -m benchmarks.bench_hybrid --docs 1000000 --baseline-docs 100000
+"""
+import argparse
+import gc
+import math
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from benchmarks.common import rss_bytes, summarize_latencies
+from app.services.lexical_index import LexicalIndex, tokenize
+from app.services.retrieval import reciprocal_rank_fusion
+
+
+def synthetic_docs(docs: int, vocab: int, names: int, seed: int = 0, batch: int = 10_000) -> Iterator[List[str]]:
+    """Batches of documents of 20-60 Zipf-distributed words plus one rare name."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(vocab)])
+    cdf = np.cumsum(1.0 / np.arange(1, vocab + 1) ** 1.1)
+    cdf /= cdf[-1]
+    for lo in range(0, docs, batch):
+        n = min(batch, docs - lo)
+        lengths = rng.integers(20, 61, size=n)
+        drawn = words[np.searchsorted(cdf, rng.random(int(lengths.sum())))]
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        labels = rng.integers(0, names, size=n)
+        yield [" ".join(drawn[bounds[i]:bounds[i + 1]]) + f" lemma{labels[i]}" for i in range(n)]
+
+
+def sample_queries(texts: List[str], count: int, seed: int = 1) -> List[str]:
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.integers(0, len(texts), size=count):
+        tokens = texts[i].split()
+        common = [tokens[j] for j in rng.integers(0, len(tokens) - 1, size=2)]
+        queries.append(" ".join(common + [tokens[-1]]))
+    return queries
+
+
+class DictBM25:
+    """The straightforward version: term -> list of (doc, tf), scored in Python."""
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+
+    def add(self, texts: List[str]) -> None:
+        for text in texts:
+            tokens = tokenize(text)
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((len(self.lengths), tf))
+            self.lengths.append(len(tokens))
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        n, avg = len(self.lengths), sum(self.lengths) / len(self.lengths)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term, [])
+            idf = math.log1p((n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / avg)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+
+def time_queries(search, queries: List[str], k: int) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize_latencies(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--baseline-docs", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--names", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex.create(tmp)
+        subset: List[str] = []
+        raw_bytes, build_s = 0, 0.0
+        for texts in synthetic_docs(args.docs, args.vocab, args.names, batch=args.batch):
+            if len(subset) < args.baseline_docs:
+                subset.extend(texts[:args.baseline_docs - len(subset)])
+            raw_bytes += sum(len(t) for t in texts)
+            started = time.perf_counter()
+            index.add(texts)
+            build_s += time.perf_counter() - started
+        postings = sum(len(s.docs) for s in index.segments)
+        print(f"{index.count:,} docs ({raw_bytes / 1e6:,.0f} MB text), {len(index.vocab):,} terms, "
+              f"{postings:,} postings")
+        print(f"build: {build_s:.1f}s ({index.count / build_s:,.0f} docs/s) in batches of {args.batch:,}, "
+              f"{len(index.segments)} segments")
+        print(f"index on disk: {index.size_bytes / 1e6:,.1f} MB "
+              f"({index.size_bytes / raw_bytes:.2f}x the text, {index.size_bytes / postings:.1f} bytes/posting)\n")
+
+        with tempfile.TemporaryDirectory() as small_tmp:
+            small = LexicalIndex.create(small_tmp)
+            small.add(subset)
+            gc.collect()
+            before = rss_bytes()
+            baseline = DictBM25()
+            baseline.add(subset)
+            heap = rss_bytes() - before
+            queries = sample_queries(subset, args.queries)
+            for query in queries[:20]:     # same ranking up to float32 rounding and ties
+                expected = [score for _, score in baseline.search(query, 10)]
+                assert np.allclose([score for _, score in small.search(query, 10)], expected, rtol=1e-4), query
+
+            print(f"{'index':<34}{'docs':>10}{'size MB':>9}{'p50 ms':>9}{'p95 ms':>9}")
+            rows = [
+                ("dict postings, Python loop", len(subset), heap / 1e6, time_queries(baseline.search, queries, args.k)),
+                ("array postings, vectorized", len(subset), small.size_bytes / 1e6,
+                 time_queries(small.search, queries, args.k)),
+                ("array postings, vectorized", index.count, index.size_bytes / 1e6,
+                 time_queries(index.search, sample_queries(subset, args.queries), args.k)),
+            ]
+            for name, docs, size_mb, stats in rows:
+                print(f"{name:<34}{docs:>10,}{size_mb:>9.1f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}")
+
+        lexical = index.search(queries[0], args.k)
+        dense = [(n + 1, s) for n, s in lexical[::-1]]
+        started = time.perf_counter()
+        for _ in range(1000):
+            reciprocal_rank_fusion([dense, lexical])
+        print(f"\nRRF of two {args.k}-hit lists: {(time.perf_counter() - started):.3f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
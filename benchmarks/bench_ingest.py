@@ -0,0 +1,91 @@
+"""
+Benchmarks DataManager ingestion from files on disk: reading each document
+whole and calling `load_data` (json.loads on full strings) against the
+streaming `load_files` loader, with and without memory-mapping. Reports wall
+time, throughput and the tracemalloc peak, which for the whole-document path
+includes the raw text plus its fully materialised object graph.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest --events 500000 --tasks 500000 --profiles 20000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from app.services.data_manager import DataManager
+from benchmarks.bench_data_manager import synthetic_documents
+
+FILES = {"profile_json": "profiles.json", "calendar_json": "calendar.json", "task_json": "tasks.json"}
+
+
+def write_documents(directory: Path, profiles: int, events: int, tasks: int) -> Dict[str, Path]:
+    docs = synthetic_documents(profiles, events, tasks)
+    paths = {}
+    for name, filename in FILES.items():
+        paths[name] = directory / filename
+        paths[name].write_text(docs[name], encoding="utf-8")
+    return paths
+
+
+def measure(load: Callable[[DataManager], None]) -> Tuple[float, int, DataManager]:
+    """Returns (seconds, tracemalloc peak bytes, loaded manager); tracing runs as a separate pass."""
+    gc.collect()
+    start = time.perf_counter()
+    dm = DataManager()
+    load(dm)
+    seconds = time.perf_counter() - start
+    del dm
+    gc.collect()
+    tracemalloc.start()
+    dm = DataManager()
+    load(dm)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, dm
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=1 << 16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_documents(Path(tmp), args.profiles, args.events, args.tasks)
+        total_mb = sum(os.path.getsize(p) for p in paths.values()) / 2**20
+        print(f"input: {total_mb:.1f} MiB across {len(paths)} files")
+
+        def whole_document(dm: DataManager) -> None:
+            dm.load_data(**{name: path.read_text(encoding="utf-8") for name, path in paths.items()})
+
+        def streamed(use_mmap: bool) -> Callable[[DataManager], None]:
+            def load(dm: DataManager) -> None:
+                dm.load_files(paths["profile_json"], paths["calendar_json"], paths["task_json"],
+                              use_mmap=use_mmap, chunk_size=args.chunk_size)
+            return load
+
+        rows = [
+            ("load_data (read + json.loads)", whole_document),
+            ("load_files (streamed)", streamed(False)),
+            ("load_files (streamed, mmap)", streamed(True)),
+        ]
+        print(f"\n{'loader':<32}{'seconds':>10}{'MiB/s':>10}{'peak MiB':>10}")
+        counts = None
+        for name, load in rows:
+            seconds, peak, dm = measure(load)
+            loaded = (len(dm.profile_data["profiles"]), len(dm.calendar_data["events"]), len(dm.task_data["tasks"]))
+            assert counts in (None, loaded), (counts, loaded)
+            counts = loaded
+            print(f"{name:<32}{seconds:>10.2f}{total_mb / seconds:>10.1f}{peak / 2**20:>10.1f}")
+            del dm
+
+
+if __name__ == "__main__":
+    main()
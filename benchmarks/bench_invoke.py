@@ -0,0 +1,273 @@
+"""
+Load-test and benchmark suite for the FastAPI /invoke path.
+
+Drives `app.main:app` with the fake LLM provider either in-process (through
+httpx's ASGI transport) or under a uvicorn subprocess, and reports latency
+percentiles, throughput and memory for two scenarios:
+
+  academic  - a "plan" request that runs coordinator -> profile analyzer -> planner
+  senior    - a factual question that runs the senior agent <-> tools loop
+
+Each scenario is measured at a fixed request rate (open loop) and at
+increasing concurrency levels (closed loop). Results are written to JSON and
+can be compared against a baseline to catch regressions in graph overhead,
+serialization and state merging. No baseline is committed, since latencies
+depend on the machine: store one with `--save-baseline` first, and later runs
+on the same machine are compared against it.
+
+Run from the repository root:
+    python -m benchmarks.bench_invoke --llm-latency-ms 20 --output bench_results.json
+    python -m benchmarks.bench_invoke --save-baseline
+    python -m benchmarks.bench_invoke
+    python -m benchmarks.bench_invoke --uvicorn --workers 2
+    python -m benchmarks.bench_invoke --cassette cassettes/atlas.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.common import (
+    configure_offline_env, rss_bytes, summarize_latencies, tree_rss_bytes, write_offline_config,
+)
+
+configure_offline_env()
+
+import httpx  # noqa: E402
+
+SCENARIOS = {
+    "academic": "Help me plan my study schedule for next week for my Cognitive Psychology midterm.",
+    "senior": "What is an LLM and how does it relate to cognitive psychology?",
+}
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "invoke.json"
+# Metrics where a larger value is a regression; throughput is the inverse.
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+class Target:
+    """
+    Owns the HTTP client and knows how to sample server memory. Under uvicorn
+    that is the supervisor plus every worker process it forked.
+    """
+    def __init__(self, client: httpx.AsyncClient, server_pid: Optional[int] = None):
+        self.client = client
+        self.server_pid = server_pid
+
+    def memory_bytes(self) -> Optional[int]:
+        if self.server_pid is None:
+            return rss_bytes()
+        return tree_rss_bytes(self.server_pid)
+
+
+async def send(target: Target, query: str, shared_thread: bool) -> Optional[float]:
+    payload = {"query": query, "thread_id": None if shared_thread else uuid.uuid4().hex}
+    start = time.perf_counter()
+    response = await target.client.post("/invoke", json=payload)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed if response.status_code == 200 else None
+
+
+def _report(latencies: List[Optional[float]], elapsed: float, memory_before: Optional[int], target: Target) -> Dict:
+    ok = [value for value in latencies if value is not None]
+    memory = target.memory_bytes()
+    return {
+        **summarize_latencies(ok),
+        "errors": len(latencies) - len(ok),
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        # None when the server's process tree can't be measured on this platform.
+        "rss_bytes": memory,
+        "rss_growth_bytes": None if memory is None or memory_before is None else memory - memory_before,
+    }
+
+
+async def run_fixed_rps(target: Target, query: str, rps: float, duration: float, shared_thread: bool) -> Dict:
+    """Open-loop load: requests are launched on schedule whether or not earlier ones finished."""
+    memory_before = target.memory_bytes()
+    interval = 1 / rps
+    total = int(rps * duration)
+    start = time.perf_counter()
+    pending = []
+    for i in range(total):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        pending.append(asyncio.create_task(send(target, query, shared_thread)))
+    latencies = await asyncio.gather(*pending)
+    return {"target_rps": rps, **_report(latencies, time.perf_counter() - start, memory_before, target)}
+
+
+async def run_concurrency(target: Target, query: str, workers: int, per_worker: int, shared_thread: bool) -> Dict:
+    """Closed-loop load: each worker issues its next request as soon as the previous one returns."""
+    memory_before = target.memory_bytes()
+    latencies: List[Optional[float]] = []
+
+    async def worker():
+        for _ in range(per_worker):
+            latencies.append(await send(target, query, shared_thread))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return {"concurrency": workers, **_report(latencies, time.perf_counter() - start, memory_before, target)}
+
+
+async def run_suite(target: Target, args: argparse.Namespace) -> Dict:
+    results = {}
+    for name in args.scenarios:
+        query = SCENARIOS[name]
+        # Warm up imports, lazy model construction and the checkpointer.
+        await asyncio.gather(*(send(target, query, args.shared_thread) for _ in range(args.warmup)))
+        scenario = {
+            "fixed_rps": await run_fixed_rps(target, query, args.rps, args.duration, args.shared_thread),
+            "concurrency": {},
+        }
+        for workers in args.concurrency:
+            scenario["concurrency"][str(workers)] = await run_concurrency(
+                target, query, workers, args.requests_per_worker, args.shared_thread
+            )
+        results[name] = scenario
+    return results
+
+
+async def in_process(args: argparse.Namespace) -> Dict:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        return await run_suite(Target(client), args)
+
+
+async def under_uvicorn(args: argparse.Namespace) -> Dict:
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    server = subprocess.Popen(command, env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not become healthy")
+            return await run_suite(Target(client, server.pid), args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Returns a human-readable line for every metric that regressed beyond the tolerance."""
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        runs = [("fixed_rps", current["fixed_rps"], base.get("fixed_rps"))]
+        runs += [(f"concurrency={level}", run, base.get("concurrency", {}).get(level))
+                 for level, run in current["concurrency"].items()]
+        for label, run, base_run in runs:
+            if not base_run:
+                continue
+            for metric in LATENCY_METRICS:
+                if base_run[metric] and run[metric] > base_run[metric] * (1 + tolerance):
+                    regressions.append(f"{scenario} {label} {metric}: {base_run[metric]:.2f} -> {run[metric]:.2f}")
+            if run["throughput_rps"] < base_run["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} {label} throughput_rps: "
+                                   f"{base_run['throughput_rps']:.1f} -> {run['throughput_rps']:.1f}")
+    return regressions
+
+
+def _mib(value: Optional[int]) -> str:
+    return "    n/a" if value is None else f"{value / 2**20:7.1f}MiB"
+
+
+def print_table(results: Dict) -> None:
+    for scenario, data in results["scenarios"].items():
+        print(f"\n== {scenario} ==")
+        rows = [("rps=%g" % data["fixed_rps"]["target_rps"], data["fixed_rps"])]
+        rows += [(f"c={level}", run) for level, run in data["concurrency"].items()]
+        for label, run in rows:
+            print(f"{label:>8}  {run['throughput_rps']:8.1f} req/s  p50={run['p50_ms']:7.1f}ms  "
+                  f"p95={run['p95_ms']:7.1f}ms  p99={run['p99_ms']:7.1f}ms  "
+                  f"rss={_mib(run['rss_bytes'])}  errors={run['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0, help="Fake provider latency per call.")
+    parser.add_argument("--rps", type=float, default=50.0, help="Request rate for the fixed-RPS run.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds for the fixed-RPS run.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests-per-worker", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--shared-thread", action="store_true",
+                        help="Reuse one checkpointer thread, so history grows like the default /invoke thread.")
+    parser.add_argument("--uvicorn", action="store_true", help="Benchmark a uvicorn subprocess instead of in-process.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="Baseline to compare against (written by --save-baseline).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression.")
+    parser.add_argument("--cassette", help="Replay recorded LLM responses (with recorded timing) "
+                                           "instead of the fake provider.")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.cassette:
+        overrides = {"cassette.mode": "replay", "cassette.path": args.cassette, "cassette.replay_timing": True}
+    config_path = write_offline_config(
+        args.llm_latency_ms, os.path.join(tempfile.mkdtemp(), "config.yml"), overrides
+    )
+    os.environ["ATLAS_CONFIG_PATH"] = config_path
+
+    runner = under_uvicorn if args.uvicorn else in_process
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": "uvicorn" if args.uvicorn else "in_process",
+            "python": platform.python_version(),
+            "llm_latency_ms": args.llm_latency_ms,
+            "cassette": args.cassette,
+            "shared_thread": args.shared_thread,
+        },
+        "scenarios": asyncio.run(runner(args)),
+    }
+    print_table(results)
+
+    with open(args.output, "w") as fp:
+        json.dump(results, fp, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%}).")
+    else:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to store one for later comparisons.")
+
+
+if __name__ == "__main__":
+    main()
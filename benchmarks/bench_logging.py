@@ -0,0 +1,112 @@
+"""
+Compares request throughput with blocking stream logging against the
+queue-based logging subsystem in `app.utils.logger`.
+
+Each simulated request runs the master router and the coordinator node
+against the fake LLM provider, so the only difference between the two
+runs is how log records reach the output stream.
+
+Run from the repository root:
+    python -m benchmarks.bench_logging --requests 200 --sink-latency-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import configure_offline_env, summarize_latencies
+
+configure_offline_env()
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from app.agents.coordinator import coordinator_agent  # noqa: E402
+from app.graph.graph import master_router  # noqa: E402
+from app.graph.state import AcademicState  # noqa: E402
+from app.services.llm_service import LLMService  # noqa: E402
+from app.utils import logger as atlas_logging  # noqa: E402
+
+
+class SlowStream:
+    """A file wrapper whose writes stall, like stdout piped to a busy log collector."""
+    def __init__(self, fp, latency_ms: float):
+        self.fp = fp
+        self.latency = latency_ms / 1000
+
+    def write(self, data: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.fp.write(data)
+
+    def flush(self) -> None:
+        self.fp.flush()
+
+
+def configure_blocking(stream, level: str) -> None:
+    """The pre-queue behaviour: every record is written on the caller's thread."""
+    atlas_logging.shutdown_logging()
+    root = logging.getLogger("app")
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(atlas_logging.ContextFilter())
+    handler.setFormatter(atlas_logging.JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+
+async def one_request(llm_service: LLMService) -> float:
+    query = "Help me plan my study schedule for next week."
+    state = AcademicState(
+        messages=[HumanMessage(content=query)], atlas_message=[HumanMessage(content=query)],
+        profile={}, calendar={}, tasks={}, results={},
+    )
+    start = time.perf_counter()
+    with atlas_logging.request_context(request_id=uuid.uuid4().hex, thread_id="bench"):
+        master_router(state)
+        await coordinator_agent(state, llm_service)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_batch(llm_service: LLMService, requests: int) -> dict:
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request(llm_service) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {"throughput_rps": requests / elapsed, **summarize_latencies(list(latencies))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Concurrent requests per run.")
+    parser.add_argument("--level", default="DEBUG", help="Log level for both runs.")
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2,
+                        help="Artificial per-write stall of the output stream.")
+    args = parser.parse_args()
+
+    llm_service = LLMService()
+    llm_service.config["llm"]["default_provider"] = "fake"
+    llm_service.config["llm"]["providers"]["fake"]["latency_ms"] = 0
+
+    with tempfile.TemporaryFile("w+") as fp:
+        stream = SlowStream(fp, args.sink_latency_ms)
+
+        configure_blocking(stream, args.level)
+        blocking = asyncio.run(run_batch(llm_service, args.requests))
+
+        atlas_logging.setup_logging(
+            {"level": args.level, "format": "json", "debug_sample_rate": 1.0}, stream=stream, force=True
+        )
+        queued = asyncio.run(run_batch(llm_service, args.requests))
+        atlas_logging.shutdown_logging()
+
+    for name, result in (("blocking", blocking), ("queue", queued)):
+        print(f"{name:>9}: {result['throughput_rps']:8.1f} req/s  "
+              f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+    print(f"  speedup: {queued['throughput_rps'] / blocking['throughput_rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmarks the local task prioritizer against the LLM task analysis it
+replaces in `PlannerAgent.task_analyzer`.
+
+  scorer   - feature extraction (cold and memoized text heuristics) and the
+             vectorized score + argsort, per task-list size
+  planner  - task_analyzer end to end in `engine` mode vs `llm` mode against
+             the fake provider, with the prompt size each one produces
+
+Run from the repository root:
+    python -m benchmarks.bench_prioritizer --sizes 100 1000 5000 50000 --llm-latency-ms 50
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.common import configure_offline_env
+
+configure_offline_env()
+
+from app.agents.planner import PlannerAgent  # noqa: E402
+from app.core.records import Task, TaskList  # noqa: E402
+from app.services import prioritizer  # noqa: E402
+from app.services.llm_service import LLMService  # noqa: E402
+
+NOW = datetime(2025, 8, 19, 9, 0, tzinfo=timezone.utc)
+PROFILE = {"academic_info": {"current_courses": [
+    {"name": "Cognitive Psychology", "grade": "B+"},
+    {"name": "Statistics for Behavioral Sciences", "grade": "A-"},
+    {"name": "Developmental Neuroscience", "grade": "C+"},
+]}}
+TEMPLATES = [
+    ("Chapter {n} Summary", "Summarize key concepts from the Cognitive Psychology textbook."),
+    ("Statistics Problem Set {n}", "Complete problems 1-{m} on probability distributions."),
+    ("Neuroscience Lab Report {n}", "Write up the developmental neuroscience lab."),
+    ("Reading {n}", "Read chapters {n}-{m}."),
+    ("Midterm Review {n}", None),
+    ("Quiz {n}", None),
+]
+
+
+def synthetic_tasks(count: int, seed: int = 5) -> List[Task]:
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        title, notes = rng.choice(TEMPLATES)
+        n, m = rng.randrange(1, 12), rng.randrange(12, 30)
+        due = NOW + timedelta(hours=rng.randrange(-48, 24 * 30))
+        tasks.append(Task(title.format(n=n), due.timestamp(), rng.choice(["needsAction", "needsAction", "completed"]),
+                          notes.format(n=n, m=m) if notes else None, id=f"task_{i}"))
+    return tasks
+
+
+def best_ms(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def clear_caches() -> None:
+    prioritizer.estimate_effort_hours.cache_clear()
+    prioritizer.match_course.cache_clear()
+    prioritizer._text_features.cache_clear()
+
+
+def cold_extract(tasks: TaskList) -> None:
+    clear_caches()
+    prioritizer.extract_features(tasks, PROFILE)
+
+
+async def analyze(planner: PlannerAgent, state: dict, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await planner.task_analyzer(state)
+    state["_analysis"] = result["results"]["task_analysis"]["analysis"]
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 50_000])
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--planner-tasks", type=int, default=200, help="Task-list size for the planner comparison.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8}{'extract cold ms':>17}{'extract warm ms':>17}{'score+rank ms':>15}")
+    for size in args.sizes:
+        tasks = TaskList.from_records(synthetic_tasks(size))
+        cold = best_ms(lambda: cold_extract(tasks))
+        warm = best_ms(lambda: prioritizer.extract_features(tasks, PROFILE))
+        features = prioritizer.extract_features(tasks, PROFILE)
+        rank = best_ms(lambda: np.argsort(-prioritizer.score_tasks(features, NOW.timestamp()), kind="stable"))
+        print(f"{size:>8,}{cold:>17.3f}{warm:>17.3f}{rank:>15.3f}")
+
+    llm_service = LLMService()
+    llm_service.config["llm"]["default_provider"] = "fake"
+    llm_service.config["llm"]["providers"]["fake"]["latency_ms"] = args.llm_latency_ms
+    state = {"tasks": {"tasks": TaskList.from_records(synthetic_tasks(args.planner_tasks))}, "profile": PROFILE}
+
+    print(f"\ntask_analyzer over {args.planner_tasks} tasks (fake LLM latency {args.llm_latency_ms:.0f} ms)")
+    print(f"{'mode':>8}{'ms/call':>12}{'analysis chars':>16}")
+    for mode in ("engine", "llm", "both"):
+        llm_service.config.setdefault("planner", {})["task_analysis"] = mode
+        planner = PlannerAgent(llm_service)
+        elapsed = asyncio.run(analyze(planner, state, args.repeat))
+        print(f"{mode:>8}{elapsed:>12.2f}{len(state['_analysis']):>16,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmarks the typed Event/Task records against the raw dicts DataManager
+used to hand out (tasks carried a mutated-in `due_datetime`):
+
+  memory      - tracemalloc bytes per object
+  parse       - building the objects from decoded JSON
+  prompt      - serializing a task list for the planner prompt
+                (json.dumps with a datetime hook vs compact prompt lines)
+  checkpoint  - LangGraph JsonPlusSerializer dumps/loads round trip of the
+                state lists (raw dicts vs column-wise EventList/TaskList)
+
+Run from the repository root:
+    python -m benchmarks.bench_records --records 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.records import RECORD_TYPES, Event, EventList, Task, TaskList, parse_datetime, to_prompt_lines
+from benchmarks.bench_data_manager import synthetic_documents
+
+
+def json_serializer(obj):
+    """The planner's former hook for the mutated `due_datetime` field."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def legacy_task(raw: Dict[str, Any]) -> Dict[str, Any]:
+    raw["due_datetime"] = parse_datetime(raw["due"])
+    return raw
+
+
+def bytes_per_object(build: Callable[[], List[Any]]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / len(objects)
+
+
+def seconds(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    docs = synthetic_documents(1000, args.records, args.records)
+    raw_events = json.loads(docs["calendar_json"])["events"]
+    raw_tasks = json.loads(docs["task_json"])["tasks"]
+    legacy_tasks = [legacy_task(dict(t)) for t in raw_tasks]
+    tasks = [Task.from_dict(t) for t in raw_tasks]
+    events = [Event.from_dict(e) for e in raw_events]
+    serde = JsonPlusSerializer(allowed_msgpack_modules=RECORD_TYPES)
+    state_lists = {"tasks": TaskList.from_records(tasks), "events": EventList.from_records(events)}
+
+    print(f"{args.records:,} events / tasks\n")
+    print(f"{'memory (bytes/object)':<34}{'dict':>12}{'record':>12}{'ratio':>8}")
+    rows = [
+        ("event", lambda: json.loads(docs["calendar_json"])["events"],
+         lambda: [Event.from_dict(e) for e in json.loads(docs["calendar_json"])["events"]]),
+        ("task (with due_datetime)", lambda: [legacy_task(t) for t in json.loads(docs["task_json"])["tasks"]],
+         lambda: [Task.from_dict(t) for t in json.loads(docs["task_json"])["tasks"]]),
+    ]
+    for name, legacy, typed in rows:
+        legacy_b, typed_b = bytes_per_object(legacy), bytes_per_object(typed)
+        print(f"{name:<34}{legacy_b:>12.0f}{typed_b:>12.0f}{legacy_b / typed_b:>7.1f}x")
+
+    legacy_prompt = json.dumps(legacy_tasks, default=json_serializer)
+    compact_prompt = to_prompt_lines(tasks)
+    legacy_blob = serde.dumps_typed({"tasks": legacy_tasks, "events": raw_events})
+    typed_blob = serde.dumps_typed(state_lists)
+    timings = [
+        ("parse tasks", lambda: [legacy_task(dict(t)) for t in raw_tasks],
+         lambda: [Task.from_dict(t) for t in raw_tasks]),
+        ("prompt serialization (tasks)", lambda: json.dumps(legacy_tasks, default=json_serializer),
+         lambda: to_prompt_lines(tasks)),
+        ("checkpoint dumps", lambda: serde.dumps_typed({"tasks": legacy_tasks, "events": raw_events}),
+         lambda: serde.dumps_typed(state_lists)),
+        ("checkpoint loads", lambda: serde.loads_typed(legacy_blob), lambda: serde.loads_typed(typed_blob)),
+    ]
+    print(f"\n{'operation (seconds)':<34}{'dict':>12}{'record':>12}{'speedup':>8}")
+    for name, legacy, typed in timings:
+        legacy_s, typed_s = seconds(legacy), seconds(typed)
+        print(f"{name:<34}{legacy_s:>12.3f}{typed_s:>12.3f}{legacy_s / typed_s:>7.1f}x")
+
+    print(f"\n{'size':<34}{'dict':>12}{'record':>12}")
+    print(f"{'prompt characters (tasks)':<34}{len(legacy_prompt):>12,}{len(compact_prompt):>12,}")
+    print(f"{'checkpoint bytes':<34}{len(legacy_blob[1]):>12,}{len(typed_blob[1]):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Memory benchmark for recurring events over a semester: a cohort whose
+calendars are mostly weekly lectures, stored either as series (one event
+with an RRULE, expanded lazily per query) or eagerly expanded into one event
+per occurrence.
+
+  load      - tracemalloc bytes held by DataManager after loading, and load time
+  query     - one student's week (get_events_between), mean time per query
+  stream    - peak memory of a free-time analysis (one student over the
+              semester, the whole cohort over a month): streamed occurrences
+              vs a materialized event list
+  state     - checkpoint bytes / prompt characters of a one-week window vs
+              putting the whole expanded semester into AcademicState
+
+Run from the repository root:
+    python -m benchmarks.bench_recurrence --students 2000 --weeks 16
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.records import RECORD_TYPES, EventList, to_prompt_lines
+from app.services.data_manager import DataManager
+from app.services.recurrence import RecurrenceRule
+from app.services.scheduling import analyze_calendar
+
+SEMESTER_START = datetime(2025, 9, 1, tzinfo=timezone.utc)    # a Monday
+PATTERNS = ("MO,WE", "TU,TH", "MO,WE,FR", "FR", "TU")
+STAMP = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def semester_documents(students: int, weeks: int, courses: int = 5, one_offs: int = 10,
+                       seed: int = 3) -> Tuple[str, str, str]:
+    """(profiles, series calendar, eagerly expanded calendar) JSON documents."""
+    rng = random.Random(seed)
+    until = (SEMESTER_START + timedelta(weeks=weeks) - timedelta(seconds=1)).strftime("%Y%m%dT%H%M%SZ")
+    series, eager = [], []
+    for s in range(students):
+        student_id = f"student_{s}"
+        for c in range(courses):
+            start = SEMESTER_START + timedelta(hours=rng.randrange(8, 18))
+            lecture = {
+                "id": f"{student_id}_course_{c}", "summary": f"Course {c} Lecture", "student_id": student_id,
+                "start": {"dateTime": start.strftime(STAMP)},
+                "end": {"dateTime": (start + timedelta(minutes=75)).strftime(STAMP)},
+                "recurrence": [f"RRULE:FREQ=WEEKLY;BYDAY={rng.choice(PATTERNS)};UNTIL={until}"],
+            }
+            series.append(lecture)
+            rule = RecurrenceRule.parse(lecture["recurrence"][0])
+            for ts in rule.starts(start.timestamp(), start.timestamp(), float("inf")):
+                occurrence = datetime.fromtimestamp(ts, timezone.utc)
+                eager.append({
+                    "id": f"{lecture['id']}_{occurrence:%Y%m%dT%H%M%SZ}", "summary": lecture["summary"],
+                    "student_id": student_id, "start": {"dateTime": occurrence.strftime(STAMP)},
+                    "end": {"dateTime": (occurrence + timedelta(minutes=75)).strftime(STAMP)},
+                })
+        for e in range(one_offs):
+            start = SEMESTER_START + timedelta(days=rng.randrange(weeks * 7), hours=rng.randrange(8, 20))
+            event = {"id": f"{student_id}_event_{e}", "summary": f"Event {e}", "student_id": student_id,
+                     "start": {"dateTime": start.strftime(STAMP)},
+                     "end": {"dateTime": (start + timedelta(hours=1)).strftime(STAMP)}}
+            series.append(event)
+            eager.append(event)
+    profiles = json.dumps({"profiles": [{"id": f"student_{s}"} for s in range(students)]})
+    return profiles, json.dumps({"events": series}), json.dumps({"events": eager})
+
+
+def held_bytes(build: Callable[[], object]) -> Tuple[object, int]:
+    """The built object and the bytes it keeps allocated."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def peak_bytes(fn: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def load(profiles: str, calendar: str) -> DataManager:
+    data_manager = DataManager()
+    data_manager.load_data(profiles, calendar, json.dumps({"tasks": []}))
+    return data_manager
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    profiles, series_doc, eager_doc = semester_documents(args.students, args.weeks)
+    managers: Dict[str, DataManager] = {}
+    print(f"{args.students:,} students, {args.weeks}-week semester\n")
+    print(f"{'':<10}{'records':>12}{'held MB':>10}{'load s':>9}{'week query ms':>15}")
+    week = (SEMESTER_START + timedelta(weeks=6), SEMESTER_START + timedelta(weeks=7))
+    for name, doc in (("series", series_doc), ("eager", eager_doc)):
+        started = time.perf_counter()
+        load(profiles, doc)     # timed separately: tracemalloc slows allocation down
+        seconds = time.perf_counter() - started
+        data_manager, held = held_bytes(lambda: load(profiles, doc))
+        managers[name] = data_manager
+        started = time.perf_counter()
+        for q in range(args.queries):
+            data_manager.get_events_between(*week, student_id=f"student_{q % args.students}")
+        query_ms = (time.perf_counter() - started) * 1000 / args.queries
+        print(f"{name:<10}{len(data_manager.calendar_data['events']):>12,}{held / 1e6:>10.1f}{seconds:>9.2f}"
+              f"{query_ms:>15.3f}")
+
+    series_dm = managers["series"]
+    semester_days = args.weeks * 7
+    student = "student_0"
+    print(f"\n{'free-time analysis (peak KB)':<34}{'streamed':>10}{'materialized':>14}")
+    for name, student_id, days in (("one student, semester", student, semester_days),
+                                   ("whole cohort, 4 weeks", None, 28)):
+        end = SEMESTER_START + timedelta(days=days)
+        streamed = peak_bytes(lambda: series_dm.analyze_availability(
+            days=days, student_id=student_id, start=SEMESTER_START))
+        materialized = peak_bytes(lambda: analyze_calendar(
+            series_dm.get_events_between(SEMESTER_START, end, student_id), start=SEMESTER_START, days=days))
+        print(f"{name:<34}{streamed / 1e3:>10,.0f}{materialized / 1e3:>14,.0f}")
+
+    serde = JsonPlusSerializer(allowed_msgpack_modules=RECORD_TYPES)
+    week_events = series_dm.get_events_between(SEMESTER_START, SEMESTER_START + timedelta(days=7), student)
+    full_events = series_dm.get_events_between(SEMESTER_START, SEMESTER_START + timedelta(days=semester_days),
+                                               student)
+    print(f"\n{'state calendar':<22}{'events':>8}{'checkpoint B':>14}{'prompt chars':>14}")
+    for name, events in (("one week (lazy)", week_events), ("semester (eager)", full_events)):
+        blob = serde.dumps_typed({"events": EventList.from_records(events)})[1]
+        print(f"{name:<22}{len(events):>8,}{len(blob):>14,}{len(to_prompt_lines(events)):>14,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Recall and latency of the vector index behind `rag_search` on a large
+synthetic corpus: clustered unit vectors (topics with noise), appended to an
+on-disk index in batches, then queried with held-out points near the data.
+
+  flat      - exact brute-force top-k over the memory-mapped matrix
+  ivf       - k-means lists (about sqrt(n) of them), scanning `n_probe` lists;
+              recall@k is measured against the flat results
+
+Run from the repository root:
+    python -m benchmarks.bench_retrieval --chunks 1000000 --dim 128 --probes 1 4 8 16 32
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies
+from app.services.vector_index import VectorIndex, normalize
+
+
+def synthetic_corpus(chunks: int, dim: int, topics: int, spread: float = 1.2, seed: int = 0):
+    """
+    Yields (vectors, chunk documents) batches of unit vectors clustered around
+    `topics` centers; `spread` is the noise norm relative to the unit center,
+    so topics overlap and span several IVF lists each.
+    """
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(topics, dim)))
+    for lo in range(0, chunks, 100_000):
+        n = min(100_000, chunks - lo)
+        labels = rng.integers(0, topics, size=n)
+        noise = spread / np.sqrt(dim) * rng.normal(size=(n, dim)).astype(np.float32)
+        vectors = normalize(centers[labels] + noise)
+        yield vectors, [{"text": f"chunk {lo + i}", "source": f"topic_{t}.md"} for i, t in enumerate(labels)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=1.2)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex.create(tmp, dim=args.dim)
+        start = time.perf_counter()
+        sample = []
+        for vectors, chunks in synthetic_corpus(args.chunks, args.dim, args.topics, args.spread):
+            index.add(vectors, chunks)
+            sample.append(vectors[rng.integers(0, len(vectors), size=max(1, args.queries // 10))])
+        add_s = time.perf_counter() - start
+        # Queries are perturbed copies of indexed chunks, like a paraphrased question.
+        base = np.concatenate(sample)[:args.queries]
+        queries = normalize(base + 0.3 / np.sqrt(args.dim) * rng.normal(size=base.shape).astype(np.float32))
+        size_mb = index.count * args.dim * 4 / 1e6
+        print(f"{index.count:,} chunks x {args.dim} dims ({size_mb:,.0f} MB matrix), appended in {add_s:.1f}s\n")
+
+        exact, latencies = [], []
+        for q in queries:
+            started = time.perf_counter()
+            exact.append({n for n, _ in index.search(q, args.k, mode="flat")})
+            latencies.append((time.perf_counter() - started) * 1000)
+        flat = summarize_latencies(latencies)
+
+        start = time.perf_counter()
+        index.build_ivf(args.lists)
+        build_s = time.perf_counter() - start
+
+        print(f"{'mode':<14}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        print(f"{'flat':<14}{1.0:>10.3f}{flat['p50_ms']:>10.2f}{flat['p95_ms']:>10.2f}{flat['mean_ms']:>10.2f}")
+        for n_probe in args.probes:
+            found, latencies = 0, []
+            for q, truth in zip(queries, exact):
+                started = time.perf_counter()
+                hits = index.search(q, args.k, mode="ivf", n_probe=n_probe)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found += len(truth & {n for n, _ in hits})
+            stats = summarize_latencies(latencies)
+            name = f"ivf probe {n_probe}"
+            print(f"{name:<14}{found / (len(queries) * args.k):>10.3f}{stats['p50_ms']:>10.2f}"
+                  f"{stats['p95_ms']:>10.2f}{stats['mean_ms']:>10.2f}")
+        print(f"\nIVF build: {index.n_lists:,} lists in {build_s:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmarks the study-schedule solver on large synthetic weeks: slot
+construction, greedy assignment, and how much the local search improves the
+objective within its time budget. Also reports the size of the skeleton the
+LLM narrates.
+
+Run from the repository root:
+    python -m benchmarks.bench_schedule_solver --weeks 1 4 12 --tasks 50 200 1000 --budget-ms 50 200
+"""
+import argparse
+import time
+
+from benchmarks.bench_prioritizer import NOW, PROFILE, synthetic_tasks
+from benchmarks.bench_scheduling import synthetic_events
+from app.core.records import Event, TaskList
+from app.services import schedule_solver
+from app.services.prioritizer import prioritize_tasks
+from app.services.scheduling import analyze_calendar
+
+SOLVER_PROFILE = {**PROFILE, "learning_preferences": {"study_patterns": {"peak_energy": "late_morning"}}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--events-per-day", type=int, default=4)
+    parser.add_argument("--budget-ms", type=float, nargs="+", default=[50, 200])
+    args = parser.parse_args()
+
+    print(f"{'weeks':>6}{'tasks':>7}{'slots':>7}{'budget':>8}{'slots ms':>10}{'greedy ms':>11}{'search ms':>11}"
+          f"{'iters':>9}{'greedy obj':>12}{'final obj':>11}{'sessions':>10}{'unplaced':>10}{'chars':>8}")
+    for weeks in args.weeks:
+        days = weeks * 7
+        # Shift the synthetic calendar onto the scheduling window.
+        events = [Event(e.summary, e.start_ts + 86400, e.end_ts + 86400)
+                  for e in synthetic_events(args.events_per_day * days, days)]
+        availability = analyze_calendar(events, SOLVER_PROFILE, start=NOW, days=days)
+        for count in args.tasks:
+            ranking = prioritize_tasks(TaskList.from_records(synthetic_tasks(count)), SOLVER_PROFILE, now=NOW)
+            for budget in args.budget_ms:
+                settings = {**schedule_solver._DEFAULTS, "time_budget_ms": budget, "max_tasks": count,
+                            "max_iterations": 10_000_000, "stale_iterations": 10_000}
+                session_s = settings["session_minutes"] * 60
+
+                start = time.perf_counter()
+                slots = schedule_solver.build_slots(availability.free_blocks, availability.peak_blocks, session_s,
+                                                    settings["break_minutes"] * 60, availability.tz)
+                items = schedule_solver.items_from_ranking(ranking, session_s, count)
+                slots_ms = (time.perf_counter() - start) * 1000
+
+                solver = schedule_solver._Solver(items, slots, availability.window[0], settings)
+                start = time.perf_counter()
+                solver.greedy()
+                greedy_ms = (time.perf_counter() - start) * 1000
+                greedy_objective = solver.objective()
+
+                start = time.perf_counter()
+                iterations = solver.local_search(budget / 1000, settings["max_iterations"],
+                                                 settings["stale_iterations"] * len(slots), settings["seed"])
+                search_ms = (time.perf_counter() - start) * 1000
+
+                schedule = schedule_solver.Schedule(items, slots, solver.assignment, solver.objective(),
+                                                    greedy_objective, iterations, availability.tz, settings)
+                missing = sum(schedule.unscheduled().values())
+                print(f"{weeks:>6}{count:>7,}{len(slots):>7,}{budget:>8.0f}{slots_ms:>10.2f}{greedy_ms:>11.2f}"
+                      f"{search_ms:>11.1f}{iterations:>9,}{greedy_objective:>12.2f}{schedule.objective:>11.2f}"
+                      f"{len(schedule.sessions()):>10,}{missing:>10,}{len(schedule.to_prompt()):>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmarks the local scheduling engine (sweep-line busy merge, free blocks,
+peak-energy blocks, conflict detection) on large synthetic calendars, against
+a naive all-pairs conflict check, and compares the size of its prompt output
+with the raw event lines the LLM calendar analysis used to read.
+
+Run from the repository root:
+    python -m benchmarks.bench_scheduling --sizes 1000 5000 100000 --days 120
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from app.core.records import Event, to_prompt_lines
+from app.services.scheduling import analyze_calendar
+
+START = datetime(2025, 8, 18, tzinfo=timezone.utc)
+PROFILE = {"learning_preferences": {"study_patterns": {"peak_energy": "late_morning"}}}
+
+
+def synthetic_events(count: int, days: int, seed: int = 11) -> List[Event]:
+    """Events of 30 minutes to 3 hours, starting on the quarter hour between 07:00 and 22:00."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        start = START + timedelta(days=rng.randrange(days), hours=rng.randrange(7, 22), minutes=15 * rng.randrange(4))
+        duration = timedelta(minutes=30 * rng.randrange(1, 7))
+        events.append(Event(f"Event {i}", start.timestamp(), (start + duration).timestamp()))
+    return events
+
+
+def naive_conflicts(events: List[Event]) -> List[Tuple[Event, Event]]:
+    return [
+        (a, b) for i, a in enumerate(events) for b in events[i + 1:]
+        if a.start_ts < b.end_ts and b.start_ts < a.end_ts
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--naive-limit", type=int, default=5000, help="Largest calendar for the all-pairs baseline.")
+    args = parser.parse_args()
+
+    print(f"{'events':>9}{'engine ms':>12}{'naive ms':>12}{'conflicts':>12}{'free blocks':>13}"
+          f"{'raw chars':>12}{'prompt chars':>14}")
+    for size in args.sizes:
+        events = synthetic_events(size, args.days)
+        start = time.perf_counter()
+        availability = analyze_calendar(events, PROFILE, start=START, days=args.days)
+        engine_ms = (time.perf_counter() - start) * 1000
+
+        naive = "-"
+        if size <= args.naive_limit:
+            start = time.perf_counter()
+            pairs = naive_conflicts(events)
+            naive = f"{(time.perf_counter() - start) * 1000:.0f}"
+            assert len(pairs) == availability.conflict_count
+
+        print(f"{size:>9,}{engine_ms:>12.1f}{naive:>12}{availability.conflict_count:>12,}"
+              f"{len(availability.free_blocks):>13,}{len(to_prompt_lines(events)):>12,}"
+              f"{len(availability.to_prompt()):>14,}")
+
+
+if __name__ == "__main__":
+    main()
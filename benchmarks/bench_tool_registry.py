@@ -0,0 +1,143 @@
+"""
+Per-turn overhead of the SeniorAgent's tool handling with `--tools` tools
+registered (`rag_search` plus synthetic tools with pydantic argument
+schemas and multi-line descriptions, like typical `@tool` functions).
+
+  per-turn  - CPU time to prepare one turn (prompt plus tool schemas) and to
+              run it through the fake chat model:
+                old: convert every tool with `convert_to_openai_tool`, paste
+                     the schema list into the prompt and pass `tools=`
+                new: the `ToolRegistry`'s compact prompt listing and an LLM
+                     bound once with `bind_tools`
+  prompt    - size of the rendered SENIOR_AGENT_PROMPT (approximate tokens)
+  startup   - building the registry from imported tools, and from lazy
+              plugin declarations (which import nothing until called)
+
+Run from the repository root:
+    python -m benchmarks.bench_tool_registry --tools 50 --turns 500
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import configure_offline_env, summarize_latencies
+
+configure_offline_env()
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.tools import BaseTool, StructuredTool  # noqa: E402
+from langchain_core.utils.function_calling import convert_to_openai_tool  # noqa: E402
+from pydantic import Field, create_model  # noqa: E402
+
+from app.prompts.prompts import SENIOR_AGENT_PROMPT  # noqa: E402
+from app.services.fake_llm import FakeChatModel  # noqa: E402
+from app.tools.executor import tools as builtin_tools  # noqa: E402
+from app.tools.registry import ToolRegistry  # noqa: E402
+from app.utils.tokens import count_tokens  # noqa: E402
+
+_FIELDS = [("course", str, "Course code, e.g. PSY101."), ("topic", str, "Topic or chapter to look up."),
+           ("limit", int, "Maximum number of results to return."), ("week", int, "Week of the semester."),
+           ("include_solutions", bool, "Whether worked solutions are included.")]
+
+
+def make_tools(count: int) -> List[BaseTool]:
+    """`rag_search` plus `count - 1` synthetic tools with 2-5 documented arguments."""
+    synthetic = []
+    for i in range(count - len(builtin_tools)):
+        fields = {name: (kind, Field(description=doc)) for name, kind, doc in _FIELDS[:2 + i % 4]}
+        schema = create_model(f"Tool{i}Input", **fields)
+
+        async def run(**kwargs) -> str:
+            return "ok"
+
+        synthetic.append(StructuredTool(
+            name=f"course_tool_{i}", args_schema=schema, coroutine=run,
+            description=(f"Looks up course resource type {i} for the student's current courses.\n"
+                         "Returns matching items with their source, due date and a short summary. "
+                         "Use it when the student asks about assignments, readings or past exams.")))
+    return list(builtin_tools) + synthetic
+
+
+def plugin_specs(tools: List[BaseTool]) -> List[Dict]:
+    """The same tools declared as lazy plugins (the target module is never imported here)."""
+    return [{"name": f"plugin_{t.name}", "description": t.description, "target": f"atlas_bench_plugins.{t.name}:run",
+             "parameters": convert_to_openai_tool(t)["function"]["parameters"]} for t in tools]
+
+
+def conversation() -> List:
+    return [HumanMessage(content="What is working memory?"),
+            AIMessage(content="Working memory holds a few items for active processing."),
+            HumanMessage(content="How is it different from short-term memory?"),
+            AIMessage(content="Short-term memory stores; working memory also manipulates."),
+            HumanMessage(content="Which chapter of my psychology textbook covers this?")]
+
+
+def old_turn(tools: List[BaseTool], llm: FakeChatModel, messages: List) -> Callable:
+    async def turn() -> str:
+        tools_as_dicts = [convert_to_openai_tool(t) for t in tools]
+        prompt = SENIOR_AGENT_PROMPT.format(messages=messages, query=messages[-1].content, tools=tools_as_dicts)
+        await llm.ainvoke(prompt, tools=tools_as_dicts)
+        return prompt
+    return turn
+
+
+def new_turn(registry: ToolRegistry, llm: FakeChatModel, messages: List) -> Callable:
+    bound = registry.bind(llm)
+
+    async def turn() -> str:
+        prompt = SENIOR_AGENT_PROMPT.format(messages=messages, query=messages[-1].content, tools=registry.prompt)
+        await bound.ainvoke(prompt)
+        return prompt
+    return turn
+
+
+async def measure(turn: Callable, turns: int) -> Dict[str, float]:
+    for _ in range(min(turns, 20)):                # warm-up
+        await turn()
+    latencies = []
+    for _ in range(turns):
+        started = time.process_time()
+        await turn()
+        latencies.append((time.process_time() - started) * 1000)
+    return summarize_latencies(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    tools = make_tools(args.tools)
+    messages = conversation()
+    llm = FakeChatModel()
+
+    started = time.perf_counter()
+    registry = ToolRegistry(tools)
+    eager_ms = (time.perf_counter() - started) * 1000
+    modules = len(sys.modules)
+    started = time.perf_counter()
+    lazy = ToolRegistry(plugins=plugin_specs(tools))
+    lazy_ms = (time.perf_counter() - started) * 1000
+    imported = len(sys.modules) - modules
+    assert len(lazy) == len(registry) and not any(m.startswith("atlas_bench_plugins") for m in sys.modules)
+
+    print(f"{len(tools)} registered tools, {args.turns} turns\n")
+    print(f"{'turn':<6}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'prompt chars':>14}{'~tokens':>9}")
+    results = {}
+    for name, turn in (("old", old_turn(tools, llm, messages)), ("new", new_turn(registry, llm, messages))):
+        stats = asyncio.run(measure(turn, args.turns))
+        prompt = asyncio.run(turn())
+        tokens = count_tokens(prompt, "approx")
+        results[name] = stats["mean_ms"]
+        print(f"{name:<6}{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}{stats['mean_ms']:>9.3f}"
+              f"{len(prompt):>14,}{tokens:>9,}")
+    print(f"\nper-turn CPU: {results['old'] / results['new']:.1f}x less with the registry")
+    print(f"startup: registry of {len(registry)} imported tools {eager_ms:.1f} ms; "
+          f"{len(lazy)} lazy plugins {lazy_ms:.1f} ms, {imported} modules imported")
+
+
+if __name__ == "__main__":
+    main()
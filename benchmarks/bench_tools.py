@@ -0,0 +1,105 @@
+"""
+Latency of one SeniorAgent tool round: LangGraph's `ToolNode` against the
+`ToolExecutor` that replaced it, on a stand-in for `rag_search` (an embedding
+call plus an index search, `--tool-latency-ms`). Each round carries
+`--calls` tool calls whose queries repeat with a Zipf distribution over
+`--topics` topics, like students asking about the same course material.
+
+  steady  - every call takes the normal latency
+  stalls  - `--stall-rate` of the calls hang for `--stall-ms` (a slow
+            provider); the executor cuts them off at `--timeout-ms`
+
+Run from the repository root:
+    python -m benchmarks.bench_tools --rounds 300 --calls 3 --tool-latency-ms 120
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from benchmarks.common import configure_offline_env, summarize_latencies
+
+configure_offline_env()
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langgraph.graph import END, StateGraph  # noqa: E402
+from langgraph.prebuilt import ToolNode  # noqa: E402
+
+from app.graph.state import AcademicState  # noqa: E402
+from app.tools.executor import ToolExecutor  # noqa: E402
+
+
+def make_tool(latency_ms: float, stall_rate: float, stall_ms: float, seed: int = 11):
+    rng = random.Random(seed)
+
+    @tool
+    async def rag_search(query: str) -> str:
+        """Searches the course material."""
+        stalled = rng.random() < stall_rate
+        await asyncio.sleep((stall_ms if stalled else latency_ms) / 1000)
+        return f"[1] (notes.md) Material about {query}."
+
+    return rag_search
+
+
+def make_rounds(rounds: int, calls: int, topics: int, seed: int = 5) -> List[AIMessage]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(topics)]
+    messages = []
+    for r in range(rounds):
+        picks = rng.choices(range(topics), weights=weights, k=calls)
+        messages.append(AIMessage(content="", tool_calls=[
+            {"name": "rag_search", "args": {"query": f"Topic {t} explained" + (" " if r % 2 else "")},
+             "id": f"call_{r}_{i}"} for i, t in enumerate(picks)]))
+    return messages
+
+
+async def run(node, messages: List[AIMessage]) -> Dict[str, float]:
+    """Round latency of `node` as the only node of a graph (both executors pay the same graph overhead)."""
+    workflow = StateGraph(AcademicState)
+    workflow.add_node("tools", node)
+    workflow.set_entry_point("tools")
+    workflow.add_edge("tools", END)
+    graph = workflow.compile()
+    latencies = []
+    for message in messages:
+        started = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content="question"), message], "results": {}})
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize_latencies(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--tool-latency-ms", type=float, default=120)
+    parser.add_argument("--stall-rate", type=float, default=0.03)
+    parser.add_argument("--stall-ms", type=float, default=5000)
+    parser.add_argument("--timeout-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    messages = make_rounds(args.rounds, args.calls, args.topics)
+    print(f"{args.rounds} rounds x {args.calls} calls over {args.topics} topics, tool latency "
+          f"{args.tool_latency_ms:.0f} ms\n")
+    print(f"{'scenario':<10}{'executor':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'hit rate':>10}")
+    for scenario, stall_rate in (("steady", 0.0), ("stalls", args.stall_rate)):
+        rows = []
+        tool_ = make_tool(args.tool_latency_ms, stall_rate, args.stall_ms)
+        rows.append(("ToolNode", asyncio.run(run(ToolNode([tool_]), messages)), None))
+        for name, cache_tools in (("ToolExecutor, no cache", []), ("ToolExecutor, cached", ["rag_search"])):
+            tool_ = make_tool(args.tool_latency_ms, stall_rate, args.stall_ms)
+            executor = ToolExecutor([tool_], {"timeout_seconds": args.timeout_ms / 1000,
+                                              "cache": {"tools": cache_tools}})
+            rows.append((name, asyncio.run(run(executor, messages)), executor.cache.hit_rate))
+        for name, stats, hit_rate in rows:
+            rate = "-" if hit_rate is None else f"{hit_rate:.1%}"
+            print(f"{scenario:<10}{name:<24}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                  f"{stats['mean_ms']:>9.1f}{rate:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import statistics
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from app.utils.config_loader import load_config
+
+
+def configure_offline_env() -> None:
+    """
+    Fills in placeholder secrets so `app.utils.env_loader.settings` can be built
+    without real API keys. Benchmarks only ever talk to the fake provider.
+    Must run before anything under `app.services` is imported.
+    """
+    for key in ("OPENAI_API_KEY", "GROQ_API_KEY", "GOOGLE_API_KEY"):
+        os.environ.setdefault(key, "offline-benchmark")
+    os.environ.setdefault("LANGSMITH_TRACING_V2", "false")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    """Reduces a latency sample to the figures every benchmark reports."""
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": statistics.fmean(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+def _proc_rss(pid) -> Optional[int]:
+    """VmRSS from /proc/<pid>/status; None if the process is gone or /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as fp:
+            for line in fp:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """Current resident set size of a process (Linux /proc), or this process's peak RSS elsewhere."""
+    current = _proc_rss(pid or "self")
+    if current is not None:
+        return current
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _children(pid: int) -> List[int]:
+    """Direct child pids of a process, from /proc/<pid>/task/*/children (Linux only)."""
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as fp:
+                children += [int(child) for child in fp.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+def tree_rss_bytes(pid: int) -> Optional[int]:
+    """
+    Summed resident set size of a process and all its descendants, e.g. a
+    uvicorn supervisor and its workers. None where /proc is unavailable, since
+    the peak-RSS fallback of `rss_bytes` only describes this process.
+    """
+    total = _proc_rss(pid)
+    if total is None:
+        return None
+    pending = _children(pid)
+    while pending:
+        child = pending.pop()
+        total += _proc_rss(child) or 0     # a worker may exit between listing and reading
+        pending += _children(child)
+    return total
+
+
+def write_offline_config(latency_ms: float, path: str, overrides: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Writes a copy of config.yml that routes every agent to the fake provider.
+    Point ATLAS_CONFIG_PATH at the returned path before importing the app.
+    `overrides` maps dotted keys (e.g. "logging.level") to values.
+    """
+    config = load_config("config.yml")
+    config["llm"]["default_provider"] = "fake"
+    config["embedding_model"]["default_provider"] = "fake"
+    config["llm"]["providers"]["fake"]["latency_ms"] = latency_ms
+    config.setdefault("agents", {}).setdefault("senior", {})["provider"] = "fake"
+    config.setdefault("app", {})["export_graph_image"] = False
+    config.setdefault("logging", {})["level"] = "WARNING"
+    for dotted, value in (overrides or {}).items():
+        section = config
+        *parents, leaf = dotted.split(".")
+        for key in parents:
+            section = section.setdefault(key, {})
+        section[leaf] = value
+    with open(path, "w") as fp:
+        yaml.safe_dump(config, fp)
+    return path
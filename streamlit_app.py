@@ -3,13 +3,20 @@
 import streamlit as st
 import asyncio
 import json
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from langchain_core.messages import HumanMessage
 
 # Import the core components from your app
 from app.graph.graph import create_graph
+from app.core.records import Event, EventList, Task, TaskList
 from app.graph.state import AcademicState
+from app.services.calendar_import import import_calendar, import_settings
+from app.services.data_manager import DataManager
+from app.services.data_store import build_academic_state, create_data_manager
+from app.utils.config_loader import load_config
+from app.utils.logger import request_context
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -24,35 +31,41 @@ def parse_text_to_list(text: str) -> list:
     return [line.strip() for line in text.split('\n') if line.strip()]
 
 def format_events(lines: list) -> list:
-    """Converts lines of text into the calendar event JSON structure."""
-    events = []
-    now = datetime.now(timezone.utc)
-    for line in lines:
-        events.append({
-            "summary": line,
-            "start": {"dateTime": now.isoformat()},
-            "end": {"dateTime": now.isoformat()}
-        })
-    return events
+    """Converts lines of text into calendar Event records."""
+    now = datetime.now(timezone.utc).timestamp()
+    return EventList.from_records(Event(summary=line, start_ts=now, end_ts=now) for line in lines)
+
+def import_uploaded_calendar(upload, data_manager, student_id: str):
+    """Streams an uploaded .ics/.csv export into `data_manager` and reports the result in the sidebar."""
+    upload.seek(0)
+    stats = import_calendar(data_manager, upload, student_id=student_id,
+                            settings=import_settings(load_config()), name=upload.name)
+    st.sidebar.caption(f"Imported {stats.records:,} event(s) from {upload.name}"
+                       + (f" ({stats.skipped:,} skipped)" if stats.skipped else ""))
+    return stats
 
 def format_tasks(lines: list) -> list:
-    """Converts lines of text into the tasks JSON structure."""
-    tasks = []
-    for line in lines:
-        tasks.append({
-            "title": line,
-            "due": "2025-09-01T23:59:59Z", # Using a fixed future date for simplicity
-            "status": "needsAction"
-        })
-    return tasks
+    """Converts lines of text into Task records."""
+    # Using a fixed future date for simplicity
+    due = datetime(2025, 9, 1, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+    return TaskList.from_records(Task(title=line, due_ts=due, status="needsAction") for line in lines)
 
 
 # --- Main Application ---
 st.title("🎓 ATLAS: Your Personal Academic Assistant")
 st.markdown("Use the sidebar to enter your academic profile, then describe your challenge below.")
 
+@st.cache_resource
+def load_data_manager():
+    """One data store per Streamlit server process, shared across sessions."""
+    return create_data_manager()
+
+
 # --- Sidebar for User Input ---
 st.sidebar.header("Your Academic Profile")
+data_source = st.sidebar.radio("Data source", ["Enter manually", "Load from data store"], index=0)
+store_student_id = st.sidebar.text_input("Student ID", "student_123") \
+    if data_source == "Load from data store" else None
 student_name = st.sidebar.text_input("Name", "Sarah")
 major = st.sidebar.text_input("Major", "Psychology")
 learning_style = st.sidebar.selectbox(
@@ -70,6 +83,9 @@ events_input = st.sidebar.text_area(
     "Neuroscience Club Meeting\nStudy Group for Stats",
     height=100
 )
+calendar_upload = st.sidebar.file_uploader(
+    "...or import a calendar export (.ics / .csv)", type=["ics", "ical", "csv"]
+)
 tasks_input = st.sidebar.text_area(
     "Active Tasks/Assignments (one per line)",
     "Chapter 3 Summary\nStatistics Problem Set",
@@ -92,17 +108,18 @@ async def run_graph(user_request: str, initial_state: dict):
     full_log = ""
     final_outputs = {}
 
-    async for event in graph.astream(initial_state):
-        node_name = list(event.keys())[0]
-        node_output = event[node_name]
-        
-        # Update the progress log
-        full_log += f"**✅ Agent Executed: `{node_name}`**\n\n"
-        progress_placeholder.markdown(full_log)
+    with request_context(request_id=uuid.uuid4().hex):
+        async for event in graph.astream(initial_state):
+            node_name = list(event.keys())[0]
+            node_output = event[node_name]
 
-        # Store the output from each agent node
-        if "results" in node_output:
-            final_outputs.update(node_output["results"])
+            # Update the progress log
+            full_log += f"**✅ Agent Executed: `{node_name}`**\n\n"
+            progress_placeholder.markdown(full_log)
+
+            # Store the output from each agent node
+            if "results" in node_output:
+                final_outputs.update(node_output["results"])
 
     # Display the final, combined outputs
     final_output_placeholder.markdown("--- \n### 💡 Your Generated Plan & Insights")
@@ -128,7 +145,19 @@ user_input = st.text_area(
 )
 
 if st.button("Generate Plan", type="primary", use_container_width=True):
-    if user_input and student_name and major and courses_input:
+    if user_input and store_student_id:
+        with st.spinner("🤖 The agent team is assembling and working on your request..."):
+            upload_key = calendar_upload and (calendar_upload.name, calendar_upload.size, store_student_id)
+            if upload_key and st.session_state.get("imported_calendar") != upload_key:
+                # Once per upload: the SQLite store appends rather than upserts.
+                import_uploaded_calendar(calendar_upload, load_data_manager(), store_student_id)
+                st.session_state["imported_calendar"] = upload_key
+            initial_state = build_academic_state(load_data_manager(), user_input, store_student_id)
+            if not initial_state["profile"]:
+                st.warning(f"No profile found for '{store_student_id}' in the data store.")
+            else:
+                asyncio.run(run_graph(user_input, initial_state))
+    elif user_input and student_name and major and courses_input:
         with st.spinner("🤖 The agent team is assembling and working on your request..."):
             # 1. Build the profile, calendar, and task data from sidebar inputs
             profile_data = {
@@ -138,7 +167,13 @@ if st.button("Generate Plan", type="primary", use_container_width=True):
                 "academic_info": {"current_courses": [{"name": c} for c in parse_text_to_list(courses_input)]}
             }
             
-            calendar_data = {"events": format_events(parse_text_to_list(events_input))}
+            if calendar_upload is not None:
+                # Real times from the export, expanded for the coming week.
+                uploaded = DataManager()
+                import_uploaded_calendar(calendar_upload, uploaded, profile_data["id"])
+                calendar_data = {"events": EventList.from_records(uploaded.get_upcoming_events())}
+            else:
+                calendar_data = {"events": format_events(parse_text_to_list(events_input))}
             tasks_data = {"tasks": format_tasks(parse_text_to_list(tasks_input))}
 
             # 2. Assemble the initial state for the graph
@@ -172,7 +207,8 @@ if st.button("Generate Plan", type="primary", use_container_width=True):
 
 # # Import the core components from your app
 # from app.graph.graph import create_graph
-# from app.graph.state import AcademicState
+# from app.core.records import Event, EventList, Task, TaskList
+from app.graph.state import AcademicState
 # from app.services.data_manager import DataManager
 
 # # --- Page Configuration ---